@@ -4,3 +4,24 @@ from django.apps import AppConfig
 class AppraisalFormInjestionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'appraisal_form_injestion'
+
+    def warm_up(self):
+        """Called from the web server entry points by common.registry.warm_up_apps()."""
+        from django.urls import get_resolver
+        from common.registry import get_instance, ping_storage_in_background, warm_up
+        from appraisal_form_injestion.clients.data_injestion_mongo_client import DataInjestionMongoClient
+        from appraisal_form_injestion.journal_catalog import get_journal_catalog
+        from appraisal_form_injestion.services.attachment_service import AttachmentService
+        from appraisal_form_injestion.services.data_injestion_service import DataInjestionService
+        from appraisal_form_injestion.services.form_history_service import FormHistoryService
+        from appraisal_form_injestion.services.publication_index_service import PublicationIndexService
+
+        get_journal_catalog()
+        warm_up([DataInjestionService, FormHistoryService, PublicationIndexService, AttachmentService])
+        # Import the URLconf, and with it the views and DRF, and compile its patterns,
+        # which the first request would otherwise pay for
+        get_resolver().reverse_dict
+        ping_storage_in_background([
+            lambda: get_instance(DataInjestionMongoClient).check_unique_form_index(),
+            lambda: get_instance(DataInjestionService).check_transactions(),
+        ])
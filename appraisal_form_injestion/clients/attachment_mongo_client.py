@@ -0,0 +1,133 @@
+import hashlib
+import logging
+from typing import List,Dict
+from bson import ObjectId
+from bson.errors import InvalidId
+from common.clients.abstract_mongo_client import AbstractMongoDBClient
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+class AttachmentTooLarge(Exception):
+    pass
+
+class AttachmentHashMismatch(Exception):
+    pass
+
+class AttachmentMongoClient(AbstractMongoDBClient):
+    """
+    Evidence attachments stored in GridFS on the shared MongoClient. Files are
+    deduplicated by the sha256 of their content, kept in metadata.sha256.
+    """
+    def __init__(self):
+        super().__init__(settings.APPRAISAL_SYSTEM_MONGO_DB_NAME)
+        self._bucket = None
+        self.files_collection = f"{settings.ATTACHMENT_BUCKET_NAME}.files"
+
+    @property
+    def bucket(self):
+        """
+        GridFS bucket, created on first use since only the mongo storage backend
+        has GridFS. gridfs is imported here too, so workers that never touch an
+        attachment do not load it.
+        """
+        if self._bucket is None:
+            from gridfs import GridFSBucket
+            if self.storage.name != "mongo":
+                raise Exception(f"Attachments require the mongo storage backend, not {self.storage.name}")
+            self._bucket = GridFSBucket(self.db, bucket_name=settings.ATTACHMENT_BUCKET_NAME, chunk_size_bytes=settings.ATTACHMENT_CHUNK_SIZE)
+        return self._bucket
+
+    def ensure_indexes(self):
+        try:
+            # One file per content, so two uploads of the same file racing each other
+            # cannot both be kept; attachments only ever live on the mongo backend
+            unique = self.storage.name == "mongo"
+            if unique and "metadata_sha256" in self.db[self.files_collection].index_information():
+                # Replaces the earlier non-unique index on the same key
+                self.db[self.files_collection].drop_index("metadata_sha256")
+            self.create_index(self.files_collection, [("metadata.sha256", 1)], name="metadata_sha256_unique", unique=unique)
+            self.create_index(self.files_collection, [("metadata.user_id", 1), ("metadata.section", 1)], name="metadata_user_id_section")
+        except Exception as e:
+            logger.error(f"Error creating attachment indexes: {e}")
+            raise e
+
+    def find_by_sha256(self, sha256:str):
+        try:
+            return self.find_one(self.files_collection, {"metadata.sha256": sha256})
+        except Exception as e:
+            logger.error(f"Error finding attachment by hash: {e}")
+            raise e
+
+    def add_owner(self, file_id, user_id:str):
+        try:
+            self.update_one(self.files_collection, {"_id": file_id}, {"$addToSet": {"metadata.owners": user_id}})
+        except Exception as e:
+            logger.error(f"Error adding attachment owner: {e}")
+            raise e
+
+    def upload_from_stream(self, stream, filename:str, metadata:Dict, max_size:int):
+        """
+        Copy a file-like stream into GridFS one chunk at a time, hashing as it
+        goes, so no more than one chunk is ever held in memory.
+
+        Returns:
+            Tuple[ObjectId, str, int, bool]: File id, sha256 hex digest, size in bytes,
+                                             and whether the content was already stored,
+                                             in which case the copy is dropped and the
+                                             id is the stored file's
+        """
+        from gridfs.errors import FileExists
+        grid_in = self.bucket.open_upload_stream(filename, metadata=metadata)
+        sha256 = hashlib.sha256()
+        size = 0
+        try:
+            while True:
+                chunk = stream.read(settings.ATTACHMENT_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise AttachmentTooLarge(f"Attachment exceeds {max_size} bytes")
+                sha256.update(chunk)
+                grid_in.write(chunk)
+            # The files document is only written on close, so the hash of the
+            # complete content can still go into its metadata
+            digest = sha256.hexdigest()
+            grid_in.metadata = {**metadata, "sha256": digest}
+            try:
+                grid_in.close()
+            except FileExists:
+                # GridIn reports the unique sha256 index refusing the files document as
+                # FileExists; drop the chunks already written and point at the stored file
+                grid_in.abort()
+                existing = self.find_by_sha256(digest)
+                if existing is None:
+                    raise Exception(f"Attachment {digest} was refused as a duplicate but is not stored")
+                return existing["_id"], digest, size, True
+        except Exception as e:
+            grid_in.abort()
+            logger.error(f"Error uploading attachment: {e}")
+            raise e
+
+        return grid_in._id, digest, size, False
+
+    def open_download_stream(self, file_id:str):
+        from gridfs.errors import NoFile
+        try:
+            return self.bucket.open_download_stream(ObjectId(file_id))
+        except (NoFile, InvalidId):
+            return None
+        except Exception as e:
+            logger.error(f"Error opening attachment: {e}")
+            raise e
+
+    def delete_attachment(self, file_id):
+        from gridfs.errors import NoFile
+        try:
+            self.bucket.delete(ObjectId(file_id))
+        except (NoFile, InvalidId):
+            pass
+        except Exception as e:
+            logger.error(f"Error deleting attachment: {e}")
+            raise e
@@ -1,37 +1,618 @@
 import logging
-from typing import List,Dict
+from datetime import datetime, timezone
+from typing import List,Dict,Tuple
+from pymongo import ReplaceOne, errors
 from common.clients.abstract_mongo_client import AbstractMongoDBClient
+from appraisal_form_injestion.constants import (ALL_SECTIONS_MASK, FILTER_INDEXES, FILTER_WILDCARD_PROJECTION,
+SEMESTERS_PATH, SEMESTER_KEY_PREFIX, section_bit, semester_of, set_path, version_key, compute_completeness_mask)
+from appraisal_form_injestion.utils import sum_item12_1_hours
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+class VersionConflict(Exception):
+    """A conditional section write found a different version than the one expected."""
+    def __init__(self, current_versions:Dict):
+        super().__init__(f"Section version conflict, current versions: {current_versions}")
+        self.current_versions = current_versions
+
+class MissingUniqueIndex(Exception):
+    """The form collection lacks the unique (cycle, user_id) index that version conflicts are detected by."""
+
+def resolve_cycle(cycle:str = None) -> str:
+    """The given appraisal cycle id, or the active cycle when none is given."""
+    return cycle or settings.APPRAISAL_ACTIVE_CYCLE
+
 class DataInjestionMongoClient(AbstractMongoDBClient):
+    """
+    Form documents, one per (cycle, user_id). Every method takes an optional
+    cycle id and defaults to the active appraisal cycle. Closed cycles can be
+    moved to the archive collection, which reads fall back to.
+    """
     def __init__(self):
         super().__init__(settings.APPRAISAL_SYSTEM_MONGO_DB_NAME)
+        self._unique_form_index = False
+
+    def ensure_indexes(self):
+        try:
+            self.create_index(settings.DATA_INJECTION_COLLECTION_NAME, [("cycle", 1), ("user_id", 1)], name="cycle_user_id", unique=True)
+            # Both completeness indexes end with every field the incomplete-faculty
+            # query projects, so that query is covered and never loads a form document.
+            self.create_index(
+                settings.DATA_INJECTION_COLLECTION_NAME,
+                [("cycle", 1), ("department", 1), ("completeness_mask", 1), ("section_count", 1), ("user_id", 1)],
+                name="cycle_department_completeness",
+            )
+            self.create_index(
+                settings.DATA_INJECTION_COLLECTION_NAME,
+                [("cycle", 1), ("completeness_mask", 1), ("section_count", 1), ("user_id", 1), ("department", 1)],
+                name="cycle_completeness",
+            )
+            for keys in FILTER_INDEXES:
+                self.create_index(settings.DATA_INJECTION_COLLECTION_NAME, [("cycle", 1), *keys])
+            self.create_index(
+                settings.DATA_INJECTION_COLLECTION_NAME,
+                [("cycle", 1), (f"{SEMESTERS_PATH}.semester", 1), ("user_id", 1)],
+                name="cycle_semester_user_id",
+            )
+            self.create_index(
+                settings.DATA_INJECTION_COLLECTION_NAME,
+                [("$**", 1)],
+                name="section_filter_wildcard",
+                wildcardProjection=FILTER_WILDCARD_PROJECTION,
+            )
+        except Exception as e:
+            logger.error(f"Error creating data injestion indexes: {e}")
+            raise e
 
-    def get_data_injestion_collection(self, user_id:str, projection:Dict = None):
+    def has_unique_form_index(self) -> bool:
+        """
+        Whether the form collection has the unique (cycle, user_id) index. Bulk
+        section writes and conditional creates rely on it to turn a version
+        mismatch into a duplicate key error; without it they would create a
+        second form document instead. Once found it is not looked up again.
+        """
+        if self._unique_form_index:
+            return True
+        try:
+            indexes = self.db[settings.DATA_INJECTION_COLLECTION_NAME].index_information()
+        except Exception as e:
+            logger.error(f"Error reading data injestion indexes: {e}")
+            raise e
+        self._unique_form_index = any(
+            [field for field, _ in index["key"]] == ["cycle", "user_id"] and index.get("unique") for index in indexes.values()
+        )
+        return self._unique_form_index
+
+    def check_unique_form_index(self) -> bool:
+        """has_unique_form_index(), logging an error when the index is missing. Run at startup."""
+        if self.has_unique_form_index():
+            return True
+        logger.error(
+            f"{settings.DATA_INJECTION_COLLECTION_NAME} has no unique (cycle, user_id) index; bulk section writes "
+            f"are refused until ensure_mongo_indexes is run"
+        )
+        return False
+
+    def require_unique_form_index(self):
+        if not self.has_unique_form_index():
+            raise MissingUniqueIndex(
+                f"{settings.DATA_INJECTION_COLLECTION_NAME} has no unique (cycle, user_id) index, run ensure_mongo_indexes"
+            )
+
+    def ensure_archive_indexes(self):
+        try:
+            self.create_index(settings.APPRAISAL_ARCHIVE_COLLECTION_NAME, [("cycle", 1), ("user_id", 1)], name="cycle_user_id", unique=True)
+            self.create_index(settings.APPRAISAL_ARCHIVE_HISTORY_COLLECTION_NAME, [("cycle", 1), ("user_id", 1), ("superseded_at", 1)], name="cycle_user_id_superseded_at")
+        except Exception as e:
+            logger.error(f"Error creating appraisal archive indexes: {e}")
+            raise e
+
+    def get_data_injestion_collection(self, user_id:str, projection:Dict = None, cycle:str = None):
         try:
             projection["_id"] = 0
-            result = self.find_one(settings.DATA_INJECTION_COLLECTION_NAME, {"user_id": user_id}, projection)
+            result = self._find_form(user_id, projection, cycle)
             return result
         except Exception as e:
             logger.error(f"Error getting data injestion collection: {e}")
             raise e
 
-    def update_data_injestion_collection(self, user_id:str, data):
+    def update_data_injestion_collection(self, user_id:str, data, cycle:str = None, expected_versions:Dict = None):
+        """
+        Write section data for a user, creating the user's form document for the
+        cycle on first write.
+
+        Args:
+            expected_versions (Dict): Optional section key -> version the caller last
+                read (0 for never written). The write is only applied if every listed
+                section is still at that version, checked in the update filter itself.
+
+        Returns:
+            Dict: New version of every section key written, e.g. {"14": 7}.
+
+        Raises:
+            VersionConflict: If a section is not at its expected version
+            MissingUniqueIndex: If the write expects nothing to exist yet and the
+                                unique (cycle, user_id) index it relies on is missing
+        """
         try:
-            filter_dict = {"user_id": user_id}
-            update = {"$set": data}
-            self.update_one(settings.DATA_INJECTION_COLLECTION_NAME, filter_dict, update)
+            expected_versions = expected_versions or {}
+            filter_dict, update, upsert = self.build_section_write(user_id, data, cycle, expected_versions)
+            if upsert and expected_versions:
+                # A conditional create only conflicts through the unique index; without it
+                # the upsert would add a second form document for the user
+                self.require_unique_form_index()
+            sections = [key for key in data if section_bit(key) is not None]
+            projection = {"_id": 0, **{f"section_versions.{version_key(key)}": 1 for key in sections}}
+            write = self.find_one_and_upsert if upsert else self.find_one_and_update
+            try:
+                result = write(settings.DATA_INJECTION_COLLECTION_NAME, filter_dict, update, projection)
+            except errors.DuplicateKeyError:
+                if expected_versions:
+                    # The document exists but the version filter did not match, so the
+                    # upsert collided with the unique (cycle, user_id) index
+                    result = None
+                else:
+                    # Lost a race to create the document; it exists now, so this matches
+                    result = write(settings.DATA_INJECTION_COLLECTION_NAME, filter_dict, update, projection)
+            if result is None:
+                raise VersionConflict(self.get_section_versions(user_id, list(expected_versions), cycle))
+            versions = result.get("section_versions", {})
+            return {key: versions.get(version_key(key)) for key in sections}
+        except (VersionConflict, MissingUniqueIndex):
+            raise
         except Exception as e:
             logger.error(f"Error updating data injestion collection: {e}")
             raise e
 
-    def get_data_injestion_collection_by_user_id_and_section(self, user_id:str, section:str):
+    def build_section_write(self, user_id:str, data:Dict, cycle:str = None, expected_versions:Dict = None):
+        """
+        Filter, pipeline update and upsert flag that write section data for a user,
+        shared by single saves and bulk ingestion.
+        """
+        filter_dict = {"cycle": resolve_cycle(cycle), "user_id": user_id}
+        expected_versions = expected_versions or {}
+        for key, version in expected_versions.items():
+            field = f"section_versions.{version_key(key)}"
+            filter_dict[field] = version if version else {"$in": [None, 0]}
+        # Only a write that expects nothing to exist yet may create the document;
+        # with a version > 0 a missing match is always a conflict.
+        upsert = not any(expected_versions.values())
+        sections = [key for key in data if section_bit(key) is not None]
+        # Pipeline update so the completeness bitmask, section count and section
+        # versions are derived from the stored document in the same atomic write.
+        update = [{"$set": {
+            **self._section_fields(data),
+            **self._completeness_fields(data),
+            **self._version_fields(sections),
+        }}]
+        return filter_dict, update, upsert
+
+    def write_sections_batch(self, writes:List[Tuple[str, Dict, Dict]], cycle:str = None):
+        """
+        Apply many section writes in unordered bulk writes.
+
+        Every write must carry the versions it expects for each section it
+        writes, so the new versions are known without reading them back. A
+        write whose versions no longer match collides with the unique
+        (cycle, user_id) index instead of silently matching nothing, which
+        makes every failure visible per write.
+
+        Args:
+            writes (List[Tuple[str, Dict, Dict]]): (user_id, data, expected_versions)
+
+        Returns:
+            Dict[int, Dict]: Error of each failed write by its index in writes
+
+        Raises:
+            MissingUniqueIndex: If the unique (cycle, user_id) index is missing;
+                                nothing is written
+        """
+        self.require_unique_form_index()
         try:
-            projection = {"_id": 0, "user_id":1, f"{section}":1}
-            result = self.find_one(settings.DATA_INJECTION_COLLECTION_NAME, {"user_id": user_id}, projection)
+            with self.bulk_writer(settings.DATA_INJECTION_COLLECTION_NAME) as writer:
+                for user_id, data, expected_versions in writes:
+                    filter_dict, update, _ = self.build_section_write(user_id, data, cycle, expected_versions)
+                    # A version mismatch must surface as a duplicate key error, so always upsert
+                    writer.update_one(filter_dict, update, upsert=True)
+            return {error["index"]: error for error in writer.errors if error["index"] is not None}
+        except Exception as e:
+            logger.error(f"Error writing section batch: {e}")
+            raise e
+
+    @staticmethod
+    def build_form_document(user_id:str, data:Dict, cycle:str = None):
+        """
+        The form document a first write of data creates, built client-side so
+        seed and scale-test data can be bulk inserted instead of upserted.
+        """
+        document = {"cycle": resolve_cycle(cycle), "user_id": user_id, "section_versions": {}}
+        semesters = []
+        for key, value in data.items():
+            semester = semester_of(key)
+            if semester is None:
+                # Dotted section keys are nested documents once Mongo stores them
+                set_path(document, key, value)
+            else:
+                semesters.append({**value, "semester": semester})
+            if section_bit(key) is not None:
+                document["section_versions"][version_key(key)] = 1
+        if semesters:
+            set_path(document, SEMESTERS_PATH, semesters)
+        document["completeness_mask"] = compute_completeness_mask(document)
+        document["section_count"] = bin(document["completeness_mask"]).count("1")
+        return document
+
+    def insert_form_documents(self, documents:List[Dict]):
+        """
+        Insert complete form documents, unordered so one duplicate does not stop the batch.
+
+        Returns:
+            Tuple[int, int]: Documents inserted and documents skipped because their (cycle, user_id) was already stored
+        """
+        try:
+            return self.insert_many_skipping_duplicates(settings.DATA_INJECTION_COLLECTION_NAME, documents)
+        except Exception as e:
+            logger.error(f"Error inserting form documents: {e}")
+            raise e
+
+    def get_section_versions_for_users(self, user_sections:Dict[str, List[str]], cycle:str = None):
+        """Current version of the given section keys for many users in one query, 0 if never written."""
+        try:
+            sections = {key for keys in user_sections.values() for key in keys}
+            projection = {"_id": 0, "user_id": 1, **{f"section_versions.{version_key(key)}": 1 for key in sections}}
+            query = {"cycle": resolve_cycle(cycle), "user_id": {"$in": list(user_sections)}}
+            found = {document["user_id"]: document.get("section_versions", {})
+                     for document in self.find_all(settings.DATA_INJECTION_COLLECTION_NAME, query, projection=projection)}
+            return {
+                user_id: {key: found.get(user_id, {}).get(version_key(key), 0) for key in keys}
+                for user_id, keys in user_sections.items()
+            }
+        except Exception as e:
+            logger.error(f"Error getting section versions for users: {e}")
+            raise e
+
+    def get_section_versions(self, user_id:str, sections:List[str], cycle:str = None):
+        """Current version of each section key, 0 for sections never written."""
+        try:
+            projection = {"_id": 0, **{f"section_versions.{version_key(key)}": 1 for key in sections}}
+            result = self.find_one(settings.DATA_INJECTION_COLLECTION_NAME, {"cycle": resolve_cycle(cycle), "user_id": user_id}, projection) or {}
+            versions = result.get("section_versions", {})
+            return {key: versions.get(version_key(key), 0) for key in sections}
+        except Exception as e:
+            logger.error(f"Error getting section versions: {e}")
+            raise e
+
+    def get_data_injestion_collection_by_user_id_and_section(self, user_id:str, section:str, cycle:str = None):
+        try:
+            projection = {"_id": 0, "user_id":1, f"{section}":1, f"section_versions.{version_key(section)}": 1}
+            if section == "12.1":
+                # Item 12.1 is versioned per semester, under the 12_1_<semester> keys
+                del projection["section_versions.12_1"]
+                projection["section_versions"] = 1
+            result = self._find_form(user_id, projection, cycle)
+            if result and section == "12.1":
+                prefix = version_key(SEMESTER_KEY_PREFIX)
+                result["section_versions"] = {key: value for key, value in (result.get("section_versions") or {}).items() if key.startswith(prefix)}
             return result
         except Exception as e:
             logger.error(f"Error getting data injestion collection by user id and section: {e}")
             raise e
+
+    def get_incomplete_faculty(self, department:str = None, skip:int = 0, limit:int = 0, cycle:str = None):
+        try:
+            query = {"cycle": resolve_cycle(cycle), "completeness_mask": {"$lt": ALL_SECTIONS_MASK}}
+            if department:
+                query["department"] = department
+            # Only indexed fields are projected so the query is answered from the index alone
+            projection = {"_id": 0, "user_id": 1, "department": 1, "completeness_mask": 1, "section_count": 1}
+            sort = [("completeness_mask", 1), ("section_count", 1), ("user_id", 1)]
+            result = self.find_all(settings.DATA_INJECTION_COLLECTION_NAME, query, skip, limit, projection, sort)
+            return list(result)
+        except Exception as e:
+            logger.error(f"Error getting incomplete faculty: {e}")
+            raise e
+
+    def get_user_ids(self, department:str = None, cycle:str = None):
+        try:
+            # The range on completeness_mask keeps this on the covering completeness indexes
+            query = {"cycle": resolve_cycle(cycle), "completeness_mask": {"$gte": 0}}
+            if department:
+                query["department"] = department
+            projection = {"_id": 0, "user_id": 1}
+            result = self.find_all(settings.DATA_INJECTION_COLLECTION_NAME, query, projection=projection)
+            return [doc["user_id"] for doc in result]
+        except Exception as e:
+            logger.error(f"Error getting user ids: {e}")
+            raise e
+
+    def filter_faculty(self, query:Dict, skip:int = 0, limit:int = 0, explain:bool = False, cycle:str = None, lookups:List[Tuple[Dict, Dict]] = None):
+        """
+        Form documents matching query, a page at a time. lookups are
+        ($lookup stage, $match) pairs applied after query, in one aggregation
+        with the page taken after them, so joined conditions need no list of
+        matching users up front. The explain stats are those of query, which
+        decides the index the form collection is read by.
+        """
+        try:
+            query = {"cycle": resolve_cycle(cycle), **query}
+            # No sort: sorting on user_id would let the planner prefer the user_id index
+            # over the section filter indexes.
+            projection = {"_id": 0, "user_id": 1, "department": 1}
+            if lookups:
+                pipeline = [{"$match": query}]
+                for stage, match in lookups:
+                    pipeline += [stage, {"$match": match}]
+                pipeline += [{"$skip": skip}] if skip else []
+                pipeline += [{"$limit": limit}] if limit else []
+                pipeline.append({"$project": projection})
+                result = list(self.aggregate(settings.DATA_INJECTION_COLLECTION_NAME, pipeline))
+            else:
+                result = list(self.find_all(settings.DATA_INJECTION_COLLECTION_NAME, query, skip, limit, projection))
+            stats = None
+            if explain:
+                stats = self.explain(settings.DATA_INJECTION_COLLECTION_NAME, query, skip, limit, projection)
+            return result, stats
+        except Exception as e:
+            logger.error(f"Error filtering faculty: {e}")
+            raise e
+
+    def backfill_completeness(self, cycle:str = None):
+        """Set the completeness bitmask and section count on the cycle's form documents that lack them."""
+        try:
+            query = {"cycle": resolve_cycle(cycle), "completeness_mask": {"$exists": False}}
+            with self.bulk_writer(settings.DATA_INJECTION_COLLECTION_NAME) as writer:
+                for document in self.find_all(settings.DATA_INJECTION_COLLECTION_NAME, query):
+                    mask = compute_completeness_mask(document)
+                    update = {"$set": {"completeness_mask": mask, "section_count": bin(mask).count("1")}}
+                    department = (document.get("1-10") or {}).get("data", {}).get("department")
+                    if department and "department" not in document:
+                        update["$set"]["department"] = department
+                    # Matching the mask's absence again leaves a document written since untouched
+                    writer.update_one({"_id": document["_id"], "completeness_mask": {"$exists": False}}, update)
+            for error in writer.errors:
+                logger.error(f"Error backfilling completeness for operation {error['index']}: {error['message']}")
+            return writer.stats()["modified"]
+        except Exception as e:
+            logger.error(f"Error backfilling completeness: {e}")
+            raise e
+
+    def get_inline_section_rows(self, section:str, cycle:str = None):
+        """Form documents that still keep the rows of a list section inline."""
+        try:
+            query = {"cycle": resolve_cycle(cycle), f"{section}.data": {"$type": "array"}}
+            projection = {"_id": 0, "user_id": 1, section: 1, f"section_versions.{version_key(section)}": 1}
+            return self.find_all(settings.DATA_INJECTION_COLLECTION_NAME, query, projection=projection)
+        except Exception as e:
+            logger.error(f"Error getting inline section rows: {e}")
+            raise e
+
+    def set_section_aggregates(self, user_id:str, section:str, aggregates:Dict, version:int, cycle:str = None):
+        """
+        Replace an inline section with its aggregates, unless the section was
+        written again since it was read.
+
+        Returns:
+            bool: True if the section was replaced
+        """
+        try:
+            filter_dict = {"cycle": resolve_cycle(cycle), "user_id": user_id, f"section_versions.{version_key(section)}": version}
+            result = self.update_one(settings.DATA_INJECTION_COLLECTION_NAME, filter_dict, {"$set": {section: aggregates}})
+            return result.modified_count == 1
+        except Exception as e:
+            logger.error(f"Error setting section aggregates: {e}")
+            raise e
+
+    def adopt_legacy_documents(self, cycle:str):
+        """Assign a cycle to form documents written before cycles existed."""
+        try:
+            result = self.update_many(settings.DATA_INJECTION_COLLECTION_NAME, {"cycle": {"$exists": False}}, {"$set": {"cycle": cycle}})
+            return result.modified_count
+        except Exception as e:
+            logger.error(f"Error adopting legacy form documents: {e}")
+            raise e
+
+    def get_cycle_documents(self, cycle:str):
+        try:
+            return self.find_all(settings.DATA_INJECTION_COLLECTION_NAME, {"cycle": cycle}, sort=[("user_id", 1)])
+        except Exception as e:
+            logger.error(f"Error getting form documents for cycle {cycle}: {e}")
+            raise e
+
+    def archive_documents(self, documents:List[Dict]):
+        """
+        Upsert form documents into the archive collection, keyed by (cycle, user_id).
+
+        A cycle archived again (after --keep, or after late edits were adopted
+        back into it) keeps the copy it replaces: copies that differ are moved
+        to the archive history collection first, with their superseded_at time.
+        """
+        try:
+            now = datetime.now(timezone.utc)
+            keys = {(document["cycle"], document["user_id"]) for document in documents}
+            query = {"cycle": {"$in": list({cycle for cycle, _ in keys})}, "user_id": {"$in": list({user_id for _, user_id in keys})}}
+            current = {(document["cycle"], document["user_id"]): document for document in documents}
+            superseded = []
+            for previous in self.find_all(settings.APPRAISAL_ARCHIVE_COLLECTION_NAME, query):
+                key = (previous["cycle"], previous.get("user_id"))
+                if key in keys and self._archived_fields(previous) != self._archived_fields(current[key]):
+                    previous["archive_id"] = previous.pop("_id")
+                    previous["superseded_at"] = now
+                    superseded.append(previous)
+
+            def write():
+                if superseded:
+                    self.insert_many(settings.APPRAISAL_ARCHIVE_HISTORY_COLLECTION_NAME, superseded)
+                operations = [ReplaceOne({"cycle": document["cycle"], "user_id": document["user_id"]}, {**document, "archived_at": now}, upsert=True)
+                              for document in documents]
+                return self.bulk_write(settings.APPRAISAL_ARCHIVE_COLLECTION_NAME, operations, ordered=False)
+
+            if superseded and self.storage.supports_transactions():
+                return self.run_in_transaction(write)
+            return write()
+        except Exception as e:
+            logger.error(f"Error archiving form documents: {e}")
+            raise e
+
+    @staticmethod
+    def _archived_fields(document:Dict) -> Dict:
+        return {key: value for key, value in document.items() if key not in ("_id", "archived_at", "created_at", "updated_at")}
+
+    def delete_cycle_documents(self, cycle:str, user_ids:List[str]):
+        try:
+            return self.delete_many(settings.DATA_INJECTION_COLLECTION_NAME, {"cycle": cycle, "user_id": {"$in": user_ids}})
+        except Exception as e:
+            logger.error(f"Error deleting form documents for cycle {cycle}: {e}")
+            raise e
+
+    def _find_form(self, user_id:str, projection:Dict, cycle:str = None):
+        cycle = resolve_cycle(cycle)
+        result = self.find_one(settings.DATA_INJECTION_COLLECTION_NAME, {"cycle": cycle, "user_id": user_id}, projection)
+        if result is None and cycle != settings.APPRAISAL_ACTIVE_CYCLE:
+            result = self.find_one(settings.APPRAISAL_ARCHIVE_COLLECTION_NAME, {"cycle": cycle, "user_id": user_id}, projection)
+        return result
+
+    def get_teaching_load(self, semesters:List[str] = None, user_id:str = None, department:str = None, cycle:str = None):
+        """
+        Combine item 12.1 hours across the selected semesters (all when none are
+        given) and score the combined engagement, in one aggregation.
+
+        Returns:
+            List[Dict]: Per user: semesters included, total hours scheduled and
+                        engaged, engagement percent and score
+        """
+        try:
+            match = {"cycle": resolve_cycle(cycle), SEMESTERS_PATH: {"$exists": True}}
+            if user_id:
+                match["user_id"] = user_id
+            if department:
+                match["department"] = department
+            records = f"${SEMESTERS_PATH}"
+            if semesters:
+                match[f"{SEMESTERS_PATH}.semester"] = {"$in": semesters}
+                records = {"$filter": {"input": records, "cond": {"$in": ["$$this.semester", {"$literal": semesters}]}}}
+
+            pipeline = [
+                {"$match": match},
+                {"$project": {"_id": 0, "user_id": 1, "department": 1, "records": records}},
+                {"$set": {
+                    "total_hour_scheduled": {"$sum": "$records.total_hour_scheduled"},
+                    "total_hour_engaged": {"$sum": "$records.total_hour_engaged"},
+                }},
+                {"$set": {"percent": {"$cond": [
+                    {"$gt": ["$total_hour_scheduled", 0]},
+                    {"$multiply": [{"$divide": ["$total_hour_engaged", "$total_hour_scheduled"]}, 100]},
+                    0,
+                ]}}},
+                {"$project": {
+                    "user_id": 1,
+                    "department": 1,
+                    "semesters": "$records.semester",
+                    "total_hour_scheduled": 1,
+                    "total_hour_engaged": 1,
+                    "percent": 1,
+                    "score": self._teaching_load_score_expression(),
+                }},
+                {"$sort": {"user_id": 1}},
+            ]
+            return list(self.aggregate(settings.DATA_INJECTION_COLLECTION_NAME, pipeline))
+        except Exception as e:
+            logger.error(f"Error getting teaching load: {e}")
+            raise e
+
+    def migrate_legacy_semesters(self, cycle:str = None):
+        """
+        Move item 12.1 data stored under "12.1_<semester>" keys into the semesters array.
+
+        Returns:
+            int: Number of form documents migrated
+        """
+        try:
+            cycle = resolve_cycle(cycle)
+            query = {"cycle": cycle, "12": {"$type": "object"}}
+            projection = {"_id": 1, "12": 1}
+            with self.bulk_writer(settings.DATA_INJECTION_COLLECTION_NAME) as writer:
+                for document in self.find_all(settings.DATA_INJECTION_COLLECTION_NAME, query, projection=projection):
+                    legacy = {f"12.{key}": value for key, value in document["12"].items() if key.startswith("1_")}
+                    if not legacy:
+                        continue
+                    for value in legacy.values():
+                        value["total_hour_scheduled"], value["total_hour_engaged"] = sum_item12_1_hours(value.get("data") or [])
+                    update = [
+                        {"$set": self._section_fields(legacy)},
+                        {"$unset": list(legacy)},
+                    ]
+                    writer.update_one({"_id": document["_id"]}, update)
+            for error in writer.errors:
+                logger.error(f"Error migrating semesters for operation {error['index']}: {error['message']}")
+            return writer.stats()["modified"]
+        except Exception as e:
+            logger.error(f"Error migrating legacy semesters: {e}")
+            raise e
+
+    @staticmethod
+    def _section_fields(data:Dict):
+        """
+        $set fields for a section write. Item 12.1 semester keys replace their
+        record in the semesters array and leave the other semesters untouched.
+        """
+        fields = {}
+        records = []
+        for key, value in data.items():
+            semester = semester_of(key)
+            if semester is None:
+                fields[key] = {"$literal": value}
+            else:
+                records.append({**value, "semester": semester})
+
+        if records:
+            replaced = [record["semester"] for record in records]
+            fields[SEMESTERS_PATH] = {"$concatArrays": [
+                {"$filter": {
+                    "input": {"$ifNull": [f"${SEMESTERS_PATH}", []]},
+                    "cond": {"$not": [{"$in": ["$$this.semester", {"$literal": replaced}]}]},
+                }},
+                {"$literal": records},
+            ]}
+        return fields
+
+    @staticmethod
+    def _teaching_load_score_expression():
+        # Same rule as calculate_api_score_for_item12_1, applied to the combined hours
+        percent = "$percent"
+        return {"$min": [30, {"$add": [
+            {"$switch": {
+                "branches": [
+                    {"case": {"$gte": [percent, 95]}, "then": 25},
+                    {"case": {"$gte": [percent, 80]}, "then": {"$add": [15, {"$multiply": [{"$subtract": [percent, 80]}, 10 / 15]}]}},
+                ],
+                "default": 0,
+            }},
+            {"$cond": [{"$gt": ["$total_hour_engaged", "$total_hour_scheduled"]}, 5, 0]},
+        ]}]}
+
+    @staticmethod
+    def _version_fields(sections:List[str]):
+        return {
+            f"section_versions.{version_key(key)}": {"$add": [{"$ifNull": [f"$section_versions.{version_key(key)}", 0]}, 1]}
+            for key in sections
+        }
+
+    @staticmethod
+    def _completeness_fields(data:Dict):
+        bits = {section_bit(key) for key in data} - {None}
+        if not bits:
+            return {}
+
+        mask = {"$ifNull": ["$completeness_mask", 0]}
+        count = {"$ifNull": ["$section_count", 0]}
+        # 1 when the bit is not yet set in the stored mask, 0 otherwise.
+        # Written arithmetically so it does not depend on $bitOr (MongoDB 6.3+).
+        newly_set = {
+            bit: {"$subtract": [1, {"$mod": [{"$trunc": {"$divide": [mask, bit]}}, 2]}]}
+            for bit in bits
+        }
+        return {
+            "completeness_mask": {"$toInt": {"$add": [mask, *({"$multiply": [bit, flag]} for bit, flag in newly_set.items())]}},
+            "section_count": {"$toInt": {"$add": [count, *newly_set.values()]}},
+        }
@@ -0,0 +1,76 @@
+import logging
+from typing import List,Dict
+from common.clients.abstract_mongo_client import AbstractMongoDBClient
+from appraisal_form_injestion.clients.data_injestion_mongo_client import resolve_cycle
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+class FormHistoryMongoClient(AbstractMongoDBClient):
+    """
+    Append-only history of section writes. Each entry is either a full
+    snapshot of the section or a JSON patch against the previous version.
+    """
+    def __init__(self):
+        super().__init__(settings.APPRAISAL_SYSTEM_MONGO_DB_NAME)
+
+    def ensure_indexes(self):
+        try:
+            self.create_index(
+                settings.FORM_HISTORY_COLLECTION_NAME,
+                [("cycle", 1), ("user_id", 1), ("section", 1), ("version", 1)],
+                name="cycle_user_id_section_version",
+                unique=True,
+            )
+        except Exception as e:
+            logger.error(f"Error creating form history indexes: {e}")
+            raise e
+
+    def insert_history_entry(self, entry:Dict):
+        try:
+            # Entries never change once written, so a retried write is a no-op rather than a duplicate key error
+            key_fields = ("cycle", "user_id", "section", "version")
+            filter_dict = {field: entry[field] for field in key_fields}
+            fields = {key: value for key, value in entry.items() if key not in key_fields}
+            self.upsert_one(settings.FORM_HISTORY_COLLECTION_NAME, filter_dict, {"$setOnInsert": fields})
+        except Exception as e:
+            logger.error(f"Error inserting form history entry: {e}")
+            raise e
+
+    def get_entries_for_version(self, user_id:str, section:str, version:int, cycle:str = None):
+        """
+        Return the entries needed to rebuild a version: the latest snapshot at
+        or before it followed by every later diff, in version order.
+        """
+        try:
+            cycle = resolve_cycle(cycle)
+            query = {"cycle": cycle, "user_id": user_id, "section": section, "version": {"$lte": version}, "kind": "snapshot"}
+            result = self.find_all(settings.FORM_HISTORY_COLLECTION_NAME, query, limit=1, projection={"_id": 0}, sort=[("version", -1)])
+            snapshot = next(iter(result), None)
+            if snapshot is None:
+                return []
+
+            query = {"cycle": cycle, "user_id": user_id, "section": section, "version": {"$gt": snapshot["version"], "$lte": version}}
+            diffs = self.find_all(settings.FORM_HISTORY_COLLECTION_NAME, query, projection={"_id": 0}, sort=[("version", 1)])
+            return [snapshot, *diffs]
+        except Exception as e:
+            logger.error(f"Error getting form history entries: {e}")
+            raise e
+
+    def list_versions(self, user_id:str, section:str, cycle:str = None):
+        try:
+            query = {"cycle": resolve_cycle(cycle), "user_id": user_id, "section": section}
+            projection = {"_id": 0, "version": 1, "kind": 1, "size": 1, "created_at": 1}
+            return list(self.find_all(settings.FORM_HISTORY_COLLECTION_NAME, query, projection=projection, sort=[("version", 1)]))
+        except Exception as e:
+            logger.error(f"Error listing form history versions: {e}")
+            raise e
+
+    def adopt_legacy_entries(self, cycle:str):
+        """Assign a cycle to history entries written before cycles existed."""
+        try:
+            result = self.update_many(settings.FORM_HISTORY_COLLECTION_NAME, {"cycle": {"$exists": False}}, {"$set": {"cycle": cycle}})
+            return result.modified_count
+        except Exception as e:
+            logger.error(f"Error adopting legacy form history entries: {e}")
+            raise e
@@ -0,0 +1,82 @@
+import logging
+from typing import List,Dict
+from common.clients.abstract_mongo_client import AbstractMongoDBClient
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+class OutboxMongoClient(AbstractMongoDBClient):
+    """
+    Outbox of section change events, appended in the transaction that writes
+    the sections, and the checkpoint of every consumer relaying them: the
+    position of the last event it was delivered.
+
+    Positions come from a counter document incremented in the same
+    transaction as the events are inserted. Transactions that append events
+    therefore conflict on the counter and commit one after another, so
+    positions become visible in order and without gaps.
+    """
+    def __init__(self):
+        super().__init__(settings.APPRAISAL_SYSTEM_MONGO_DB_NAME)
+
+    def ensure_indexes(self):
+        try:
+            self.create_index(settings.OUTBOX_COLLECTION_NAME, [("position", 1)], name="position", unique=True)
+        except Exception as e:
+            logger.error(f"Error creating outbox indexes: {e}")
+            raise e
+
+    def append_events(self, events:List[Dict]):
+        """Number the events with the next positions and insert them."""
+        try:
+            if not events:
+                return
+            counter = self.find_one_and_upsert(
+                settings.OUTBOX_SEQUENCE_COLLECTION_NAME, {"_id": settings.OUTBOX_COLLECTION_NAME}, {"$inc": {"value": len(events)}}
+            )
+            first = counter["value"] - len(events) + 1
+            for offset, event in enumerate(events):
+                event["position"] = first + offset
+            self.insert_many(settings.OUTBOX_COLLECTION_NAME, events)
+        except Exception as e:
+            logger.error(f"Error appending outbox events: {e}")
+            raise e
+
+    def get_events(self, after:int = None, limit:int = 0) -> List[Dict]:
+        """Events with a position after after, in position order."""
+        try:
+            query = {"position": {"$gt": after}} if after is not None else {}
+            return list(self.find_all(settings.OUTBOX_COLLECTION_NAME, query, limit=limit, projection={"updated_at": 0}, sort=[("position", 1)]))
+        except Exception as e:
+            logger.error(f"Error getting outbox events: {e}")
+            raise e
+
+    def delete_events(self, through:int) -> int:
+        """Delete events up to and including position through."""
+        try:
+            return self.delete_many(settings.OUTBOX_COLLECTION_NAME, {"position": {"$lte": through}}).deleted_count
+        except Exception as e:
+            logger.error(f"Error deleting outbox events: {e}")
+            raise e
+
+    def get_checkpoint(self, consumer:str):
+        try:
+            return self.find_one(settings.OUTBOX_CHECKPOINT_COLLECTION_NAME, {"_id": consumer})
+        except Exception as e:
+            logger.error(f"Error getting outbox checkpoint: {e}")
+            raise e
+
+    def get_checkpoints(self) -> List[Dict]:
+        try:
+            return list(self.find_all(settings.OUTBOX_CHECKPOINT_COLLECTION_NAME, sort=[("_id", 1)]))
+        except Exception as e:
+            logger.error(f"Error listing outbox checkpoints: {e}")
+            raise e
+
+    def save_checkpoint(self, consumer:str, position:int, delivered:int):
+        try:
+            update = {"$set": {"position": position}, "$inc": {"delivered": delivered}}
+            self.upsert_one(settings.OUTBOX_CHECKPOINT_COLLECTION_NAME, {"_id": consumer}, update)
+        except Exception as e:
+            logger.error(f"Error saving outbox checkpoint: {e}")
+            raise e
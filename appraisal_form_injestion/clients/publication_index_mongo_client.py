@@ -0,0 +1,113 @@
+import logging
+import re
+from typing import List,Dict
+from pymongo import UpdateMany, UpdateOne
+from common.clients.abstract_mongo_client import AbstractMongoDBClient
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+class PublicationIndexMongoClient(AbstractMongoDBClient):
+    """
+    Cross-faculty index of item 14 publications. Each document is one paper,
+    keyed by its fingerprint (used as _id so concurrent upserts from two
+    co-authors can never create duplicates), with one claim per faculty
+    member who entered it.
+    """
+    def __init__(self):
+        super().__init__(settings.APPRAISAL_SYSTEM_MONGO_DB_NAME)
+
+    def ensure_indexes(self):
+        try:
+            # DOI/ISSN lookups are pure equality, so hashed indexes keep them small and evenly spread
+            self.create_index(settings.PUBLICATION_INDEX_COLLECTION_NAME, [("doi", "hashed")], name="doi_hashed")
+            self.create_index(settings.PUBLICATION_INDEX_COLLECTION_NAME, [("issn", "hashed")], name="issn_hashed")
+            # Anchored prefix regexes on normalized_title are served by an ordinary ascending index
+            self.create_index(settings.PUBLICATION_INDEX_COLLECTION_NAME, [("normalized_title", 1)], name="normalized_title")
+            self.create_index(settings.PUBLICATION_INDEX_COLLECTION_NAME, [("claims.user_id", 1)], name="claims_user_id")
+            self.create_index(settings.PUBLICATION_INDEX_COLLECTION_NAME, [("claim_count", 1)], name="claim_count")
+        except Exception as e:
+            logger.error(f"Error creating publication index indexes: {e}")
+            raise e
+
+    def sync_user_publications(self, user_id:str, publications:List[Dict]):
+        """
+        Make the index reflect the user's current item 14 entries: claims on
+        papers the user no longer lists are dropped and every listed paper is
+        upserted with the user's claim, all in one bulk round trip.
+        """
+        try:
+            fingerprints = [publication["fingerprint"] for publication in publications]
+            operations = [UpdateMany(
+                {"claims.user_id": user_id, "_id": {"$nin": fingerprints}},
+                self._claims_pipeline(user_id),
+            )]
+            for publication in publications:
+                claim = {
+                    "user_id": user_id,
+                    "user_author_type": publication["user_author_type"],
+                    "author_count": publication["author_count"],
+                }
+                details = {
+                    "title": publication["title"],
+                    "normalized_title": publication["normalized_title"],
+                    "doi": publication["doi"],
+                    "issn": publication["issn"],
+                    "pub_type": publication["pub_type"],
+                }
+                operations.append(UpdateOne(
+                    {"_id": publication["fingerprint"]},
+                    self._with_timestamps(
+                        [{"$set": {key: {"$ifNull": [f"${key}", {"$literal": value}]} for key, value in details.items()}}]
+                        + self._claims_pipeline(user_id, claim),
+                        upsert=True,
+                    ),
+                    upsert=True,
+                ))
+            self.bulk_write(settings.PUBLICATION_INDEX_COLLECTION_NAME, operations, ordered=False)
+        except Exception as e:
+            logger.error(f"Error syncing user publications: {e}")
+            raise e
+
+    def find_by_doi(self, doi:str, limit:int = 10):
+        try:
+            return list(self.find_all(settings.PUBLICATION_INDEX_COLLECTION_NAME, {"doi": doi}, limit=limit))
+        except Exception as e:
+            logger.error(f"Error finding publication by doi: {e}")
+            raise e
+
+    def find_by_issn(self, issn:str, limit:int = 10):
+        try:
+            return list(self.find_all(settings.PUBLICATION_INDEX_COLLECTION_NAME, {"issn": issn}, limit=limit))
+        except Exception as e:
+            logger.error(f"Error finding publication by issn: {e}")
+            raise e
+
+    def find_by_title_prefix(self, prefix:str, limit:int = 10):
+        try:
+            query = {"normalized_title": {"$regex": f"^{re.escape(prefix)}"}}
+            sort = [("normalized_title", 1)]
+            return list(self.find_all(settings.PUBLICATION_INDEX_COLLECTION_NAME, query, limit=limit, sort=sort))
+        except Exception as e:
+            logger.error(f"Error finding publication by title prefix: {e}")
+            raise e
+
+    def get_shared_publications(self):
+        try:
+            return self.find_all(settings.PUBLICATION_INDEX_COLLECTION_NAME, {"claim_count": {"$gt": 1}})
+        except Exception as e:
+            logger.error(f"Error getting shared publications: {e}")
+            raise e
+
+    @staticmethod
+    def _claims_pipeline(user_id:str, claim:Dict = None):
+        claims = {"$filter": {
+            "input": {"$ifNull": ["$claims", []]},
+            "cond": {"$ne": ["$$this.user_id", {"$literal": user_id}]},
+        }}
+        if claim is not None:
+            claims = {"$concatArrays": [claims, [{"$literal": claim}]]}
+        return [
+            {"$set": {"claims": claims}},
+            {"$set": {"claim_count": {"$size": "$claims"}}},
+        ]
@@ -0,0 +1,141 @@
+import logging
+from typing import List,Dict
+from pymongo import DeleteMany, ReplaceOne
+from common.clients.abstract_mongo_client import AbstractMongoDBClient
+from appraisal_form_injestion.clients.data_injestion_mongo_client import resolve_cycle
+from appraisal_form_injestion.constants import CHILD_ROW_SECTIONS, CHILD_ROW_FILTER_INDEXES
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Layout recorded on a form document section whose rows are in the section rows
+# collection. Reads and filters follow each document's layout, since documents
+# written before FORM_LIST_STORAGE_MODE changed keep the layout they were written in.
+CHILD_LAYOUT = "child"
+
+def uses_child_rows(section:str) -> bool:
+    """Whether new writes of this section keep their rows in the section rows collection."""
+    return settings.FORM_LIST_STORAGE_MODE == "child" and section in CHILD_ROW_SECTIONS
+
+def stores_child_rows(value) -> bool:
+    """Whether a stored section keeps its rows in the section rows collection."""
+    return isinstance(value, dict) and value.get("layout") == CHILD_LAYOUT
+
+class SectionRowsMongoClient(AbstractMongoDBClient):
+    """
+    Rows of large list sections, one document per row:
+    {"cycle", "user_id", "section", "row_id", "data", "api_score"}. row_id is the row's
+    position in the list, so a page of rows is a range scan on the unique index.
+    """
+    def __init__(self):
+        super().__init__(settings.APPRAISAL_SYSTEM_MONGO_DB_NAME)
+
+    def ensure_indexes(self):
+        try:
+            self.create_index(
+                settings.FORM_SECTION_ROWS_COLLECTION_NAME,
+                [("cycle", 1), ("user_id", 1), ("section", 1), ("row_id", 1)],
+                name="cycle_user_id_section_row_id",
+                unique=True,
+            )
+            for keys in CHILD_ROW_FILTER_INDEXES:
+                self.create_index(settings.FORM_SECTION_ROWS_COLLECTION_NAME, [("cycle", 1), *keys])
+        except Exception as e:
+            logger.error(f"Error creating section rows indexes: {e}")
+            raise e
+
+    def replace_rows(self, user_id:str, section:str, rows:List[Dict], api_scores:List = None, cycle:str = None):
+        """Make the stored rows of a section exactly the given list, in one unordered bulk write."""
+        try:
+            cycle = resolve_cycle(cycle)
+            operations = []
+            for document in self.build_row_documents(user_id, section, rows, api_scores, cycle):
+                filter_dict = {key: document[key] for key in ("cycle", "user_id", "section", "row_id")}
+                operations.append(ReplaceOne(filter_dict, document, upsert=True))
+            operations.append(DeleteMany({"cycle": cycle, "user_id": user_id, "section": section, "row_id": {"$gte": len(rows)}}))
+            return self.bulk_write(settings.FORM_SECTION_ROWS_COLLECTION_NAME, operations, ordered=False)
+        except Exception as e:
+            logger.error(f"Error replacing section rows: {e}")
+            raise e
+
+    @staticmethod
+    def build_row_documents(user_id:str, section:str, rows:List[Dict], api_scores:List = None, cycle:str = None):
+        cycle = resolve_cycle(cycle)
+        api_scores = api_scores or []
+        documents = []
+        for row_id, row in enumerate(rows):
+            document = {"cycle": cycle, "user_id": user_id, "section": section, "row_id": row_id, "data": row}
+            if row_id < len(api_scores):
+                document["api_score"] = api_scores[row_id]
+            documents.append(document)
+        return documents
+
+    def insert_row_documents(self, documents:List[Dict]):
+        """Insert section rows unordered, returning the rows inserted and the rows skipped as already stored."""
+        try:
+            return self.insert_many_skipping_duplicates(settings.FORM_SECTION_ROWS_COLLECTION_NAME, documents)
+        except Exception as e:
+            logger.error(f"Error inserting section rows: {e}")
+            raise e
+
+    def get_rows(self, user_id:str, section:str, skip:int = 0, limit:int = 0, cycle:str = None):
+        try:
+            row_id = {"$gte": skip}
+            if limit:
+                row_id["$lt"] = skip + limit
+            query = {"cycle": resolve_cycle(cycle), "user_id": user_id, "section": section, "row_id": row_id}
+            projection = {"_id": 0, "row_id": 1, "data": 1, "api_score": 1}
+            result = self.find_all(settings.FORM_SECTION_ROWS_COLLECTION_NAME, query, projection=projection, sort=[("row_id", 1)])
+            return list(result)
+        except Exception as e:
+            logger.error(f"Error getting section rows: {e}")
+            raise e
+
+    def find_user_ids(self, section:str, conditions:Dict, cycle:str = None):
+        """
+        User ids with at least one row in the section matching every condition.
+
+        Args:
+            conditions (Dict): Row field -> operator document, as built for $elemMatch
+        """
+        try:
+            query = {"cycle": resolve_cycle(cycle), "section": section, **{f"data.{field}": condition for field, condition in conditions.items()}}
+            result = self.find_all(settings.FORM_SECTION_ROWS_COLLECTION_NAME, query, projection={"_id": 0, "user_id": 1})
+            return {doc["user_id"] for doc in result}
+        except Exception as e:
+            logger.error(f"Error finding user ids by section rows: {e}")
+            raise e
+
+    def lookup_stage(self, section:str, conditions:Dict, as_field:str, cycle:str = None) -> Dict:
+        """
+        $lookup stage for a pipeline on the form collection that sets as_field
+        to [] unless the document's user has a row in the section matching
+        every condition. Each document is looked up on the unique
+        (cycle, user_id, section, row_id) index, so the cost follows the page
+        of documents read rather than the number of matching rows.
+        """
+        match = {"cycle": resolve_cycle(cycle), "section": section, **{f"data.{field}": condition for field, condition in conditions.items()}}
+        return {"$lookup": {
+            "from": settings.FORM_SECTION_ROWS_COLLECTION_NAME,
+            # localField and foreignField alongside a pipeline need MongoDB 5.0
+            "localField": "user_id",
+            "foreignField": "user_id",
+            "pipeline": [{"$match": match}, {"$limit": 1}, {"$project": {"_id": 1}}],
+            "as": as_field,
+        }}
+
+    def adopt_legacy_rows(self, cycle:str):
+        """Assign a cycle to rows written before cycles existed."""
+        try:
+            result = self.update_many(settings.FORM_SECTION_ROWS_COLLECTION_NAME, {"cycle": {"$exists": False}}, {"$set": {"cycle": cycle}})
+            return result.modified_count
+        except Exception as e:
+            logger.error(f"Error adopting legacy section rows: {e}")
+            raise e
+
+    def delete_cycle_rows(self, cycle:str, user_ids:List[str]):
+        try:
+            return self.delete_many(settings.FORM_SECTION_ROWS_COLLECTION_NAME, {"cycle": cycle, "user_id": {"$in": user_ids}})
+        except Exception as e:
+            logger.error(f"Error deleting section rows for cycle {cycle}: {e}")
+            raise e
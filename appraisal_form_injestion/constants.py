@@ -0,0 +1,143 @@
+from typing import Dict, List, Optional
+
+# One bit per section key written by DataInjestionService. Item 12.1 is written
+# once per semester but only counts as a single section for completeness.
+SECTION_BITS = {
+    "1-10": 1 << 0,
+    "11": 1 << 1,
+    "12.1": 1 << 2,
+    "12.3-12.4": 1 << 3,
+    "13": 1 << 4,
+    "14": 1 << 5,
+    "15": 1 << 6,
+    "16": 1 << 7,
+    "17": 1 << 8,
+    "18": 1 << 9,
+    "19": 1 << 10,
+}
+
+ALL_SECTIONS_MASK = sum(SECTION_BITS.values())
+TOTAL_SECTIONS = len(SECTION_BITS)
+
+
+def section_bit(section_key: str) -> Optional[int]:
+    """
+    Return the completeness bit for a stored section key, or None if the key
+    is not a section (e.g. denormalised fields such as department).
+    """
+    if section_key.startswith("12.1_"):
+        section_key = "12.1"
+    return SECTION_BITS.get(section_key)
+
+
+# Item 12.1 is written per semester under the key "12.1_<semester>" and stored as
+# one record per semester in this array.
+SEMESTER_KEY_PREFIX = "12.1_"
+SEMESTERS_PATH = "12.1.semesters"
+
+
+def semester_of(section_key: str) -> Optional[str]:
+    """The semester of an item 12.1 section key, or None for any other key."""
+    if section_key.startswith(SEMESTER_KEY_PREFIX):
+        return section_key[len(SEMESTER_KEY_PREFIX):]
+    return None
+
+
+def version_key(section_key: str) -> str:
+    """
+    Field name used for a section in per-section metadata maps such as
+    section_versions. Dots are replaced so the key stays a single field.
+    """
+    return section_key.replace(".", "_")
+
+
+def missing_sections(mask: int) -> List[str]:
+    """List the section keys whose bit is not set in the completeness mask."""
+    mask = int(mask or 0)
+    return [section for section, bit in SECTION_BITS.items() if not mask & bit]
+
+
+def get_path(document: Dict, path: str):
+    """
+    Resolve a dotted Mongo field path against a nested dict. Section keys such
+    as "12.3-12.4" are stored by Mongo as nested documents, so they have to be
+    read back the same way.
+    """
+    value = document
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def set_path(document: Dict, path: str, value) -> None:
+    """Set a dotted Mongo field path in a nested dict, creating documents on the way like $set does."""
+    parts = path.split(".")
+    for part in parts[:-1]:
+        document = document.setdefault(part, {})
+    document[parts[-1]] = value
+
+
+def compute_completeness_mask(document: Dict) -> int:
+    """Derive the completeness mask from the sections present in a stored form document."""
+    mask = 0
+    for section, bit in SECTION_BITS.items():
+        if section == "12.1":
+            # Documents written before semesters were stored as an array still have "12.1_<semester>" keys
+            legacy = document.get("12") or {}
+            if get_path(document, SEMESTERS_PATH) or any(key.startswith("1_") for key in legacy):
+                mask |= bit
+        elif get_path(document, section) is not None:
+            mask |= bit
+    return mask
+
+
+# Section row fields admins may filter on, with the type query values are coerced to.
+FILTER_FIELDS = {
+    "11.data.program_type": str,
+    "11.data.attended/organized": str,
+    "11.data.is_chief_organizer": bool,
+    "14.data.pub_type": str,
+    "14.data.indexed": bool,
+    "14.data.impact_factor": float,
+    "14.data.user_author_type": str,
+    "15.data.publisher_type": str,
+    "15.data.is_chapter": bool,
+    "15.data.user_author_type": str,
+    "16.data.status": str,
+    "16.data.is_hss": bool,
+    "16.data.is_consultancy": bool,
+    "16.data.amount_sanctioned": float,
+    "17.data.degree": str,
+    "17.data.status": str,
+    "17.data.months_ongoing": int,
+    "18.data.position_type": str,
+}
+
+# Compound multikey indexes for the filter combinations reviewers ask for most.
+# Predicates on one section are combined with $elemMatch, which lets the planner
+# intersect the bounds of both keys. Every other whitelisted field is served by
+# the wildcard index below.
+FILTER_INDEXES = [
+    [("14.data.pub_type", 1), ("14.data.impact_factor", 1)],
+    [("14.data.indexed", 1), ("14.data.impact_factor", 1)],
+    [("15.data.publisher_type", 1), ("15.data.is_chapter", 1)],
+    [("16.data.status", 1), ("16.data.amount_sanctioned", 1)],
+    [("17.data.status", 1), ("17.data.degree", 1)],
+]
+
+FILTER_WILDCARD_PROJECTION = {field: 1 for field in FILTER_FIELDS}
+
+# List sections whose rows can be kept in the section rows collection instead of
+# inline on the form document (FORM_LIST_STORAGE_MODE = "child").
+CHILD_ROW_SECTIONS = ["14", "15", "17"]
+
+# The filter indexes above, rebuilt for the section rows collection. Each row is
+# its own document there, so these are not multikey and end in user_id to cover
+# the user id lookup.
+CHILD_ROW_FILTER_INDEXES = [
+    [("section", 1), *((f"data.{field.split('.data.', 1)[1]}", direction) for field, direction in keys), ("user_id", 1)]
+    for keys in FILTER_INDEXES
+    if keys[0][0].split(".data.", 1)[0] in CHILD_ROW_SECTIONS
+]
@@ -0,0 +1,185 @@
+import bisect
+import csv
+import hashlib
+import itertools
+import logging
+import threading
+from collections import namedtuple
+from pathlib import Path
+from typing import List,Dict,Optional
+from django.conf import settings
+from appraisal_form_injestion.utils import extract_issn, normalize_publication_title, parse_bool
+
+logger = logging.getLogger(__name__)
+
+JournalEntry = namedtuple("JournalEntry", ["issn", "eissn", "title", "indexed", "impact_factor"])
+
+class JournalCatalog:
+    """
+    Read-only, in-memory journal catalog. Entries are indexed by every ISSN
+    they carry (print and electronic) and by normalised title in a sorted list,
+    so ISSN lookups are a dict hit and title prefix lookups a binary search.
+    """
+    __slots__ = ("version", "by_issn", "titles", "title_entries")
+
+    def __init__(self, entries:List[JournalEntry], version:str):
+        self.version = version
+        self.by_issn = {}
+        for entry in entries:
+            for issn in (entry.issn, entry.eissn):
+                if issn:
+                    self.by_issn[issn] = entry
+        ordered = sorted((normalize_publication_title(entry.title), entry) for entry in entries if entry.title)
+        self.titles = [title for title, _ in ordered]
+        self.title_entries = [entry for _, entry in ordered]
+
+    def __len__(self):
+        return len(self.title_entries)
+
+    def get_by_issn(self, issn:str) -> Optional[JournalEntry]:
+        return self.by_issn.get(extract_issn(issn, labelled=True) or "")
+
+    def search_title_prefix(self, prefix:str, limit:int = 10) -> List[JournalEntry]:
+        prefix = normalize_publication_title(prefix)
+        if not prefix:
+            return []
+        start = bisect.bisect_left(self.titles, prefix)
+        result = []
+        for index in range(start, min(start + limit, len(self.titles))):
+            if not self.titles[index].startswith(prefix):
+                break
+            result.append(self.title_entries[index])
+        return result
+
+    def lookup(self, query:str, limit:int = 10) -> List[JournalEntry]:
+        entry = self.get_by_issn(query) if len(query.strip()) <= 9 else None
+        if entry:
+            return [entry]
+        return self.search_title_prefix(query, limit)
+
+def _parse_indexed(value) -> bool:
+    return parse_bool(value) is True
+
+def _parse_impact_factor(value) -> Optional[float]:
+    try:
+        return float(value) if str(value or "").strip() else None
+    except ValueError:
+        return None
+
+def _entry_from_row(row:Dict) -> Optional[JournalEntry]:
+    issn = extract_issn(str(row.get("issn") or ""), labelled=True)
+    eissn = extract_issn(str(row.get("eissn") or ""), labelled=True)
+    title = str(row.get("title") or "").strip()
+    if not (issn or eissn or title):
+        return None
+    return JournalEntry(issn, eissn, title, _parse_indexed(row.get("indexed")), _parse_impact_factor(row.get("impact_factor")))
+
+def _read_csv(path:Path):
+    version = None
+    with open(path, newline="", encoding="utf-8") as f:
+        # Leading "# key: value" lines carry metadata such as the catalog version
+        lines = iter(f)
+        header_lines = []
+        for line in lines:
+            if not line.startswith("#"):
+                header_lines.append(line)
+                break
+            key, _, value = line[1:].partition(":")
+            if key.strip().lower() == "version":
+                version = value.strip()
+        reader = csv.DictReader(itertools.chain(header_lines, lines))
+        entries = [entry for entry in map(_entry_from_row, reader) if entry]
+    return entries, version
+
+def _read_parquet(path:Path):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise Exception("pyarrow is required to load a Parquet journal catalog")
+    table = pq.read_table(path, columns=["issn", "eissn", "title", "indexed", "impact_factor"])
+    entries = [entry for entry in map(_entry_from_row, table.to_pylist()) if entry]
+    version = (table.schema.metadata or {}).get(b"version", b"").decode() or None
+    return entries, version
+
+def load_journal_catalog(path) -> JournalCatalog:
+    path = Path(path)
+    if not path.exists():
+        logger.warning(f"Journal catalog not found at {path}, journal validation is disabled")
+        return JournalCatalog([], "missing")
+
+    if path.suffix == ".parquet":
+        entries, version = _read_parquet(path)
+    else:
+        entries, version = _read_csv(path)
+
+    if not version:
+        version = hashlib.sha256(path.read_bytes()).hexdigest()[:12]
+    if not entries:
+        logger.warning(f"Journal catalog at {path} has no journals, so item 14 indexed and impact factor values are scored as reported; set JOURNAL_CATALOG_PATH to the institution's catalog")
+        return JournalCatalog([], version)
+    logger.info(f"Loaded {len(entries)} journals from {path} (version {version})")
+    return JournalCatalog(entries, version)
+
+_journal_catalog = None
+_journal_catalog_lock = threading.Lock()
+
+def get_journal_catalog() -> JournalCatalog:
+    """Return the process-wide catalog, loading it from JOURNAL_CATALOG_PATH on first use."""
+    global _journal_catalog
+    if _journal_catalog is None:
+        with _journal_catalog_lock:
+            if _journal_catalog is None:
+                _journal_catalog = load_journal_catalog(settings.JOURNAL_CATALOG_PATH)
+    return _journal_catalog
+
+def apply_journal_catalog(publication:Dict, catalog:JournalCatalog = None) -> Dict:
+    """
+    Fill in or validate the self-reported indexed/impact_factor fields of an
+    item 14 row from the journal catalog, matched by the ISSN in the reference.
+
+    Missing values are filled from the catalog. Values that disagree with it
+    are recorded under "journal_catalog.mismatches" for reviewers, and are
+    replaced only when JOURNAL_CATALOG_ENFORCE is on.
+    """
+    if catalog is None:
+        catalog = get_journal_catalog()
+    issn = extract_issn(str(publication.get("issn") or ""), labelled=True) or extract_issn(publication.get("title_and_complete_reference", ""))
+    entry = catalog.by_issn.get(issn) if issn else None
+    if entry is None:
+        return publication
+
+    mismatches = []
+    if publication.get("indexed") in (None, ""):
+        publication["indexed"] = entry.indexed
+    else:
+        # Reported values may be strings such as "false", which bool() reads as True
+        reported = parse_bool(publication["indexed"])
+        if reported is not None:
+            publication["indexed"] = reported
+        if reported != entry.indexed:
+            mismatches.append("indexed")
+            if settings.JOURNAL_CATALOG_ENFORCE:
+                publication["indexed"] = entry.indexed
+
+    if entry.impact_factor is not None:
+        if publication.get("impact_factor") in (None, "", 0):
+            publication["impact_factor"] = entry.impact_factor
+        else:
+            try:
+                reported = float(publication["impact_factor"])
+            except (TypeError, ValueError):
+                reported = None
+            if reported is None or abs(reported - entry.impact_factor) > 0.01:
+                mismatches.append("impact_factor")
+                if settings.JOURNAL_CATALOG_ENFORCE:
+                    publication["impact_factor"] = entry.impact_factor
+
+    publication["journal_catalog"] = {
+        "version": catalog.version,
+        "issn": issn,
+        "title": entry.title,
+        "indexed": entry.indexed,
+        "impact_factor": entry.impact_factor,
+        "mismatches": mismatches,
+    }
+    return publication
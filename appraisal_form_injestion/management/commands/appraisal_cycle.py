@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from appraisal_form_injestion.services.appraisal_cycle_service import AppraisalCycleService
+
+
+class Command(BaseCommand):
+    help = "Manage appraisal cycles: adopt pre-cycle data or archive a closed cycle"
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest="action", required=True)
+
+        adopt = subparsers.add_parser("adopt-legacy", help="Assign a cycle to data written before cycles existed")
+        adopt.add_argument("cycle", nargs="?", help="Cycle id (default: the active cycle)")
+
+        archive = subparsers.add_parser("archive", help="Move a closed cycle out of the form collection")
+        archive.add_argument("cycle", help="Cycle id to archive")
+        archive.add_argument("--export", metavar="PATH", help="Write a gzipped JSON lines file instead of the archive collection")
+        archive.add_argument("--keep", action="store_true", help="Copy only, leave the cycle in the form collection")
+        archive.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        service = AppraisalCycleService()
+        if options["action"] == "adopt-legacy":
+            cycle = options["cycle"] or settings.APPRAISAL_ACTIVE_CYCLE
+            counts = service.adopt_legacy_data(cycle)
+            for collection, count in counts.items():
+                self.stdout.write(f"Assigned cycle {cycle} to {count} {collection} documents")
+            return
+
+        try:
+            archived = service.archive_cycle(options["cycle"], options["export"], options["keep"], options["batch_size"])
+        except ValueError as e:
+            raise CommandError(str(e))
+        destination = options["export"] or settings.APPRAISAL_ARCHIVE_COLLECTION_NAME
+        self.stdout.write(f"Archived {archived} form documents of cycle {options['cycle']} to {destination}")
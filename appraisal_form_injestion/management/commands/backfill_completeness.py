@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from appraisal_form_injestion.clients.data_injestion_mongo_client import DataInjestionMongoClient
+
+
+class Command(BaseCommand):
+    help = "Compute the completeness bitmask and section count for form documents written before they existed"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cycle", help="Cycle id (default: the active cycle)")
+
+    def handle(self, *args, **options):
+        cycle = options["cycle"] or settings.APPRAISAL_ACTIVE_CYCLE
+        updated = DataInjestionMongoClient().backfill_completeness(cycle)
+        self.stdout.write(f"Backfilled completeness for {updated} form documents of cycle {cycle}")
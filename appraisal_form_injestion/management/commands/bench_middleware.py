@@ -0,0 +1,114 @@
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from common.wsgi import call_wsgi
+
+PROFILES = {"full": "false", "api-only": "true"}
+
+# Calls timed in every profile: a read, a cached score preview and a section save
+ROUTES = [
+    ("get-item-by-section", "GET", "/api/get-item-by-section/", "user_id=F00001&section=18", None),
+    ("score-preview", "POST", "/api/score-preview/", "", {"section": "18", "data": [{"position_type": "Member", "membership_details": "IEEE"}]}),
+    ("injest-item-18", "POST", "/api/injest-item-18/", "", {"user_id": "F00001", "data": [{"position_type": "Chairmanship", "membership_details": "ACM"}]}),
+]
+
+
+def _rss_mb():
+    """Resident set size of this process, from /proc where available."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def call_route(handler, method, path, query, body):
+    status = call_wsgi(handler, method, path, query, body)
+    if status != 200:
+        raise CommandError(f"{method} {path} returned {status}")
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-request overhead and worker memory of the full settings profile against the "
+        "API_ONLY profile, calling the WSGI handler of a fresh worker process for each"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000, help="Timed requests per route")
+        parser.add_argument("--warmup", type=int, default=100, help="Untimed requests per route before timing")
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+        parser.add_argument("--worker", action="store_true", help="Internal: measure the profile this process was started with")
+
+    def handle(self, *args, **options):
+        if options["worker"]:
+            self.stdout.write(json.dumps(self._measure(options["requests"], options["warmup"])))
+            return
+
+        report = {profile: self._run_worker(profile, options) for profile in PROFILES}
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        full, lean = report["full"], report["api-only"]
+        self.stdout.write(f"{'':<24}{'full':>12}{'api-only':>12}{'change':>10}")
+        rows = [
+            ("middleware", full["middleware"], lean["middleware"]),
+            ("installed apps", full["installed_apps"], lean["installed_apps"]),
+            ("modules loaded", full["modules"], lean["modules"]),
+            ("worker RSS MB", full["rss_mb"], lean["rss_mb"]),
+        ]
+        rows += [(f"{route} us", full["routes"][route]["mean_us"], lean["routes"][route]["mean_us"]) for route in full["routes"]]
+        for name, before, after in rows:
+            change = f"{(after - before) / before:+.1%}" if before else ""
+            self.stdout.write(f"{name:<24}{before:>12}{after:>12}{change:>10}")
+
+    def _run_worker(self, profile, options):
+        command = [sys.executable, str(settings.BASE_DIR / "manage.py"), "bench_middleware", "--worker",
+                   "--requests", str(options["requests"]), "--warmup", str(options["warmup"])]
+        # The comparison is of the request path, so the storage is kept in memory to take MongoDB out of it
+        environment = {**os.environ, "API_ONLY": PROFILES[profile], "STORAGE_BACKEND": "memory", "TRAFFIC_CAPTURE_PATH": ""}
+        result = subprocess.run(command, env=environment, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise CommandError(f"The {profile} worker failed:\n{result.stderr.strip()}")
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    def _measure(self, requests, warmup):
+        from django.core.handlers.wsgi import WSGIHandler
+
+        logging.disable(logging.WARNING)
+        handler = WSGIHandler()
+
+        routes = {}
+        for name, method, path, query, body in ROUTES:
+            body = json.dumps(body).encode("utf-8") if body is not None else b""
+            for _ in range(warmup):
+                call_route(handler, method, path, query, body)
+            samples = []
+            for _ in range(requests):
+                started = time.perf_counter()
+                call_route(handler, method, path, query, body)
+                samples.append(time.perf_counter() - started)
+            samples.sort()
+            routes[name] = {
+                "mean_us": round(sum(samples) / len(samples) * 1e6, 1),
+                "p50_us": round(samples[len(samples) // 2] * 1e6, 1),
+                "p99_us": round(samples[int(len(samples) * 0.99)] * 1e6, 1),
+            }
+        return {
+            "api_only": settings.API_ONLY,
+            "middleware": len(settings.MIDDLEWARE),
+            "installed_apps": len(settings.INSTALLED_APPS),
+            "modules": len(sys.modules),
+            "rss_mb": round(_rss_mb(), 1),
+            "routes": routes,
+        }
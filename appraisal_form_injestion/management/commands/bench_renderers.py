@@ -0,0 +1,105 @@
+import io
+import json
+import time
+from datetime import datetime, timezone
+from bson import ObjectId
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from appraisal_form_injestion.synthetic import SyntheticInstitution
+from appraisal_form_injestion.utils import calculate_api_score_for_item14
+from common.parsers import ORJSONParser
+from common.renderers import ORJSONRenderer
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the orjson DRF renderer and parser against DRF's JSONRenderer and JSONParser on "
+        "GetItemBySection responses and ingest bodies for item 14 sections of increasing size"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--publications", type=int, nargs="+", default=[20, 200, 2000], help="Item 14 section sizes to benchmark")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed of the synthetic institution")
+        parser.add_argument("--repeat", type=int, default=20, help="Timed runs per measurement; the fastest is reported")
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+
+    def handle(self, *args, **options):
+        publications = self._publications(options["seed"], max(options["publications"]))
+        report = []
+        for count in options["publications"]:
+            report.append(self._measure(publications[:count], options["repeat"]))
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(f"Milliseconds per call, fastest of {options['repeat']} runs")
+        self.stdout.write(f"{'rows':>6}{'KB':>9}{'render drf':>12}{'orjson':>9}{'speedup':>9}{'parse drf':>11}{'orjson':>9}{'speedup':>9}")
+        for result in report:
+            self.stdout.write(
+                f"{result['publications']:>6}{result['bytes'] / 1024:>9.1f}"
+                f"{result['render_drf_ms']:>12.3f}{result['render_orjson_ms']:>9.3f}{result['render_speedup']:>8.1f}x"
+                f"{result['parse_drf_ms']:>11.3f}{result['parse_orjson_ms']:>9.3f}{result['parse_speedup']:>8.1f}x"
+            )
+
+    @staticmethod
+    def _publications(seed, count):
+        """Item 14 rows of as many synthetic faculty members as it takes."""
+        institution = SyntheticInstitution(seed)
+        publications = []
+        index = 0
+        while len(publications) < count:
+            faculty = institution.faculty(index)
+            for section, payload, _ in institution.form_sections(faculty, "bench"):
+                if section == "14":
+                    publications.extend(payload)
+            index += 1
+        return publications[:count]
+
+    def _measure(self, publications, repeat):
+        api_score_list = [calculate_api_score_for_item14(publication) or 0 for publication in publications]
+        now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=123000)
+        # A GetItemBySection response, with the timestamps the clients write on every form
+        response = {
+            "message": "Data fetched successfully",
+            "result": {
+                "user_id": "F00001",
+                "14": {"data": publications, "score": sum(api_score_list), "api_score_list": api_score_list},
+                "section_versions": {"14": 7},
+                "created_at": now,
+                "updated_at": now,
+            },
+        }
+        drf_renderer, orjson_renderer = JSONRenderer(), ORJSONRenderer()
+        rendered = drf_renderer.render(response)
+        if json.loads(orjson_renderer.render(response))["result"]["14"] != json.loads(rendered)["result"]["14"]:
+            raise CommandError("The orjson renderer's output differs from JSONRenderer's")
+        # JSONRenderer cannot serialize ObjectIds, so only the orjson renderer sees the form _id
+        orjson_response = {**response, "result": {"_id": ObjectId(), **response["result"]}}
+
+        body = json.dumps({"user_id": "F00001", "data": publications}).encode("utf-8")
+        drf_parser, orjson_parser = JSONParser(), ORJSONParser()
+        render_drf = self._best(lambda: drf_renderer.render(response), repeat)
+        render_orjson = self._best(lambda: orjson_renderer.render(orjson_response), repeat)
+        parse_drf = self._best(lambda: drf_parser.parse(io.BytesIO(body)), repeat)
+        parse_orjson = self._best(lambda: orjson_parser.parse(io.BytesIO(body)), repeat)
+        return {
+            "publications": len(publications),
+            "bytes": len(rendered),
+            "render_drf_ms": render_drf * 1000,
+            "render_orjson_ms": render_orjson * 1000,
+            "render_speedup": render_drf / render_orjson,
+            "parse_drf_ms": parse_drf * 1000,
+            "parse_orjson_ms": parse_orjson * 1000,
+            "parse_speedup": parse_drf / parse_orjson,
+        }
+
+    @staticmethod
+    def _best(call, repeat):
+        best = None
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            call()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
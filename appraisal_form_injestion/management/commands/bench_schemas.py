@@ -0,0 +1,127 @@
+import json
+import time
+from django.core.management.base import BaseCommand, CommandError
+from appraisal_form_injestion import schemas
+from appraisal_form_injestion.schemas import SECTION_SCHEMAS, SchemaError, decode_section, validate_section
+from appraisal_form_injestion.synthetic import SyntheticInstitution
+
+
+def _touch(value):
+    """Read every value of a decoded payload with .get(), as the scorers do without validating."""
+    if type(value) is dict:
+        for key in value:
+            _touch(value.get(key))
+    elif type(value) is list:
+        for item in value:
+            _touch(item)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark decoding ingest request bodies with json.loads and with orjson, and separately the cost "
+        "of validating the decoded payloads against the section schemas, over synthetic appraisal forms"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--faculty", type=int, default=300, help="Number of synthetic faculty members whose forms are used as bodies")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed of the synthetic institution")
+        parser.add_argument("--distributions", metavar="PATH",
+                            help="JSON file overriding list length distributions, e.g. {\"publications\": {\"mean\": 40, \"max\": 200}}")
+        parser.add_argument("--section", nargs="+", choices=list(SECTION_SCHEMAS), help="Only benchmark these sections")
+        parser.add_argument("--repeat", type=int, default=5, help="Timed passes over the bodies; the fastest is reported")
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+
+    def handle(self, *args, **options):
+        bodies = self._bodies(options)
+        if not bodies:
+            raise CommandError("No request bodies were generated")
+
+        report = {"sections": {}}
+        for section, section_bodies in bodies.items():
+            report["sections"][section] = self._measure(section, section_bodies, options["repeat"])
+        all_bodies = [(section, body) for section, section_bodies in bodies.items() for body in section_bodies]
+        report["total"] = self._measure(None, all_bodies, options["repeat"])
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(f"Microseconds per body, fastest of {options['repeat']} passes")
+        self.stdout.write(f"{'section':<11}{'bodies':>8}{'avg bytes':>11}{'json.loads':>12}{'+ .get()':>10}{'orjson':>10}{'schema':>10}")
+        for section, result in [*report["sections"].items(), ("all", report["total"])]:
+            self.stdout.write(
+                f"{section:<11}{result['bodies']:>8}{result['average_bytes']:>11.0f}{result['json_loads_us']:>12.1f}"
+                f"{result['json_loads_get_us']:>10.1f}{result['decode_us']:>10.1f}{result['validate_us']:>10.1f}"
+            )
+        self.stdout.write(
+            "json.loads and orjson are the decoders alone; schema is the validation of an already decoded "
+            "body, which comes on top of the decoder"
+        )
+
+    def _bodies(self, options):
+        distributions = None
+        if options["distributions"]:
+            try:
+                with open(options["distributions"], encoding="utf-8") as file:
+                    distributions = json.load(file)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Invalid distributions file: {e}")
+        institution = SyntheticInstitution(options["seed"], distributions)
+        sections = set(options["section"] or SECTION_SCHEMAS)
+        bodies = {}
+        for index in range(options["faculty"]):
+            faculty = institution.faculty(index)
+            for section, payload, semester in institution.form_sections(faculty, "bench"):
+                if section not in sections:
+                    continue
+                body = {"user_id": faculty["user_id"], "data": payload}
+                if semester:
+                    body["semester"] = semester
+                bodies.setdefault(section, []).append(json.dumps(body).encode("utf-8"))
+        # Synthetic forms are valid, so a rejection here is a schema bug rather than a slow path
+        for section, section_bodies in bodies.items():
+            for body in section_bodies:
+                try:
+                    decode_section(section, body)
+                except SchemaError as e:
+                    raise CommandError(f"Synthetic section {section} body was rejected: {e}")
+        return bodies
+
+    @staticmethod
+    def _measure(section, bodies, repeat):
+        pairs = bodies if section is None else [(section, body) for body in bodies]
+
+        def json_loads():
+            for _, body in pairs:
+                json.loads(body)
+
+        def json_loads_get():
+            for _, body in pairs:
+                data = json.loads(body)
+                data.get("user_id")
+                _touch(data.get("data"))
+
+        def decode():
+            for _, body in pairs:
+                schemas.decode(body)
+
+        def validate():
+            for body_section, payload in decoded:
+                validate_section(body_section, payload["data"], ["data"])
+
+        timings = {}
+        for name, run in (("json_loads", json_loads), ("json_loads_get", json_loads_get), ("decode", decode), ("validate", validate)):
+            best = None
+            for _ in range(max(repeat, 1)):
+                # Validation converts payloads in place, so every pass starts from fresh copies
+                decoded = [(body_section, schemas.decode(body)) for body_section, body in pairs] if name == "validate" else None
+                started = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            timings[f"{name}_us"] = best / len(pairs) * 1e6
+
+        return {
+            "bodies": len(pairs),
+            "average_bytes": sum(len(body) for _, body in pairs) / len(pairs),
+            **timings,
+        }
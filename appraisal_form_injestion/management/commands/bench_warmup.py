@@ -0,0 +1,87 @@
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from appraisal_form_injestion.management.commands.bench_middleware import ROUTES, call_route
+from common.registry import warm_up_apps
+
+PROFILES = {"cold": "false", "warm": "true"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the first request of a fresh worker process against its steady state, with SERVICE_WARMUP off "
+        "and on. Each worker serves the routes from the in-memory storage through the WSGI handler"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5, help="Worker processes per profile; the median first request is reported")
+        parser.add_argument("--requests", type=int, default=300, help="Requests per route after the first, for the steady state")
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+        parser.add_argument("--worker", action="store_true", help="Internal: measure the profile this process was started with")
+
+    def handle(self, *args, **options):
+        if options["worker"]:
+            # As the WSGI entry point does; commands themselves never warm up
+            warm_up_apps()
+            self.stdout.write(json.dumps(self._measure(options["requests"])))
+            return
+
+        report = {}
+        for profile in PROFILES:
+            runs = [self._run_worker(profile, options) for _ in range(max(options["runs"], 1))]
+            report[profile] = {
+                "startup_ms": round(statistics.median(run["startup_ms"] for run in runs), 1),
+                "routes": {
+                    name: {
+                        "first_us": round(statistics.median(run["routes"][name]["first_us"] for run in runs), 1),
+                        "p50_us": round(statistics.median(run["routes"][name]["p50_us"] for run in runs), 1),
+                    }
+                    for name in runs[0]["routes"]
+                },
+            }
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"Median of {options['runs']} worker processes per profile, in microseconds")
+        self.stdout.write(f"{'':<24}{'cold first':>12}{'warm first':>12}{'steady p50':>12}")
+        for name in report["cold"]["routes"]:
+            cold, warm = report["cold"]["routes"][name], report["warm"]["routes"][name]
+            self.stdout.write(f"{name:<24}{cold['first_us']:>12}{warm['first_us']:>12}{warm['p50_us']:>12}")
+        self.stdout.write(f"{'startup ms':<24}{report['cold']['startup_ms']:>12}{report['warm']['startup_ms']:>12}")
+
+    def _run_worker(self, profile, options):
+        command = [sys.executable, str(settings.BASE_DIR / "manage.py"), "bench_warmup", "--worker",
+                   "--requests", str(options["requests"])]
+        environment = {**os.environ, "SERVICE_WARMUP": PROFILES[profile], "STORAGE_BACKEND": "memory", "TRAFFIC_CAPTURE_PATH": ""}
+        started = time.perf_counter()
+        result = subprocess.run(command, env=environment, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise CommandError(f"The {profile} worker failed:\n{result.stderr.strip()}")
+        run = json.loads(result.stdout.strip().splitlines()[-1])
+        # Interpreter start, django.setup() and any warm-up, less the requests the worker timed
+        run["startup_ms"] = (time.perf_counter() - started) * 1000 - run["requests_ms"]
+        return run
+
+    def _measure(self, requests):
+        from django.core.handlers.wsgi import WSGIHandler
+
+        logging.disable(logging.WARNING)
+        started = time.perf_counter()
+        handler = WSGIHandler()
+        routes = {}
+        for name, method, path, query, body in ROUTES:
+            body = json.dumps(body).encode("utf-8") if body is not None else b""
+            samples = []
+            for _ in range(requests + 1):
+                request_started = time.perf_counter()
+                call_route(handler, method, path, query, body)
+                samples.append(time.perf_counter() - request_started)
+            routes[name] = {"first_us": samples[0] * 1e6, "p50_us": statistics.median(samples[1:]) * 1e6}
+        return {"routes": routes, "requests_ms": (time.perf_counter() - started) * 1000}
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from appraisal_form_injestion.clients.attachment_mongo_client import AttachmentMongoClient
+from appraisal_form_injestion.clients.data_injestion_mongo_client import DataInjestionMongoClient
+from appraisal_form_injestion.clients.form_history_mongo_client import FormHistoryMongoClient
+from appraisal_form_injestion.clients.outbox_mongo_client import OutboxMongoClient
+from appraisal_form_injestion.clients.publication_index_mongo_client import PublicationIndexMongoClient
+from appraisal_form_injestion.clients.section_rows_mongo_client import SectionRowsMongoClient
+from faculty_admin.clients.faculty_data_mongo_client import FacultyDataMongoClient
+
+
+class Command(BaseCommand):
+    help = "Create the MongoDB indexes the application queries rely on"
+
+    def handle(self, *args, **options):
+        for client_class in (
+            AttachmentMongoClient,
+            DataInjestionMongoClient,
+            FacultyDataMongoClient,
+            FormHistoryMongoClient,
+            OutboxMongoClient,
+            PublicationIndexMongoClient,
+            SectionRowsMongoClient,
+        ):
+            client_class().ensure_indexes()
+            self.stdout.write(f"Ensured indexes for {client_class.__name__}")
@@ -0,0 +1,174 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from common.storage import BACKENDS, create_storage, set_storage
+from appraisal_form_injestion.clients.data_injestion_mongo_client import DataInjestionMongoClient
+from appraisal_form_injestion.clients.section_rows_mongo_client import SectionRowsMongoClient
+from appraisal_form_injestion.services.data_injestion_service import DataInjestionService
+from appraisal_form_injestion.synthetic import SyntheticInstitution, iter_cycles
+from faculty_admin.clients.faculty_data_mongo_client import FacultyDataMongoClient
+
+# Ingest endpoint of every section, for --calls
+SECTION_URL_NAMES = {
+    "1-10": "injest-item-1-to-10",
+    "11": "injest-item-11",
+    "12.1": "injest-item-12-1",
+    "12.3-12.4": "injest-item-12-3-to-12-4",
+    "13": "injest-item-13",
+    "14": "injest-item-14",
+    "15": "injest-item-15",
+    "16": "injest-item-16",
+    "17": "injest-item-17",
+    "18": "injest-item-18",
+    "19": "injest-item-19",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a deterministic synthetic institution (faculty directory and scored appraisal forms for "
+        "several cycles) and bulk load it, or write it as ingest NDJSON or load-test calls"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--faculty", type=int, default=5000, help="Number of faculty members")
+        parser.add_argument("--years", type=int, default=3, help="Number of cycles, ending with the active cycle")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed; the same seed always generates the same data")
+        parser.add_argument("--distributions", metavar="PATH",
+                            help="JSON file overriding list length distributions, e.g. {\"publications\": {\"mean\": 6, \"max\": 40}}")
+        parser.add_argument("--storage", choices=BACKENDS, help="Storage backend to load into instead of STORAGE_BACKEND")
+        parser.add_argument("--mongo-uri", help="MongoDB to load into instead of MONGO_URI")
+        parser.add_argument("--database", help="Database to load into instead of APPRAISAL_SYSTEM_MONGO_DB_NAME")
+        parser.add_argument("--drop", action="store_true", help="Drop the form, section rows and faculty collections first")
+        parser.add_argument("--batch-size", type=int, default=500, help="Documents per insert")
+        parser.add_argument("--writers", type=int, default=4, help="Concurrent insert threads")
+        output = parser.add_mutually_exclusive_group()
+        output.add_argument("--ndjson", metavar="PATH", help="Write active cycle {user_id, section, payload} records for ingest_forms instead of loading")
+        output.add_argument("--calls", metavar="PATH", help="Write active cycle ingest API calls for loadtest instead of loading")
+
+    def handle(self, *args, **options):
+        distributions = None
+        if options["distributions"]:
+            try:
+                with open(options["distributions"], encoding="utf-8") as file:
+                    distributions = json.load(file)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Invalid distributions file: {e}")
+        institution = SyntheticInstitution(options["seed"], distributions)
+        active_year = int(settings.APPRAISAL_ACTIVE_CYCLE[:4])
+        cycles = list(iter_cycles(active_year - options["years"] + 1, options["years"]))
+
+        if options["ndjson"] or options["calls"]:
+            self._write_records(institution, options)
+            return
+
+        # Must happen before the first client is created, since clients bind the backend and database on creation
+        if options["storage"] or options["mongo_uri"]:
+            set_storage(create_storage(options["storage"] or settings.STORAGE_BACKEND, uri=options["mongo_uri"]))
+        if options["database"]:
+            settings.APPRAISAL_SYSTEM_MONGO_DB_NAME = options["database"]
+        self._load(institution, cycles, options)
+
+    def _write_records(self, institution, options):
+        """Records of the active cycle only, since both consumers write to one cycle per run."""
+        path = options["ndjson"] or options["calls"]
+        count = 0
+        with open(path, "w", encoding="utf-8") as file:
+            for index in range(options["faculty"]):
+                faculty = institution.faculty(index)
+                for section, payload, semester in institution.form_sections(faculty, settings.APPRAISAL_ACTIVE_CYCLE):
+                    if options["ndjson"]:
+                        record = {"user_id": faculty["user_id"], "section": section, "payload": payload}
+                        if semester:
+                            record["semester"] = semester
+                    else:
+                        body = {"user_id": faculty["user_id"], "data": payload}
+                        if semester:
+                            body["semester"] = semester
+                        record = {"method": "POST", "path": reverse(SECTION_URL_NAMES[section]), "body": body}
+                    file.write(json.dumps(record) + "\n")
+                    count += 1
+        self.stdout.write(f"Wrote {count} records for {options['faculty']} faculty to {path}")
+
+    def _load(self, institution, cycles, options):
+        service = DataInjestionService()
+        form_client = DataInjestionMongoClient()
+        rows_client = SectionRowsMongoClient()
+        faculty_client = FacultyDataMongoClient()
+        if options["drop"]:
+            for collection in (settings.DATA_INJECTION_COLLECTION_NAME, settings.FORM_SECTION_ROWS_COLLECTION_NAME, settings.FACULTY_DATA_COLLECTION_NAME):
+                form_client.drop_collection(collection)
+
+        started = time.monotonic()
+        batch_size = options["batch_size"]
+        counts = {"faculty": 0, "forms": 0, "rows": 0}
+        skipped = {"forms": 0, "rows": 0}
+        faculty_batch, form_batch, row_batch = [], [], []
+
+        with ThreadPoolExecutor(max_workers=options["writers"], thread_name_prefix="synthetic-load") as executor:
+            in_flight = {}
+
+            def collect(future):
+                name = in_flight.pop(future)
+                result = future.result()
+                if name in skipped:
+                    # Forms and rows already stored by an earlier run without --drop are skipped
+                    counts[name] += result[0]
+                    skipped[name] += result[1]
+
+            def submit(insert, documents, name):
+                # Bound the documents held in memory to a few batches per writer
+                while len(in_flight) >= options["writers"] * 2:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future)
+                in_flight[executor.submit(insert, documents)] = name
+                if name == "faculty":
+                    counts[name] += len(documents)
+
+            for index in range(options["faculty"]):
+                faculty = institution.faculty(index)
+                faculty_batch.append(faculty)
+                for cycle in cycles:
+                    data = {}
+                    for section, payload, semester in institution.form_sections(faculty, cycle):
+                        section_data, _ = service.score_section(section, payload, semester)
+                        data.update(section_data)
+                    stored, child_rows = service.split_child_rows(data)
+                    form_batch.append(form_client.build_form_document(faculty["user_id"], stored, cycle))
+                    for section, (rows, api_scores) in child_rows.items():
+                        row_batch.extend(rows_client.build_row_documents(faculty["user_id"], section, rows, api_scores, cycle))
+
+                if len(faculty_batch) >= batch_size:
+                    submit(faculty_client.upsert_faculty_batch, faculty_batch, "faculty")
+                    faculty_batch = []
+                if len(form_batch) >= batch_size:
+                    submit(form_client.insert_form_documents, form_batch, "forms")
+                    form_batch = []
+                if len(row_batch) >= batch_size:
+                    submit(rows_client.insert_row_documents, row_batch, "rows")
+                    row_batch = []
+
+            for insert, documents, name in ((faculty_client.upsert_faculty_batch, faculty_batch, "faculty"),
+                                            (form_client.insert_form_documents, form_batch, "forms"),
+                                            (rows_client.insert_row_documents, row_batch, "rows")):
+                if documents:
+                    submit(insert, documents, name)
+            for future in list(in_flight):
+                collect(future)
+
+        elapsed = time.monotonic() - started
+        total = sum(counts.values())
+        self.stdout.write(
+            f"Loaded {counts['faculty']} faculty, {counts['forms']} form documents over {len(cycles)} cycles "
+            f"and {counts['rows']} section rows in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.0f} documents/s)"
+        )
+        if any(skipped.values()):
+            self.stdout.write(f"Skipped {skipped['forms']} form documents and {skipped['rows']} section rows already stored")
+        # Indexes are built once after the load, which is faster than maintaining them per insert
+        for client in (form_client, rows_client, faculty_client):
+            client.ensure_indexes()
+        self.stdout.write("Indexes ensured")
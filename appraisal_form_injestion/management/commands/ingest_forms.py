@@ -0,0 +1,37 @@
+import json
+import sys
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from appraisal_form_injestion.clients.data_injestion_mongo_client import MissingUniqueIndex
+from appraisal_form_injestion.services.form_bulk_ingest_service import FormBulkIngestService
+
+
+class Command(BaseCommand):
+    help = "Bulk ingest appraisal form sections from an NDJSON file of {user_id, section, payload} records"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="NDJSON file, or - to read standard input")
+        parser.add_argument("--cycle", help="Cycle id (default: the active cycle)")
+        parser.add_argument("--batch-size", type=int, help="Records per bulk write")
+        parser.add_argument("--workers", type=int, help="Scoring threads")
+        parser.add_argument("--quiet", action="store_true", help="Only print failed lines and the summary")
+
+    def handle(self, *args, **options):
+        service = FormBulkIngestService()
+        if options["path"] == "-":
+            self._ingest(service, sys.stdin.buffer, options)
+            return
+        path = Path(options["path"])
+        if not path.exists():
+            raise CommandError(f"File not found: {path}")
+        with path.open("rb") as file:
+            self._ingest(service, file, options)
+
+    def _ingest(self, service, file, options):
+        try:
+            for result in service.ingest(file, options["cycle"], options["batch_size"], options["workers"]):
+                if options["quiet"] and result.get("status") == "saved":
+                    continue
+                self.stdout.write(json.dumps(result, default=str))
+        except MissingUniqueIndex as e:
+            raise CommandError(str(e))
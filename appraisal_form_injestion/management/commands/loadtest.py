@@ -0,0 +1,65 @@
+import json
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from common.storage import BACKENDS, create_storage, set_storage
+from common.loadtest import HttpTarget, InProcessTarget, LoadRun, load_calls
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a JSON lines file of API calls (as recorded with TRAFFIC_CAPTURE_PATH) against the API "
+        "and report per-route throughput, p50/p95/p99 latency and error rates"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="JSON lines file of {method, path, query, body} calls")
+        parser.add_argument("--url", help="Base URL of a running server (default: call the views in process)")
+        parser.add_argument("--mongo-uri", help="In process only: MongoDB to use instead of MONGO_URI, e.g. a local mongod")
+        parser.add_argument("--storage", choices=BACKENDS,
+                            help="In process only: storage backend instead of STORAGE_BACKEND, e.g. memory to run without MongoDB")
+        parser.add_argument("--concurrency", type=int, default=10, help="Concurrent workers")
+        parser.add_argument("--ramp-up", type=float, default=0.0, help="Seconds over which workers are started")
+        parser.add_argument("--think-time", type=float, default=0.0, help="Mean seconds a worker waits between calls")
+        parser.add_argument("--loops", type=int, default=1, help="Passes over the calls")
+        parser.add_argument("--duration", type=float, help="Run for this many seconds, cycling over the calls")
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.exists():
+            raise CommandError(f"File not found: {path}")
+        calls = load_calls(str(path))
+        if not calls:
+            raise CommandError(f"No replayable calls in {path}")
+
+        if options["url"]:
+            if options["mongo_uri"] or options["storage"]:
+                raise CommandError("--mongo-uri and --storage only apply when calling the views in process")
+            target = HttpTarget(options["url"])
+        else:
+            self._configure_storage(options)
+            target = InProcessTarget()
+
+        run = LoadRun(calls, target, options["concurrency"], options["ramp_up"], options["think_time"], options["loops"], options["duration"])
+        report = run.run()
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self._print_report(report)
+
+    @staticmethod
+    def _configure_storage(options):
+        # Must happen before the first client is created, since clients bind the backend on creation
+        if options["storage"] or options["mongo_uri"]:
+            set_storage(create_storage(options["storage"] or "mongo", uri=options["mongo_uri"]))
+
+    def _print_report(self, report):
+        header = f"{'route':<28}{'requests':>9}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}{'4xx':>8}"
+        self.stdout.write(f"{report['elapsed_seconds']}s at concurrency {report['concurrency']}")
+        self.stdout.write(header)
+        rows = list(report["routes"].items()) + [("overall", report["overall"])]
+        for name, stats in rows:
+            self.stdout.write(
+                f"{name:<28}{stats['requests']:>9}{stats['throughput_rps']:>9}{stats['p50_ms']:>9}{stats['p95_ms']:>9}"
+                f"{stats['p99_ms']:>9}{stats['error_rate']:>8.1%}{stats['client_error_rate']:>8.1%}"
+            )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from appraisal_form_injestion.clients.data_injestion_mongo_client import DataInjestionMongoClient
+
+
+class Command(BaseCommand):
+    help = "Move item 12.1 data stored under per-semester keys into the semesters array"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cycle", help="Cycle id (default: the active cycle)")
+
+    def handle(self, *args, **options):
+        migrated = DataInjestionMongoClient().migrate_legacy_semesters(options["cycle"])
+        self.stdout.write(f"Migrated item 12.1 semesters for {migrated} form documents")
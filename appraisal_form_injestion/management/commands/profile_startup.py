@@ -0,0 +1,159 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+PROJECT_PACKAGES = ("appraisal_form_injestion", "faculty_admin", "common", "faculty_apprasial_system")
+
+# Run in a fresh interpreter: load the WSGI application as a server worker does, then answer one request
+WORKER = """
+import json, sys, time
+started = time.perf_counter()
+from faculty_apprasial_system.wsgi import application
+booted = time.perf_counter()
+from common.wsgi import call_wsgi
+status = call_wsgi(application, "GET", sys.argv[1], sys.argv[2])
+responded = time.perf_counter()
+print(json.dumps({"status": status, "boot_ms": (booted - started) * 1000, "first_request_ms": (responded - booted) * 1000}), flush=True)
+"""
+
+
+def parse_importtime(stderr:str):
+    """(module, self us, cumulative us, depth) for each line python -X importtime wrote."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # The header line
+        module = name.strip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((module, int(self_us), int(cumulative_us), depth))
+    return imports
+
+
+class Command(BaseCommand):
+    help = (
+        "Profile the cold start of an API worker: the time a fresh interpreter takes to load the WSGI application "
+        "and answer its first request, with SERVICE_WARMUP off and on, and the -X importtime breakdown of what it "
+        "imports. Fails when the time to first response is over the budget, so it can run as a benchmark in CI"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5, help="Workers started per profile; medians are reported")
+        parser.add_argument("--path", default="/api/get-item-by-section/", help="Path of the first request")
+        parser.add_argument("--query", default="user_id=F00001&section=18", help="Query string of the first request")
+        parser.add_argument("--storage", default="memory", help="STORAGE_BACKEND of the workers")
+        parser.add_argument("--top", type=int, default=15, help="Packages and modules listed in the import breakdown")
+        parser.add_argument("--budget-ms", type=float, default=settings.STARTUP_BUDGET_MS,
+                            help="Maximum median time to first response, in milliseconds (default STARTUP_BUDGET_MS)")
+        parser.add_argument("--record", metavar="PATH", help="Append the results as a JSON line to this file, to track them over time")
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+
+    def handle(self, *args, **options):
+        report = {
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "path": options["path"],
+            "storage": options["storage"],
+            "budget_ms": options["budget_ms"],
+            "profiles": {},
+        }
+        for profile, warmup in (("lazy", "false"), ("warm", "true")):
+            runs = [self._run_worker(warmup, options) for _ in range(max(options["runs"], 1))]
+            result = {
+                key: round(statistics.median(run[key] for run in runs), 1)
+                for key in ("interpreter_ms", "boot_ms", "first_request_ms", "first_response_ms")
+            }
+            result["imports"] = self._import_breakdown(warmup, options)
+            report["profiles"][profile] = result
+
+        over_budget = [profile for profile, result in report["profiles"].items() if result["first_response_ms"] > options["budget_ms"]]
+        report["within_budget"] = not over_budget
+
+        if options["record"]:
+            with open(options["record"], "a", encoding="utf-8") as file:
+                file.write(json.dumps(report) + "\n")
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self._print(report, options)
+        if over_budget:
+            raise CommandError(
+                f"Time to first response is over the {options['budget_ms']:.0f} ms budget with SERVICE_WARMUP "
+                + ", ".join(f"{'on' if profile == 'warm' else 'off'} ({report['profiles'][profile]['first_response_ms']} ms)" for profile in over_budget)
+            )
+
+    def _environment(self, warmup, options):
+        return {
+            **os.environ,
+            "PYTHONPATH": os.pathsep.join(filter(None, [str(settings.BASE_DIR), os.environ.get("PYTHONPATH")])),
+            "SERVICE_WARMUP": warmup,
+            "STORAGE_BACKEND": options["storage"],
+            "TRAFFIC_CAPTURE_PATH": "",
+        }
+
+    def _run_worker(self, warmup, options):
+        command = [sys.executable, "-c", WORKER, options["path"], options["query"]]
+        started = time.perf_counter()
+        worker = subprocess.Popen(command, env=self._environment(warmup, options), cwd=settings.BASE_DIR,
+                                  stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        # Timed to the result line rather than to exit, which also includes interpreter shutdown
+        line = worker.stdout.readline()
+        first_response_ms = (time.perf_counter() - started) * 1000
+        _, stderr = worker.communicate()
+        if worker.returncode != 0 or not line:
+            raise CommandError(f"The startup worker failed:\n{stderr.strip()}")
+        run = json.loads(line)
+        if run["status"] != 200:
+            raise CommandError(f"GET {options['path']} returned {run['status']}")
+        run["first_response_ms"] = first_response_ms
+        run["interpreter_ms"] = first_response_ms - run["boot_ms"] - run["first_request_ms"]
+        return run
+
+    def _import_breakdown(self, warmup, options):
+        command = [sys.executable, "-X", "importtime", "-c", WORKER, options["path"], options["query"]]
+        result = subprocess.run(command, env=self._environment(warmup, options), cwd=settings.BASE_DIR, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise CommandError(f"The startup worker failed:\n{result.stderr.strip()}")
+        imports = parse_importtime(result.stderr)
+        packages = {}
+        for module, self_us, _, _ in imports:
+            package = module.split(".", 1)[0]
+            packages[package] = packages.get(package, 0) + self_us
+        top = options["top"]
+        return {
+            "modules": len(imports),
+            "total_ms": round(sum(self_us for _, self_us, _, _ in imports) / 1000, 1),
+            "project_ms": round(sum(us for package, us in packages.items() if package in PROJECT_PACKAGES) / 1000, 1),
+            "packages_ms": {package: round(us / 1000, 1) for package, us in sorted(packages.items(), key=lambda item: -item[1])[:top]},
+            "slowest_ms": {module: round(self_us / 1000, 1) for module, self_us, _, _ in sorted(imports, key=lambda item: -item[1])[:top]},
+        }
+
+    def _print(self, report, options):
+        lazy, warm = report["profiles"]["lazy"], report["profiles"]["warm"]
+        self.stdout.write(f"GET {report['path']} on a fresh worker, median of {options['runs']} runs, in milliseconds")
+        self.stdout.write(f"{'SERVICE_WARMUP':<28}{'off':>10}{'on':>10}")
+        for key, label in (("interpreter_ms", "interpreter start"), ("boot_ms", "load WSGI application"),
+                           ("first_request_ms", "first request"), ("first_response_ms", "time to first response")):
+            self.stdout.write(f"{label:<28}{lazy[key]:>10}{warm[key]:>10}")
+        for key, label in (("modules", "modules imported"), ("total_ms", "import time"), ("project_ms", "of which project code")):
+            self.stdout.write(f"{label:<28}{lazy['imports'][key]:>10}{warm['imports'][key]:>10}")
+
+        self.stdout.write("")
+        self.stdout.write("Import time by top-level package, self time summed, SERVICE_WARMUP on")
+        for package, ms in warm["imports"]["packages_ms"].items():
+            self.stdout.write(f"  {package:<40}{ms:>8}")
+        self.stdout.write("Slowest modules, self time")
+        for module, ms in warm["imports"]["slowest_ms"].items():
+            self.stdout.write(f"  {module:<40}{ms:>8}")
+        self.stdout.write("")
+        verdict = "within" if report["within_budget"] else "OVER"
+        self.stdout.write(f"Budget {report['budget_ms']:.0f} ms: {verdict}")
@@ -0,0 +1,72 @@
+import json
+import signal
+import threading
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from appraisal_form_injestion.services.form_history_service import FormHistorySink
+from appraisal_form_injestion.services.outbox_service import OutboxService
+from common.sinks import create_sink
+
+
+class Command(BaseCommand):
+    help = (
+        "Relay section change events from the outbox to a sink in batches, moving the consumer's checkpoint "
+        "after each batch is delivered. Events are delivered at least once; consumers deduplicate by event_id"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--consumer", help="Name of the checkpoint to resume from and advance (default FORM_HISTORY_CONSUMER for the history sink, otherwise default)")
+        # The queue sink is in-process, for relays run on a thread next to their consumer.
+        # The history sink writes the form history, which is derived from the events while the outbox is enabled
+        parser.add_argument("--sink", choices=["file", "webhook", "history"], help="Where to deliver the events")
+        parser.add_argument("--target", help="File path or webhook URL")
+        parser.add_argument("--batch-size", type=int, help="Events per delivery (default OUTBOX_RELAY_BATCH_SIZE)")
+        parser.add_argument("--interval", type=float, help="Seconds to wait when the outbox is drained (default OUTBOX_RELAY_INTERVAL)")
+        parser.add_argument("--settle-ms", type=int, help="Milliseconds to wait on a gap in event positions before skipping it (default OUTBOX_RELAY_SETTLE_MS)")
+        parser.add_argument("--once", action="store_true", help="Relay until the outbox is drained, then exit")
+        parser.add_argument("--status", action="store_true", help="Print the checkpoint of every consumer and exit")
+        parser.add_argument("--prune", action="store_true", help="Delete the events every consumer has been delivered and exit")
+
+    def handle(self, *args, **options):
+        service = OutboxService()
+        if options["status"]:
+            for checkpoint in service.get_checkpoints():
+                self.stdout.write(json.dumps(checkpoint, default=str))
+            return
+        if options["prune"]:
+            self.stdout.write(f"Deleted {service.prune()} delivered events")
+            return
+        if not options["sink"]:
+            raise CommandError("--sink is required to relay events")
+
+        if not options["consumer"]:
+            options["consumer"] = settings.FORM_HISTORY_CONSUMER if options["sink"] == "history" else "default"
+        try:
+            sink = FormHistorySink() if options["sink"] == "history" else create_sink(options["sink"], options["target"])
+        except (ValueError, OSError) as e:
+            raise CommandError(str(e))
+        try:
+            if options["once"]:
+                delivered = self._drain(service, sink, options)
+            else:
+                stop = threading.Event()
+                signal.signal(signal.SIGTERM, lambda *_: stop.set())
+                try:
+                    delivered = service.relay(options["consumer"], sink, options["batch_size"], options["interval"], options["settle_ms"], stop)
+                except KeyboardInterrupt:
+                    delivered = None
+        finally:
+            sink.close()
+        if delivered is not None:
+            self.stdout.write(f"Delivered {delivered} events to {options['consumer']}")
+
+    def _drain(self, service, sink, options):
+        delivered = 0
+        while True:
+            try:
+                count = service.relay_batch(options["consumer"], sink, options["batch_size"], options["settle_ms"])
+            except Exception as e:
+                raise CommandError(f"Relay stopped after {delivered} events: {e}")
+            if not count:
+                return delivered
+            delivered += count
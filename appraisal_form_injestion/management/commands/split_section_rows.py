@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from appraisal_form_injestion.constants import CHILD_ROW_SECTIONS
+from appraisal_form_injestion.services.data_injestion_service import DataInjestionService
+
+
+class Command(BaseCommand):
+    help = "Move inline rows of list sections into the section rows collection"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--section", action="append", choices=CHILD_ROW_SECTIONS, help="Section to move (default: all list sections)")
+        parser.add_argument("--cycle", help="Cycle id (default: the active cycle)")
+
+    def handle(self, *args, **options):
+        service = DataInjestionService()
+        for section in options["section"] or CHILD_ROW_SECTIONS:
+            moved = service.split_section_rows(section, options["cycle"])
+            self.stdout.write(f"Moved rows of section {section} for {moved} form documents")
@@ -0,0 +1,413 @@
+"""
+Typed schemas for the section payloads posted to the ingest endpoints,
+declared as msgspec Structs.
+
+Request bodies are decoded from bytes with orjson and each section payload is
+then converted to its Struct type with msgspec, so a malformed value is
+reported with its path, e.g. "data[3].impact_factor: expected a number, got
+'n/a'", before any scoring or storage work. Validated payloads stay the dicts
+and lists they were decoded as, since the scorers, history diffs and storage
+all work on those: the converted values are written back into them, so
+numeric strings in number fields become numbers, booleans given as strings
+become booleans, missing fields with a default are filled in, and keys a
+schema does not declare are kept as they are.
+"""
+import math
+import re
+from datetime import date
+from functools import lru_cache
+from typing import Dict, List, Optional, Union
+import msgspec
+import orjson
+from msgspec import UNSET, Struct, UnsetType, field
+
+class SchemaError(ValueError):
+    """A payload that does not match its schema. path locates the offending value."""
+    def __init__(self, message:str, path:List = None):
+        super().__init__(message)
+        self.message = message
+        self.path = path if path is not None else []
+
+    def __str__(self):
+        if not self.path:
+            return self.message
+        return f"{format_path(self.path)}: {self.message}"
+
+def format_path(path:List) -> str:
+    text = ""
+    for part in path:
+        if isinstance(part, int):
+            text += f"[{part}]"
+        elif not part.isidentifier():
+            text += f'["{part}"]'
+        else:
+            text += f".{part}" if text else part
+    return text
+
+def decode(body) -> object:
+    """Decode a JSON request body (bytes or str)."""
+    try:
+        return orjson.loads(body)
+    except ValueError as e:
+        raise SchemaError(f"Invalid JSON: {e}")
+
+@lru_cache(maxsize=4096)
+def parse_date(value:str) -> Optional[date]:
+    """
+    A dd-mm-YYYY string as a date, or None if it is not one. Much cheaper than
+    strptime, and cached since forms repeat a small set of dates.
+    """
+    parts = value.split("-")
+    if len(parts) != 3:
+        return None
+    day, month, year = parts
+    if not (0 < len(day) <= 2 and 0 < len(month) <= 2 and len(year) == 4 and day.isdigit() and month.isdigit() and year.isdigit()):
+        return None
+    try:
+        return date(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+# Number fields also accept numeric strings, and "" as null, as the form
+# inputs send them; Record converts them once msgspec has checked the types.
+# Fields with a numeric default, which the scorers do arithmetic on, take
+# their default for "" and null instead.
+Number = Union[int, float, str, None, UnsetType]
+OptionalString = Union[str, None, UnsetType]
+
+def invalid(key:str, message:str):
+    """Reject the value of one field of a record, from __post_init__."""
+    # msgspec reports the record's path; the field is carried in the message and split off again in convert()
+    return ValueError(f"{key}: {message}")
+
+class Record(Struct, kw_only=True):
+    """
+    Base of the section payload Structs. Converts Number fields, and runs
+    clean(), for checks across fields, once every field has its type.
+    """
+    def __post_init__(self):
+        for name, key, default in _number_fields(type(self)):
+            value = getattr(self, name)
+            if type(value) is str:
+                value = _parse_number(key, value)
+                setattr(self, name, value)
+            if value is None and default is not None:
+                setattr(self, name, default)
+        self.clean()
+
+    def clean(self):
+        """Checks across fields. Raise invalid() to reject the record."""
+
+@lru_cache(maxsize=None)
+def _number_fields(cls) -> tuple:
+    return tuple(
+        (info.name, info.encode_name, info.default if type(info.default) in (int, float) else None)
+        for info in msgspec.structs.fields(cls) if info.type == Number
+    )
+
+def _parse_number(key:str, value:str):
+    text = value.strip()
+    if not text:
+        return None
+    try:
+        number = int(text) if text.lstrip("+-").isdigit() else float(text)
+    except ValueError:
+        raise invalid(key, f"expected a number, got {value!r}")
+    if not math.isfinite(number):
+        raise invalid(key, f"expected a finite number, got {value!r}")
+    return number
+
+def _check_choice(key:str, value, choices:List[str]):
+    if value is not UNSET and value is not None and value.lower() not in choices:
+        raise invalid(key, f"expected one of {', '.join(choices)}, got {value!r}")
+
+def _check_date(key:str, value:str):
+    if value and parse_date(value) is None:
+        raise invalid(key, f"expected a date like 31-07-2024, got {value!r}")
+
+# Section payloads
+
+class GeneralDetails(Record):
+    full_name: OptionalString = UNSET
+    present_designation: OptionalString = UNSET
+    qualifications: OptionalString = UNSET
+    department: OptionalString = UNSET
+    institute_joining_date: OptionalString = UNSET
+    first_designation: OptionalString = UNSET
+    present_pay_scale_and_pay: Number = field(name="present_pay_scale_&_pay", default=UNSET)
+    areas_of_specialization_and_current_interest: OptionalString = UNSET
+    additional_qualification_acquired: OptionalString = UNSET
+    pursuing_higher_studies: OptionalString = UNSET
+
+EVENT_STATUSES = ["attended", "organized"]
+EVENT_TYPES = ["course", "program", "seminar", "conference", "workshop"]
+
+class Event(Record, kw_only=True):
+    title: OptionalString = UNSET
+    start_date: str
+    end_date: str
+    # The portal sends true for organised events and false for attended ones
+    attended_or_organized: Union[str, bool] = field(name="attended/organized")
+    program_type: str
+    is_chief_organizer: bool = False
+    sponsoring_agency: OptionalString = UNSET
+    organisation_and_place: OptionalString = field(name="organisation_&_place", default=UNSET)
+
+    def clean(self):
+        if type(self.attended_or_organized) is bool:
+            self.attended_or_organized = "organized" if self.attended_or_organized else "attended"
+        _check_choice("attended/organized", self.attended_or_organized, EVENT_STATUSES)
+        _check_choice("program_type", self.program_type, EVENT_TYPES)
+        _check_date("start_date", self.start_date)
+        _check_date("end_date", self.end_date)
+        # Courses, programs and organised events are scored by duration
+        if self.program_type.lower() in ("course", "program") or self.attended_or_organized.lower() == "organized":
+            for key in ("start_date", "end_date"):
+                if not getattr(self, key):
+                    raise invalid(key, "is required for courses, programs and organised events")
+            if parse_date(self.end_date) < parse_date(self.start_date):
+                raise invalid("end_date", "must not be before start_date")
+
+class Course(Record):
+    course_code: OptionalString = UNSET
+    course_title: OptionalString = UNSET
+    contact_hr_per_week: Number = UNSET
+    total_hour_scheduled: Number = UNSET
+    total_hour_engaged: Number = UNSET
+
+class ProjectsGuided(Record):
+    number_of_projects_guided: Number = UNSET
+    number_of_students_guided: Number = UNSET
+
+class ExamDuty(Record):
+    activity: OptionalString = UNSET
+    class_: OptionalString = field(name="class", default=UNSET)
+    t1: Number = UNSET
+    t2: Number = UNSET
+    t3: Number = UNSET
+
+class ProjectGuidance(Record):
+    item12_3: ProjectsGuided = field(name="12.3")
+    item12_4: List[ExamDuty] = field(name="12.4", default_factory=list)
+
+class ClubActivity(Record):
+    name_of_club: OptionalString = UNSET
+    played_lead_role: bool = False
+    details_of_activities: OptionalString = UNSET
+
+class CommitteeRole(Record):
+    role: OptionalString = UNSET
+    details_of_activities: OptionalString = UNSET
+
+class AdministrativePosition(Record):
+    position_type: OptionalString = UNSET
+    details_of_activities: OptionalString = UNSET
+
+class ExtensionActivity(Record):
+    nature: OptionalString = UNSET
+    details_of_activities: OptionalString = UNSET
+
+class OtherContribution(Record):
+    points: Number = 0
+    details_of_activities: OptionalString = UNSET
+
+class StudentActivities(Record, forbid_unknown_fields=True):
+    A: Union[List[ClubActivity], None, UnsetType] = UNSET
+    B: Union[List[CommitteeRole], None, UnsetType] = UNSET
+    C: Union[List[AdministrativePosition], None, UnsetType] = UNSET
+    D: Union[List[ExtensionActivity], None, UnsetType] = UNSET
+    E: Union[List[OtherContribution], None, UnsetType] = UNSET
+
+class Author(Record):
+    name: OptionalString = UNSET
+    author_type: OptionalString = UNSET
+
+PUBLICATION_TYPES = ["ij", "nj", "oj", "ic", "nc", "lc", "pn", "oa"]
+
+class Publication(Record, kw_only=True):
+    title_and_complete_reference: OptionalString = UNSET
+    pub_type: str
+    isbn_issn: OptionalString = UNSET
+    issn: OptionalString = UNSET
+    # Left unset rather than defaulted, so the journal catalog can fill it in
+    indexed: Union[bool, None, UnsetType] = UNSET
+    impact_factor: Number = 0
+    user_author_type: OptionalString = UNSET
+    other_authors: Union[List[Author], None, UnsetType] = UNSET
+
+    def clean(self):
+        _check_choice("pub_type", self.pub_type, PUBLICATION_TYPES)
+        # Other journals are scored by whether they carry an ISBN/ISSN
+        if self.pub_type.upper() == "OJ" and not self.isbn_issn:
+            raise invalid("isbn_issn", "is required for other journals (OJ)")
+
+class Book(Record):
+    title_and_complete_reference: OptionalString = UNSET
+    publisher_type: OptionalString = UNSET
+    is_chapter: bool = False
+    number_of_chapters: Number = 0
+    user_author_type: OptionalString = UNSET
+    other_authors: Union[List[Author], None, UnsetType] = UNSET
+
+    def clean(self):
+        _check_choice("publisher_type", self.publisher_type, ["ip", "np", "lp"])
+
+class Project(Record):
+    title: OptionalString = UNSET
+    sponsoring_agency: OptionalString = UNSET
+    duration: OptionalString = UNSET
+    sanction_date: OptionalString = UNSET
+    status: OptionalString = UNSET
+    is_hss: bool = False
+    amount_sanctioned: Number = 0
+    is_consultancy: bool = False
+    user_author_type: OptionalString = UNSET
+    other_authors: Union[List[Author], None, UnsetType] = UNSET
+
+class ResearchStudent(Record):
+    title: OptionalString = UNSET
+    enroll_no_and_name: OptionalString = UNSET
+    degree: OptionalString = UNSET
+    status: OptionalString = UNSET
+    months_ongoing: Number = 0
+    user_author_type: OptionalString = UNSET
+    other_authors: Union[List[Author], None, UnsetType] = UNSET
+
+class Membership(Record):
+    position_type: OptionalString = UNSET
+    membership_details: OptionalString = UNSET
+
+class InstituteAward(Record):
+    details: OptionalString = UNSET
+    points: Number = 0
+
+class Award(Record):
+    details: OptionalString = UNSET
+
+class OtherInformation(Record, forbid_unknown_fields=True):
+    self_: Union[List[InstituteAward], None, UnsetType] = field(name="self", default=UNSET)
+    national: Union[List[Award], None, UnsetType] = UNSET
+    international: Union[List[Award], None, UnsetType] = UNSET
+
+SECTION_SCHEMAS = {
+    "1-10": GeneralDetails,
+    "11": List[Event],
+    "12.1": List[Course],
+    "12.3-12.4": ProjectGuidance,
+    "13": StudentActivities,
+    "14": List[Publication],
+    "15": List[Book],
+    "16": List[Project],
+    "17": List[ResearchStudent],
+    "18": List[Membership],
+    "19": OtherInformation,
+}
+
+# msgspec error messages, e.g. "Expected `str | null`, got `int` - at `$[0].title`"
+MSGSPEC_ERROR = re.compile(r"^(?P<message>.*?)(?: - at `\$(?P<path>.*)`)?$", re.S)
+MSGSPEC_PATH_PART = re.compile(r"\[(\d+)\]|\.([^.\[]+)")
+FIELD_MESSAGE = re.compile(r"^(?P<key>[^\s:]+): (?P<message>.*)$", re.S)
+MSGSPEC_TYPE_NAMES = {"str": "a string", "int": "a number", "float": "a number", "bool": "true or false",
+                      "array": "an array", "object": "an object", "null": "null"}
+
+def _schema_error(error:msgspec.ValidationError) -> SchemaError:
+    match = MSGSPEC_ERROR.match(str(error))
+    message = match["message"]
+    path = []
+    for index, key in MSGSPEC_PATH_PART.findall(match["path"] or ""):
+        if index:
+            path.append(int(index))
+        elif key.isdigit() and path and type(path[-1]) is str and path[-1].isdigit():
+            # msgspec does not quote keys, so "12.3" comes out as two parts
+            path[-1] += f".{key}"
+        else:
+            path.append(key)
+    field_message = FIELD_MESSAGE.match(message)
+    if field_message:
+        path.append(field_message["key"])
+        message = field_message["message"]
+    elif message.startswith("Object missing required field `"):
+        path.append(message.split("`")[1])
+        message = "is required"
+    elif message.startswith("Object contains unknown field `"):
+        path.append(message.split("`")[1])
+        message = "unknown field"
+    elif message.startswith("Expected `"):
+        expected, _, got = message[len("Expected `"):].partition("`, got `")
+        kinds = [MSGSPEC_TYPE_NAMES.get(kind.strip(), kind.strip()) for kind in expected.split("|")]
+        kinds = [kind for kind in dict.fromkeys(kinds) if kind != "null"] or ["null"]
+        if "a number" in kinds and "a string" in kinds:
+            # Number fields, whose numeric strings are converted afterwards
+            kinds.remove("a string")
+        message = f"expected {' or '.join(kinds)}, got {got.rstrip('`')}"
+    return SchemaError(message, path)
+
+def _merge(original, converted):
+    """Write the converted values back into the decoded payload, keeping keys the schema does not declare."""
+    if type(original) is dict and type(converted) is dict:
+        for key, value in converted.items():
+            original[key] = _merge(original.get(key), value)
+        return original
+    if type(original) is list and type(converted) is list and len(original) == len(converted):
+        for index, value in enumerate(converted):
+            original[index] = _merge(original[index], value)
+        return original
+    return converted
+
+def convert(payload, schema, path:List = None):
+    """Validate a decoded payload against a Struct type in place and return it."""
+    try:
+        converted = msgspec.to_builtins(msgspec.convert(payload, schema, strict=False))
+    except msgspec.ValidationError as e:
+        error = _schema_error(e)
+        error.path[:0] = path or []
+        raise error
+    return _merge(payload, converted)
+
+def validate_section(section:str, payload, path:List = None):
+    """
+    Validate a decoded section payload in place and return it.
+
+    Raises:
+        SchemaError: If the payload does not match the section's schema; its path
+                     starts with the given path.
+    """
+    schema = SECTION_SCHEMAS.get(section)
+    if schema is None:
+        raise SchemaError(f"Unknown section: {section}")
+    if payload is None:
+        raise SchemaError("is required", list(path or []))
+    return convert(payload, schema, path)
+
+def decode_section(section:str, body) -> Dict:
+    """
+    Decode and validate the body of a single section request, {"user_id",
+    "data", "semester"?, "expected_version"?}, and return it with the
+    validated payload under "data". Items 1 to 10 are also accepted as a flat
+    {"user_id", "full_name", ...} object, as the portal posts them, and
+    stored whole as before. expected_version is left to the views, which
+    also accept it from If-Match.
+    """
+    if section not in SECTION_SCHEMAS:
+        raise SchemaError(f"Unknown section: {section}")
+    envelope = decode(body)
+    if type(envelope) is not dict:
+        raise SchemaError("Request body must be a JSON object")
+    if section == "1-10" and "data" not in envelope:
+        envelope = {
+            "user_id": envelope.get("user_id"),
+            "expected_version": envelope.get("expected_version"),
+            "data": {key: value for key, value in envelope.items() if key != "expected_version"},
+        }
+        if envelope["expected_version"] is None:
+            del envelope["expected_version"]
+
+    user_id = envelope.get("user_id")
+    if type(user_id) is not str or not user_id.strip():
+        raise SchemaError("is required" if user_id in (None, "") else "expected a non-blank string", ["user_id"])
+    if section == "12.1":
+        semester = envelope.get("semester")
+        if type(semester) is not str or not semester.strip():
+            raise SchemaError("is required" if semester in (None, "") else "expected a non-blank string", ["semester"])
+    envelope["data"] = validate_section(section, envelope.get("data"), ["data"])
+    return envelope
@@ -0,0 +1,102 @@
+import gzip
+import logging
+from typing import List,Dict
+from bson import json_util
+from django.conf import settings
+from appraisal_form_injestion.clients.data_injestion_mongo_client import DataInjestionMongoClient
+from appraisal_form_injestion.clients.form_history_mongo_client import FormHistoryMongoClient
+from appraisal_form_injestion.clients.section_rows_mongo_client import SectionRowsMongoClient, stores_child_rows
+from common.registry import get_instance
+
+logger = logging.getLogger(__name__)
+
+class AppraisalCycleService:
+    def __init__(self):
+        self.data_injestion_mongo_client = get_instance(DataInjestionMongoClient)
+        self.section_rows_mongo_client = get_instance(SectionRowsMongoClient)
+        self.form_history_mongo_client = get_instance(FormHistoryMongoClient)
+
+    def adopt_legacy_data(self, cycle:str):
+        """
+        Assign a cycle to form documents, section rows and history entries
+        written before cycles existed.
+
+        Returns:
+            Dict: Number of documents updated per collection
+        """
+        try:
+            return {
+                "forms": self.data_injestion_mongo_client.adopt_legacy_documents(cycle),
+                "section_rows": self.section_rows_mongo_client.adopt_legacy_rows(cycle),
+                "history": self.form_history_mongo_client.adopt_legacy_entries(cycle),
+            }
+        except Exception as e:
+            logger.error(f"Error adopting legacy data into cycle {cycle}: {e}")
+            raise e
+
+    def archive_cycle(self, cycle:str, export_path:str = None, keep:bool = False, batch_size:int = 500):
+        """
+        Move a closed cycle out of the hot form collection, either into the
+        archive collection or into a gzipped JSON lines export.
+
+        Archived documents are self-contained: rows kept in the section rows
+        collection are put back inline. Each batch is removed from the hot
+        collections only after it has been written, so an interrupted run can
+        simply be started again.
+
+        Returns:
+            int: Number of form documents archived
+        """
+        try:
+            if cycle == settings.APPRAISAL_ACTIVE_CYCLE:
+                raise ValueError(f"Cycle {cycle} is the active cycle and cannot be archived")
+
+            if export_path:
+                export = gzip.open(export_path, "at", encoding="utf-8")
+            else:
+                export = None
+                self.data_injestion_mongo_client.ensure_archive_indexes()
+
+            archived = 0
+            try:
+                batch = []
+                for document in self.data_injestion_mongo_client.get_cycle_documents(cycle):
+                    batch.append(self._inline_section_rows(cycle, document))
+                    if len(batch) >= batch_size:
+                        archived += self._archive_batch(cycle, batch, export, keep)
+                        batch = []
+                if batch:
+                    archived += self._archive_batch(cycle, batch, export, keep)
+            finally:
+                if export:
+                    export.close()
+            return archived
+        except Exception as e:
+            logger.error(f"Error archiving cycle {cycle}: {e}")
+            raise e
+
+    def _inline_section_rows(self, cycle:str, document:Dict):
+        document.pop("_id", None)
+        for section, value in document.items():
+            if stores_child_rows(value):
+                rows = self.section_rows_mongo_client.get_rows(document["user_id"], section, cycle=cycle)
+                value.pop("layout")
+                value.pop("row_count")
+                value["data"] = [row["data"] for row in rows]
+                if any("api_score" in row for row in rows):
+                    value["api_score_list"] = [row.get("api_score") for row in rows]
+        return document
+
+    def _archive_batch(self, cycle:str, documents:List[Dict], export, keep:bool):
+        if export:
+            for document in documents:
+                export.write(json_util.dumps(document) + "\n")
+            export.flush()
+        else:
+            self.data_injestion_mongo_client.archive_documents(documents)
+
+        if not keep:
+            user_ids = [document["user_id"] for document in documents]
+            self.section_rows_mongo_client.delete_cycle_rows(cycle, user_ids)
+            self.data_injestion_mongo_client.delete_cycle_documents(cycle, user_ids)
+        return len(documents)
@@ -0,0 +1,58 @@
+import logging
+from typing import List,Dict
+from django.conf import settings
+from appraisal_form_injestion.clients.attachment_mongo_client import AttachmentHashMismatch, AttachmentMongoClient
+from common.registry import get_instance
+
+logger = logging.getLogger(__name__)
+
+class AttachmentService:
+    def __init__(self):
+        self.attachment_mongo_client = get_instance(AttachmentMongoClient)
+
+    def upload_attachment(self, stream, user_id:str, section:str, filename:str, content_type:str, expected_sha256:str = None):
+        """
+        Store an evidence file for a section row.
+
+        The file is always streamed into GridFS and hashed on the way in. If the
+        same content is already stored, the new copy is dropped and the user is
+        added to the owners of the existing one. A sha256 sent by the client is
+        only checked against the hash of the bytes received, never trusted in
+        place of reading them.
+
+        Returns:
+            Dict: attachment_id to put in the row's attachment_ids, plus sha256,
+                  size and whether the content was deduplicated
+
+        Raises:
+            AttachmentHashMismatch: If expected_sha256 is not the hash of the file received
+        """
+        try:
+            if section not in settings.ATTACHMENT_SECTIONS:
+                raise ValueError(f"Attachments are not supported for section {section}")
+
+            metadata = {"user_id": user_id, "section": section, "content_type": content_type, "owners": [user_id]}
+            file_id, sha256, size, deduplicated = self.attachment_mongo_client.upload_from_stream(stream, filename, metadata, settings.ATTACHMENT_MAX_SIZE)
+            if expected_sha256 and expected_sha256.lower() != sha256:
+                # A deduplicated upload points at a file other users own; only a new copy is deleted
+                if not deduplicated:
+                    self.attachment_mongo_client.delete_attachment(file_id)
+                raise AttachmentHashMismatch(f"Attachment content does not match X-Content-SHA256 (received {sha256})")
+
+            if deduplicated:
+                self.attachment_mongo_client.add_owner(file_id, user_id)
+            return self._result(file_id, sha256, size, deduplicated)
+        except Exception as e:
+            logger.error(f"Error uploading attachment: {e}")
+            raise e
+
+    def open_attachment(self, attachment_id:str):
+        try:
+            return self.attachment_mongo_client.open_download_stream(attachment_id)
+        except Exception as e:
+            logger.error(f"Error opening attachment: {e}")
+            raise e
+
+    @staticmethod
+    def _result(file_id, sha256:str, size:int, deduplicated:bool):
+        return {"attachment_id": str(file_id), "sha256": sha256, "size": size, "deduplicated": deduplicated}
@@ -1,251 +1,574 @@
+import copy
+import hashlib
+import json
 import logging
-from typing import List,Dict
+from typing import List,Dict,Tuple
 from datetime import datetime
-from appraisal_form_injestion.clients.data_injestion_mongo_client import DataInjestionMongoClient
-from appraisal_form_injestion.utils import (calculate_api_score_for_item11, calculate_api_score_for_item12_1, calculate_api_score_for_item13, 
-calculate_api_score_for_item14, calculate_api_score_for_item15, calculate_api_score_for_item16, calculate_api_score_for_item17)
+from django.conf import settings
+from appraisal_form_injestion.clients.data_injestion_mongo_client import DataInjestionMongoClient, VersionConflict, resolve_cycle
+from appraisal_form_injestion.clients.section_rows_mongo_client import CHILD_LAYOUT, SectionRowsMongoClient, stores_child_rows, uses_child_rows
+from appraisal_form_injestion.services.form_history_service import FormHistoryService
+from appraisal_form_injestion.services.outbox_service import OutboxService
+from appraisal_form_injestion.services.publication_index_service import PublicationIndexService
+from appraisal_form_injestion.constants import get_path, section_bit, version_key
+from appraisal_form_injestion.journal_catalog import apply_journal_catalog, get_journal_catalog
+from appraisal_form_injestion.utils import (calculate_api_score_for_item11, calculate_api_score_for_item12_1, calculate_api_score_for_item13,
+calculate_api_score_for_item14, calculate_api_score_for_item15, calculate_api_score_for_item16, calculate_api_score_for_item17,
+sum_item12_1_hours)
+from common.cache import LRUCache
+from common.registry import get_instance
 
 logger = logging.getLogger(__name__)
 
+# Shared by every service instance so previews stay cached across requests
+_score_preview_cache = LRUCache(settings.SCORE_PREVIEW_CACHE_SIZE)
+
+class _SectionChanged(Exception):
+    pass
+
 class DataInjestionService:
     def __init__(self):
-        self.data_injestion_mongo_client = DataInjestionMongoClient()
+        self.data_injestion_mongo_client = get_instance(DataInjestionMongoClient)
+        self.section_rows_mongo_client = get_instance(SectionRowsMongoClient)
+        self.publication_index_service = get_instance(PublicationIndexService)
+        self.form_history_service = get_instance(FormHistoryService)
+        self.outbox_service = get_instance(OutboxService)
+
+    # Scoring. Each score_item* method is side-effect free: it returns the value
+    # stored under the section key and the response sent back to the client.
+
+    def score_item11(self, data: List[Dict]) -> Tuple[Dict, Dict]:
+        total_score = 0
+        seminar_attended_count = 0
+        api_score_list = []
+
+        for item in data:
+            api_points,seminar_attended = calculate_api_score_for_item11(item["attended/organized"], item["program_type"], item["is_chief_organizer"], item["start_date"], item["end_date"])
+            item["api_score"] = api_points
+            api_score_list.append(api_points)
+            if seminar_attended:
+                seminar_attended_count += 1
+            else:
+                total_score += api_points
+
+        seminar_points = min(seminar_attended_count * 2, 5)
+        total_score += seminar_points
+
+        section_data = {
+            "data": data,
+            "score": total_score,
+            "api_score_list": api_score_list
+        }
+        return section_data, {"score": total_score,"api_score_list": api_score_list}
+
+    def score_item12_1(self, data: List[Dict]) -> Tuple[Dict, Dict]:
+        score = calculate_api_score_for_item12_1(data)
+        total_scheduled, total_engaged = sum_item12_1_hours(data)
+        # Hour totals are stored with the semester so cross-semester totals can be aggregated server-side
+        section_data = {
+            "data": data,
+            "score": score,
+            "total_hour_scheduled": total_scheduled,
+            "total_hour_engaged": total_engaged
+        }
+        return section_data, {"score": score}
+
+    def score_item12_3_to_12_4(self, data: Dict) -> Tuple[Dict, Dict]:
+        score = 0
+        if data["12.3"].get("number_of_projects_guided","") and data["12.3"].get("number_of_students_guided",""):
+            score = 10
+
+        for item in data["12.4"]:
+            score += 10
+
+        section_data = {
+            "data": data,
+            "score": min(score,30)
+        }
+        return section_data, {"score": min(score,30)}
+
+    def score_item13(self, data: Dict) -> Tuple[Dict, Dict]:
+        total_score = 0
+        api_score_dict = {}
+        for section in data:
+            score = calculate_api_score_for_item13(data[section], section)
+            api_score_dict[section] = score
+            total_score += score
+        section_data = {
+            "data": data,
+            "score": min(total_score,60),
+            "api_score_dict": api_score_dict
+        }
+        return section_data, {"score": min(total_score,60),"api_score_dict": api_score_dict}
+
+    def score_item14(self, data: List[Dict]) -> Tuple[Dict, Dict]:
+        total_score = 0
+        api_score_list = []
+        for item in data:
+            apply_journal_catalog(item)
+            score = calculate_api_score_for_item14(item)
+            total_score += score
+            api_score_list.append(score)
+
+        section_data = {
+            "data": data,
+            "score": total_score,
+            "api_score_list": api_score_list
+        }
+        return section_data, {"score": total_score,"api_score_list": api_score_list}
+
+    def score_item15(self, data: List[Dict]) -> Tuple[Dict, Dict]:
+        total_score = 0
+        api_score_list = []
+        for item in data:
+            score = calculate_api_score_for_item15(item)
+            total_score += score
+            api_score_list.append(score)
+
+        section_data = {
+            "data": data,
+            "score": total_score,
+            "api_score_list": api_score_list
+        }
+        return section_data, {"score": total_score,"api_score_list": api_score_list}
+
+    def score_item16(self, data: List[Dict]) -> Tuple[Dict, Dict]:
+        total_score = 0
+        api_score_list = []
+        for item in data:
+            score = calculate_api_score_for_item16(item)
+            total_score += score
+            api_score_list.append(score)
+
+        section_data = {
+            "data": data,
+            "score": total_score,
+            "api_score_list": api_score_list
+        }
+        return section_data, {"score": total_score,"api_score_list": api_score_list}
+
+    def score_item17(self, data: List[Dict]) -> Tuple[Dict, Dict]:
+        total_score = 0
+        api_score_list = []
+        for item in data:
+            score = calculate_api_score_for_item17(item)
+            total_score += score
+            api_score_list.append(score)
+        section_data = {
+            "data": data,
+            "total_score": total_score,
+            "api_score_list": api_score_list
+        }
+        return section_data, {"score": total_score,"api_score_list": api_score_list}
+
+    def score_item18(self, data: List[Dict]) -> Tuple[Dict, Dict]:
+        total_score = 0
+        api_score_list = []
+        for item in data:
+            type = str(item.get("position_type","")).lower()
+            score = 5
+            if type == "chairmanship":
+                score = 10
+            total_score += score
+            api_score_list.append(score)
+        section_data = {
+            "data": data,
+            "total_score": total_score,
+            "api_score_list": api_score_list
+        }
+        return section_data, {"score": total_score,"api_score_list": api_score_list}
+
+    def score_item19(self, data: Dict) -> Tuple[Dict, Dict]:
+        total_score = 0
+        api_score_dict = {}
+        for type in data:
+            score = 0
+            if type == "self":
+                for item in data[type]:
+                    score += int(item.get("points",0))
+                    score = min(score,30)
+            elif type == "national":
+                score = len(data[type]) * 30
+            elif type == "international":
+                score = len(data[type]) * 50
+
+            total_score += score
+            api_score_dict[type] = score
+
+        section_data = {
+            "data": data,
+            "total_score": total_score,
+            "api_score_dict": api_score_dict
+        }
+        return section_data, {"score": total_score,"api_score_dict": api_score_dict}
+
+    SECTION_SCORERS = {
+        "11": score_item11,
+        "12.1": score_item12_1,
+        "12.3-12.4": score_item12_3_to_12_4,
+        "13": score_item13,
+        "14": score_item14,
+        "15": score_item15,
+        "16": score_item16,
+        "17": score_item17,
+        "18": score_item18,
+        "19": score_item19,
+    }
+
+    def preview_score(self, section:str, data):
+        """
+        Score a section payload without persisting it. Results are memoised in a
+        bounded LRU keyed by a canonical hash of the payload, so repeated previews
+        of an unchanged form cost a hash and a dict lookup. The key also holds the
+        journal catalog version and JOURNAL_CATALOG_ENFORCE, which item 14 scores
+        depend on, so a new catalog is never answered with scores from the old one.
+        """
+        try:
+            scorer = self.SECTION_SCORERS.get(section)
+            if scorer is None:
+                raise ValueError(f"Unknown section: {section}")
+
+            catalog = [get_journal_catalog().version, settings.JOURNAL_CATALOG_ENFORCE]
+            canonical = json.dumps([section, data, catalog], sort_keys=True, separators=(",", ":"), default=str)
+            key = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+            result = _score_preview_cache.get(key)
+            if result is None:
+                _, result = scorer(self, copy.deepcopy(data))
+                _score_preview_cache.set(key, result)
+            return copy.deepcopy(result)
+        except Exception as e:
+            logger.error(f"Error previewing score for section {section}: {e}")
+            raise e
+
+    # Ingestion
+
+    def check_transactions(self) -> bool:
+        """
+        Whether saves can run on this storage, logging an error when they cannot.
+        Run at startup. Where the storage cannot run transactions the outbox is
+        turned off, with a warning, and rows kept in the section rows collection
+        cannot be saved.
+        """
+        self.outbox_service.is_enabled()
+        storage = self.data_injestion_mongo_client.storage
+        if settings.FORM_LIST_STORAGE_MODE != "child" or storage.supports_transactions() or settings.MONGO_ALLOW_WRITES_WITHOUT_TRANSACTIONS:
+            return True
+        logger.error(
+            "FORM_LIST_STORAGE_MODE is child, which writes section rows in the saving transaction, but the storage cannot "
+            "run transactions; saves of list sections fail until it is a MongoDB replica set or MONGO_ALLOW_WRITES_WITHOUT_TRANSACTIONS is set"
+        )
+        return False
 
-    def injest_data_item1_to_10(self, user_id:str, data:Dict):
+    def _save_sections(self, user_id:str, data:Dict, cycle:str = None, expected_version:int = None):
+        """
+        Persist section data. With expected_version the write only applies if
+        the section is still at that version, otherwise VersionConflict is
+        raised. Rows kept in the section rows collection are replaced, and while
+        the outbox is enabled a change event is appended to it, in the same
+        transaction; the history entries are derived from the events later.
+        With the outbox off, a history entry for every section written is
+        written here instead, in the transaction wherever the storage has them.
+        """
+        cycle = resolve_cycle(cycle)
+        expected_versions = None
+        if expected_version is not None:
+            expected_versions = {section: expected_version for section in data if section_bit(section) is not None}
+        stored, child_rows = self.split_child_rows(data)
+        outbox = self.outbox_service.is_enabled()
+
+        def write():
+            versions = self.data_injestion_mongo_client.update_data_injestion_collection(user_id, stored, cycle, expected_versions)
+            self.write_child_rows(user_id, versions, child_rows, cycle)
+            if outbox:
+                self.outbox_service.append_section_events(user_id, data, versions, cycle)
+            else:
+                self.form_history_service.record_section_writes(user_id, data, versions, cycle)
+            return versions
+
+        if outbox or child_rows or self.data_injestion_mongo_client.storage.supports_transactions():
+            versions = self.data_injestion_mongo_client.run_in_transaction(write)
+        else:
+            versions = write()
+        self._after_sections_saved(user_id, data, versions, cycle)
+        return versions
+
+    @staticmethod
+    def split_child_rows(data:Dict) -> Tuple[Dict, Dict]:
+        """
+        Split section data into what is stored on the form document and the rows
+        of sections kept in the section rows collection.
+
+        Returns:
+            Tuple[Dict, Dict]: Stored data, and section -> (rows, api_scores)
+        """
+        stored = dict(data)
+        child_rows = {}
+        for section, value in data.items():
+            if uses_child_rows(section):
+                # Only the aggregates stay on the form document; rows go to the section rows collection
+                rows = value.get("data") or []
+                stored[section] = {key: item for key, item in value.items() if key not in ("data", "api_score_list")}
+                stored[section]["row_count"] = len(rows)
+                stored[section]["layout"] = CHILD_LAYOUT
+                child_rows[section] = (rows, value.get("api_score_list"))
+        return stored, child_rows
+
+    def write_child_rows(self, user_id:str, versions:Dict, child_rows:Dict, cycle:str):
+        """Replace the rows of the sections written, in the transaction that wrote the form document."""
+        for section, (rows, api_scores) in child_rows.items():
+            if versions.get(section):
+                self.section_rows_mongo_client.replace_rows(user_id, section, rows, api_scores, cycle)
+
+    def _after_sections_saved(self, user_id:str, data:Dict, versions:Dict, cycle:str):
+        # With the outbox on, the history relay diffs against what it last wrote
+        if not self.outbox_service.is_enabled():
+            self.form_history_service.remember_section_writes(user_id, data, versions, cycle)
+
+    def score_section(self, section:str, payload, semester:str = None) -> Tuple[Dict, Dict]:
+        """
+        Score a payload for any section the way its injest method does, without
+        persisting it.
+
+        Returns:
+            Tuple[Dict, Dict]: Data to save keyed by section key, and the response
+        """
+        if section == "1-10":
+            data = {"1-10": {"data": payload}}
+            if payload.get("department"):
+                data["department"] = payload["department"]
+            return data, {}
+        scorer = self.SECTION_SCORERS.get(section)
+        if scorer is None:
+            raise ValueError(f"Unknown section: {section}")
+        key = section
+        if section == "12.1":
+            if not semester:
+                raise ValueError("Semester is required for section 12.1")
+            key = f"12.1_{semester}"
+        section_data, result = scorer(self, payload)
+        return {key: section_data}, result
+
+    def get_item_by_section(self, user_id:str, section:str, page:int = None, page_size:int = None, cycle:str = None):
+        """
+        Read a stored section. List sections can be read a page at a time; rows kept
+        in the section rows collection are fetched by row_id range and put back
+        under "data", so both storage modes return the same shape.
+        """
         try:
+            result = self.data_injestion_mongo_client.get_data_injestion_collection_by_user_id_and_section(user_id, section, cycle)
+            value = get_path(result, section) if result else None
+            if not isinstance(value, dict):
+                return result
+
+            paginated = page is not None or page_size is not None
+            page = page or 1
+            page_size = page_size or (settings.FORM_ROWS_PAGE_SIZE if paginated else 0)
+            skip = (page - 1) * page_size
+
+            if stores_child_rows(value):
+                rows = self.section_rows_mongo_client.get_rows(user_id, section, skip, page_size, cycle)
+                value.pop("layout")
+                total_rows = value.pop("row_count")
+                value["data"] = [row["data"] for row in rows]
+                if any("api_score" in row for row in rows):
+                    value["api_score_list"] = [row.get("api_score") for row in rows]
+            elif paginated and isinstance(value.get("data"), list):
+                total_rows = len(value["data"])
+                value["data"] = value["data"][skip:skip + page_size]
+                if isinstance(value.get("api_score_list"), list):
+                    value["api_score_list"] = value["api_score_list"][skip:skip + page_size]
+            else:
+                return result
+
+            if paginated:
+                result["pagination"] = {"page": page, "page_size": page_size, "total_rows": total_rows}
+            return result
+        except Exception as e:
+            logger.error(f"Error getting item by section: {e}")
+            raise e
+
+    def split_section_rows(self, section:str, cycle:str = None):
+        """
+        Move the inline rows of a list section into the section rows collection
+        for every form saved before child storage was enabled.
+
+        Returns:
+            int: Number of form documents moved
+        """
+        try:
+            cycle = resolve_cycle(cycle)
+            moved = 0
+            for document in self.data_injestion_mongo_client.get_inline_section_rows(section, cycle):
+                user_id = document["user_id"]
+                value = document[section]
+                rows = value["data"]
+                aggregates = {key: item for key, item in value.items() if key not in ("data", "api_score_list")}
+                aggregates["row_count"] = len(rows)
+                aggregates["layout"] = CHILD_LAYOUT
+                version = document.get("section_versions", {}).get(version_key(section))
+
+                def move():
+                    self.section_rows_mongo_client.replace_rows(user_id, section, rows, value.get("api_score_list"), cycle)
+                    if not self.data_injestion_mongo_client.set_section_aggregates(user_id, section, aggregates, version, cycle):
+                        # Written again since it was read; the new write already stored its rows where it wanted them
+                        raise _SectionChanged()
+
+                try:
+                    self.data_injestion_mongo_client.run_in_transaction(move)
+                    moved += 1
+                except _SectionChanged:
+                    pass
+            return moved
+        except Exception as e:
+            logger.error(f"Error splitting section rows for {section}: {e}")
+            raise e
+
+    def get_teaching_load(self, semesters:List[str] = None, user_id:str = None, department:str = None, cycle:str = None):
+        try:
+            return self.data_injestion_mongo_client.get_teaching_load(semesters, user_id, department, cycle)
+        except Exception as e:
+            logger.error(f"Error getting teaching load: {e}")
+            raise e
+
+    def injest_data_item1_to_10(self, user_id:str, data:Dict, expected_version:int = None):
+        try:
+            department = data.get("department")
             data = {"1-10": {
                         "data":data
                     }}
-            self.data_injestion_mongo_client.update_data_injestion_collection(user_id, data)
+            if department:
+                # Denormalised so admin completeness queries can filter by department from the index
+                data["department"] = department
+            versions = self._save_sections(user_id, data, expected_version=expected_version)
+            return {"version": versions.get("1-10")}
+        except VersionConflict:
+            raise
         except Exception as e:
             logger.error(f"Error injesting data 1 to 10: {e}")
             raise e
 
-    def injest_data_item11(self, user_id: str, data: List[Dict]):
+    def injest_data_item11(self, user_id: str, data: List[Dict], expected_version:int = None):
         try:
-            total_score = 0
-            seminar_attended_count = 0
-            api_score_list = []
-
-            for item in data:
-                api_points,seminar_attended = calculate_api_score_for_item11(item["attended/organized"], item["program_type"], item["is_chief_organizer"], item["start_date"], item["end_date"])
-                item["api_score"] = api_points
-                api_score_list.append(api_points)
-                if seminar_attended:
-                    seminar_attended_count += 1
-                else:
-                    total_score += api_points
-
-            seminar_points = min(seminar_attended_count * 2, 5)
-            total_score += seminar_points
-
-            result_data = {"11":{
-                "data": data,
-                "score": total_score,
-                "api_score_list": api_score_list
-            }}
-
-            self.data_injestion_mongo_client.update_data_injestion_collection(user_id, result_data)
-            return {"score": total_score,"api_score_list": api_score_list}
+            section_data, result = self.score_item11(data)
+            versions = self._save_sections(user_id, {"11": section_data}, expected_version=expected_version)
+            result["version"] = versions.get("11")
+            return result
+        except VersionConflict:
+            raise
         except Exception as e:
             logger.error(f"Error injesting data 11: {e}")
             raise e
 
-    def injest_data_item12_1(self, user_id:str, data:List[Dict], semester:str):
+    def injest_data_item12_1(self, user_id:str, data:List[Dict], semester:str, expected_version:int = None):
         try:
-            score = calculate_api_score_for_item12_1(data)
+            section_data, result = self.score_item12_1(data)
             key = f"12.1_{semester}"
-            result_data = {key:{
-                "data": data,
-                "score": score
-            }}
-
-            self.data_injestion_mongo_client.update_data_injestion_collection(user_id, result_data)
-            return {"score": score}
+            versions = self._save_sections(user_id, {key: section_data}, expected_version=expected_version)
+            result["version"] = versions.get(key)
+            return result
+        except VersionConflict:
+            raise
         except Exception as e:
             logger.error(f"Error injesting data 12.1: {e}")
             raise e
 
-    def injest_data_item12_3_to_12_4(self, user_id:str, data:Dict):
+    def injest_data_item12_3_to_12_4(self, user_id:str, data:Dict, expected_version:int = None):
         try:
-            score = 0
-            if data["12.3"].get("number_of_projects_guided","") and data["12.4"].get("number_of_students_guided",""):
-                score = 10
-
-            for item in data["12.4"]:
-                score += 10
-
-            result_data = {
-                "12.3-12.4":{
-                    "data": data,
-                    "score": min(score,30)
-                }
-            }
-            self.data_injestion_mongo_client.update_data_injestion_collection(user_id, result_data)
-            return {"score": min(score,30)}
+            section_data, result = self.score_item12_3_to_12_4(data)
+            versions = self._save_sections(user_id, {"12.3-12.4": section_data}, expected_version=expected_version)
+            result["version"] = versions.get("12.3-12.4")
+            return result
+        except VersionConflict:
+            raise
         except Exception as e:
             logger.error(f"Error injesting data 12.3: {e}")
             raise e
 
-    def injest_data_item13(self, user_id:str, data:Dict):
+    def injest_data_item13(self, user_id:str, data:Dict, expected_version:int = None):
         try:
-            total_score = 0
-            api_score_dict = {}
-            for section in data:
-                score = calculate_api_score_for_item13(data[section], section)
-                api_score_dict[section] = score
-                total_score += score
-            result_data = {
-                "13":{
-                    "data": data,
-                    "score": min(total_score,60),
-                    "api_score_dict": api_score_dict
-                }
-            }
-            self.data_injestion_mongo_client.update_data_injestion_collection(user_id, result_data)
-            return {"score": min(total_score,60),"api_score_dict": api_score_dict}
+            section_data, result = self.score_item13(data)
+            versions = self._save_sections(user_id, {"13": section_data}, expected_version=expected_version)
+            result["version"] = versions.get("13")
+            return result
+        except VersionConflict:
+            raise
         except Exception as e:
             logger.error(f"Error injesting data 13: {e}")
             raise e
 
-    def injest_data_item14(self, user_id:str, data:List[Dict]):
+    def injest_data_item14(self, user_id:str, data:List[Dict], expected_version:int = None):
         try:
-            total_score = 0
-            api_score_list = []
-            for item in data:
-                score = calculate_api_score_for_item14(item)
-                total_score += score
-                api_score_list.append(score)
-
-            result_data = {
-                "14":{
-                    "data": data,
-                    "score": total_score,
-                    "api_score_list": api_score_list
-                }
-            }
-            self.data_injestion_mongo_client.update_data_injestion_collection(user_id, result_data)
-            return {"score": total_score,"api_score_list": api_score_list}
+            section_data, result = self.score_item14(data)
+            versions = self._save_sections(user_id, {"14": section_data}, expected_version=expected_version)
+            result["version"] = versions.get("14")
+            try:
+                self.publication_index_service.index_user_publications(user_id, data)
+            except Exception as e:
+                # The section is already saved; a stale index only affects suggestions and reports
+                logger.error(f"Error indexing publications for item 14: {e}")
+            return result
+        except VersionConflict:
+            raise
         except Exception as e:
             logger.error(f"Error injesting data 14: {e}")
             raise e
-    
-    def injest_data_item15(self, user_id:str, data:List[Dict]):
+
+    def injest_data_item15(self, user_id:str, data:List[Dict], expected_version:int = None):
         try:
-            total_score = 0
-            api_score_list = []
-            for item in data:
-                score = calculate_api_score_for_item15(item)
-                total_score += score
-                api_score_list.append(score)
-
-            result_data = {
-                "15":{
-                    "data": data,
-                    "score": total_score,
-                    "api_score_list": api_score_list
-                }
-            }
-            self.data_injestion_mongo_client.update_data_injestion_collection(user_id, result_data)
-            return {"score": total_score,"api_score_list": api_score_list}
+            section_data, result = self.score_item15(data)
+            versions = self._save_sections(user_id, {"15": section_data}, expected_version=expected_version)
+            result["version"] = versions.get("15")
+            return result
+        except VersionConflict:
+            raise
         except Exception as e:
             logger.error(f"Error injesting data 15: {e}")
             raise e
 
-    def injest_data_item16(self, user_id:str, data:List[Dict]):
+    def injest_data_item16(self, user_id:str, data:List[Dict], expected_version:int = None):
         try:
-            total_score = 0
-            api_score_list = []
-            for item in data:
-                score = calculate_api_score_for_item16(item)
-                total_score += score
-                api_score_list.append(score)
-
-            result_data = {
-                "16":{
-                    "data": data,
-                    "score": total_score,
-                    "api_score_list": api_score_list
-                }
-            }
-            self.data_injestion_mongo_client.update_data_injestion_collection(user_id, result_data)
-            return {"score": total_score,"api_score_list": api_score_list}
+            section_data, result = self.score_item16(data)
+            versions = self._save_sections(user_id, {"16": section_data}, expected_version=expected_version)
+            result["version"] = versions.get("16")
+            return result
+        except VersionConflict:
+            raise
         except Exception as e:
             logger.error(f"Error injesting data 16: {e}")
             raise e
 
-    def injest_data_item17(self, user_id:str, data:List[Dict]):
+    def injest_data_item17(self, user_id:str, data:List[Dict], expected_version:int = None):
         try:
-            total_score = 0
-            api_score_list = []
-            for item in data:
-                score = calculate_api_score_for_item17(item)
-                total_score += score
-                api_score_list.append(score)
-            result_data = {
-                "17":{
-                    "data": data,
-                    "total_score": total_score,
-                    "api_score_list": api_score_list
-                }
-            }
-            self.data_injestion_mongo_client.update_data_injestion_collection(user_id, result_data)
-            return {"score": total_score,"api_score_list": api_score_list}
+            section_data, result = self.score_item17(data)
+            versions = self._save_sections(user_id, {"17": section_data}, expected_version=expected_version)
+            result["version"] = versions.get("17")
+            return result
+        except VersionConflict:
+            raise
         except Exception as e:
             logger.error(f"Error injesting data 17: {e}")
             raise e
 
-    def injest_data_item18(self, user_id:str, data:List[Dict]):
+    def injest_data_item18(self, user_id:str, data:List[Dict], expected_version:int = None):
         try:
-            total_score = 0
-            api_score_list = []
-            for item in data:
-                type = str(item.get("position_type","")).lower()
-                score = 5
-                if type == "chairmanship":
-                    score = 10
-                total_score += score
-                api_score_list.append(score)
-            result_data = {
-                "18":{
-                    "data": data,
-                    "total_score": total_score,
-                    "api_score_list": api_score_list
-                }
-            }
-            self.data_injestion_mongo_client.update_data_injestion_collection(user_id, result_data)
-            return {"score": total_score,"api_score_list": api_score_list}
+            section_data, result = self.score_item18(data)
+            versions = self._save_sections(user_id, {"18": section_data}, expected_version=expected_version)
+            result["version"] = versions.get("18")
+            return result
+        except VersionConflict:
+            raise
         except Exception as e:
             logger.error(f"Error injesting data 18: {e}")
             raise e
 
-    def injest_data_item19(self, user_id:str, data:Dict):
+    def injest_data_item19(self, user_id:str, data:Dict, expected_version:int = None):
         try:
-            total_score = 0
-            api_score_dict = {}
-            for type in data:
-                score = 0
-                if type == "self":
-                    for item in data[type]:
-                        score += int(item.get("points",0))
-                        score = min(score,30)
-                elif type == "national":
-                    score = len(data[type]) * 30
-                elif type == "international":
-                    score = len(data[type]) * 50
-
-                total_score += score
-                api_score_dict[type] = score
-
-            result_data = {
-                "19":{
-                    "data": data,
-                    "total_score": total_score,
-                    "api_score_dict": api_score_dict
-                }
-            }
-            self.data_injestion_mongo_client.update_data_injestion_collection(user_id, result_data)
-            return {"score": total_score,"api_score_dict": api_score_dict}
+            section_data, result = self.score_item19(data)
+            versions = self._save_sections(user_id, {"19": section_data}, expected_version=expected_version)
+            result["version"] = versions.get("19")
+            return result
+        except VersionConflict:
+            raise
         except Exception as e:
             logger.error(f"Error injesting data 19: {e}")
             raise e
@@ -0,0 +1,264 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List
+from django.conf import settings
+from appraisal_form_injestion.clients.data_injestion_mongo_client import VersionConflict, resolve_cycle
+from appraisal_form_injestion.constants import section_bit
+from appraisal_form_injestion.schemas import SchemaError, decode, validate_section
+from appraisal_form_injestion.services.data_injestion_service import DataInjestionService
+from common.registry import get_instance
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+# Error of the records of a batch whose transaction was rolled back because one of its writes failed
+ROLLED_BACK = {"code": None, "message": "Batch rolled back"}
+
+class _BatchRolledBack(Exception):
+    pass
+
+class FormBulkIngestService:
+    """
+    Ingests appraisal form sections from an NDJSON stream, one record per line:
+
+        {"user_id": "...", "section": "14", "payload": [...]}
+
+    Records may also carry "semester" (required for section 12.1) and
+    "expected_version" to make the write conditional, as with If-Match on the
+    single section endpoints. Payloads are checked against the section schemas
+    as lines are read, so a malformed record fails with the path of the bad
+    value before any scoring work is done.
+
+    The stream is read a batch of lines at a time, so memory is bounded by the
+    batch size whatever the size of the upload. Each batch is scored in a worker
+    pool with the same scorers as the single section endpoints and written with
+    one bulk write, and a result is yielded for every input line in order.
+    """
+    def __init__(self):
+        self.data_injestion_service = get_instance(DataInjestionService)
+        self.data_injestion_mongo_client = self.data_injestion_service.data_injestion_mongo_client
+
+    def ingest(self, lines:Iterable, cycle:str = None, batch_size:int = None, workers:int = None) -> Iterator[Dict]:
+        """
+        Ingest NDJSON lines (bytes or str) and yield the result of each line,
+        followed by a final {"summary": {...}} record.
+
+        Raises:
+            MissingUniqueIndex: Before any line is read, if the form collection
+                                lacks the unique (cycle, user_id) index
+        """
+        self.data_injestion_mongo_client.require_unique_form_index()
+        cycle = resolve_cycle(cycle)
+        batch_size = batch_size or settings.FORM_BULK_INGEST_BATCH_SIZE
+        workers = workers or settings.FORM_BULK_INGEST_WORKERS
+        summary = {"lines": 0, "saved": 0, "conflicts": 0, "errors": 0, "batches": 0}
+        started = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="form-bulk-ingest") as executor:
+            for batch in self._read_batches(lines, batch_size):
+                summary["batches"] += 1
+                for result in self._ingest_batch(batch, cycle, executor):
+                    summary["lines"] += 1
+                    if result["status"] == "saved":
+                        summary["saved"] += 1
+                    elif result["status"] == "conflict":
+                        summary["conflicts"] += 1
+                    else:
+                        summary["errors"] += 1
+                    yield result
+
+        summary["elapsed_seconds"] = round(time.monotonic() - started, 3)
+        yield {"summary": summary}
+
+    def _read_batches(self, lines:Iterable, batch_size:int) -> Iterator[List[Dict]]:
+        """
+        Parse lines into batches of records. A batch never holds two writes to the
+        same section of the same user, since their order inside an unordered bulk
+        write is not guaranteed.
+        """
+        batch, keys = [], set()
+        for line_number, line in enumerate(lines, start=1):
+            if isinstance(line, bytes):
+                line = line.decode("utf-8")
+            if not line.strip():
+                continue
+            record = self._parse_record(line_number, line)
+            key = record.get("key")
+            if len(batch) >= batch_size or (key is not None and key in keys):
+                yield batch
+                batch, keys = [], set()
+            batch.append(record)
+            if key is not None:
+                keys.add(key)
+        if batch:
+            yield batch
+
+    @staticmethod
+    def _parse_record(line_number:int, line:str) -> Dict:
+        record = {"line": line_number}
+        try:
+            item = decode(line)
+        except SchemaError as e:
+            record["error"] = str(e)
+            return record
+        if not isinstance(item, dict):
+            record["error"] = "Each line must be a JSON object"
+            return record
+
+        record["user_id"] = item.get("user_id")
+        record["section"] = item.get("section")
+        if not record["user_id"] or not record["section"] or "payload" not in item:
+            record["error"] = "user_id, section and payload are required"
+            return record
+        expected_version = item.get("expected_version")
+        if expected_version is not None and (not isinstance(expected_version, int) or expected_version < 0):
+            record["error"] = "expected_version must be a non-negative integer"
+            return record
+        try:
+            validate_section(record["section"], item["payload"], ["payload"])
+        except SchemaError as e:
+            record["error"] = str(e)
+            return record
+        record["payload"] = item["payload"]
+        record["semester"] = item.get("semester")
+        record["expected_version"] = expected_version
+        record["key"] = (str(record["user_id"]), record["section"], record["semester"])
+        return record
+
+    def _score(self, record:Dict):
+        if "error" in record:
+            return record
+        try:
+            record["data"], record["result"] = self.data_injestion_service.score_section(
+                record["section"], record.pop("payload"), record["semester"])
+        except Exception as e:
+            record["error"] = f"Error scoring section {record['section']}: {e}"
+        return record
+
+    def _ingest_batch(self, batch:List[Dict], cycle:str, executor:ThreadPoolExecutor) -> List[Dict]:
+        records = list(executor.map(self._score, batch))
+        pending = [record for record in records if "error" not in record]
+
+        for record in pending:
+            record["stored"], record["child_rows"] = self.data_injestion_service.split_child_rows(record["data"])
+            record["sections"] = [key for key in record["data"] if section_bit(key) is not None]
+        # Unconditional records are written against the versions current right now
+        unconditional = {}
+        for record in pending:
+            if record["expected_version"] is None:
+                unconditional.setdefault(record["user_id"], []).extend(record["sections"])
+        current = self.data_injestion_mongo_client.get_section_versions_for_users(unconditional, cycle) if unconditional else {}
+        for record in pending:
+            if record["expected_version"] is None:
+                record["expected_versions"] = current[record["user_id"]]
+            else:
+                record["expected_versions"] = {key: record["expected_version"] for key in record["sections"]}
+
+        errors = self._write_batch(pending, cycle) if pending else {}
+        for index, record in enumerate(pending):
+            error = errors.get(index)
+            if error is None:
+                self._saved(record, record["versions"], cycle)
+            elif error is ROLLED_BACK or (error["code"] == DUPLICATE_KEY_ERROR and record["expected_version"] is None):
+                # Another writer got there between the version read and the bulk write (or created
+                # the document first), or the batch was rolled back for another record: save on its own
+                self._save_single(record, cycle)
+            elif error["code"] == DUPLICATE_KEY_ERROR:
+                record["conflict"] = self.data_injestion_mongo_client.get_section_versions(record["user_id"], record["sections"], cycle)
+            else:
+                record["error"] = error["message"]
+        return [self._line_result(record) for record in records]
+
+    def _write_batch(self, pending:List[Dict], cycle:str) -> Dict:
+        """
+        Bulk write the pending records, and replace their section rows and
+        append their outbox events, or write their history entries while the
+        outbox is off, in one transaction. Returns the error of each record that was not written, by
+        its index in pending.
+
+        A failed write aborts the transaction, so the whole batch is rolled back
+        and every record is reported as ROLLED_BACK, to be saved on its own.
+        Where the storage has no transactions the writes stand and the history
+        entries and events of the ones that succeeded are written after them;
+        if that fails, the batch fails rather than lose them.
+        """
+        transactional = self.data_injestion_mongo_client.storage.supports_transactions()
+        outbox = self.data_injestion_service.outbox_service.is_enabled()
+        writes = [(record["user_id"], record["stored"], record["expected_versions"]) for record in pending]
+
+        def write():
+            errors = self.data_injestion_mongo_client.write_sections_batch(writes, cycle)
+            if errors and transactional:
+                raise _BatchRolledBack()
+            events = []
+            for index, record in enumerate(pending):
+                if index in errors:
+                    continue
+                record["versions"] = {key: version + 1 for key, version in record["expected_versions"].items()}
+                self.data_injestion_service.write_child_rows(record["user_id"], record["versions"], record["child_rows"], cycle)
+                if outbox:
+                    events.extend(self.data_injestion_service.outbox_service.section_events(record["user_id"], record["data"], record["versions"], cycle))
+                else:
+                    self.data_injestion_service.form_history_service.record_section_writes(record["user_id"], record["data"], record["versions"], cycle)
+            if events:
+                self.data_injestion_service.outbox_service.append_events(events)
+            return errors
+
+        if not transactional:
+            return write()
+        try:
+            return self.data_injestion_mongo_client.run_in_transaction(write)
+        except _BatchRolledBack:
+            return {index: ROLLED_BACK for index in range(len(pending))}
+
+    def _saved(self, record:Dict, versions:Dict, cycle:str):
+        record["versions"] = versions
+        try:
+            self.data_injestion_service._after_sections_saved(record["user_id"], record["data"], versions, cycle)
+            if record["section"] == "14":
+                self.data_injestion_service.publication_index_service.index_user_publications(record["user_id"], record["data"]["14"]["data"])
+        except Exception as e:
+            # The section, its rows and its history are saved; the publication index is reported but not retried
+            logger.error(f"Error after bulk saving {record['user_id']} section {record['section']}: {e}")
+            record["warning"] = str(e)
+
+    def _save_single(self, record:Dict, cycle:str):
+        try:
+            # Conditional records keep their expected versions; unconditional ones are written over whatever is there
+            outbox = self.data_injestion_service.outbox_service.is_enabled()
+            transactional = outbox or record["child_rows"] or self.data_injestion_mongo_client.storage.supports_transactions()
+            expected_versions = record["expected_versions"] if record["expected_version"] is not None else None
+
+            def write():
+                versions = self.data_injestion_mongo_client.update_data_injestion_collection(record["user_id"], record["stored"], cycle, expected_versions)
+                self.data_injestion_service.write_child_rows(record["user_id"], versions, record["child_rows"], cycle)
+                if outbox:
+                    self.data_injestion_service.outbox_service.append_section_events(record["user_id"], record["data"], versions, cycle)
+                else:
+                    self.data_injestion_service.form_history_service.record_section_writes(record["user_id"], record["data"], versions, cycle)
+                return versions
+
+            versions = self.data_injestion_mongo_client.run_in_transaction(write) if transactional else write()
+            self._saved(record, versions, cycle)
+        except VersionConflict as e:
+            record["conflict"] = e.current_versions
+        except Exception as e:
+            record["error"] = str(e)
+
+    @staticmethod
+    def _line_result(record:Dict) -> Dict:
+        result = {"line": record["line"], "user_id": record.get("user_id"), "section": record.get("section")}
+        if "error" in record:
+            result["status"] = "error"
+            result["message"] = record["error"]
+        elif "conflict" in record:
+            result["status"] = "conflict"
+            result["current_versions"] = record["conflict"]
+        else:
+            result["status"] = "saved"
+            result["result"] = record["result"]
+            result["version"] = next(iter(record["versions"].values()), None)
+            if "warning" in record:
+                result["warning"] = record["warning"]
+        return result
@@ -0,0 +1,124 @@
+import json
+import logging
+from typing import List,Dict
+from django.conf import settings
+from appraisal_form_injestion.clients.data_injestion_mongo_client import resolve_cycle
+from appraisal_form_injestion.clients.form_history_mongo_client import FormHistoryMongoClient
+from common.cache import LRUCache
+from common.json_diff import diff, apply_patch
+from common.registry import get_instance
+from common.sinks import Sink
+
+logger = logging.getLogger(__name__)
+
+# While the outbox is enabled, history is derived from its change events by
+# relaying them to FormHistorySink (relay_outbox --sink history), off the save
+# path: the events are durable, so an entry is never lost to a restart, only
+# written a moment later. Without the outbox, the request that saves a section
+# writes its entry, in its transaction where the storage has them. Either way
+# the cache holds the last version written per section so the next diff
+# normally needs no read at all.
+_last_written = LRUCache(settings.FORM_HISTORY_CACHE_SIZE)
+
+class FormHistoryService:
+    def __init__(self):
+        self.form_history_mongo_client = get_instance(FormHistoryMongoClient)
+
+    def record_section_writes(self, user_id:str, data:Dict, versions:Dict, cycle:str = None):
+        """
+        Write a history entry for every section written, for saves made while
+        the outbox is off. Called in the transaction that writes the sections,
+        so the entries are committed, or rolled back, with them;
+        remember_section_writes() is called after it.
+        """
+        cycle = resolve_cycle(cycle)
+        for section, version in versions.items():
+            if version:
+                self._write_history_entry(cycle, user_id, section, version, data[section])
+
+    def remember_section_writes(self, user_id:str, data:Dict, versions:Dict, cycle:str = None):
+        """Cache the committed versions, which the next write of each section diffs against."""
+        cycle = resolve_cycle(cycle)
+        for section, version in versions.items():
+            if version:
+                _last_written.set((cycle, user_id, section), (version, data[section]))
+
+    def record_events(self, events:List[Dict]):
+        """
+        Write the history entry of every outbox event, in position order so
+        each diff finds the version before it. Entries already written are left
+        as they are, so a redelivered batch is harmless.
+        """
+        for event in events:
+            if event.get("value") is None:
+                # Appended before events carried their value; that version is left out of the history
+                continue
+            self._write_history_entry(event["cycle"], event["user_id"], event["section"], event["version"], event["value"])
+            _last_written.set((event["cycle"], event["user_id"], event["section"]), (event["version"], event["value"]))
+
+    def _write_history_entry(self, cycle:str, user_id:str, section:str, version:int, value):
+        try:
+            previous = None
+            is_snapshot_version = (version - 1) % settings.FORM_HISTORY_SNAPSHOT_INTERVAL == 0
+            if not is_snapshot_version:
+                previous = self._get_previous_version(cycle, user_id, section, version - 1)
+
+            entry = {"cycle": cycle, "user_id": user_id, "section": section, "version": version}
+            if previous is None:
+                entry["kind"] = "snapshot"
+                entry["value"] = value
+            else:
+                entry["kind"] = "diff"
+                entry["patch"] = diff(previous, value)
+            entry["size"] = len(json.dumps(entry.get("value", entry.get("patch")), default=str))
+
+            self.form_history_mongo_client.insert_history_entry(entry)
+        except Exception as e:
+            logger.error(f"Error writing history for {user_id} section {section} version {version}: {e}")
+            raise e
+
+    def _get_previous_version(self, cycle:str, user_id:str, section:str, version:int):
+        cached = _last_written.get((cycle, user_id, section))
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        # Written by another process, or evicted: rebuild it, or fall back to a snapshot
+        return self.get_section_version(user_id, section, version, cycle)
+
+    def get_section_version(self, user_id:str, section:str, version:int, cycle:str = None):
+        """
+        Rebuild a past version of a section from its nearest snapshot and the
+        diffs after it. Returns None if the version is not in the history.
+        """
+        try:
+            entries = self.form_history_mongo_client.get_entries_for_version(user_id, section, version, cycle)
+            versions = [entry["version"] for entry in entries]
+            # Diffs only apply to the version right before them, so the chain must have no gaps
+            if not entries or versions != list(range(versions[0], version + 1)):
+                return None
+
+            value = entries[0]["value"]
+            for entry in entries[1:]:
+                value = apply_patch(value, entry["patch"])
+            return value
+        except Exception as e:
+            logger.error(f"Error rebuilding section history: {e}")
+            raise e
+
+    def list_versions(self, user_id:str, section:str, cycle:str = None):
+        try:
+            return self.form_history_mongo_client.list_versions(user_id, section, cycle)
+        except Exception as e:
+            logger.error(f"Error listing section history: {e}")
+            raise e
+
+
+class FormHistorySink(Sink):
+    """Relay sink that writes the history of the sections the outbox events record."""
+    name = "history"
+    with_values = True
+
+    def __init__(self, service:FormHistoryService = None):
+        self.service = service or get_instance(FormHistoryService)
+
+    def deliver(self, events:List[Dict]):
+        self.service.record_events(events)
@@ -0,0 +1,178 @@
+import logging
+import threading
+import time
+from typing import List,Dict
+from bson import ObjectId
+from django.conf import settings
+from appraisal_form_injestion.clients.data_injestion_mongo_client import resolve_cycle
+from appraisal_form_injestion.clients.outbox_mongo_client import OutboxMongoClient
+from common.registry import get_instance
+from common.sinks import Sink
+
+logger = logging.getLogger(__name__)
+
+class OutboxService:
+    """
+    Section change events. DataInjestionService and FormBulkIngestService
+    append them in the transaction that writes the sections; relay_batch()
+    delivers them to a sink in position order and then moves the consumer's
+    checkpoint past them, so every event is delivered at least once, and
+    again if the relay stops in between.
+    """
+    def __init__(self):
+        self.outbox_mongo_client = get_instance(OutboxMongoClient)
+        # Consumer -> (checkpoint position, monotonic time) of a gap the relay is waiting on
+        self._gaps = {}
+        self._warned_disabled = False
+
+    def is_enabled(self) -> bool:
+        """
+        Whether saves append change events. Besides OUTBOX_ENABLED, that needs a
+        storage that can append them in the saving transaction: on a standalone
+        MongoDB server the outbox is off, with a warning, unless
+        MONGO_ALLOW_WRITES_WITHOUT_TRANSACTIONS accepts appending them without one.
+        """
+        if not settings.OUTBOX_ENABLED:
+            return False
+        if self.outbox_mongo_client.storage.supports_transactions() or settings.MONGO_ALLOW_WRITES_WITHOUT_TRANSACTIONS:
+            return True
+        if not self._warned_disabled:
+            self._warned_disabled = True
+            logger.warning(
+                "The storage cannot run transactions, so no section change events are recorded; use a MongoDB "
+                "replica set, or set MONGO_ALLOW_WRITES_WITHOUT_TRANSACTIONS to record them without one"
+            )
+        return False
+
+    @staticmethod
+    def section_events(user_id:str, data:Dict, versions:Dict, cycle:str = None) -> List[Dict]:
+        """
+        One event per section written: who, which section, its new score and
+        version, and the value saved, which only sinks with_values receive.
+        """
+        cycle = resolve_cycle(cycle)
+        events = []
+        for section, version in versions.items():
+            if not version:
+                continue
+            value = data.get(section)
+            score = None
+            if isinstance(value, dict):
+                # Sections keep their score under "score" or "total_score"; 1-10 has none
+                score = value.get("score", value.get("total_score"))
+            events.append({"_id": ObjectId(), "cycle": cycle, "user_id": user_id, "section": section, "score": score, "version": version, "value": value})
+        return events
+
+    def append_section_events(self, user_id:str, data:Dict, versions:Dict, cycle:str = None):
+        self.outbox_mongo_client.append_events(self.section_events(user_id, data, versions, cycle))
+
+    def append_events(self, events:List[Dict]):
+        self.outbox_mongo_client.append_events(events)
+
+    def relay_batch(self, consumer:str, sink:Sink, batch_size:int = None, settle_ms:int = None) -> int:
+        """
+        Deliver the next batch of events after the consumer's checkpoint and
+        move the checkpoint past it. Returns the number of events delivered.
+
+        Only consecutive positions from the checkpoint on are delivered. Events
+        appended in a transaction never leave a gap; one appended without a
+        transaction (MONGO_ALLOW_WRITES_WITHOUT_TRANSACTIONS) may still be in
+        flight behind a later one, or may have failed after taking its
+        position. A gap is waited for until it has stayed open for the settle
+        time, by this relay's own clock, and then skipped with a warning.
+        """
+        batch_size = settings.OUTBOX_RELAY_BATCH_SIZE if batch_size is None else batch_size
+        settle_ms = settings.OUTBOX_RELAY_SETTLE_MS if settle_ms is None else settle_ms
+
+        checkpoint = self.outbox_mongo_client.get_checkpoint(consumer)
+        after = self._position(checkpoint)
+        events = self.outbox_mongo_client.get_events(after, batch_size)
+        if not events:
+            return 0
+
+        run = self._consecutive(after, events)
+        if not run:
+            opened = self._gaps.get(consumer)
+            if opened is None or opened[0] != after:
+                opened = self._gaps[consumer] = (after, time.monotonic())
+            if (time.monotonic() - opened[1]) * 1000 < settle_ms:
+                return 0
+            logger.warning(f"Skipping outbox positions {after + 1} to {events[0]['position'] - 1} for {consumer}, they were never written")
+            run = self._consecutive(events[0]["position"] - 1, events)
+        self._gaps.pop(consumer, None)
+
+        sink.deliver([self.delivered_form(event, sink.with_values) for event in run])
+        self.outbox_mongo_client.save_checkpoint(consumer, run[-1]["position"], len(run))
+        return len(run)
+
+    @staticmethod
+    def _position(checkpoint:Dict) -> int:
+        # Checkpoints from before events had positions are restarted from the beginning
+        position = checkpoint.get("position") if checkpoint else None
+        return position if type(position) is int else 0
+
+    @staticmethod
+    def _consecutive(after:int, events:List[Dict]) -> List[Dict]:
+        """The leading events whose positions follow after without a gap."""
+        run = []
+        for event in events:
+            if event["position"] != after + len(run) + 1:
+                break
+            run.append(event)
+        return run
+
+    def relay(self, consumer:str, sink:Sink, batch_size:int = None, interval:float = None, settle_ms:int = None, stop:threading.Event = None) -> int:
+        """
+        Relay batches until stop is set, waiting interval seconds whenever the
+        outbox is drained or the sink fails. Returns the number of events delivered.
+        """
+        interval = settings.OUTBOX_RELAY_INTERVAL if interval is None else interval
+        stop = stop or threading.Event()
+        delivered = 0
+        while not stop.is_set():
+            try:
+                count = self.relay_batch(consumer, sink, batch_size, settle_ms)
+            except Exception as e:
+                logger.error(f"Error relaying outbox events to {consumer}: {e}")
+                count = 0
+            delivered += count
+            if not count:
+                stop.wait(interval)
+        return delivered
+
+    def get_checkpoints(self) -> List[Dict]:
+        return [
+            {"consumer": checkpoint["_id"], "position": self._position(checkpoint), "delivered": checkpoint.get("delivered", 0),
+             "updated_at": checkpoint.get("updated_at")}
+            for checkpoint in self.outbox_mongo_client.get_checkpoints()
+        ]
+
+    def prune(self) -> int:
+        """
+        Delete the events every consumer with a checkpoint has been delivered,
+        and the history relay too: the form history is derived from them, so
+        they are kept until it has written them even before it first runs.
+        """
+        checkpoints = self.outbox_mongo_client.get_checkpoints()
+        positions = {checkpoint["_id"]: self._position(checkpoint) for checkpoint in checkpoints}
+        position = min([positions.get(settings.FORM_HISTORY_CONSUMER, 0), *positions.values()])
+        if not position:
+            return 0
+        return self.outbox_mongo_client.delete_events(position)
+
+    @staticmethod
+    def delivered_form(event:Dict, with_value:bool = False) -> Dict:
+        """The event as sinks receive it, with its _id as a string event_id consumers can deduplicate by."""
+        delivered = {
+            "event_id": str(event["_id"]),
+            "position": event["position"],
+            "cycle": event.get("cycle"),
+            "user_id": event["user_id"],
+            "section": event["section"],
+            "score": event.get("score"),
+            "version": event["version"],
+            "created_at": event.get("created_at"),
+        }
+        if with_value:
+            delivered["value"] = event.get("value")
+        return delivered
@@ -0,0 +1,101 @@
+import logging
+from typing import List,Dict
+from appraisal_form_injestion.clients.publication_index_mongo_client import PublicationIndexMongoClient
+from appraisal_form_injestion.utils import (extract_doi, extract_issn, extract_publication_title, normalize_publication_title,
+publication_fingerprint)
+from common.registry import get_instance
+
+logger = logging.getLogger(__name__)
+
+LEAD_AUTHOR_TYPE = "first/principal author"
+
+class PublicationIndexService:
+    def __init__(self):
+        self.publication_index_mongo_client = get_instance(PublicationIndexMongoClient)
+
+    @staticmethod
+    def build_entries(data:List[Dict]) -> List[Dict]:
+        entries = {}
+        for item in data:
+            fingerprint = publication_fingerprint(item)
+            if not fingerprint:
+                continue
+            reference = item.get("title_and_complete_reference", "")
+            entries[fingerprint] = {
+                "fingerprint": fingerprint,
+                "title": reference,
+                # Title prefix lookups match the title, not the authors the reference starts with
+                "normalized_title": normalize_publication_title(extract_publication_title(reference)),
+                "doi": extract_doi(reference),
+                "issn": extract_issn(reference),
+                "pub_type": str(item.get("pub_type", "")).upper(),
+                "user_author_type": str(item.get("user_author_type", "")).lower(),
+                "author_count": 1 + len(item.get("other_authors", []) or []),
+            }
+        return list(entries.values())
+
+    def index_user_publications(self, user_id:str, data:List[Dict]):
+        try:
+            self.publication_index_mongo_client.sync_user_publications(user_id, self.build_entries(data))
+        except Exception as e:
+            logger.error(f"Error indexing publications: {e}")
+            raise e
+
+    def suggest_publications(self, query:str, limit:int = 10):
+        try:
+            doi = extract_doi(query)
+            issn = extract_issn(query, labelled=True)
+            prefix = normalize_publication_title(query)
+            if doi:
+                rows = self.publication_index_mongo_client.find_by_doi(doi, limit)
+            elif issn and (not prefix or len(query.strip()) <= 9):
+                # The query is an ISSN and nothing else, with or without its hyphen or label
+                rows = self.publication_index_mongo_client.find_by_issn(issn, limit)
+            elif prefix:
+                rows = self.publication_index_mongo_client.find_by_title_prefix(prefix, limit)
+            else:
+                return []
+
+            return [{
+                "fingerprint": row["_id"],
+                "title": row.get("title"),
+                "doi": row.get("doi"),
+                "issn": row.get("issn"),
+                "pub_type": row.get("pub_type"),
+                "claimed_by": [claim["user_id"] for claim in row.get("claims", [])],
+            } for row in rows]
+        except Exception as e:
+            logger.error(f"Error suggesting publications: {e}")
+            raise e
+
+    def get_consistency_report(self):
+        """
+        Flag papers claimed by more than one faculty member whose claims cannot
+        all be true: several claimants as first/principal author, or claimants
+        disagreeing on the number of authors the score is split across.
+        """
+        try:
+            report = []
+            for row in self.publication_index_mongo_client.get_shared_publications():
+                claims = row.get("claims", [])
+                conflicts = []
+
+                lead_claimants = [claim["user_id"] for claim in claims if claim.get("user_author_type") == LEAD_AUTHOR_TYPE]
+                if len(lead_claimants) > 1:
+                    conflicts.append({"type": "multiple_first_authors", "user_ids": lead_claimants})
+
+                author_counts = {claim["user_id"]: claim.get("author_count") for claim in claims}
+                if len(set(author_counts.values())) > 1:
+                    conflicts.append({"type": "author_count_mismatch", "author_counts": author_counts})
+
+                if conflicts:
+                    report.append({
+                        "fingerprint": row["_id"],
+                        "title": row.get("title"),
+                        "claims": claims,
+                        "conflicts": conflicts,
+                    })
+            return report
+        except Exception as e:
+            logger.error(f"Error building publication consistency report: {e}")
+            raise e
@@ -0,0 +1,290 @@
+"""
+Deterministic synthetic institution data for scale testing: a faculty
+directory and, per faculty member and cycle, payloads for every section of
+the appraisal form in the shapes the item scorers expect.
+
+Every faculty member draws from their own generator seeded by (seed, index),
+so the same seed always yields the same data regardless of how much of it is
+generated or in which order.
+"""
+import copy
+import math
+import random
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Tuple
+
+# Mean and upper bound of every list length. Lengths are Poisson distributed
+# around the mean and clipped to the bound; "authors" counts everyone on a
+# paper, project or thesis including the faculty member.
+DEFAULT_DISTRIBUTIONS = {
+    "events": {"mean": 4, "max": 20},
+    "courses": {"mean": 3, "max": 6},
+    "activities_12_4": {"mean": 2, "max": 6},
+    "activities_13": {"mean": 1.5, "max": 8},
+    "publications": {"mean": 3, "max": 30},
+    "books": {"mean": 0.4, "max": 5},
+    "projects": {"mean": 0.8, "max": 6},
+    "students": {"mean": 1.5, "max": 10},
+    "memberships": {"mean": 1.5, "max": 8},
+    "awards": {"mean": 0.5, "max": 6},
+    "authors": {"mean": 3.5, "max": 15},
+    # Probability that a faculty member has filled in a given section
+    "completion": 0.85,
+}
+
+DEPARTMENTS = ["CSE", "ECE", "IT", "Biotechnology", "Mathematics", "Physics", "HSS", "Management"]
+DESIGNATIONS = ["Assistant Professor", "Assistant Professor (Grade II)", "Associate Professor", "Professor"]
+FIRST_NAMES = ["Aarti", "Amit", "Anjali", "Arjun", "Deepak", "Kavita", "Manish", "Neha", "Pooja", "Rahul",
+               "Rajesh", "Ritu", "Sandeep", "Shalini", "Sunil", "Swati", "Vikas", "Vivek", "Yamini", "Zoya"]
+LAST_NAMES = ["Agarwal", "Bansal", "Chauhan", "Gupta", "Jain", "Kapoor", "Kumar", "Mehta", "Mishra", "Rao",
+              "Sharma", "Singh", "Srivastava", "Tiwari", "Verma"]
+TOPICS = ["deep learning", "wireless sensor networks", "protein folding", "graph algorithms", "VLSI design",
+          "quantum materials", "supply chain analytics", "natural language processing", "image segmentation",
+          "cryptographic protocols", "renewable energy systems", "computational biology"]
+SEMESTERS = ["odd", "even"]
+
+class SyntheticInstitution:
+    def __init__(self, seed:int = 0, distributions:Dict = None):
+        self.seed = seed
+        self.distributions = copy.deepcopy(DEFAULT_DISTRIBUTIONS)
+        for key, value in (distributions or {}).items():
+            if isinstance(value, dict):
+                self.distributions.setdefault(key, {}).update(value)
+            else:
+                self.distributions[key] = value
+
+    def random_for(self, *key) -> random.Random:
+        return random.Random(":".join(str(part) for part in (self.seed, *key)))
+
+    def faculty(self, index:int) -> Dict:
+        """Faculty directory record, as the faculty import writes it."""
+        rng = self.random_for("faculty", index)
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        return {
+            "user_id": f"F{index:05d}",
+            "name": f"{first} {last}",
+            "email": f"{first}.{last}.{index}@example.edu".lower(),
+            "department": rng.choice(DEPARTMENTS),
+            "designation": rng.choice(DESIGNATIONS),
+            "joining_date": (date(2000, 1, 1) + timedelta(days=rng.randrange(9000))).isoformat(),
+        }
+
+    def form_sections(self, faculty:Dict, cycle:str) -> List[Tuple[str, object, str]]:
+        """
+        (section, payload, semester) for every section a faculty member filled in
+        for a cycle; semester is only set for item 12.1.
+        """
+        rng = self.random_for("form", faculty["user_id"], cycle)
+        year = int(cycle[:4]) if cycle[:4].isdigit() else 2024
+        sections = []
+
+        def filled():
+            return rng.random() < self.distributions["completion"]
+
+        # Item 1-10 is always filled in, it carries the department
+        sections.append(("1-10", self._item1_to_10(rng, faculty), None))
+        if filled():
+            sections.append(("11", [self._event(rng, year) for _ in range(self._count(rng, "events"))], None))
+        for semester in SEMESTERS:
+            if filled():
+                sections.append(("12.1", [self._course(rng) for _ in range(max(1, self._count(rng, "courses")))], semester))
+        if filled():
+            sections.append(("12.3-12.4", self._item12_3_to_12_4(rng), None))
+        if filled():
+            sections.append(("13", self._item13(rng), None))
+        if filled():
+            sections.append(("14", [self._publication(rng, year) for _ in range(self._count(rng, "publications"))], None))
+        if filled():
+            sections.append(("15", [self._book(rng, year) for _ in range(self._count(rng, "books"))], None))
+        if filled():
+            sections.append(("16", [self._project(rng, year) for _ in range(self._count(rng, "projects"))], None))
+        if filled():
+            sections.append(("17", [self._student(rng, year) for _ in range(self._count(rng, "students"))], None))
+        if filled():
+            sections.append(("18", [self._membership(rng) for _ in range(self._count(rng, "memberships"))], None))
+        if filled():
+            sections.append(("19", self._item19(rng), None))
+        return sections
+
+    # Distributions
+
+    def _count(self, rng:random.Random, name:str) -> int:
+        distribution = self.distributions[name]
+        return min(self._poisson(rng, distribution["mean"]), distribution["max"])
+
+    @staticmethod
+    def _poisson(rng:random.Random, mean:float) -> int:
+        # Knuth's method, fine for the small means used here
+        if mean <= 0:
+            return 0
+        limit, count, product = math.exp(-mean), 0, rng.random()
+        while product > limit:
+            count += 1
+            product *= rng.random()
+        return count
+
+    def _co_authors(self, rng:random.Random, lead_types:List[str], other_type:str, user_type:str) -> List[Dict]:
+        """
+        Co-authors of a joint work. Item 14 splits points between lead and other
+        authors and needs at least one of each among all authors, so the list
+        always completes whichever category the faculty member is not in.
+        """
+        total = max(2, min(1 + self._poisson(rng, self.distributions["authors"]["mean"] - 1), self.distributions["authors"]["max"]))
+        authors = []
+        for position in range(total - 1):
+            if position == 0:
+                author_type = other_type if user_type in lead_types else rng.choice(lead_types)
+            else:
+                author_type = rng.choice(lead_types) if rng.random() < 0.2 else other_type
+            authors.append({"name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", "author_type": author_type})
+        return authors
+
+    # Section payloads
+
+    def _item1_to_10(self, rng:random.Random, faculty:Dict) -> Dict:
+        return {
+            "full_name": faculty["name"],
+            "present_designation": faculty["designation"],
+            "qualifications": rng.choice(["Ph.D.", "M.Tech.", "M.Sc., Ph.D.", "MBA, Ph.D."]),
+            "department": faculty["department"],
+            "institute_joining_date": faculty["joining_date"],
+            "first_designation": DESIGNATIONS[0],
+            "present_pay_scale_&_pay": rng.randrange(60000, 220000, 100),
+            "areas_of_specialization_and_current_interest": ", ".join(rng.sample(TOPICS, 2)),
+            "additional_qualification_acquired": "",
+            "pursuing_higher_studies": rng.choice(["No", "No", "Ph.D. (part time)"]),
+        }
+
+    def _event(self, rng:random.Random, year:int) -> Dict:
+        start = date(year, 7, 1) + timedelta(days=rng.randrange(330))
+        program_type = rng.choice(["course", "program", "seminar", "conference", "workshop"])
+        days = rng.choice([1, 2, 3, 5]) if program_type in ("seminar", "conference", "workshop") else rng.choice([3, 5, 7, 10, 14, 21])
+        status = "organized" if rng.random() < 0.25 else "attended"
+        return {
+            "title": f"{program_type.title()} on {rng.choice(TOPICS)}",
+            # Scorers parse dd-mm-YYYY and need both dates to score courses and organised events
+            "start_date": start.strftime("%d-%m-%Y"),
+            "end_date": (start + timedelta(days=days - 1)).strftime("%d-%m-%Y"),
+            "attended/organized": status,
+            "program_type": program_type,
+            "is_chief_organizer": status == "organized" and rng.random() < 0.3,
+            "sponsoring_agency": rng.choice(["AICTE", "DST", "SERB", "Self", "IEEE"]),
+            "organisation_&_place": rng.choice(["IIT Delhi", "NIT Kurukshetra", "JIIT Noida", "IISc Bangalore"]),
+        }
+
+    def _course(self, rng:random.Random) -> Dict:
+        contact_hours = rng.choice([2, 3, 4])
+        scheduled = contact_hours * rng.randrange(12, 16)
+        return {
+            "course_code": f"{rng.choice(['CS', 'EC', 'MA', 'PH', 'HS'])}{rng.randrange(100, 900)}",
+            "course_title": rng.choice(TOPICS).title(),
+            "contact_hr_per_week": contact_hours,
+            "total_hour_scheduled": scheduled,
+            "total_hour_engaged": max(0, scheduled + rng.randrange(-8, 4)),
+        }
+
+    def _item12_3_to_12_4(self, rng:random.Random) -> Dict:
+        return {
+            "12.3": {
+                "number_of_projects_guided": self._poisson(rng, 3),
+                "number_of_students_guided": self._poisson(rng, 8),
+            },
+            "12.4": [
+                {"activity": rng.choice(["Lab development", "Question bank", "Course file", "Mentoring"]),
+                 "class": rng.choice(["B.Tech. I", "B.Tech. II", "B.Tech. III", "M.Tech. I"]),
+                 "t1": rng.randrange(10), "t2": rng.randrange(10), "t3": rng.randrange(10)}
+                for _ in range(self._count(rng, "activities_12_4"))
+            ],
+        }
+
+    def _item13(self, rng:random.Random) -> Dict:
+        def activities(make):
+            return [make() for _ in range(self._count(rng, "activities_13"))]
+        return {
+            "A": activities(lambda: {"name_of_club": rng.choice(["Robotics", "Music", "Literary", "Coding"]),
+                                     "played_lead_role": rng.random() < 0.3, "details_of_activities": "Club activities"}),
+            "B": activities(lambda: {"role": rng.choice(["Incharge/Chairman", "Member"]), "details_of_activities": "Committee work"}),
+            "C": activities(lambda: {"position_type": rng.choice(["HOD", "Time Table Incharge", "Member", "Individual Responsibility"]),
+                                     "details_of_activities": "Administrative responsibility"}),
+            "D": activities(lambda: {"nature": rng.choice(["outside", "within"]), "details_of_activities": "Extension activity"}),
+            "E": activities(lambda: {"points": rng.randrange(1, 4), "details": "Other contribution"}),
+        }
+
+    def _publication(self, rng:random.Random, year:int) -> Dict:
+        pub_type = rng.choices(["IJ", "NJ", "OJ", "IC", "NC", "LC", "PN", "OA"], weights=[30, 10, 5, 30, 10, 5, 5, 5])[0]
+        indexed = pub_type in ("IJ", "IC") and rng.random() < 0.6
+        impact_factor = round(rng.uniform(0.5, 8), 2) if pub_type == "IJ" and rng.random() < 0.5 else 0
+        user_type = rng.choice(["First/Principal Author", "Corresponding Author/Supervisor/Mentor", "Other"])
+        issn = f"{rng.randrange(1000, 9999)}-{rng.randrange(100, 999)}{rng.choice('0123456789X')}"
+        doi = f"10.{rng.randrange(1000, 9999)}/syn.{year}.{rng.randrange(10 ** 6)}"
+        return {
+            "title_and_complete_reference": f"A study of {rng.choice(TOPICS)}, Journal of {rng.choice(TOPICS).title()}, {year}, ISSN {issn}, doi:{doi}",
+            "pub_type": pub_type,
+            # The scorer reads isbn_issn for every publication type
+            "isbn_issn": rng.choice(["ISSN", "ISBN", "Other"]),
+            "indexed": indexed,
+            "impact_factor": impact_factor,
+            "user_author_type": user_type,
+            # Item 14 only scores joint publications
+            "other_authors": self._co_authors(rng, ["First/Principal Author", "Corresponding Author/Supervisor/Mentor"], "Other", user_type),
+        }
+
+    def _book(self, rng:random.Random, year:int) -> Dict:
+        is_chapter = rng.random() < 0.6
+        user_type = rng.choice(["First/Principal Author", "Other"])
+        return {
+            "title_and_complete_reference": f"{rng.choice(TOPICS).title()}: Theory and Practice, {year}",
+            "publisher_type": rng.choice(["IP", "NP", "LP"]),
+            "is_chapter": is_chapter,
+            "number_of_chapters": rng.randrange(1, 4) if is_chapter else 0,
+            "user_author_type": user_type,
+            "other_authors": self._co_authors(rng, ["First/Principal Author"], "Other", user_type) if rng.random() < 0.7 else [],
+        }
+
+    def _project(self, rng:random.Random, year:int) -> Dict:
+        user_type = rng.choice(["Chief/Co Investigator", "Other"])
+        return {
+            "title": f"Project on {rng.choice(TOPICS)}",
+            "sponsoring_agency": rng.choice(["DST", "SERB", "DBT", "ICMR", "Industry"]),
+            "duration": f"{rng.randrange(1, 4)} years",
+            "sanction_date": date(year, rng.randrange(1, 13), 1).isoformat(),
+            "status": rng.choice(["ongoing", "completed"]),
+            "is_hss": rng.random() < 0.15,
+            "amount_sanctioned": round(rng.uniform(0.2, 40), 2),
+            "is_consultancy": rng.random() < 0.2,
+            "user_author_type": user_type,
+            "other_authors": self._co_authors(rng, ["Chief/Co Investigator"], "Other", user_type) if rng.random() < 0.6 else [],
+        }
+
+    def _student(self, rng:random.Random, year:int) -> Dict:
+        degree = rng.choice(["PhD", "PhD", "M.Tech.", "M.Phil."])
+        status = rng.choice(["awarded", "thesis submitted", "ongoing"])
+        user_type = rng.choice(["Chief Supervisor", "Other"])
+        return {
+            "title": f"Thesis on {rng.choice(TOPICS)}",
+            "enroll_no_and_name": f"{year % 100}{rng.randrange(10 ** 6):06d} {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "degree": degree,
+            "status": status,
+            # Ongoing PhDs only score after six months, and the scorer has no points for fewer
+            "months_ongoing": rng.randrange(7, 60) if status == "ongoing" else 0,
+            "user_author_type": user_type,
+            "other_authors": self._co_authors(rng, ["Chief Supervisor"], "Other", user_type) if rng.random() < 0.5 else [],
+        }
+
+    def _membership(self, rng:random.Random) -> Dict:
+        return {
+            "position_type": rng.choice(["Chairmanship", "Member", "Member", "Reviewer"]),
+            "membership_details": f"{rng.choice(['IEEE', 'ACM', 'CSI', 'ISTE'])} {rng.choice(['chapter', 'committee', 'board'])}",
+        }
+
+    def _item19(self, rng:random.Random) -> Dict:
+        awards = self._count(rng, "awards")
+        return {
+            "self": [{"details": "Institute award", "points": rng.randrange(1, 11)} for _ in range(awards)],
+            "national": [{"details": "National award"} for _ in range(self._poisson(rng, awards * 0.2))],
+            "international": [{"details": "International award"} for _ in range(self._poisson(rng, awards * 0.05))],
+        }
+
+def iter_cycles(first_year:int, years:int) -> Iterator[str]:
+    for year in range(first_year, first_year + years):
+        yield f"{year}-{year + 1}"
@@ -0,0 +1,35 @@
+import io
+import uuid
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from common.registry import reset_instances
+from common.storage import create_storage, set_storage
+
+class StorageTestCase(SimpleTestCase):
+    """
+    Runs each test against a fresh database on a new storage, installed as the
+    process-wide one with the app's indexes, and the shared services rebuilt
+    against it. Subclasses override create_storage() to use another backend.
+    """
+    def create_storage(self):
+        return create_storage("memory")
+
+    def setUp(self):
+        super().setUp()
+        settings_override = override_settings(APPRAISAL_SYSTEM_MONGO_DB_NAME=f"test_{uuid.uuid4().hex[:12]}")
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.storage = self.create_storage()
+        self.addCleanup(self.storage.close)
+        set_storage(self.storage)
+        self.addCleanup(set_storage, None)
+        reset_instances()
+        self.addCleanup(reset_instances)
+        self.addCleanup(self._drop_database, settings.APPRAISAL_SYSTEM_MONGO_DB_NAME)
+        call_command("ensure_mongo_indexes", stdout=io.StringIO())
+
+    def _drop_database(self, name:str):
+        database = self.storage.database(name)
+        for collection in database.list_collection_names():
+            database.drop_collection(collection)
@@ -0,0 +1,108 @@
+"""
+Evidence attachments are deduplicated by content: a second upload of the same
+bytes is refused by the unique sha256 index and answered with the stored file.
+"""
+import io
+import os
+import unittest
+from bson import ObjectId
+from django.conf import settings
+from django.test import override_settings
+from gridfs.errors import FileExists
+from appraisal_form_injestion.clients.attachment_mongo_client import AttachmentHashMismatch, AttachmentMongoClient
+from appraisal_form_injestion.services.attachment_service import AttachmentService
+from appraisal_form_injestion.tests import StorageTestCase
+from common.registry import get_instance
+from common.storage import create_storage
+
+CONTENT = b"%PDF-1.7 certificate " * 1000
+
+class FakeGridIn:
+    """The parts of GridIn the client uses; close() refuses stored content the way the unique index does."""
+    def __init__(self, bucket, filename:str, metadata:dict):
+        self.bucket, self.filename, self.metadata = bucket, filename, metadata
+        self._id = ObjectId()
+        self.chunks = []
+
+    def write(self, chunk:bytes):
+        self.chunks.append(chunk)
+
+    def close(self):
+        files = self.bucket.client.db[self.bucket.client.files_collection]
+        if files.find_one({"metadata.sha256": self.metadata["sha256"]}):
+            raise FileExists(f"file with _id {self._id!r} already exists")
+        files.insert_one({"_id": self._id, "filename": self.filename, "length": sum(map(len, self.chunks)), "metadata": self.metadata})
+
+    def abort(self):
+        self.bucket.aborted.append(self._id)
+
+class FakeBucket:
+    def __init__(self, client:AttachmentMongoClient):
+        self.client = client
+        self.aborted = []
+
+    def open_upload_stream(self, filename:str, metadata:dict = None):
+        return FakeGridIn(self, filename, metadata)
+
+
+@override_settings(ATTACHMENT_SECTIONS=["14"], ATTACHMENT_MAX_SIZE=1 << 20)
+class AttachmentDedupTests(StorageTestCase):
+    def setUp(self):
+        super().setUp()
+        self.service = get_instance(AttachmentService)
+        self.client = self.service.attachment_mongo_client
+        self.use_bucket()
+
+    def use_bucket(self):
+        self.client._bucket = FakeBucket(self.client)
+
+    def upload(self, user_id:str, content:bytes = CONTENT, expected_sha256:str = None):
+        return self.service.upload_attachment(io.BytesIO(content), user_id, "14", "certificate.pdf", "application/pdf", expected_sha256)
+
+    def stored(self):
+        return list(self.client.find_all(self.client.files_collection, {}, projection={"metadata.owners": 1, "metadata.sha256": 1}))
+
+    def test_same_content_twice(self):
+        first = self.upload("u1")
+        second = self.upload("u2")
+        self.assertEqual(first["deduplicated"], False, "first upload")
+        self.assertEqual((second["attachment_id"], second["deduplicated"]), (first["attachment_id"], True), "second upload")
+        self.assertEqual(second["sha256"], first["sha256"], "hash")
+        stored = self.stored()
+        self.assertEqual(len(stored), 1, "stored files")
+        self.assertEqual(stored[0]["metadata"]["owners"], ["u1", "u2"], "owners")
+
+    def test_hash_mismatch_keeps_the_stored_file(self):
+        first = self.upload("u1")
+        with self.assertRaises(AttachmentHashMismatch):
+            self.upload("u2", expected_sha256="0" * 64)
+        self.assertEqual([str(file["_id"]) for file in self.stored()], [first["attachment_id"]], "stored files after the mismatch")
+        self.assertEqual(self.stored()[0]["metadata"]["owners"], ["u1"], "owners after the mismatch")
+
+    def test_refused_copy_is_dropped(self):
+        self.upload("u1")
+        second = self.upload("u2")
+        self.assertEqual(len(self.client.bucket.aborted), 1, "aborted copies")
+        self.assertNotEqual(str(self.client.bucket.aborted[0]), second["attachment_id"], "aborted copy is not the stored file")
+
+    def test_different_content_is_stored_separately(self):
+        first = self.upload("u1")
+        second = self.upload("u1", CONTENT + b"v2")
+        self.assertNotEqual(first["attachment_id"], second["attachment_id"], "distinct files")
+        self.assertEqual(len(self.stored()), 2, "stored files")
+
+
+@unittest.skipUnless(os.getenv("STORAGE_TEST_MONGO_URI"), "set STORAGE_TEST_MONGO_URI to run against MongoDB")
+class MongoAttachmentDedupTests(AttachmentDedupTests):
+    """The same tests on GridFS itself, whose unique index refusal surfaces as FileExists."""
+    def create_storage(self):
+        return create_storage("mongo", uri=os.getenv("STORAGE_TEST_MONGO_URI"))
+
+    def use_bucket(self):
+        pass
+
+    def test_refused_copy_is_dropped(self):
+        first = self.upload("u1")
+        self.upload("u2")
+        chunks = self.client.db[f"{settings.ATTACHMENT_BUCKET_NAME}.chunks"]
+        self.assertEqual(chunks.distinct("files_id"), [ObjectId(first["attachment_id"])], "chunk owners")
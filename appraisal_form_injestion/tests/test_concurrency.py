@@ -0,0 +1,86 @@
+"""
+Optimistic concurrency on section saves: reads return the section version as
+an ETag, saves sent with it in If-Match (or expected_version) only apply if
+the section is still at that version, and stale saves get a 409 carrying the
+current version.
+"""
+import threading
+import orjson
+from django.test import Client
+from appraisal_form_injestion.tests import StorageTestCase
+
+def projects(title:str):
+    return [{"title": title, "status": "ongoing", "months_ongoing": 6}]
+
+def save(user_id:str, title:str, if_match:str = None, **body):
+    headers = {"HTTP_IF_MATCH": if_match} if if_match is not None else {}
+    payload = {"user_id": user_id, "data": projects(title), **body}
+    return Client().post("/api/injest-item-17/", orjson.dumps(payload), content_type="application/json", **headers)
+
+def read(user_id:str, section:str = "17", **params):
+    return Client().get("/api/get-item-by-section/", {"user_id": user_id, "section": section, **params})
+
+
+class SectionVersionTests(StorageTestCase):
+    def test_read_and_save_with_the_etag(self):
+        self.assertEqual(save("v1", "first")["ETag"], '"1"', "first save")
+        etag = read("v1")["ETag"]
+        self.assertEqual(etag, '"1"', "read")
+        response = save("v1", "second", if_match=etag)
+        self.assertEqual((response.status_code, response["ETag"]), (200, '"2"'), "conditional save")
+        self.assertEqual(read("v1").json()["result"]["17"]["data"][0]["title"], "second", "saved data")
+
+    def test_stale_save_is_refused(self):
+        save("v1", "first")
+        save("v1", "second", if_match='"1"')
+        response = save("v1", "lost update", if_match='"1"')
+        self.assertEqual((response.status_code, response["ETag"]), (409, '"2"'), "stale save")
+        self.assertEqual(response.json()["result"], {"current_version": 2}, "conflict body")
+        self.assertEqual(read("v1").json()["result"]["17"]["data"][0]["title"], "second", "data after the stale save")
+
+    def test_entity_tag_forms(self):
+        save("v1", "first")
+        self.assertEqual(save("v1", "weak", if_match='W/"1"').status_code, 200, "weak tag")
+        self.assertEqual(save("v1", "bare", if_match="2").status_code, 200, "bare version")
+        self.assertEqual(save("v1", "any", if_match="*").status_code, 200, "unconditional")
+        self.assertEqual(save("v1", "bad", if_match='"abc"').status_code, 400, "tag that is not a version")
+
+    def test_expected_version_in_the_body(self):
+        self.assertEqual(save("v1", "create", expected_version=0).status_code, 200, "create if missing")
+        self.assertEqual(save("v1", "create again", expected_version=0).status_code, 409, "create over an existing section")
+        self.assertEqual(save("v1", "second", expected_version=1).status_code, 200, "conditional save")
+        # If-Match wins over the body
+        self.assertEqual(save("v1", "third", if_match='"2"', expected_version=1).status_code, 200, "header and body")
+
+    def test_conditional_save_of_a_missing_section(self):
+        response = save("v2", "first", if_match='"3"')
+        self.assertEqual((response.status_code, response.json()["result"]), (409, {"current_version": 0}), "no section to update")
+        self.assertEqual(read("v2").json()["result"], None, "nothing created")
+
+    def test_semesters_are_versioned_separately(self):
+        for semester in ("odd-2026", "even-2027"):
+            payload = {"user_id": "v3", "semester": semester, "data": [{"course_code": "CS101", "total_hour_scheduled": 40, "total_hour_engaged": 38}]}
+            response = Client().post("/api/injest-item-12-1/", orjson.dumps(payload), content_type="application/json")
+            self.assertEqual(response["ETag"], '"1"', semester)
+        payload = {"user_id": "v3", "semester": "odd-2026", "data": []}
+        response = Client().post("/api/injest-item-12-1/", orjson.dumps(payload), content_type="application/json", HTTP_IF_MATCH='"1"')
+        self.assertEqual(response["ETag"], '"2"', "second odd semester save")
+        self.assertEqual(read("v3", "12.1", semester="odd-2026")["ETag"], '"2"', "odd semester tag")
+        self.assertEqual(read("v3", "12.1", semester="even-2027")["ETag"], '"1"', "even semester tag")
+
+    def test_concurrent_saves_from_one_version(self):
+        save("v4", "first")
+        barrier = threading.Barrier(8)
+        statuses = []
+
+        def concurrent_save(index:int):
+            barrier.wait()
+            statuses.append(save("v4", f"edit {index}", if_match='"1"').status_code)
+
+        threads = [threading.Thread(target=concurrent_save, args=(index,)) for index in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(statuses), [200] + [409] * 7, "one save wins")
+        self.assertEqual(read("v4")["ETag"], '"2"', "version after the race")
@@ -0,0 +1,124 @@
+"""
+Section history: derived from the outbox events by the history relay while
+the outbox is enabled, so saves do not write it, and written by the save
+itself while it is off. Past versions are rebuilt from snapshots and diffs.
+"""
+import orjson
+from django.conf import settings
+from django.test import Client, override_settings
+from appraisal_form_injestion.clients.form_history_mongo_client import FormHistoryMongoClient
+from appraisal_form_injestion.services import form_history_service
+from appraisal_form_injestion.services.form_history_service import FormHistoryService, FormHistorySink
+from appraisal_form_injestion.services.outbox_service import OutboxService
+from appraisal_form_injestion.tests import StorageTestCase
+from common.registry import get_instance
+
+def projects(months:int):
+    return [{"title": "Grid storage", "status": "ongoing", "months_ongoing": months}, {"title": "Catalog", "status": "completed"}]
+
+def save(user_id:str, months:int, expected_version:int = None):
+    payload = {"user_id": user_id, "data": projects(months)}
+    if expected_version is not None:
+        payload["expected_version"] = expected_version
+    return Client().post("/api/injest-item-17/", orjson.dumps(payload), content_type="application/json")
+
+def get_history(**params):
+    return Client().get("/api/section-history/", params)
+
+
+class HistoryTestCase(StorageTestCase):
+    def setUp(self):
+        super().setUp()
+        form_history_service._last_written.clear()
+        self.addCleanup(form_history_service._last_written.clear)
+        self.history = get_instance(FormHistoryService)
+
+    def save_versions(self, user_id:str, count:int):
+        for version in range(1, count + 1):
+            response = save(user_id, 10 + version, expected_version=version - 1 if version > 1 else None)
+            self.assertEqual(response.status_code, 200, response.content)
+
+    def entries(self, user_id:str):
+        return [(entry["version"], entry["kind"]) for entry in self.history.list_versions(user_id, "17")]
+
+    def months(self, user_id:str, version:int):
+        value = self.history.get_section_version(user_id, "17", version)
+        return None if value is None else value["data"][0]["months_ongoing"]
+
+
+@override_settings(OUTBOX_ENABLED=True, FORM_HISTORY_SNAPSHOT_INTERVAL=3)
+class OutboxHistoryTests(HistoryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.outbox = get_instance(OutboxService)
+
+    def relay(self, batch_size:int = None):
+        return self.outbox.relay_batch(settings.FORM_HISTORY_CONSUMER, FormHistorySink(), batch_size)
+
+    def test_saves_leave_the_history_to_the_relay(self):
+        self.save_versions("h1", 2)
+        self.assertEqual(self.entries("h1"), [], "history written by the saves")
+        self.assertEqual(self.relay(), 2, "relayed")
+        self.assertEqual(self.entries("h1"), [(1, "snapshot"), (2, "diff")], "history")
+
+    def test_versions_are_rebuilt(self):
+        self.save_versions("h1", 5)
+        self.relay(batch_size=2)
+        self.relay()
+        self.assertEqual(self.entries("h1"), [(1, "snapshot"), (2, "diff"), (3, "diff"), (4, "snapshot"), (5, "diff")], "history")
+        self.assertEqual([self.months("h1", version) for version in range(1, 6)], [11, 12, 13, 14, 15], "rebuilt versions")
+        self.assertEqual(self.months("h1", 6), None, "unsaved version")
+
+    def test_diffs_without_the_cache(self):
+        self.save_versions("h1", 2)
+        self.relay(batch_size=1)
+        # The relay restarted, so version 2 is diffed against version 1 rebuilt from the history
+        form_history_service._last_written.clear()
+        self.relay()
+        self.assertEqual(self.entries("h1"), [(1, "snapshot"), (2, "diff")], "history")
+        self.assertEqual(self.months("h1", 2), 12, "rebuilt version")
+
+    def test_redelivery_is_harmless(self):
+        self.save_versions("h1", 2)
+        events = [OutboxService.delivered_form(event, True) for event in self.outbox.outbox_mongo_client.get_events(0)]
+        sink = FormHistorySink()
+        sink.deliver(events)
+        sink.deliver(events)
+        self.assertEqual(self.entries("h1"), [(1, "snapshot"), (2, "diff")], "history")
+        self.assertEqual(self.months("h1", 2), 12, "rebuilt version")
+
+    def test_other_sinks_do_not_receive_values(self):
+        save("h1", 11)
+        event = self.outbox.outbox_mongo_client.get_events(0)[0]
+        self.assertNotIn("value", OutboxService.delivered_form(event), "delivered without the value")
+        self.assertEqual(OutboxService.delivered_form(event, True)["value"]["data"][0]["title"], "Grid storage", "delivered with the value")
+
+    def test_history_endpoint(self):
+        self.save_versions("h1", 2)
+        self.relay()
+        response = get_history(user_id="h1", section="17", version=2)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()["result"]["data"]["data"][0]["months_ongoing"], 12, "rebuilt version")
+        self.assertEqual(get_history(user_id="h1", section="17", version=3).status_code, 404, "unsaved version")
+        self.assertEqual(get_history(user_id="h1", section="17", version="x").status_code, 400, "bad version")
+
+
+@override_settings(OUTBOX_ENABLED=False, FORM_HISTORY_SNAPSHOT_INTERVAL=3)
+class SaveHistoryTests(HistoryTestCase):
+    def test_saves_write_the_history(self):
+        self.save_versions("h2", 4)
+        self.assertEqual(self.entries("h2"), [(1, "snapshot"), (2, "diff"), (3, "diff"), (4, "snapshot")], "history")
+        self.assertEqual([self.months("h2", version) for version in range(1, 5)], [11, 12, 13, 14], "rebuilt versions")
+
+    def test_stale_save_writes_no_history(self):
+        self.save_versions("h2", 2)
+        self.assertEqual(save("h2", 99, expected_version=1).status_code, 409, "stale save")
+        self.assertEqual(self.entries("h2"), [(1, "snapshot"), (2, "diff")], "history")
+
+    def test_missing_link_falls_back_to_a_snapshot(self):
+        self.save_versions("h2", 2)
+        FormHistoryMongoClient().delete_many(settings.FORM_HISTORY_COLLECTION_NAME, {"version": 2})
+        form_history_service._last_written.clear()
+        self.assertEqual(save("h2", 13, expected_version=2).status_code, 200, "save")
+        self.assertEqual(self.entries("h2"), [(1, "snapshot"), (3, "snapshot")], "history")
+        self.assertEqual((self.months("h2", 2), self.months("h2", 3)), (None, 13), "rebuilt versions")
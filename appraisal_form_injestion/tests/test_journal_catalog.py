@@ -0,0 +1,59 @@
+"""
+The journal catalog item 14 publications are checked against: loading it,
+looking journals up, and what an empty catalog, the shipped default, does.
+"""
+import os
+import tempfile
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+from appraisal_form_injestion.journal_catalog import apply_journal_catalog, load_journal_catalog
+
+CATALOG = """# version: 2026.1
+issn,eissn,title,indexed,impact_factor
+0028-0836,1476-4687,Nature,true,48.5
+1234-5679,,Journal of Graph Minors,false,
+,,Journal of Graph Theory,yes,1.2
+"""
+
+class JournalCatalogTests(SimpleTestCase):
+    def write_catalog(self, text:str) -> str:
+        handle, path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(handle, "w") as f:
+            f.write(text)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_lookups(self):
+        catalog = load_journal_catalog(self.write_catalog(CATALOG))
+        self.assertEqual((catalog.version, len(catalog)), ("2026.1", 3), "version and size")
+        self.assertEqual(catalog.get_by_issn("14764687").title, "Nature", "electronic ISSN without its hyphen")
+        self.assertEqual([entry.title for entry in catalog.lookup("journal of graph")], ["Journal of Graph Minors", "Journal of Graph Theory"], "title prefix")
+        self.assertEqual([entry.title for entry in catalog.lookup("journal of graph", limit=1)], ["Journal of Graph Minors"], "limited prefix")
+        self.assertEqual([entry.impact_factor for entry in catalog.lookup("1234-5679")], [None], "ISSN lookup")
+
+    def test_version_defaults_to_the_content_hash(self):
+        catalog = load_journal_catalog(self.write_catalog(CATALOG.split("\n", 1)[1]))
+        self.assertEqual(len(catalog.version), 12, "hash version")
+
+    def test_shipped_catalog_is_an_empty_template(self):
+        with self.assertLogs("appraisal_form_injestion.journal_catalog", "WARNING"):
+            catalog = load_journal_catalog(settings.BASE_DIR / "appraisal_form_injestion" / "data" / "journal_catalog.csv")
+        self.assertEqual((catalog.version, len(catalog), catalog.by_issn), ("empty", 0, {}), "shipped catalog")
+        publication = {"pub_type": "IJ", "issn": "0028-0836", "indexed": True, "impact_factor": 7}
+        self.assertEqual(apply_journal_catalog(dict(publication), catalog), publication, "values kept as reported")
+
+    def test_missing_catalog(self):
+        with self.assertLogs("appraisal_form_injestion.journal_catalog", "WARNING"):
+            catalog = load_journal_catalog(os.path.join(tempfile.gettempdir(), "no_such_catalog.csv"))
+        self.assertEqual((catalog.version, len(catalog)), ("missing", 0), "missing catalog")
+
+    def test_reported_values_are_checked(self):
+        catalog = load_journal_catalog(self.write_catalog(CATALOG))
+        filled = apply_journal_catalog({"issn": "0028-0836"}, catalog)
+        self.assertEqual((filled["indexed"], filled["impact_factor"], filled["journal_catalog"]["mismatches"]), (True, 48.5, []), "filled in")
+        reported = {"title_and_complete_reference": "A. Author, Graphs, Nature, ISSN 0028-0836", "indexed": "false", "impact_factor": 3}
+        checked = apply_journal_catalog(dict(reported), catalog)
+        self.assertEqual((checked["indexed"], checked["impact_factor"], checked["journal_catalog"]["mismatches"]), (False, 3, ["indexed", "impact_factor"]), "mismatches recorded")
+        with override_settings(JOURNAL_CATALOG_ENFORCE=True):
+            enforced = apply_journal_catalog(dict(reported), catalog)
+        self.assertEqual((enforced["indexed"], enforced["impact_factor"]), (True, 48.5), "catalog values enforced")
@@ -0,0 +1,157 @@
+"""
+Section change events: appended with every save where the storage can do so
+in the saving transaction, turned off where it cannot (a standalone MongoDB
+server), and relayed to sinks in position order with consumer checkpoints.
+"""
+import os
+import queue
+import unittest
+from unittest import mock
+import orjson
+from django.conf import settings
+from django.test import Client, override_settings
+from appraisal_form_injestion.clients.outbox_mongo_client import OutboxMongoClient
+from appraisal_form_injestion.services.data_injestion_service import DataInjestionService
+from appraisal_form_injestion.services.form_history_service import FormHistorySink
+from appraisal_form_injestion.services.outbox_service import OutboxService
+from appraisal_form_injestion.tests import StorageTestCase
+from common.registry import get_instance
+from common.sinks import QueueSink, Sink
+from common.storage import create_storage
+from common.storage.memory import MemoryStorage
+from common.storage.mongo import MongoStorage
+
+PROJECTS = [{"title": "Grid storage", "status": "ongoing", "months_ongoing": 14}]
+
+class StandaloneMemoryStorage(MemoryStorage):
+    """In-memory storage that refuses transactions the way a standalone MongoDB server does."""
+    def supports_transactions(self) -> bool:
+        return False
+
+    def run_in_transaction(self, callback):
+        return MongoStorage.run_in_transaction(self, callback)
+
+class FailingSink(Sink):
+    name = "failing"
+
+    def deliver(self, events):
+        raise Exception("sink is down")
+
+def save_projects(user_id:str, expected_version:int = None):
+    payload = {"user_id": user_id, "data": PROJECTS}
+    if expected_version is not None:
+        payload["expected_version"] = expected_version
+    return Client().post("/api/injest-item-17/", orjson.dumps(payload), content_type="application/json")
+
+
+class MongoTopologyTests(unittest.TestCase):
+    """The server's hello reply decides whether MongoStorage runs transactions, without a server to ask."""
+    def storage(self, hello):
+        storage = MongoStorage("mongodb://localhost:1/")
+        self.addCleanup(storage.close)
+        storage.client = mock.MagicMock()
+        storage.client.admin.command.return_value = hello
+        return storage
+
+    def test_replica_set(self):
+        storage = self.storage({"isWritablePrimary": True, "setName": "rs0"})
+        self.assertEqual((storage.is_replicated(), storage.supports_transactions()), (True, True), "replica set")
+
+    def test_standalone_server(self):
+        storage = self.storage({"isWritablePrimary": True})
+        self.assertEqual(storage.supports_transactions(), False, "standalone transactions")
+        with override_settings(MONGO_ALLOW_WRITES_WITHOUT_TRANSACTIONS=False):
+            with self.assertRaisesRegex(Exception, "standalone server"):
+                storage.run_in_transaction(lambda: "written")
+        with override_settings(MONGO_ALLOW_WRITES_WITHOUT_TRANSACTIONS=True):
+            self.assertEqual(storage.run_in_transaction(lambda: "written"), "written", "write without a transaction")
+
+
+@override_settings(OUTBOX_ENABLED=True, MONGO_ALLOW_WRITES_WITHOUT_TRANSACTIONS=False)
+class StandaloneSaveTests(StorageTestCase):
+    """Saves on a storage without transactions, with the default settings."""
+    def create_storage(self):
+        return StandaloneMemoryStorage()
+
+    def test_saves_without_recording_events(self):
+        with self.assertLogs("appraisal_form_injestion.services.outbox_service", "WARNING"):
+            response = save_projects("s1")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(save_projects("s1", expected_version=1).status_code, 200, "conditional save")
+        self.assertEqual(OutboxMongoClient().get_events(0), [], "events")
+
+    def test_allowing_writes_without_transactions_records_events(self):
+        with override_settings(MONGO_ALLOW_WRITES_WITHOUT_TRANSACTIONS=True):
+            self.assertEqual(save_projects("s1").status_code, 200, "save")
+        self.assertEqual([(event["user_id"], event["version"]) for event in OutboxMongoClient().get_events(0)], [("s1", 1)], "events")
+
+    def test_startup_check(self):
+        service = get_instance(DataInjestionService)
+        with self.assertLogs("appraisal_form_injestion.services.outbox_service", "WARNING"):
+            self.assertEqual(service.check_transactions(), True, "inline rows")
+        with override_settings(FORM_LIST_STORAGE_MODE="child"), self.assertLogs("appraisal_form_injestion.services.data_injestion_service", "ERROR"):
+            self.assertEqual(service.check_transactions(), False, "child rows")
+
+
+@unittest.skipUnless(os.getenv("STORAGE_TEST_MONGO_STANDALONE_URI"), "set STORAGE_TEST_MONGO_STANDALONE_URI to run against a standalone MongoDB server")
+class MongoStandaloneSaveTests(StandaloneSaveTests):
+    def create_storage(self):
+        return create_storage("mongo", uri=os.getenv("STORAGE_TEST_MONGO_STANDALONE_URI"))
+
+
+@override_settings(OUTBOX_ENABLED=True)
+class OutboxRelayTests(StorageTestCase):
+    def setUp(self):
+        super().setUp()
+        self.outbox = get_instance(OutboxService)
+
+    def test_saves_append_events_in_order(self):
+        for user_id in ("r1", "r2"):
+            self.assertEqual(save_projects(user_id).status_code, 200, "save")
+        self.assertEqual(save_projects("r1", expected_version=1).status_code, 200, "second save")
+        self.assertEqual(save_projects("r1", expected_version=1).status_code, 409, "stale save")
+        events = OutboxMongoClient().get_events(0)
+        self.assertEqual([(event["position"], event["user_id"], event["section"], event["version"]) for event in events],
+                         [(1, "r1", "17", 1), (2, "r2", "17", 1), (3, "r1", "17", 2)], "events")
+
+    def test_relay_moves_the_checkpoint_after_delivery(self):
+        save_projects("r1")
+        save_projects("r2")
+        sink = QueueSink(queue.Queue())
+        self.assertEqual(self.outbox.relay_batch("analytics", sink, batch_size=1), 1, "first batch")
+        self.assertEqual(self.outbox.relay_batch("analytics", sink), 1, "second batch")
+        self.assertEqual(self.outbox.relay_batch("analytics", sink), 0, "drained")
+        delivered = [sink.queue.get_nowait() for _ in range(2)]
+        self.assertEqual([(event["position"], event["user_id"]) for event in delivered], [(1, "r1"), (2, "r2")], "delivered in order")
+        self.assertEqual(set(delivered[0]), {"event_id", "position", "cycle", "user_id", "section", "score", "version", "created_at"}, "delivered fields")
+        self.assertEqual([(checkpoint["consumer"], checkpoint["position"]) for checkpoint in self.outbox.get_checkpoints()], [("analytics", 2)], "checkpoint")
+
+    def test_failed_delivery_is_retried(self):
+        save_projects("r1")
+        with self.assertRaises(Exception):
+            self.outbox.relay_batch("analytics", FailingSink())
+        sink = QueueSink(queue.Queue())
+        self.assertEqual(self.outbox.relay_batch("analytics", sink), 1, "redelivered")
+        self.assertEqual(sink.queue.get_nowait()["user_id"], "r1", "redelivered event")
+
+    def test_gap_is_skipped_once_settled(self):
+        client = OutboxMongoClient()
+        client.insert_many("section_event_outbox_collection", [
+            {"position": 1, "user_id": "g1", "section": "17", "version": 1},
+            {"position": 3, "user_id": "g3", "section": "17", "version": 1},
+        ])
+        sink = QueueSink(queue.Queue())
+        self.assertEqual(self.outbox.relay_batch("analytics", sink, settle_ms=60000), 1, "up to the gap")
+        self.assertEqual(self.outbox.relay_batch("analytics", sink, settle_ms=60000), 0, "waiting on the gap")
+        with self.assertLogs("appraisal_form_injestion.services.outbox_service", "WARNING"):
+            self.assertEqual(self.outbox.relay_batch("analytics", sink, settle_ms=0), 1, "past the gap")
+        self.assertEqual([sink.queue.get_nowait()["user_id"] for _ in range(2)], ["g1", "g3"], "delivered")
+
+    def test_prune_keeps_undelivered_events(self):
+        save_projects("r1")
+        save_projects("r2")
+        self.outbox.relay_batch("analytics", QueueSink(queue.Queue()), batch_size=1)
+        self.assertEqual(self.outbox.prune(), 0, "pruned before the history relay ran")
+        self.outbox.relay_batch(settings.FORM_HISTORY_CONSUMER, FormHistorySink())
+        self.assertEqual(self.outbox.prune(), 1, "pruned")
+        self.assertEqual([event["position"] for event in OutboxMongoClient().get_events(0)], [2], "remaining events")
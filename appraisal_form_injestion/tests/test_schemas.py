@@ -0,0 +1,63 @@
+"""
+Section payloads decoded from request bytes: numbers arriving as strings,
+blank numeric inputs, and the errors reported for payloads the scorers could
+not handle.
+"""
+import orjson
+from django.test import SimpleTestCase
+from appraisal_form_injestion.schemas import SchemaError, decode_section, validate_section
+from appraisal_form_injestion.utils import calculate_api_score_for_item14
+
+def body(**envelope) -> bytes:
+    return orjson.dumps(envelope)
+
+class DecodeSectionTests(SimpleTestCase):
+    def test_numeric_strings_are_converted(self):
+        decoded = decode_section("14", body(user_id="u1", data=[{"pub_type": "IJ", "impact_factor": " 2.5 "}, {"pub_type": "nj", "impact_factor": "3"}]))
+        self.assertEqual([row["impact_factor"] for row in decoded["data"]], [2.5, 3], "converted impact factors")
+
+    def test_blank_scored_numbers_take_their_default(self):
+        decoded = decode_section("14", body(user_id="u1", data=[{"pub_type": "IJ", "impact_factor": ""}, {"pub_type": "IJ", "impact_factor": None}]))
+        self.assertEqual([row["impact_factor"] for row in decoded["data"]], [0, 0], "blank impact factors")
+        # The scorer calls int() on the field, which fails on None
+        for row in decoded["data"]:
+            calculate_api_score_for_item14(row)
+
+    def test_blank_optional_numbers_stay_null(self):
+        decoded = decode_section("12.1", body(user_id="u1", semester="odd-2026", data=[{"course_code": "CS101", "total_hour_scheduled": ""}]))
+        self.assertEqual(decoded["data"][0]["total_hour_scheduled"], None, "blank optional number")
+
+    def test_unknown_keys_are_kept(self):
+        decoded = decode_section("14", body(user_id="u1", data=[{"pub_type": "IJ", "doi": "10.1000/x"}]))
+        self.assertEqual(decoded["data"][0]["doi"], "10.1000/x", "undeclared key")
+
+    def test_flat_general_details(self):
+        decoded = decode_section("1-10", body(user_id="u1", full_name="A. Faculty", expected_version=2))
+        self.assertEqual(decoded["expected_version"], 2, "expected version")
+        self.assertEqual(decoded["data"]["full_name"], "A. Faculty", "flat body stored under data")
+
+    def test_errors_carry_the_path(self):
+        cases = [
+            ("14", body(user_id="u1", data=[{"pub_type": "IJ"}, {"pub_type": "IJ", "impact_factor": "high"}]), ["data", 1, "impact_factor"]),
+            ("14", body(user_id="u1", data=[{"pub_type": "XX"}]), ["data", 0, "pub_type"]),
+            ("14", body(user_id="u1", data=[{"impact_factor": 1}]), ["data", 0, "pub_type"]),
+            ("14", body(user_id="u1", data=[{"pub_type": "OJ"}]), ["data", 0, "isbn_issn"]),
+            ("12.1", body(user_id="u1", data=[]), ["semester"]),
+            ("15", body(user_id=" ", data=[]), ["user_id"]),
+            ("13", body(user_id="u1", data={"F": []}), ["data", "F"]),
+        ]
+        for section, payload, path in cases:
+            with self.subTest(section=section, path=path):
+                with self.assertRaises(SchemaError) as raised:
+                    decode_section(section, payload)
+                self.assertEqual(raised.exception.path, path, str(raised.exception))
+
+    def test_non_finite_numbers_are_rejected(self):
+        with self.assertRaises(SchemaError):
+            validate_section("17", [{"months_ongoing": "inf"}])
+
+    def test_malformed_body(self):
+        for payload in (b"{", b"[]", b""):
+            with self.subTest(payload=payload):
+                with self.assertRaises(SchemaError):
+                    decode_section("14", payload)
@@ -0,0 +1,89 @@
+"""
+Section scores and their cached previews. A change to what a section scores
+changes the appraisal results, so each one is pinned here with the payload it
+was made for.
+"""
+from unittest import mock
+import orjson
+from django.test import Client, override_settings
+from appraisal_form_injestion import journal_catalog
+from appraisal_form_injestion.journal_catalog import JournalCatalog, JournalEntry
+from appraisal_form_injestion.services import data_injestion_service
+from appraisal_form_injestion.services.data_injestion_service import DataInjestionService
+from appraisal_form_injestion.tests import StorageTestCase
+from common.registry import get_instance
+
+EXAM_DUTY = {"activity": "Invigilation", "class": "B.Tech", "t1": 2, "t2": 2, "t3": 3}
+
+def project_guidance(projects, students, exam_duties:int = 0):
+    return {"12.3": {"number_of_projects_guided": projects, "number_of_students_guided": students}, "12.4": [EXAM_DUTY] * exam_duties}
+
+
+class ProjectGuidanceScoreTests(StorageTestCase):
+    """
+    Projects guided score 10 when item 12.3 lists both projects and the students
+    guided on them. Both fields are on 12.3; the scorer used to look for the
+    students on 12.4, a list of exam duties, and failed on every form that listed
+    projects guided.
+    """
+    def score(self, data):
+        return get_instance(DataInjestionService).score_section("12.3-12.4", data)[1]["score"]
+
+    def test_scores(self):
+        cases = [
+            (project_guidance(4, 9), 10),
+            (project_guidance(4, 9, exam_duties=1), 20),
+            (project_guidance(4, 9, exam_duties=5), 30),
+            (project_guidance(4, 0, exam_duties=1), 10),
+            (project_guidance(0, 9), 0),
+            (project_guidance(None, None, exam_duties=2), 20),
+        ]
+        for data, expected in cases:
+            with self.subTest(data=data["12.3"], exam_duties=len(data["12.4"])):
+                self.assertEqual(self.score(data), expected, "score")
+
+    def test_saving_projects_guided(self):
+        payload = {"user_id": "p1", "data": project_guidance(4, 9, exam_duties=1)}
+        response = Client().post("/api/injest-item-12-3-to-12-4/", orjson.dumps(payload), content_type="application/json")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()["result"]["score"], 20, "saved score")
+
+
+class ScorePreviewTests(StorageTestCase):
+    """Previews are cached, but never across journal catalogs that score them differently."""
+    PUBLICATION = {
+        "pub_type": "IJ", "issn": "ISSN 1234-5679", "title_and_complete_reference": "Graph minors",
+        "user_author_type": "First/Principal Author", "other_authors": [{"name": "B. Coauthor", "author_type": "Other"}],
+    }
+
+    def setUp(self):
+        super().setUp()
+        data_injestion_service._score_preview_cache.clear()
+        self.addCleanup(data_injestion_service._score_preview_cache.clear)
+        self.service = get_instance(DataInjestionService)
+
+    def catalog(self, version:str, impact_factor:float):
+        return mock.patch.object(journal_catalog, "_journal_catalog", JournalCatalog([JournalEntry("1234-5679", None, "Graph minors", True, impact_factor)], version))
+
+    def preview(self, **fields):
+        return self.service.preview_score("14", [{**self.PUBLICATION, **fields}])["score"]
+
+    def test_new_catalog_version(self):
+        with self.catalog("2025", 1.5):
+            self.assertEqual(self.preview(), 18, "score with the 2025 catalog")
+        with self.catalog("2026", 6.0):
+            self.assertEqual(self.preview(), 27, "score with the 2026 catalog")
+        with self.catalog("2025", 1.5):
+            self.assertEqual(self.preview(), 18, "score with the 2025 catalog again")
+
+    def test_enforcing_the_catalog(self):
+        with self.catalog("2026", 6.0):
+            self.assertEqual(self.preview(impact_factor=1), 18, "reported impact factor")
+            with override_settings(JOURNAL_CATALOG_ENFORCE=True):
+                self.assertEqual(self.preview(impact_factor=1), 27, "catalog impact factor")
+
+    def test_repeated_preview_is_cached(self):
+        with self.catalog("2026", 6.0):
+            self.preview()
+            with mock.patch.dict(DataInjestionService.SECTION_SCORERS, {"14": mock.Mock(side_effect=AssertionError("scored again"))}):
+                self.assertEqual(self.preview(), 27, "cached score")
@@ -0,0 +1,426 @@
+"""
+Conformance tests for the storage backends. Each test drives the real domain
+clients (or, for generic semantics, a scratch collection) against a throwaway
+database and checks the outcome MongoDB gives, so the same tests pass on every
+backend that behaves like the server. The mongo backend runs when
+STORAGE_TEST_MONGO_URI points at a replica set member.
+"""
+import os
+import tempfile
+import threading
+import unittest
+import uuid
+from unittest import mock
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+from pymongo.errors import DuplicateKeyError
+from appraisal_form_injestion.clients.data_injestion_mongo_client import DataInjestionMongoClient, VersionConflict
+from appraisal_form_injestion.clients.publication_index_mongo_client import PublicationIndexMongoClient
+from appraisal_form_injestion.clients.section_rows_mongo_client import SectionRowsMongoClient
+from appraisal_form_injestion.constants import section_bit
+from appraisal_form_injestion.services.data_injestion_service import DataInjestionService
+from common.registry import get_instance, reset_instances
+from common.storage import create_storage, set_storage
+from faculty_admin.clients.faculty_data_mongo_client import FacultyDataMongoClient
+from faculty_admin.utils import summarize_explain
+
+SCRATCH_COLLECTION = "conformance_scratch"
+UNIQUE_COLLECTION = "conformance_unique"
+CYCLE = "2026-2027"
+
+def semester(scheduled:int, engaged:int):
+    return {"total_hour_scheduled": scheduled, "total_hour_engaged": engaged, "data": []}
+
+def publication(fingerprint:str, title:str, author_type:str = "first"):
+    return {
+        "fingerprint": fingerprint, "title": title, "normalized_title": title.lower(), "doi": f"10.1000/{fingerprint}",
+        "issn": "1234-5678", "pub_type": "journal", "user_author_type": author_type, "author_count": 3,
+    }
+
+class StorageConformanceTests:
+    """
+    Tests run against every backend. Subclasses set create_storage(); the
+    backend is installed as the process-wide storage and each test gets a
+    fresh database, dropped afterwards.
+    """
+    maxDiff = None
+
+    @classmethod
+    def create_storage(cls):
+        raise NotImplementedError
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.storage = cls.create_storage()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.storage.close()
+        super().tearDownClass()
+
+    def setUp(self):
+        database_name = f"storage_conformance_{uuid.uuid4().hex[:12]}"
+        set_storage(self.storage)
+        self.addCleanup(set_storage, None)
+        settings_override = override_settings(APPRAISAL_SYSTEM_MONGO_DB_NAME=database_name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # Services built by an earlier test point at its database
+        reset_instances()
+        self.addCleanup(reset_instances)
+        self.addCleanup(self._drop_database, database_name)
+        self.forms = DataInjestionMongoClient()
+        self.rows = SectionRowsMongoClient()
+        self.publications = PublicationIndexMongoClient()
+        self.faculty = FacultyDataMongoClient()
+        for client in (self.forms, self.rows, self.publications, self.faculty):
+            client.ensure_indexes()
+        self.scratch = self.forms.db[SCRATCH_COLLECTION]
+
+    def _drop_database(self, database_name:str):
+        database = self.storage.database(database_name)
+        for collection in database.list_collection_names():
+            database.drop_collection(collection)
+
+    # Domain clients
+
+    def test_section_versions(self):
+        self.assertEqual(self.forms.update_data_injestion_collection("u1", {"14": {"data": []}, "department": "CSE"}, CYCLE), {"14": 1}, "first write")
+        self.assertEqual(self.forms.update_data_injestion_collection("u1", {"14": {"data": [1]}}, CYCLE, {"14": 1}), {"14": 2}, "conditional write")
+        with self.assertRaises(VersionConflict, msg="stale conditional write was applied") as raised:
+            self.forms.update_data_injestion_collection("u1", {"14": {"data": [2]}}, CYCLE, {"14": 1})
+        self.assertEqual(raised.exception.current_versions, {"14": 2}, "conflict versions")
+        self.assertEqual(self.forms.update_data_injestion_collection("u2", {"14": {"data": []}}, CYCLE, {"14": 0}), {"14": 1}, "conditional create")
+        with self.assertRaises(VersionConflict, msg="conditional write created a missing document") as raised:
+            self.forms.update_data_injestion_collection("u9", {"14": {"data": []}}, CYCLE, {"14": 3})
+        self.assertEqual(raised.exception.current_versions, {"14": 0}, "missing document versions")
+        self.assertEqual(self.forms.count_documents(settings.DATA_INJECTION_COLLECTION_NAME, {"cycle": CYCLE, "user_id": {"$in": ["u1", "u2", "u9"]}}), 2, "form documents")
+
+    def test_completeness(self):
+        self.forms.update_data_injestion_collection("c1", {"13": {"data": []}, "12.3-12.4": {"students": 2}}, CYCLE)
+        self.forms.update_data_injestion_collection("c1", {"13": {"data": [1]}}, CYCLE)
+        document = self.forms.find_one(settings.DATA_INJECTION_COLLECTION_NAME, {"cycle": CYCLE, "user_id": "c1"})
+        self.assertEqual(document["completeness_mask"], section_bit("13") | section_bit("12.3-12.4"), "completeness mask")
+        self.assertEqual(document["section_count"], 2, "section count")
+        self.assertEqual(document["12"]["3-12"]["4"], {"students": 2}, "dotted section key stored nested")
+        self.assertEqual(document["section_versions"], {"13": 2, "12_3-12_4": 1}, "section versions")
+        self.assertEqual(document["created_at"] <= document["updated_at"], True, "timestamps")
+
+    def test_semesters_and_teaching_load(self):
+        self.forms.update_data_injestion_collection("t1", {"12.1_odd-2026": semester(40, 40), "department": "ECE"}, CYCLE)
+        self.forms.update_data_injestion_collection("t1", {"12.1_even-2027": semester(40, 30)}, CYCLE)
+        # Rewriting a semester replaces its record instead of appending another
+        self.forms.update_data_injestion_collection("t1", {"12.1_odd-2026": semester(40, 40)}, CYCLE)
+        load = self.forms.get_teaching_load(user_id="t1", cycle=CYCLE)
+        self.assertEqual(len(load), 1, "teaching load rows")
+        self.assertEqual(sorted(load[0]["semesters"]), ["even-2027", "odd-2026"], "semesters")
+        self.assertEqual((load[0]["total_hour_scheduled"], load[0]["total_hour_engaged"]), (80, 70), "combined hours")
+        self.assertEqual(round(load[0]["percent"], 6), 87.5, "engagement percent")
+        self.assertEqual(round(load[0]["score"], 6), 20.0, "teaching load score")
+        odd = self.forms.get_teaching_load(["odd-2026"], user_id="t1", cycle=CYCLE)
+        self.assertEqual((odd[0]["semesters"], odd[0]["percent"], odd[0]["score"]), (["odd-2026"], 100, 25), "single semester load")
+
+    def test_bulk_section_conflicts(self):
+        self.forms.update_data_injestion_collection("b1", {"15": {"data": []}}, CYCLE)
+        errors = self.forms.write_sections_batch([
+            ("b2", {"15": {"data": []}}, {"15": 0}),
+            ("b1", {"15": {"data": [1]}}, {"15": 5}),
+            ("b1", {"16": {"data": []}}, {"16": 0}),
+        ], CYCLE)
+        self.assertEqual(sorted(errors), [1], "failed writes")
+        self.assertEqual(errors[1]["code"], 11000, "conflict error code")
+        self.assertEqual(self.forms.get_section_versions_for_users({"b1": ["15", "16"], "b2": ["15"]}, CYCLE),
+               {"b1": {"15": 1, "16": 1}, "b2": {"15": 1}}, "versions after batch")
+
+    def test_incomplete_faculty_and_filters(self):
+        self.forms.update_data_injestion_collection("f1", {"17": {"data": []}, "18": {"data": []}, "department": "ME"}, CYCLE)
+        self.forms.update_data_injestion_collection("f2", {"17": {"data": []}, "department": "ME"}, CYCLE)
+        self.forms.update_data_injestion_collection("f3", {"12.1_odd-2026": semester(10, 9), "department": "ME"}, CYCLE)
+        rows = self.forms.get_incomplete_faculty("ME", cycle=CYCLE)
+        expected = sorted(
+            ({"user_id": user, "department": "ME", "completeness_mask": mask, "section_count": count}
+             for user, mask, count in (("f1", section_bit("17") | section_bit("18"), 2), ("f2", section_bit("17"), 1), ("f3", section_bit("12.1"), 1))),
+            key=lambda row: (row["completeness_mask"], row["section_count"], row["user_id"]),
+        )
+        self.assertEqual(rows, expected, "incomplete faculty in index order")
+        self.assertEqual([row["user_id"] for row in self.forms.get_incomplete_faculty("ME", skip=1, limit=1, cycle=CYCLE)], [expected[1]["user_id"]], "skip and limit")
+        self.assertEqual(sorted(self.forms.get_user_ids("ME", CYCLE)), ["f1", "f2", "f3"], "user ids")
+        query = {"department": "ME", "12.1.semesters": {"$elemMatch": {"semester": "odd-2026", "total_hour_engaged": {"$gte": 9}}}}
+        rows, stats = self.forms.filter_faculty(query, explain=True, cycle=CYCLE)
+        self.assertEqual(rows, [{"user_id": "f3", "department": "ME"}], "$elemMatch filter")
+        self.assertEqual(summarize_explain(stats)["n_returned"], 1, "explain nReturned")
+
+    def test_section_rows(self):
+        self.rows.replace_rows("r1", "14", [{"title": "Graph theory"}, {"title": "Sets"}, {"title": "Rings"}], [5, 3, 1], CYCLE)
+        self.rows.replace_rows("r1", "14", [{"title": "Graph minors"}, {"title": "Sets"}], [4, 3], CYCLE)
+        rows = self.rows.get_rows("r1", "14", cycle=CYCLE)
+        self.assertEqual(rows, [{"row_id": 0, "data": {"title": "Graph minors"}, "api_score": 4}, {"row_id": 1, "data": {"title": "Sets"}, "api_score": 3}], "rows after shrink")
+        self.assertEqual(self.rows.get_rows("r1", "14", skip=1, limit=1, cycle=CYCLE), rows[1:], "paged rows")
+        self.assertEqual(self.rows.find_user_ids("14", {"title": {"$regex": "^graph", "$options": "i"}}, CYCLE), {"r1"}, "row regex")
+        self.assertEqual(self.rows.find_user_ids("14", {"title": {"$in": ["Rings"]}}, CYCLE), set(), "deleted row")
+
+    def test_publication_claims(self):
+        self.publications.sync_user_publications("p1", [publication("a", "Graph Colouring"), publication("b", "Sparse Sets")])
+        self.publications.sync_user_publications("p2", [publication("a", "Graph Colouring", "second")])
+        shared = list(self.publications.get_shared_publications())
+        self.assertEqual([(row["_id"], row["claim_count"], sorted(claim["user_id"] for claim in row["claims"])) for row in shared], [("a", 2, ["p1", "p2"])], "shared")
+        self.publications.sync_user_publications("p1", [publication("b", "Sparse Sets")])
+        self.assertEqual(list(self.publications.get_shared_publications()), [], "claim dropped")
+        self.assertEqual([row["_id"] for row in self.publications.find_by_title_prefix("graph")], ["a"], "title prefix")
+        self.assertEqual(self.publications.find_by_doi("10.1000/b")[0]["claims"][0]["user_id"], "p1", "doi lookup")
+
+    def test_faculty_batch_upsert(self):
+        stats, errors = self.faculty.upsert_faculty_batch([{"user_id": "d1", "department": "CSE"}, {"user_id": "d2", "department": "ME"}])
+        self.assertEqual((stats["upserted"], errors), (2, []), "first batch")
+        stats, errors = self.faculty.upsert_faculty_batch([{"user_id": "d1", "department": "ECE"}])
+        self.assertEqual((stats["matched"], stats["modified"]), (1, 1), "second batch")
+        self.assertEqual(self.faculty.get_user_ids_by_department("ECE"), ["d1"], "department lookup")
+
+    # Generic semantics on a scratch collection
+
+    def _scratch_documents(self):
+        self.scratch.delete_many({})
+        self.scratch.insert_many([
+            {"_id": 1, "n": 1, "s": "apple", "tags": ["x", "y"], "rows": [{"k": 1, "v": "a"}, {"k": 2, "v": "b"}]},
+            {"_id": 2, "n": 2.5, "s": "Banana", "tags": ["y"], "rows": [{"k": 3, "v": "c"}], "nested": {"deep": {"value": 7}}},
+            {"_id": 3, "n": "3", "s": "cherry", "tags": [], "flag": None},
+            {"_id": 4, "s": "date", "tags": "x"},
+        ])
+
+    def _ids(self, query, **kwargs):
+        return [document["_id"] for document in self.scratch.find(query, {"_id": 1}, **kwargs)]
+
+    def test_query_operators(self):
+        self._scratch_documents()
+        cases = [
+            ({"n": 1.0}, [1]),
+            ({"n": {"$gt": 1}}, [2]),
+            ({"n": {"$gte": "0"}}, [3]),
+            ({"n": {"$in": [1, "3"]}}, [1, 3]),
+            ({"n": {"$nin": [1, "3"]}}, [2, 4]),
+            ({"n": {"$ne": 1}}, [2, 3, 4]),
+            ({"n": {"$exists": False}}, [4]),
+            ({"flag": None}, [1, 2, 3, 4]),
+            ({"flag": {"$exists": True}}, [3]),
+            ({"tags": "x"}, [1, 4]),
+            ({"tags": {"$size": 0}}, [3]),
+            ({"tags": {"$type": "array"}}, [1, 2, 3]),
+            ({"tags": {"$all": ["x", "y"]}}, [1]),
+            ({"rows.k": {"$gte": 2}}, [1, 2]),
+            ({"rows.0.v": "c"}, [2]),
+            ({"rows": {"$elemMatch": {"k": 1, "v": "b"}}}, []),
+            ({"rows": {"$elemMatch": {"k": {"$gt": 1}, "v": "b"}}}, [1]),
+            ({"nested.deep.value": {"$lt": 10}}, [2]),
+            ({"s": {"$regex": "^b", "$options": "i"}}, [2]),
+            ({"$or": [{"n": 1}, {"s": "date"}]}, [1, 4]),
+            ({"$and": [{"tags": "y"}, {"n": {"$type": "number"}}]}, [1, 2]),
+            ({"$nor": [{"tags": "y"}, {"n": "3"}]}, [4]),
+            ({"_id": {"$in": [2, 4, 9]}}, [2, 4]),
+        ]
+        for query, expected in cases:
+            self.assertEqual(sorted(self._ids(query)), expected, f"find {query}")
+        self.assertEqual(self.scratch.count_documents({"tags": "y"}), 2, "count_documents")
+
+    def test_sort_skip_limit_projection(self):
+        self._scratch_documents()
+        # Numbers sort before strings, and a missing field sorts as null, before both
+        self.assertEqual(self._ids({}, sort=[("n", 1)]), [4, 1, 2, 3], "ascending mixed types")
+        self.assertEqual(self._ids({}, sort=[("n", -1)]), [3, 2, 1, 4], "descending mixed types")
+        # Strings compare by code point, so "Banana" sorts before "apple"
+        self.assertEqual([document["_id"] for document in self.scratch.find({}, {"_id": 1}).limit(2).sort("s", -1).skip(1)], [3, 1], "sort before skip and limit")
+        self.assertEqual(self.scratch.find_one({"_id": 2}, {"nested.deep.value": 1, "_id": 0}), {"nested": {"deep": {"value": 7}}}, "nested inclusion")
+        self.assertEqual(self.scratch.find_one({"_id": 1}, {"rows.v": 1}), {"_id": 1, "rows": [{"v": "a"}, {"v": "b"}]}, "inclusion through an array")
+        self.assertEqual(self.scratch.find_one({"_id": 1}, {"rows": 0, "tags": 0, "s": 0}), {"_id": 1, "n": 1}, "exclusion")
+
+    def test_update_operators(self):
+        self._scratch_documents()
+        self.scratch.update_one({"_id": 1}, {"$inc": {"n": 2, "counter": 1}, "$push": {"tags": "z"}, "$addToSet": {"rows": {"k": 1, "v": "a"}},
+                                             "$unset": {"s": ""}, "$set": {"nested.created.value": 1}})
+        document = self.scratch.find_one({"_id": 1})
+        self.assertEqual((document["n"], document["counter"], document["tags"], len(document["rows"]), "s" in document, document["nested"]),
+               (3, 1, ["x", "y", "z"], 2, False, {"created": {"value": 1}}), "operator update")
+        self.scratch.update_one({"_id": 1}, {"$pull": {"tags": "y"}, "$max": {"n": 10}, "$min": {"counter": 0}})
+        document = self.scratch.find_one({"_id": 1})
+        self.assertEqual((document["tags"], document["n"], document["counter"]), (["x", "z"], 10, 0), "$pull, $max and $min")
+        result = self.scratch.update_many({"tags": "x"}, {"$set": {"marked": True}})
+        self.assertEqual((result.matched_count, result.modified_count), (2, 2), "update_many counts")
+        result = self.scratch.update_many({"tags": "x"}, {"$set": {"marked": True}})
+        self.assertEqual((result.matched_count, result.modified_count), (2, 0), "no-op update")
+        result = self.scratch.update_one({"s": "fig", "group.kind": "fruit"}, {"$setOnInsert": {"new": True}, "$set": {"n": 5}}, upsert=True)
+        inserted = self.scratch.find_one({"_id": result.upserted_id}, {"_id": 0})
+        self.assertEqual(inserted, {"s": "fig", "group": {"kind": "fruit"}, "new": True, "n": 5}, "upsert seeded from the filter")
+        self.assertEqual(self.scratch.delete_many({"marked": True}).deleted_count, 2, "delete_many")
+
+    def test_pipeline_updates(self):
+        self._scratch_documents()
+        before = self.scratch.find_one_and_update(
+            {"_id": 2},
+            [{"$set": {"total": {"$add": ["$n", {"$size": "$tags"}, {"$ifNull": ["$missing", 10]}]}}},
+             {"$set": {"label": {"$cond": [{"$gte": ["$total", 13]}, "high", "low"]}}},
+             {"$unset": ["rows"]}],
+        )
+        self.assertEqual(before["_id"], 2, "find_one_and_update returns the document before by default")
+        after = self.scratch.find_one({"_id": 2})
+        self.assertEqual((after["total"], after["label"], "rows" in after), (13.5, "high", False), "pipeline update")
+        self.forms.upsert_one(SCRATCH_COLLECTION, {"_id": 10}, {"$set": {"v": 1}})
+        created = self.scratch.find_one({"_id": 10})
+        self.forms.replace_one(SCRATCH_COLLECTION, {"_id": 10}, {"w": 2})
+        replaced = self.scratch.find_one({"_id": 10})
+        self.assertEqual((replaced["created_at"], "v" in replaced, replaced["w"]), (created["created_at"], False, 2), "replace_one keeps created_at")
+        self.assertEqual(replaced["updated_at"] >= created["updated_at"], True, "replace_one sets updated_at")
+
+    def test_unique_indexes_and_bulk_errors(self):
+        unique = self.forms.db[UNIQUE_COLLECTION]
+        self.forms.create_index(UNIQUE_COLLECTION, [("key", 1), ("part", 1)], name="key_part", unique=True)
+        unique.insert_one({"key": "a", "part": 1})
+        with self.assertRaises(DuplicateKeyError, msg="duplicate insert was accepted") as raised:
+            unique.insert_one({"key": "a", "part": 1})
+        self.assertEqual(raised.exception.code, 11000, "duplicate key code")
+        with self.forms.bulk_writer(UNIQUE_COLLECTION) as writer:
+            writer.insert_one({"key": "b", "part": 1})
+            writer.insert_one({"key": "a", "part": 1})
+            writer.update_one({"key": "b"}, {"$set": {"part": 1, "x": 1}})
+            writer.update_one({"key": "c"}, {"$set": {"part": 1}}, upsert=True)
+            writer.update_one({"key": "c", "part": 2}, {"$set": {"part": 1}}, upsert=True)
+        self.assertEqual([(error["index"], error["code"]) for error in writer.errors], [(1, 11000), (4, 11000)], "bulk write errors")
+        stats = writer.stats()
+        self.assertEqual((stats["inserted"], stats["matched"], stats["upserted"]), (1, 1, 1), "bulk write counts")
+        self.assertEqual(sorted((document["key"], document["part"]) for document in unique.find({}, {"_id": 0, "key": 1, "part": 1})),
+               [("a", 1), ("b", 1), ("c", 1)], "documents after bulk write")
+        self.assertEqual(self.forms.create_index(UNIQUE_COLLECTION, [("key", 1), ("part", 1)], name="key_part", unique=True), "key_part", "repeated create_index")
+
+    def test_aggregation(self):
+        self._scratch_documents()
+        pipeline = [
+            {"$match": {"tags": {"$type": "array"}}},
+            {"$unwind": "$tags"},
+            {"$group": {"_id": "$tags", "count": {"$sum": 1}, "ids": {"$push": "$_id"}}},
+            {"$sort": {"_id": 1}},
+            {"$project": {"tag": "$_id", "_id": 0, "count": 1, "ids": 1}},
+        ]
+        self.assertEqual(list(self.scratch.aggregate(pipeline)), [{"count": 1, "ids": [1], "tag": "x"}, {"count": 2, "ids": [1, 2], "tag": "y"}], "unwind and group")
+        self.assertEqual(list(self.scratch.aggregate([{"$match": {"n": {"$exists": True}}}, {"$count": "total"}])), [{"total": 3}], "$count")
+
+    def test_lookup(self):
+        self._scratch_documents()
+        joined = self.forms.db[UNIQUE_COLLECTION]
+        joined.insert_many([{"_id": 10, "ref": 1, "v": "a"}, {"_id": 11, "ref": 1, "v": "b"}, {"_id": 12, "ref": 2, "v": "a"}, {"_id": 13, "v": "m"}])
+        pipeline = [
+            {"$match": {"_id": {"$in": [1, 2, 4]}}},
+            {"$lookup": {"from": UNIQUE_COLLECTION, "localField": "n", "foreignField": "ref", "pipeline": [{"$match": {"v": "a"}}, {"$project": {"_id": 1}}], "as": "joined"}},
+            {"$match": {"joined": {"$ne": []}}},
+            {"$project": {"joined": 1}},
+        ]
+        self.assertEqual(list(self.scratch.aggregate(pipeline)), [{"_id": 1, "joined": [{"_id": 10}]}], "joined with a pipeline")
+        pipeline = [{"$match": {"_id": 4}}, {"$lookup": {"from": UNIQUE_COLLECTION, "localField": "n", "foreignField": "ref", "as": "joined"}}]
+        self.assertEqual([document["joined"] for document in self.scratch.aggregate(pipeline)], [[{"_id": 13, "v": "m"}]], "missing local field joins missing foreign fields")
+
+    def test_unique_index_treats_missing_and_null_keys_as_equal(self):
+        unique = self.forms.db[UNIQUE_COLLECTION]
+        self.forms.create_index(UNIQUE_COLLECTION, [("key", 1), ("part", 1)], name="key_part", unique=True)
+        unique.insert_one({"key": "a"})
+        with self.assertRaises(DuplicateKeyError, msg="second document without part was accepted"):
+            unique.insert_one({"key": "a"})
+        with self.assertRaises(DuplicateKeyError, msg="null part was accepted next to a missing one"):
+            unique.insert_one({"key": "a", "part": None})
+        unique.insert_one({"key": "a", "part": 0})
+        self.assertEqual(unique.count_documents({"key": "a"}), 2, "documents under the unique index")
+        self.assertEqual(unique.count_documents({"key": "a", "part": None}), 1, "null matches the missing part")
+
+    # Transactions
+
+    def test_transaction_rolls_back(self):
+        if not self.storage.supports_transactions():
+            self.skipTest(f"the {self.storage.name} backend does not support transactions")
+        self.scratch.insert_one({"_id": 1, "n": 1})
+
+        def fail():
+            session = self.storage.current_session()
+            self.scratch.update_one({"_id": 1}, {"$inc": {"n": 1}}, session=session)
+            self.scratch.insert_one({"_id": 2, "n": 2}, session=session)
+            self.scratch.delete_one({"_id": 1}, session=session)
+            self.scratch.insert_one({"_id": 2, "n": 3}, session=session)
+
+        with self.assertRaises(DuplicateKeyError):
+            self.storage.run_in_transaction(fail)
+        self.assertEqual(list(self.scratch.find({}, sort=[("_id", 1)])), [{"_id": 1, "n": 1}], "documents after rollback")
+
+    def test_transaction_isolation(self):
+        if not self.storage.supports_transactions():
+            self.skipTest(f"the {self.storage.name} backend does not support transactions")
+        self.scratch.insert_one({"_id": 1, "n": 1})
+        written, seen = threading.Event(), []
+
+        def other_thread():
+            written.wait(5)
+            # Neither sees the transaction's write nor lands in the middle of it
+            seen.append(self.scratch.find_one({"_id": 1})["n"])
+            self.scratch.update_one({"_id": 1}, {"$inc": {"n": 10}})
+
+        def transaction():
+            session = self.storage.current_session()
+            self.scratch.update_one({"_id": 1}, {"$inc": {"n": 1}}, session=session)
+            written.set()
+            thread.join(0.2)
+            self.assertEqual(self.scratch.find_one({"_id": 1}, session=session)["n"], 2, "own write inside the transaction")
+            raise RuntimeError("roll back")
+
+        thread = threading.Thread(target=other_thread)
+        thread.start()
+        with self.assertRaises(RuntimeError):
+            self.storage.run_in_transaction(transaction)
+        thread.join(5)
+        self.assertEqual(seen, [1], "read made during the transaction")
+        self.assertEqual(self.scratch.find_one({"_id": 1})["n"], 11, "outside write after the rollback")
+
+    # Services
+
+    def test_split_section_rows_rolls_back_with_the_aggregates(self):
+        if not self.storage.supports_transactions():
+            self.skipTest(f"the {self.storage.name} backend does not support transactions")
+        service = get_instance(DataInjestionService)
+        rows = [{"title": "a", "status": "ongoing"}, {"title": "b", "status": "awarded"}]
+        self.forms.update_data_injestion_collection("s1", {"17": {"data": rows, "total_score": 4}}, CYCLE)
+        set_section_aggregates = service.data_injestion_mongo_client.set_section_aggregates
+
+        def set_then_fail(*args):
+            set_section_aggregates(*args)
+            raise RuntimeError("interrupted")
+
+        with mock.patch.object(service.data_injestion_mongo_client, "set_section_aggregates", side_effect=set_then_fail):
+            with self.assertRaises(RuntimeError):
+                service.split_section_rows("17", CYCLE)
+        document = self.forms.find_one(settings.DATA_INJECTION_COLLECTION_NAME, {"cycle": CYCLE, "user_id": "s1"})
+        self.assertEqual(document["17"], {"data": rows, "total_score": 4}, "inline section after the rolled back move")
+        self.assertEqual(self.rows.get_rows("s1", "17", cycle=CYCLE), [], "rows after the rolled back move")
+
+        self.assertEqual(service.split_section_rows("17", CYCLE), 1, "forms moved")
+        document = self.forms.find_one(settings.DATA_INJECTION_COLLECTION_NAME, {"cycle": CYCLE, "user_id": "s1"})
+        self.assertEqual((document["17"]["row_count"], "data" in document["17"]), (2, False), "aggregates after the move")
+        self.assertEqual([row["data"] for row in self.rows.get_rows("s1", "17", cycle=CYCLE)], rows, "moved rows")
+
+
+class MemoryStorageConformanceTests(StorageConformanceTests, SimpleTestCase):
+    @classmethod
+    def create_storage(cls):
+        return create_storage("memory")
+
+
+class SQLiteStorageConformanceTests(StorageConformanceTests, SimpleTestCase):
+    @classmethod
+    def create_storage(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        return create_storage("sqlite", path=os.path.join(cls.directory.name, "conformance.sqlite3"))
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.directory.cleanup()
+
+
+@unittest.skipUnless(os.getenv("STORAGE_TEST_MONGO_URI"), "set STORAGE_TEST_MONGO_URI to run against MongoDB")
+class MongoStorageConformanceTests(StorageConformanceTests, SimpleTestCase):
+    @classmethod
+    def create_storage(cls):
+        return create_storage("mongo", uri=os.getenv("STORAGE_TEST_MONGO_URI"))
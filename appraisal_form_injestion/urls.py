@@ -1,5 +1,7 @@
 from django.urls import path
 from .views import (
+    AttachmentDownload,
+    AttachmentUpload,
     GetItemBySection,
     InjestItem1to10,
     InjestItem11,
@@ -12,8 +14,15 @@ from .views import (
     InjestItem17,
     InjestItem18,
     InjestItem19,
+    JournalLookup,
+    PublicationLookup,
+    ScorePreview,
+    SectionHistory,
+    TeachingLoad,
 )
 urlpatterns = [
+    path("attachments/", AttachmentUpload.as_view(), name="attachment-upload"),
+    path("attachments/<str:attachment_id>/", AttachmentDownload.as_view(), name="attachment-download"),
     path("get-item-by-section/", GetItemBySection.as_view(), name="get-item-by-section"),
     path("injest-item-1-to-10/", InjestItem1to10.as_view(), name="injest-item-1-to-10"),
     path("injest-item-11/", InjestItem11.as_view(), name="injest-item-11"),
@@ -26,4 +35,9 @@ urlpatterns = [
     path("injest-item-17/", InjestItem17.as_view(), name="injest-item-17"),
     path("injest-item-18/", InjestItem18.as_view(), name="injest-item-18"),
     path("injest-item-19/", InjestItem19.as_view(), name="injest-item-19"),
+    path("journal-lookup/", JournalLookup.as_view(), name="journal-lookup"),
+    path("publication-lookup/", PublicationLookup.as_view(), name="publication-lookup"),
+    path("score-preview/", ScorePreview.as_view(), name="score-preview"),
+    path("section-history/", SectionHistory.as_view(), name="section-history"),
+    path("teaching-load/", TeachingLoad.as_view(), name="teaching-load"),
 ]
@@ -1,6 +1,8 @@
+import hashlib
 import logging
+import re
 from datetime import datetime
-from typing import List,Tuple,Dict
+from typing import List,Tuple,Dict,Optional
 
 logger = logging.getLogger(__name__)
 
@@ -112,6 +114,20 @@ def calculate_api_score_for_item12_1(data: List[Dict]):
 
     return total_api_score
 
+def sum_item12_1_hours(data: List[Dict]):
+    """
+    Total scheduled and engaged hours over item 12.1 classes.
+
+    Returns:
+        Tuple[float, float]: Total hours scheduled and total hours engaged
+    """
+    total_scheduled = 0
+    total_engaged = 0
+    for item in data:
+        total_scheduled += item.get("total_hour_scheduled", 0) or 0
+        total_engaged += item.get("total_hour_engaged", 0) or 0
+    return total_scheduled, total_engaged
+
 def calculate_api_score_for_item13(data: List[Dict], section: str) -> int:
     """
     Calculate API score for item 13 based on section logic and data.
@@ -190,6 +206,25 @@ def calculate_api_score_for_item13(data: List[Dict], section: str) -> int:
 
     return total_score
 
+TRUE_VALUES = ("true", "1", "yes", "y")
+FALSE_VALUES = ("false", "0", "no", "n", "")
+
+def parse_bool(value) -> Optional[bool]:
+    """
+    Read a yes/no field that may arrive as a bool, a number or a string such
+    as "false" or "Yes". Returns None for a value that is neither.
+    """
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return value != 0
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    return None
+
 def calculate_api_score_for_item14(publication: Dict):
     """
     Calculate API score distribution for Item 14 (Publication) per joint authorship rules.
@@ -234,7 +269,7 @@ def calculate_api_score_for_item14(publication: Dict):
         base_score = 0
 
     # Augmentation: Indexed Journal
-    indexed = bool(publication.get("indexed", False))
+    indexed = parse_bool(publication.get("indexed")) is True
     if indexed:
         base_score += 5
 
@@ -505,3 +540,97 @@ def calculate_api_score_for_item17(project: Dict):
             return (api_points*0.4)
         else:
             return (api_points*0.6)/(other+1)
+
+DOI_PATTERN = re.compile(r"\b(10\.\d{4,9}/[^\s\"<>]+)", re.IGNORECASE)
+# In running text an ISSN needs its hyphen or an "ISSN" label, so that page and
+# year ranges or bare numbers are not taken for one
+ISSN_PATTERN = re.compile(r"(?P<label>\b(?:[ep]-?)?issn\b[\s:]*)?\b(?P<head>\d{4})(?P<dash>-?)(?P<tail>\d{3}[\dX])\b", re.IGNORECASE)
+# A title quoted in the reference (IEEE style), or following the "(2020)." year (APA style)
+QUOTED_TITLE_PATTERN = re.compile(r"[\"\u201c]([^\"\u201c\u201d]+)[\"\u201d]")
+YEAR_PATTERN = re.compile(r"\((?:19|20)\d{2}[a-z]?\)\.?\s*")
+# A sentence break: a period after a word of two or more letters, so initials do not split
+SEGMENT_BREAK_PATTERN = re.compile(r"(?<=[^\s.]{2})\.\s+")
+
+def extract_doi(reference: str) -> Optional[str]:
+    """Return the lower-cased DOI found in a free-text reference, if any."""
+    match = DOI_PATTERN.search(reference or "")
+    if not match:
+        return None
+    return match.group(1).rstrip(".,;)").lower()
+
+def issn_check_digit(digits: str) -> str:
+    """Return the mod-11 check character of the first seven digits of an ISSN."""
+    total = sum(int(digit) * weight for digit, weight in zip(digits, range(8, 1, -1)))
+    check = (11 - total % 11) % 11
+    return "X" if check == 10 else str(check)
+
+def _matched_issn(match, labelled: bool) -> Optional[str]:
+    if not (labelled or match.group("label") or match.group("dash")):
+        return None
+    digits = match.group("head") + match.group("tail").upper()
+    if issn_check_digit(digits[:7]) != digits[7]:
+        return None
+    return f"{digits[:4]}-{digits[4:]}"
+
+def extract_issn(reference: str, labelled: bool = False) -> Optional[str]:
+    """
+    Return the first valid ISSN in a free-text reference, formatted as NNNN-NNNX.
+
+    Candidates must pass the mod-11 check digit, and carry their hyphen or an
+    "ISSN" label unless labelled is set, for values known to be an ISSN (a
+    catalog column or an issn field) where the hyphen may be left out.
+    """
+    for match in ISSN_PATTERN.finditer(reference or ""):
+        issn = _matched_issn(match, labelled)
+        if issn:
+            return issn
+    return None
+
+def extract_publication_title(reference: str) -> str:
+    """
+    Return the title part of a free-text reference: the quoted title, else the
+    sentence after the "(year)." of an APA reference, else the first sentence.
+    The whole reference is returned when none of these can be found.
+    """
+    text = str(reference or "").strip()
+    quoted = QUOTED_TITLE_PATTERN.search(text)
+    if quoted and len(quoted.group(1).split()) > 1:
+        return quoted.group(1).strip(" ,.")
+    year = YEAR_PATTERN.search(text)
+    if year:
+        text = text[year.end():]
+    segment = SEGMENT_BREAK_PATTERN.split(text, maxsplit=1)[0].strip(" ,.")
+    return segment or str(reference or "").strip()
+
+def normalize_publication_title(reference: str) -> str:
+    """
+    Normalise a title/reference so that the same paper entered by different
+    co-authors compares equal: DOIs, ISSNs, URLs and punctuation are dropped
+    and whitespace is collapsed.
+    """
+    text = DOI_PATTERN.sub(" ", str(reference or "").lower())
+    text = ISSN_PATTERN.sub(lambda match: " " if _matched_issn(match, False) else match.group(0), text)
+    text = re.sub(r"https?://\S+|\b(doi|issn|isbn)\b", " ", text)
+    text = re.sub(r"[^a-z0-9]+", " ", text)
+    return " ".join(text.split())
+
+def publication_fingerprint(publication: Dict) -> Optional[str]:
+    """
+    Build the identity of an item 14 publication across faculty members.
+
+    The DOI identifies a paper on its own; without one, the ISSN (when present)
+    and the normalised title are combined. The key is hashed to a fixed length.
+
+    Returns:
+        str: sha1 hex digest, or None if the entry has no usable title or DOI.
+    """
+    reference = publication.get("title_and_complete_reference", "")
+    doi = extract_doi(reference)
+    if doi:
+        key = f"doi:{doi}"
+    else:
+        title = normalize_publication_title(reference)
+        if not title:
+            return None
+        key = f"issn:{extract_issn(reference) or ''}|title:{title}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
@@ -4,20 +4,52 @@ from typing import List, Dict
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.http import StreamingHttpResponse
+from appraisal_form_injestion.services.attachment_service import AttachmentService
 from appraisal_form_injestion.services.data_injestion_service import DataInjestionService
-from appraisal_form_injestion.clients.data_injestion_mongo_client import DataInjestionMongoClient
+from appraisal_form_injestion.services.form_history_service import FormHistoryService
+from appraisal_form_injestion.services.publication_index_service import PublicationIndexService
+from appraisal_form_injestion.journal_catalog import get_journal_catalog
+from appraisal_form_injestion.clients.attachment_mongo_client import AttachmentHashMismatch, AttachmentTooLarge
+from appraisal_form_injestion.clients.data_injestion_mongo_client import VersionConflict
+from appraisal_form_injestion.constants import SEMESTER_KEY_PREFIX, version_key
+from appraisal_form_injestion.schemas import SchemaError, decode, decode_section, validate_section
+from common.registry import get_instance
+from common.http import parse_byte_range, parse_if_match_version, RangeNotSatisfiable
 from django.conf import settings
-import json
 import urllib.parse
 logger = logging.getLogger(__name__)
 
+def _get_expected_version(request, data:Dict):
+    """
+    Version of the section the client last read, from If-Match or the
+    expected_version body field. None means the save is unconditional.
+    """
+    expected_version = parse_if_match_version(request.headers.get("If-Match"))
+    body_version = data.pop("expected_version", None)
+    if expected_version is None and body_version is not None:
+        expected_version = int(body_version)
+    return expected_version
+
+def _saved_response(result):
+    response = Response({"message": "Data injested successfully","result": result}, status=status.HTTP_200_OK)
+    if isinstance(result, dict) and result.get("version") is not None:
+        response["ETag"] = f'"{result["version"]}"'
+    return response
+
+def _conflict_response(conflict:VersionConflict):
+    current_version = next(iter(conflict.current_versions.values()), 0)
+    response = Response({"message": "Section was changed by another save","result": {"current_version": current_version}}, status=status.HTTP_409_CONFLICT)
+    response["ETag"] = f'"{current_version}"'
+    return response
+
 class GetItemBySection(APIView):
     """
     API Endpoint to get data by section
     """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.data_injestion_service = DataInjestionMongoClient()
+        self.data_injestion_service = get_instance(DataInjestionService)
 
     def get(self, request, *args, **kwargs):
         try:
@@ -26,8 +58,25 @@ class GetItemBySection(APIView):
             if not user_id or not section:
                 return Response({"message": "User ID and section are required"}, status=status.HTTP_400_BAD_REQUEST)
 
-            result = self.data_injestion_service.get_data_injestion_collection_by_user_id_and_section(user_id, section)
-            return Response({"message": "Data fetched successfully","result": result}, status=status.HTTP_200_OK)
+            try:
+                page = int(request.GET["page"]) if request.GET.get("page") else None
+                page_size = int(request.GET["page_size"]) if request.GET.get("page_size") else None
+            except ValueError:
+                return Response({"message": "Page and page size must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+            if (page is not None and page < 1) or (page_size is not None and not 1 <= page_size <= settings.FORM_ROWS_MAX_PAGE_SIZE):
+                return Response({"message": f"Page must be at least 1 and page size between 1 and {settings.FORM_ROWS_MAX_PAGE_SIZE}"}, status=status.HTTP_400_BAD_REQUEST)
+
+            cycle = request.GET.get("cycle")
+            result = self.data_injestion_service.get_item_by_section(user_id, section, page, page_size, cycle)
+            response = Response({"message": "Data fetched successfully","result": result}, status=status.HTTP_200_OK)
+            # Clients send this back in If-Match to save without overwriting someone else's changes.
+            # Item 12.1 is saved a semester at a time, so its tag is the version of the requested semester
+            semester = request.GET.get("semester")
+            version_section = f"{SEMESTER_KEY_PREFIX}{semester}" if section == "12.1" and semester else section
+            version = ((result or {}).get("section_versions") or {}).get(version_key(version_section))
+            if version:
+                response["ETag"] = f'"{version}"'
+            return response
         except Exception as e:
             logger.error(f"Error getting data by section: {e}")
             return Response({"message": "Error getting data by section"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -37,7 +86,7 @@ class InjestItem1to10(APIView):
     """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.data_injestion_service = DataInjestionService()
+        self.data_injestion_service = get_instance(DataInjestionService)
 
     def post(self, request):
         try:
@@ -45,14 +94,22 @@ class InjestItem1to10(APIView):
             if not data:
                 return Response({"message": "No data provided"}, status=status.HTTP_400_BAD_REQUEST)
 
-            data = json.loads(data)
+            try:
+                data = decode_section("1-10", data)
+            except SchemaError as e:
+                return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            user_id = data["user_id"]
 
-            user_id = data.get("user_id")
-            if not user_id:
-                return Response({"message": "User ID is required"}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                expected_version = _get_expected_version(request, data)
+            except (TypeError, ValueError):
+                return Response({"message": "Expected version must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
 
-            self.data_injestion_service.injest_data_item1_to_10(user_id, data)
-            return Response({"message": "Data injested successfully"}, status=status.HTTP_200_OK)
+            result = self.data_injestion_service.injest_data_item1_to_10(user_id, data["data"], expected_version=expected_version)
+            return _saved_response(result)
+        except VersionConflict as e:
+            return _conflict_response(e)
         except Exception as e:
             logger.error(f"Error injesting data for item 1 to 10: {e}")
             return Response({"message": "Error injesting data for item 1 to 10"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -63,7 +120,7 @@ class InjestItem11(APIView):
     """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.data_injestion_service = DataInjestionService()
+        self.data_injestion_service = get_instance(DataInjestionService)
 
     def post(self, request):
         try:
@@ -71,14 +128,22 @@ class InjestItem11(APIView):
             if not data:
                 return Response({"message": "No data provided"}, status=status.HTTP_400_BAD_REQUEST)
 
-            data = json.loads(data)
+            try:
+                data = decode_section("11", data)
+            except SchemaError as e:
+                return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            user_id = data["user_id"]
 
-            user_id = data.get("user_id")
-            if not user_id:
-                return Response({"message": "User ID is required"}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                expected_version = _get_expected_version(request, data)
+            except (TypeError, ValueError):
+                return Response({"message": "Expected version must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
 
-            result = self.data_injestion_service.injest_data_item11(user_id, data)
-            return Response({"message": "Data injested successfully","result": result}, status=status.HTTP_200_OK)
+            result = self.data_injestion_service.injest_data_item11(user_id, data["data"], expected_version=expected_version)
+            return _saved_response(result)
+        except VersionConflict as e:
+            return _conflict_response(e)
         except Exception as e:
             logger.error(f"Error injesting data for item 11: {e}")
             return Response({"message": "Error injesting data for item 11"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -89,7 +154,7 @@ class InjestItem12_1(APIView):
     """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.data_injestion_service = DataInjestionService()
+        self.data_injestion_service = get_instance(DataInjestionService)
 
     def post(self, request):
         try:
@@ -97,18 +162,22 @@ class InjestItem12_1(APIView):
             if not data:
                 return Response({"message": "No data provided"}, status=status.HTTP_400_BAD_REQUEST)
 
-            data = json.loads(data)
+            try:
+                data = decode_section("12.1", data)
+            except SchemaError as e:
+                return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-            user_id = data.get("user_id")
-            if not user_id:
-                return Response({"message": "User ID is required"}, status=status.HTTP_400_BAD_REQUEST)
+            user_id = data["user_id"]
 
-            semester = data.get("semester")
-            if not semester:
-                return Response({"message": "Semester is required"}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                expected_version = _get_expected_version(request, data)
+            except (TypeError, ValueError):
+                return Response({"message": "Expected version must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
 
-            result = self.data_injestion_service.injest_data_item12_1(user_id, data, semester)
-            return Response({"message": "Data injested successfully","result": result}, status=status.HTTP_200_OK)
+            result = self.data_injestion_service.injest_data_item12_1(user_id, data["data"], data["semester"], expected_version=expected_version)
+            return _saved_response(result)
+        except VersionConflict as e:
+            return _conflict_response(e)
         except Exception as e:
             logger.error(f"Error injesting data for item 12.1: {e}")
             return Response({"message": "Error injesting data for item 12.1"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -119,7 +188,7 @@ class InjestItem12_3_to_12_4(APIView):
     """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.data_injestion_service = DataInjestionService()
+        self.data_injestion_service = get_instance(DataInjestionService)
 
     def post(self, request):
         try:
@@ -127,14 +196,22 @@ class InjestItem12_3_to_12_4(APIView):
             if not data:
                 return Response({"message": "No data provided"}, status=status.HTTP_400_BAD_REQUEST)
 
-            data = json.loads(data)
+            try:
+                data = decode_section("12.3-12.4", data)
+            except SchemaError as e:
+                return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-            user_id = data.get("user_id")
-            if not user_id:
-                return Response({"message": "User ID is required"}, status=status.HTTP_400_BAD_REQUEST)
+            user_id = data["user_id"]
 
-            result = self.data_injestion_service.injest_data_item12_3_to_12_4(user_id, data)
-            return Response({"message": "Data injested successfully","result": result}, status=status.HTTP_200_OK)
+            try:
+                expected_version = _get_expected_version(request, data)
+            except (TypeError, ValueError):
+                return Response({"message": "Expected version must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+            result = self.data_injestion_service.injest_data_item12_3_to_12_4(user_id, data["data"], expected_version=expected_version)
+            return _saved_response(result)
+        except VersionConflict as e:
+            return _conflict_response(e)
         except Exception as e:
             logger.error(f"Error injesting data for item 12.3 to 12.4: {e}")
             return Response({"message": "Error injesting data for item 12.3 to 12.4"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -145,7 +222,7 @@ class InjestItem13(APIView):
     """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.data_injestion_service = DataInjestionService()
+        self.data_injestion_service = get_instance(DataInjestionService)
 
     def post(self, request):
         try:
@@ -153,14 +230,22 @@ class InjestItem13(APIView):
             if not data:
                 return Response({"message": "No data provided"}, status=status.HTTP_400_BAD_REQUEST)
 
-            data = json.loads(data)
+            try:
+                data = decode_section("13", data)
+            except SchemaError as e:
+                return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            user_id = data["user_id"]
 
-            user_id = data.get("user_id")
-            if not user_id:
-                return Response({"message": "User ID is required"}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                expected_version = _get_expected_version(request, data)
+            except (TypeError, ValueError):
+                return Response({"message": "Expected version must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
 
-            result = self.data_injestion_service.injest_data_item13(user_id, data)
-            return Response({"message": "Data injested successfully","result": result}, status=status.HTTP_200_OK)
+            result = self.data_injestion_service.injest_data_item13(user_id, data["data"], expected_version=expected_version)
+            return _saved_response(result)
+        except VersionConflict as e:
+            return _conflict_response(e)
         except Exception as e:
             logger.error(f"Error injesting data for item 13: {e}")
             return Response({"message": "Error injesting data for item 13"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -171,7 +256,7 @@ class InjestItem14(APIView):
     """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.data_injestion_service = DataInjestionService()
+        self.data_injestion_service = get_instance(DataInjestionService)
 
     def post(self, request):
         try:
@@ -179,14 +264,22 @@ class InjestItem14(APIView):
             if not data:
                 return Response({"message": "No data provided"}, status=status.HTTP_400_BAD_REQUEST)
 
-            data = json.loads(data)
+            try:
+                data = decode_section("14", data)
+            except SchemaError as e:
+                return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            user_id = data["user_id"]
 
-            user_id = data.get("user_id")
-            if not user_id:
-                return Response({"message": "User ID is required"}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                expected_version = _get_expected_version(request, data)
+            except (TypeError, ValueError):
+                return Response({"message": "Expected version must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
 
-            result = self.data_injestion_service.injest_data_item14(user_id, data)
-            return Response({"message": "Data injested successfully","result": result}, status=status.HTTP_200_OK)
+            result = self.data_injestion_service.injest_data_item14(user_id, data["data"], expected_version=expected_version)
+            return _saved_response(result)
+        except VersionConflict as e:
+            return _conflict_response(e)
         except Exception as e:
             logger.error(f"Error injesting data for item 14: {e}")
             return Response({"message": "Error injesting data for item 14"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -197,7 +290,7 @@ class InjestItem15(APIView):
     """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.data_injestion_service = DataInjestionService()
+        self.data_injestion_service = get_instance(DataInjestionService)
 
     def post(self, request):
         try:
@@ -205,14 +298,22 @@ class InjestItem15(APIView):
             if not data:
                 return Response({"message": "No data provided"}, status=status.HTTP_400_BAD_REQUEST)
 
-            data = json.loads(data)
+            try:
+                data = decode_section("15", data)
+            except SchemaError as e:
+                return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-            user_id = data.get("user_id")
-            if not user_id:
-                return Response({"message": "User ID is required"}, status=status.HTTP_400_BAD_REQUEST)
+            user_id = data["user_id"]
 
-            result = self.data_injestion_service.injest_data_item15(user_id, data)
-            return Response({"message": "Data injested successfully","result": result}, status=status.HTTP_200_OK)
+            try:
+                expected_version = _get_expected_version(request, data)
+            except (TypeError, ValueError):
+                return Response({"message": "Expected version must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+            result = self.data_injestion_service.injest_data_item15(user_id, data["data"], expected_version=expected_version)
+            return _saved_response(result)
+        except VersionConflict as e:
+            return _conflict_response(e)
         except Exception as e:
             logger.error(f"Error injesting data for item 15: {e}")
             return Response({"message": "Error injesting data for item 15"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -223,7 +324,7 @@ class InjestItem16(APIView):
     """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.data_injestion_service = DataInjestionService()
+        self.data_injestion_service = get_instance(DataInjestionService)
 
     def post(self, request):
         try:
@@ -231,14 +332,22 @@ class InjestItem16(APIView):
             if not data:
                 return Response({"message": "No data provided"}, status=status.HTTP_400_BAD_REQUEST)
 
-            data = json.loads(data)
+            try:
+                data = decode_section("16", data)
+            except SchemaError as e:
+                return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            user_id = data["user_id"]
 
-            user_id = data.get("user_id")
-            if not user_id:
-                return Response({"message": "User ID is required"}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                expected_version = _get_expected_version(request, data)
+            except (TypeError, ValueError):
+                return Response({"message": "Expected version must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
 
-            result = self.data_injestion_service.injest_data_item16(user_id, data)
-            return Response({"message": "Data injested successfully","result": result}, status=status.HTTP_200_OK)
+            result = self.data_injestion_service.injest_data_item16(user_id, data["data"], expected_version=expected_version)
+            return _saved_response(result)
+        except VersionConflict as e:
+            return _conflict_response(e)
         except Exception as e:
             logger.error(f"Error injesting data for item 16: {e}")
             return Response({"message": "Error injesting data for item 16"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -249,7 +358,7 @@ class InjestItem17(APIView):
     """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.data_injestion_service = DataInjestionService()
+        self.data_injestion_service = get_instance(DataInjestionService)
 
     def post(self, request):
         try:
@@ -257,14 +366,22 @@ class InjestItem17(APIView):
             if not data:
                 return Response({"message": "No data provided"}, status=status.HTTP_400_BAD_REQUEST)
 
-            data = json.loads(data)
+            try:
+                data = decode_section("17", data)
+            except SchemaError as e:
+                return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            user_id = data["user_id"]
 
-            user_id = data.get("user_id")
-            if not user_id:
-                return Response({"message": "User ID is required"}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                expected_version = _get_expected_version(request, data)
+            except (TypeError, ValueError):
+                return Response({"message": "Expected version must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
 
-            result = self.data_injestion_service.injest_data_item17(user_id, data)
-            return Response({"message": "Data injested successfully","result": result}, status=status.HTTP_200_OK)
+            result = self.data_injestion_service.injest_data_item17(user_id, data["data"], expected_version=expected_version)
+            return _saved_response(result)
+        except VersionConflict as e:
+            return _conflict_response(e)
         except Exception as e:
             logger.error(f"Error injesting data for item 17: {e}")
             return Response({"message": "Error injesting data for item 17"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -275,7 +392,7 @@ class InjestItem18(APIView):
     """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.data_injestion_service = DataInjestionService()
+        self.data_injestion_service = get_instance(DataInjestionService)
 
     def post(self, request):
         try:
@@ -283,14 +400,22 @@ class InjestItem18(APIView):
             if not data:
                 return Response({"message": "No data provided"}, status=status.HTTP_400_BAD_REQUEST)
 
-            data = json.loads(data)
+            try:
+                data = decode_section("18", data)
+            except SchemaError as e:
+                return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-            user_id = data.get("user_id")
-            if not user_id:
-                return Response({"message": "User ID is required"}, status=status.HTTP_400_BAD_REQUEST)
+            user_id = data["user_id"]
 
-            result = self.data_injestion_service.injest_data_item18(user_id, data)
-            return Response({"message": "Data injested successfully","result": result}, status=status.HTTP_200_OK)
+            try:
+                expected_version = _get_expected_version(request, data)
+            except (TypeError, ValueError):
+                return Response({"message": "Expected version must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+            result = self.data_injestion_service.injest_data_item18(user_id, data["data"], expected_version=expected_version)
+            return _saved_response(result)
+        except VersionConflict as e:
+            return _conflict_response(e)
         except Exception as e:
             logger.error(f"Error injesting data for item 18: {e}")
             return Response({"message": "Error injesting data for item 18"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -301,7 +426,7 @@ class InjestItem19(APIView):
     """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.data_injestion_service = DataInjestionService()
+        self.data_injestion_service = get_instance(DataInjestionService)
 
     def post(self, request):
         try:
@@ -309,14 +434,264 @@ class InjestItem19(APIView):
             if not data:
                 return Response({"message": "No data provided"}, status=status.HTTP_400_BAD_REQUEST)
 
-            data = json.loads(data)
+            try:
+                data = decode_section("19", data)
+            except SchemaError as e:
+                return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            user_id = data["user_id"]
 
-            user_id = data.get("user_id")
-            if not user_id:
-                return Response({"message": "User ID is required"}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                expected_version = _get_expected_version(request, data)
+            except (TypeError, ValueError):
+                return Response({"message": "Expected version must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
 
-            result = self.data_injestion_service.injest_data_item19(user_id, data)
-            return Response({"message": "Data injested successfully","result": result}, status=status.HTTP_200_OK)
+            result = self.data_injestion_service.injest_data_item19(user_id, data["data"], expected_version=expected_version)
+            return _saved_response(result)
+        except VersionConflict as e:
+            return _conflict_response(e)
         except Exception as e:
             logger.error(f"Error injesting data for item 19: {e}")
             return Response({"message": "Error injesting data for item 19"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class PublicationLookup(APIView):
+    """
+    API Endpoint to suggest already indexed publications while item 14 is being filled
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.publication_index_service = get_instance(PublicationIndexService)
+
+    def get(self, request, *args, **kwargs):
+        try:
+            query = request.GET.get("q", "")
+            if not query.strip():
+                return Response({"message": "Query is required"}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                limit = min(int(request.GET.get("limit", 10)), 50)
+            except ValueError:
+                return Response({"message": "Limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+            result = self.publication_index_service.suggest_publications(query, limit)
+            return Response({"message": "Data fetched successfully","result": result}, status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.error(f"Error looking up publications: {e}")
+            return Response({"message": "Error looking up publications"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class JournalLookup(APIView):
+    """
+    API Endpoint to look up a journal's indexing status and impact factor by ISSN or title prefix
+    """
+    def get(self, request, *args, **kwargs):
+        try:
+            query = request.GET.get("q", "")
+            if not query.strip():
+                return Response({"message": "Query is required"}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                limit = min(int(request.GET.get("limit", 10)), 50)
+            except ValueError:
+                return Response({"message": "Limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+            catalog = get_journal_catalog()
+            result = {
+                "version": catalog.version,
+                "journals": [entry._asdict() for entry in catalog.lookup(query, limit)],
+            }
+            return Response({"message": "Data fetched successfully","result": result}, status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.error(f"Error looking up journals: {e}")
+            return Response({"message": "Error looking up journals"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class ScorePreview(APIView):
+    """
+    API Endpoint to calculate the score of a section without saving it
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.data_injestion_service = get_instance(DataInjestionService)
+
+    def post(self, request):
+        try:
+            data = request.body
+            if not data:
+                return Response({"message": "No data provided"}, status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                data = decode(data)
+            except SchemaError as e:
+                return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            if not isinstance(data, dict):
+                return Response({"message": "Request body must be a JSON object"}, status=status.HTTP_400_BAD_REQUEST)
+
+            section = data.get("section")
+            if not section or not isinstance(section, str):
+                return Response({"message": "Section is required"}, status=status.HTTP_400_BAD_REQUEST)
+            if section not in DataInjestionService.SECTION_SCORERS:
+                return Response({"message": f"Unknown section: {section}"}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                validate_section(section, data.get("data"), ["data"])
+            except SchemaError as e:
+                return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                result = self.data_injestion_service.preview_score(section, data.get("data"))
+            except (KeyError, TypeError, ValueError) as e:
+                # A payload the schema lets through but the scorer cannot read
+                return Response({"message": f"Invalid data for section {section}: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({"message": "Score calculated successfully","result": result}, status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.error(f"Error previewing score: {e}")
+            return Response({"message": "Error previewing score"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class SectionHistory(APIView):
+    """
+    API Endpoint to list the saved versions of a section or rebuild one of them
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.form_history_service = get_instance(FormHistoryService)
+
+    def get(self, request, *args, **kwargs):
+        try:
+            user_id = request.GET.get("user_id")
+            section = request.GET.get("section")
+            if not user_id or not section:
+                return Response({"message": "User ID and section are required"}, status=status.HTTP_400_BAD_REQUEST)
+
+            cycle = request.GET.get("cycle")
+            version = request.GET.get("version")
+            if not version:
+                result = self.form_history_service.list_versions(user_id, section, cycle)
+                return Response({"message": "Data fetched successfully","result": result}, status=status.HTTP_200_OK)
+
+            try:
+                version = int(version)
+            except ValueError:
+                return Response({"message": "Version must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+            value = self.form_history_service.get_section_version(user_id, section, version, cycle)
+            if value is None:
+                return Response({"message": "Version not found"}, status=status.HTTP_404_NOT_FOUND)
+            result = {"user_id": user_id, "section": section, "version": version, "data": value}
+            return Response({"message": "Data fetched successfully","result": result}, status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.error(f"Error getting section history: {e}")
+            return Response({"message": "Error getting section history"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class AttachmentUpload(APIView):
+    """
+    API Endpoint to upload an evidence file for a section. The request body is
+    the raw file and is streamed straight into GridFS.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.attachment_service = get_instance(AttachmentService)
+
+    def post(self, request, *args, **kwargs):
+        try:
+            user_id = request.GET.get("user_id")
+            section = request.GET.get("section")
+            filename = request.GET.get("filename")
+            if not user_id or not section or not filename:
+                return Response({"message": "User ID, section and filename are required"}, status=status.HTTP_400_BAD_REQUEST)
+            if section not in settings.ATTACHMENT_SECTIONS:
+                return Response({"message": f"Attachments are not supported for section {section}"}, status=status.HTTP_400_BAD_REQUEST)
+
+            content_length = int(request.META.get("CONTENT_LENGTH") or 0)
+            if content_length > settings.ATTACHMENT_MAX_SIZE:
+                return Response({"message": "Attachment is too large"}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+            stream = request.stream
+            if stream is None:
+                return Response({"message": "No data provided"}, status=status.HTTP_400_BAD_REQUEST)
+
+            content_type = request.META.get("CONTENT_TYPE") or "application/octet-stream"
+            expected_sha256 = request.headers.get("X-Content-SHA256")
+            result = self.attachment_service.upload_attachment(stream, user_id, section, filename, content_type, expected_sha256)
+            return Response({"message": "Attachment uploaded successfully","result": result}, status=status.HTTP_201_CREATED)
+        except AttachmentTooLarge:
+            return Response({"message": "Attachment is too large"}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        except AttachmentHashMismatch as e:
+            return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Error uploading attachment: {e}")
+            return Response({"message": "Error uploading attachment"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class AttachmentDownload(APIView):
+    """
+    API Endpoint to download an evidence file, honouring single byte-range requests
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.attachment_service = get_instance(AttachmentService)
+
+    def get(self, request, attachment_id, *args, **kwargs):
+        try:
+            grid_out = self.attachment_service.open_attachment(attachment_id)
+            if grid_out is None:
+                return Response({"message": "Attachment not found"}, status=status.HTTP_404_NOT_FOUND)
+
+            metadata = grid_out.metadata or {}
+            size = grid_out.length
+            try:
+                byte_range = parse_byte_range(request.headers.get("Range"), size)
+            except RangeNotSatisfiable:
+                grid_out.close()
+                response = Response({"message": "Requested range not satisfiable"}, status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+                response["Content-Range"] = f"bytes */{size}"
+                return response
+
+            start, end = byte_range if byte_range else (0, size - 1)
+            response = StreamingHttpResponse(
+                self._iter_file(grid_out, start, end - start + 1),
+                status=status.HTTP_206_PARTIAL_CONTENT if byte_range else status.HTTP_200_OK,
+                content_type=metadata.get("content_type", "application/octet-stream"),
+            )
+            response["Content-Length"] = str(max(end - start + 1, 0))
+            response["Accept-Ranges"] = "bytes"
+            response["Content-Disposition"] = f'attachment; filename="{urllib.parse.quote(grid_out.filename or attachment_id)}"'
+            if metadata.get("sha256"):
+                response["ETag"] = f'"{metadata["sha256"]}"'
+            if byte_range:
+                response["Content-Range"] = f"bytes {start}-{end}/{size}"
+            return response
+        except Exception as e:
+            logger.error(f"Error downloading attachment: {e}")
+            return Response({"message": "Error downloading attachment"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @staticmethod
+    def _iter_file(grid_out, start:int, length:int):
+        try:
+            grid_out.seek(start)
+            while length > 0:
+                chunk = grid_out.read(min(settings.ATTACHMENT_CHUNK_SIZE, length))
+                if not chunk:
+                    break
+                length -= len(chunk)
+                yield chunk
+        finally:
+            grid_out.close()
+
+class TeachingLoad(APIView):
+    """
+    API Endpoint to get the combined item 12.1 engagement and score across semesters
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.data_injestion_service = get_instance(DataInjestionService)
+
+    def get(self, request, *args, **kwargs):
+        try:
+            user_id = request.GET.get("user_id")
+            department = request.GET.get("department")
+            if not user_id and not department:
+                return Response({"message": "User ID or department is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+            semesters = [semester.strip() for semester in request.GET.get("semesters", "").split(",") if semester.strip()]
+            cycle = request.GET.get("cycle")
+            result = self.data_injestion_service.get_teaching_load(semesters, user_id, department, cycle)
+            if user_id:
+                result = result[0] if result else None
+            return Response({"message": "Data fetched successfully","result": result}, status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.error(f"Error getting teaching load: {e}")
+            return Response({"message": "Error getting teaching load"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -1,40 +1,40 @@
 from abc import ABC
 from datetime import datetime, timezone
 from django.conf import settings
-from pymongo import MongoClient, errors
+from pymongo import ReturnDocument, errors
+from common.clients.bulk_writer import BulkWriter
+from common.storage import get_storage
 
-# Module-level variable to store the MongoClient instance
-_mongo_client = None
+DUPLICATE_KEY_ERROR = 11000
 
 class AbstractMongoDBClient(ABC):
     def __init__(self, db):
-        global _mongo_client
-        if _mongo_client is None:
-            try:
-                # Initialize the MongoDB client with connection pooling
-                _mongo_client = MongoClient(
-                    settings.MONGO_URI,
-                    maxPoolSize=100,  # Maximum number of connections in the pool
-                    minPoolSize=10    # Minimum number of connections in the pool
-                )
-            except errors.ConnectionFailure as e:
-                raise Exception(f"Failed to connect to MongoDB: {str(e)}")
-        
-        self.client = _mongo_client
-        self.db = self.client[db]
+        # The configured storage backend (MongoDB by default) owns the connection pool
+        self.storage = get_storage()
+        self.db = self.storage.database(db)
+
+    def run_in_transaction(self, callback):
+        """
+        Call callback() in a transaction on the storage backend, so the writes it
+        makes through any client are applied together, and return its result.
+        The callback may be called again if the transaction is retried.
+        """
+        return self.storage.run_in_transaction(callback)
 
     def find_one(self, collection, filter, projection=None):
         try:
             # Find a single document in the specified collection
-            return self.db[collection].find_one(filter, projection)
+            return self.db[collection].find_one(filter, projection, session=self.storage.current_session())
         except errors.PyMongoError as e:
+            self._raise_if_transient(e)
             raise Exception(f"Error finding document: {str(e)}")
     
     def count(self, collection):
         try:
             # Count the number of documents in the specified collection
-            return self.db[collection].count_documents({})
+            return self.db[collection].count_documents({}, session=self.storage.current_session())
         except errors.PyMongoError as e:
+            self._raise_if_transient(e)
             raise Exception(f"Error counting documents: {str(e)}")
     
     def count_documents(self, collection, filter=None):
@@ -52,8 +52,9 @@ class AbstractMongoDBClient(ABC):
             filter = {}
         
         try:
-            return self.db[collection].count_documents(filter)
+            return self.db[collection].count_documents(filter, session=self.storage.current_session())
         except errors.PyMongoError as e:
+            self._raise_if_transient(e)
             raise Exception(f"Error counting documents: {str(e)}")
 
     def find_all(self, collection, query=None, skip=0, limit=0, projection=None, sort=None):
@@ -65,13 +66,14 @@ class AbstractMongoDBClient(ABC):
 
         try:
             # Fetch the documents with optional query, projection, skip, limit, and sort
-            query_result = self.db[collection].find(query, projection).skip(skip).limit(limit)
+            query_result = self.db[collection].find(query, projection, session=self.storage.current_session()).skip(skip).limit(limit)
 
             if sort:
                 query_result = query_result.sort(sort)
 
             return query_result
         except errors.PyMongoError as e:
+            self._raise_if_transient(e)
             raise Exception(f"Error finding documents: {str(e)}")
 
     def insert_one(self, collection, document):
@@ -81,50 +83,131 @@ class AbstractMongoDBClient(ABC):
 
         try:
             # Insert the document into the collection
-            return self.db[collection].insert_one(document)
+            return self.db[collection].insert_one(document, session=self.storage.current_session())
         except errors.PyMongoError as e:
+            self._raise_if_transient(e)
             raise Exception(f"Error inserting document: {str(e)}")
     
-    def insert_many(self, collection, documents):
+    def insert_many(self, collection, documents, ordered=True):
         """Insert multiple documents into the collection"""
-        # Add timestamps to each document
+        # Add timestamps to each document, one timestamp for the whole batch
+        now_utc = datetime.now(timezone.utc)
         for doc in documents:
-            doc['created_at'] = datetime.now(timezone.utc)
-            doc['updated_at'] = datetime.now(timezone.utc)
+            doc['created_at'] = now_utc
+            doc['updated_at'] = now_utc
 
         try:
             # Insert the documents into the collection
-            return self.db[collection].insert_many(documents)
+            return self.db[collection].insert_many(documents, ordered=ordered, session=self.storage.current_session())
+        except errors.BulkWriteError:
+            # Callers inspect the per-document errors, such as duplicates skipped by an unordered insert
+            raise
         except errors.PyMongoError as e:
+            self._raise_if_transient(e)
             raise Exception(f"Error inserting multiple documents: {str(e)}")
     
+    def insert_many_skipping_duplicates(self, collection, documents):
+        """
+        Insert documents unordered, skipping those a unique index already holds.
+
+        Returns:
+            Tuple[int, int]: Number of documents inserted and number skipped as duplicates
+        """
+        try:
+            return len(self.insert_many(collection, documents, ordered=False).inserted_ids), 0
+        except errors.BulkWriteError as e:
+            write_errors = e.details.get("writeErrors", [])
+            if e.details.get("writeConcernErrors") or any(error.get("code") != DUPLICATE_KEY_ERROR for error in write_errors):
+                raise Exception(f"Error inserting multiple documents: {str(e)}")
+            return e.details.get("nInserted", 0), len(write_errors)
+
+    def bulk_write(self, collection, operations, ordered=True):
+        """
+        Execute a list of pymongo write operations (UpdateOne, InsertOne...) in one round trip.
+
+        Args:
+            collection: Name of the collection
+            operations: List of pymongo write operation instances
+            ordered: Stop at the first error if True
+
+        Returns:
+            BulkWriteResult: Result of the bulk write
+        """
+        if not operations:
+            return None
+
+        try:
+            return self.db[collection].bulk_write(operations, ordered=ordered, session=self.storage.current_session())
+        except errors.PyMongoError as e:
+            self._raise_if_transient(e)
+            raise Exception(f"Error executing bulk write: {str(e)}")
+
+    def bulk_writer(self, collection, ordered=False, max_operations=None, max_bytes=None):
+        """
+        Return a BulkWriter that batches mixed writes to the collection.
+
+        Args:
+            collection: Name of the collection
+            ordered: Stop at the first failed operation if True
+            max_operations: Flush once this many operations are queued
+            max_bytes: Flush once the queued operations reach this BSON size
+        """
+        return BulkWriter(
+            self.db[collection],
+            ordered=ordered,
+            max_operations=max_operations or settings.BULK_WRITE_MAX_OPERATIONS,
+            max_bytes=max_bytes or settings.BULK_WRITE_MAX_BYTES,
+            session=self.storage.current_session(),
+        )
+
     def delete_many(self, collection, filter):
         try:
             # Delete multiple documents that match the filter
-            return self.db[collection].delete_many(filter)
+            return self.db[collection].delete_many(filter, session=self.storage.current_session())
         except errors.PyMongoError as e:
+            self._raise_if_transient(e)
             raise Exception(f"Error deleting documents: {str(e)}")
     
     def replace_one(self, collection, filter, replacement, upsert=False):
+        """
+        Replace a document, keeping its original created_at, in a single
+        server-side operation. The replacement is applied as a pipeline update
+        so created_at can be read from the document being replaced.
+        """
         try:
-            # Check if document exists
-            existing_doc = self.find_one(collection, filter)
-            
-            if existing_doc:
-                # If document exists, only update updated_at
-                replacement['updated_at'] = datetime.now(timezone.utc)
-                # Preserve the original created_at
-                replacement['created_at'] = existing_doc.get('created_at', datetime.now(timezone.utc))
-            else:
-                # If document doesn't exist, set both timestamps
-                replacement['created_at'] = datetime.now(timezone.utc)
-                replacement['updated_at'] = datetime.now(timezone.utc)
-            
-            # Replace the document
-            return self.db[collection].replace_one(filter, replacement, upsert=upsert)
+            replacement = {key: value for key, value in replacement.items() if key not in ("created_at", "updated_at")}
+            update = [{"$replaceWith": {"$mergeObjects": [
+                {"_id": "$_id"},
+                {"$literal": replacement},
+                {"created_at": {"$ifNull": ["$created_at", "$$NOW"]}, "updated_at": "$$NOW"},
+            ]}}]
+            return self.db[collection].update_one(filter, update, upsert=upsert, session=self.storage.current_session())
+        except errors.DuplicateKeyError:
+            raise
         except errors.PyMongoError as e:
+            self._raise_if_transient(e)
             raise Exception(f"Error replacing document: {str(e)}")
-    
+
+    def upsert_one(self, collection, filter, update):
+        """
+        Update the document matching filter, or insert it if there is none.
+        created_at is only written on insert and updated_at is set by the server,
+        so concurrent callers never need to read the document first.
+
+        Args:
+            collection: Name of the collection
+            filter: Query filter (dict); its equality fields seed an inserted document
+            update: Update document or aggregation pipeline
+
+        Returns:
+            UpdateResult: Result of the update, with upserted_id set on insert
+        """
+        return self.update_one(collection, filter, update, upsert=True)
+
+    def find_one_and_upsert(self, collection, filter, update, projection=None):
+        """Like upsert_one, but returns the document as it is after the write."""
+        return self.find_one_and_update(collection, filter, update, projection, upsert=True)
+
     def list_collections(self):
         try:
             # List all collection names in the database
@@ -141,18 +224,62 @@ class AbstractMongoDBClient(ABC):
         except errors.PyMongoError as e:
             raise Exception(f"Error creating collection: {str(e)}")
 
+    def drop_collection(self, collection):
+        try:
+            self.db.drop_collection(collection)
+        except errors.PyMongoError as e:
+            raise Exception(f"Error dropping collection: {str(e)}")
+
     def update_one(self, collection, filter, update, upsert=False):
         try:
-            # Ensure updated_at is always set to current UTC time
-            now_utc = datetime.now(timezone.utc)
-            if "$set" in update:
-                update["$set"]["updated_at"] = now_utc
-            else:
-                update["$set"] = {"updated_at": now_utc}
+            # Ensure updated_at is always set, and created_at whenever an upsert inserts
+            update = self._with_timestamps(update, upsert)
 
             # Update a single document in the specified collection
-            return self.db[collection].update_one(filter, update, upsert=upsert)
+            return self.db[collection].update_one(filter, update, upsert=upsert, session=self.storage.current_session())
+        except errors.DuplicateKeyError:
+            raise
         except errors.PyMongoError as e:
+            self._raise_if_transient(e)
+            raise Exception(f"Error updating document: {str(e)}")
+
+    def update_many(self, collection, filter, update, upsert=False):
+        try:
+            update = self._with_timestamps(update, upsert)
+
+            # Update every document matching the filter
+            return self.db[collection].update_many(filter, update, upsert=upsert, session=self.storage.current_session())
+        except errors.PyMongoError as e:
+            self._raise_if_transient(e)
+            raise Exception(f"Error updating documents: {str(e)}")
+
+    def find_one_and_update(self, collection, filter, update, projection=None, upsert=False, return_after=True):
+        """
+        Update a single document and return it in the same round trip.
+
+        Args:
+            collection: Name of the collection
+            filter: Query filter (dict)
+            update: Update document or aggregation pipeline
+            projection: Fields of the returned document
+            upsert: Insert the document if nothing matches
+            return_after: Return the post-image instead of the pre-image
+
+        Returns:
+            dict: The matched document, or None if nothing matched
+        """
+        try:
+            update = self._with_timestamps(update, upsert)
+            return_document = ReturnDocument.AFTER if return_after else ReturnDocument.BEFORE
+            return self.db[collection].find_one_and_update(
+                filter, update, projection=projection, upsert=upsert, return_document=return_document,
+                session=self.storage.current_session(),
+            )
+        except errors.DuplicateKeyError:
+            # Callers doing conditional upserts need to tell a lost race from a failure
+            raise
+        except errors.PyMongoError as e:
+            self._raise_if_transient(e)
             raise Exception(f"Error updating document: {str(e)}")
 
     def aggregate(self, collection, pipeline):
@@ -167,6 +294,69 @@ class AbstractMongoDBClient(ABC):
             Cursor: Aggregation result cursor
         """
         try:
-            return self.db[collection].aggregate(pipeline)
+            return self.db[collection].aggregate(pipeline, session=self.storage.current_session())
         except errors.PyMongoError as e:
+            self._raise_if_transient(e)
             raise Exception(f"Error executing aggregation pipeline: {str(e)}")
+
+    def create_index(self, collection, keys, **kwargs):
+        """
+        Create an index on the specified collection if it does not already exist.
+
+        Args:
+            collection: Name of the collection
+            keys: List of (field, direction) pairs
+            **kwargs: Index options passed through to pymongo (name, unique, partialFilterExpression...)
+
+        Returns:
+            str: Name of the index
+        """
+        try:
+            return self.db[collection].create_index(keys, **kwargs)
+        except errors.PyMongoError as e:
+            raise Exception(f"Error creating index: {str(e)}")
+
+    def explain(self, collection, query=None, skip=0, limit=0, projection=None, sort=None):
+        """
+        Return the executionStats explain output for a find on the specified collection.
+
+        Args:
+            collection: Name of the collection
+            query: Query filter (dict)
+            skip, limit, projection, sort: Same as find_all
+
+        Returns:
+            dict: Explain document from the server
+        """
+        try:
+            return self.find_all(collection, query, skip, limit, projection, sort).explain()
+        except errors.PyMongoError as e:
+            raise Exception(f"Error explaining query: {str(e)}")
+
+    @staticmethod
+    def _raise_if_transient(error:errors.PyMongoError):
+        """Re-raise errors that abort a transaction as they are, so the transaction gets retried."""
+        if error.has_error_label("TransientTransactionError") or error.has_error_label("UnknownTransactionCommitResult"):
+            raise error
+
+    @staticmethod
+    def _with_timestamps(update, upsert=False):
+        """
+        Add updated_at, and created_at for documents an upsert inserts, to an
+        update document or pipeline without a prior read.
+        """
+        if isinstance(update, list):
+            # Pipelines cannot use $setOnInsert, but can see whether created_at exists yet
+            timestamps = {"updated_at": "$$NOW"}
+            if upsert:
+                timestamps["created_at"] = {"$ifNull": ["$created_at", "$$NOW"]}
+            return update + [{"$set": timestamps}]
+
+        update = {operator: dict(fields) for operator, fields in update.items()}
+        for operator in ("$set", "$setOnInsert"):
+            if operator in update:
+                update[operator].pop("updated_at", None)
+        update.setdefault("$currentDate", {})["updated_at"] = True
+        if upsert and "created_at" not in update.get("$set", {}):
+            update.setdefault("$setOnInsert", {})["created_at"] = datetime.now(timezone.utc)
+        return update
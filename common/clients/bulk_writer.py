@@ -0,0 +1,184 @@
+import threading
+import time
+from datetime import datetime, timezone
+import bson
+from pymongo import DeleteMany, DeleteOne, InsertOne, UpdateMany, UpdateOne, errors
+
+class BulkWriter:
+    """
+    Accumulates mixed write operations for one collection and sends them as
+    bulk writes, flushing automatically once max_operations are queued or the
+    queued operations reach max_bytes of BSON.
+
+    Every operation in a batch is stamped with the same timestamp when the
+    batch is flushed: inserts get created_at and updated_at, updates get
+    updated_at and, when they upsert, created_at on insert.
+
+    In ordered mode the first failed operation stops the writer: the rest of
+    its batch is not applied by the server and anything queued afterwards is
+    dropped. In unordered mode failures are recorded and writing continues.
+    Either way errors are reported per operation in errors, with index being
+    the operation's position in the order it was queued.
+
+    Use as a context manager so the last partial batch is flushed:
+
+        with client.bulk_writer(collection) as writer:
+            for document in documents:
+                writer.update_one({"user_id": document["user_id"]}, {"$set": document}, upsert=True)
+        writer.stats()
+    """
+    def __init__(self, collection, ordered=False, max_operations=1000, max_bytes=4 * 1024 * 1024, session=None):
+        self.collection = collection
+        # Transaction the writes belong to, if any
+        self.session = session
+        self.ordered = ordered
+        self.max_operations = max_operations
+        self.max_bytes = max_bytes
+        self.errors = []
+        self._queue = []
+        self._queue_bytes = 0
+        self._queued = 0
+        self._stopped = False
+        self._lock = threading.Lock()
+        self._counts = {"inserted": 0, "matched": 0, "modified": 0, "upserted": 0, "deleted": 0, "dropped": 0}
+        self._batches = 0
+        self._flushed = 0
+        self._write_seconds = 0.0
+        self._started = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+        return False
+
+    def insert_one(self, document):
+        self._add("insert", document, size_of=document)
+
+    def update_one(self, filter, update, upsert=False):
+        self._add("update_one", filter, update, upsert, size_of={"q": filter, "u": update})
+
+    def update_many(self, filter, update, upsert=False):
+        self._add("update_many", filter, update, upsert, size_of={"q": filter, "u": update})
+
+    def replace_one(self, filter, replacement, upsert=False):
+        self._add("replace", filter, replacement, upsert, size_of={"q": filter, "u": replacement})
+
+    def delete_one(self, filter):
+        self._add("delete_one", filter, size_of=filter)
+
+    def delete_many(self, filter):
+        self._add("delete_many", filter, size_of=filter)
+
+    def _add(self, kind, *args, size_of):
+        with self._lock:
+            if self._stopped:
+                self._counts["dropped"] += 1
+                self._queued += 1
+                return
+            size = len(bson.encode(size_of))
+            self._queue.append((self._queued, kind, args))
+            self._queue_bytes += size
+            self._queued += 1
+            if len(self._queue) >= self.max_operations or self._queue_bytes >= self.max_bytes:
+                self._flush()
+
+    def flush(self):
+        """Send everything queued so far."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._queue:
+            return
+        batch, self._queue, self._queue_bytes = self._queue, [], 0
+        now = datetime.now(timezone.utc)
+        operations = [self._to_operation(kind, args, now) for _, kind, args in batch]
+
+        started = time.monotonic()
+        try:
+            result = self.collection.bulk_write(operations, ordered=self.ordered, session=self.session)
+            self._count(result.bulk_api_result)
+        except errors.BulkWriteError as e:
+            details = e.details
+            self._count(details)
+            for error in details.get("writeErrors", []):
+                index, kind, _ = batch[error["index"]]
+                self.errors.append({"index": index, "operation": kind, "code": error.get("code"), "message": error.get("errmsg")})
+            for error in details.get("writeConcernErrors", []):
+                self.errors.append({"index": None, "operation": None, "code": error.get("code"), "message": error.get("errmsg")})
+            if self.ordered and details.get("writeErrors"):
+                # The server stops at the first error; operations after it in the batch were never applied
+                applied = details["writeErrors"][0]["index"] + 1
+                self._counts["dropped"] += len(batch) - applied
+                self._stopped = True
+        except errors.PyMongoError as e:
+            raise Exception(f"Error executing bulk write: {str(e)}")
+        finally:
+            self._write_seconds += time.monotonic() - started
+        self._batches += 1
+        self._flushed += len(batch)
+
+    def _count(self, result):
+        self._counts["inserted"] += result.get("nInserted", 0)
+        self._counts["matched"] += result.get("nMatched", 0)
+        self._counts["modified"] += result.get("nModified", 0)
+        self._counts["upserted"] += result.get("nUpserted", 0)
+        self._counts["deleted"] += result.get("nRemoved", 0)
+
+    @staticmethod
+    def _to_operation(kind, args, now):
+        if kind == "insert":
+            document = args[0]
+            document["created_at"] = now
+            document["updated_at"] = now
+            return InsertOne(document)
+        if kind in ("update_one", "update_many"):
+            filter, update, upsert = args
+            operation = UpdateOne if kind == "update_one" else UpdateMany
+            return operation(filter, BulkWriter._stamp_update(update, upsert, now), upsert=upsert)
+        if kind == "replace":
+            # Applied as a pipeline so the stored created_at survives the replacement
+            filter, replacement, upsert = args
+            replacement = {key: value for key, value in replacement.items() if key not in ("created_at", "updated_at")}
+            update = [{"$replaceWith": {"$mergeObjects": [
+                {"_id": "$_id"},
+                {"$literal": replacement},
+                {"created_at": {"$ifNull": ["$created_at", {"$literal": now}]}, "updated_at": {"$literal": now}},
+            ]}}]
+            return UpdateOne(filter, update, upsert=upsert)
+        if kind == "delete_one":
+            return DeleteOne(args[0])
+        return DeleteMany(args[0])
+
+    @staticmethod
+    def _stamp_update(update, upsert, now):
+        if isinstance(update, list):
+            timestamps = {"updated_at": {"$literal": now}}
+            if upsert:
+                timestamps["created_at"] = {"$ifNull": ["$created_at", {"$literal": now}]}
+            return update + [{"$set": timestamps}]
+
+        update = {operator: dict(fields) for operator, fields in update.items()}
+        update.get("$currentDate", {}).pop("updated_at", None)
+        update.setdefault("$set", {})["updated_at"] = now
+        if upsert and "created_at" not in update["$set"]:
+            update.setdefault("$setOnInsert", {})["created_at"] = now
+        return update
+
+    def stats(self):
+        """Counts of applied writes, errors and throughput so far."""
+        with self._lock:
+            elapsed = time.monotonic() - self._started
+            return {
+                **self._counts,
+                "queued": self._queued,
+                "flushed": self._flushed,
+                "pending": len(self._queue),
+                "batches": self._batches,
+                "errors": len(self.errors),
+                "elapsed_seconds": round(elapsed, 3),
+                "write_seconds": round(self._write_seconds, 3),
+                "operations_per_second": round(self._flushed / elapsed, 1) if elapsed > 0 else 0.0,
+            }
@@ -0,0 +1,59 @@
+import re
+from typing import Optional, Tuple
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+def parse_byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range HTTP Range header ("bytes=start-end", "bytes=start-"
+    or "bytes=-suffix") against a resource of the given size.
+
+    Returns:
+        Tuple[int, int]: Inclusive (start, end) byte offsets, or None when the
+                         header is absent or not a single byte range, in which
+                         case the whole resource should be served.
+
+    Raises:
+        RangeNotSatisfiable: If the range lies outside the resource.
+    """
+    if not header:
+        return None
+    match = RANGE_PATTERN.match(header.strip())
+    if not match:
+        return None
+
+    start, end = match.groups()
+    if start == "" and end == "":
+        return None
+    if start == "":
+        # Suffix range: the last N bytes
+        length = int(end)
+        if length == 0:
+            raise RangeNotSatisfiable(header)
+        return max(size - length, 0), size - 1
+
+    start = int(start)
+    end = int(end) if end else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiable(header)
+    return start, min(end, size - 1)
+
+def parse_if_match_version(header: Optional[str]) -> Optional[int]:
+    """
+    Read an integer version from an If-Match header ('"3"', 'W/"3"' or '3').
+
+    Returns:
+        int: The version, or None when the header is absent or "*"
+
+    Raises:
+        ValueError: If the entity tag is not an integer version
+    """
+    if not header or header.strip() == "*":
+        return None
+    tag = header.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    return int(tag.strip('"'))
@@ -0,0 +1,194 @@
+"""
+Replays JSON lines of API calls (as written by TrafficCaptureMiddleware)
+against a running server or in process through the Django test client, and
+aggregates latency, throughput and errors per route.
+"""
+import http.client
+import itertools
+import json
+import math
+import random
+import threading
+import time
+from typing import Callable, Dict, Iterator, List
+from urllib.parse import urlencode, urlsplit
+from django.urls import Resolver404, resolve
+
+def load_calls(path:str) -> List[Dict]:
+    """Read API calls from a JSON lines file, skipping calls whose body was not captured."""
+    calls = []
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            call = json.loads(line)
+            if "method" not in call or "path" not in call or call.get("body_skipped"):
+                continue
+            calls.append(call)
+    return calls
+
+def route_name(path:str) -> str:
+    try:
+        match = resolve(path)
+        return match.url_name or match.route
+    except Resolver404:
+        return path
+
+def percentile(values:List[float], fraction:float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(values)))
+    return values[min(rank, len(values)) - 1]
+
+class HttpTarget:
+    """Sends calls to a running server, one keep-alive connection per worker thread."""
+    def __init__(self, base_url:str, timeout:float = 30.0):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme or "http"
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection_class = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+            connection = connection_class(self.netloc, timeout=self.timeout)
+            self._local.connection = connection
+        return connection
+
+    def send(self, call:Dict) -> int:
+        url = self.prefix + call["path"]
+        if call.get("query"):
+            url += "?" + urlencode(call["query"])
+        body, headers = None, {}
+        if call.get("body") is not None:
+            body = json.dumps(call["body"]).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        connection = self._connection()
+        try:
+            connection.request(call["method"], url, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            return response.status
+        except (http.client.HTTPException, OSError):
+            # Drop the broken connection so the next call reconnects
+            connection.close()
+            self._local.connection = None
+            raise
+
+class InProcessTarget:
+    """Calls views in this process through the Django test client, without a server."""
+    def __init__(self):
+        from django.test import Client
+        self._local = threading.local()
+        self._client_class = Client
+
+    def send(self, call:Dict) -> int:
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self._client_class()
+        method = getattr(client, call["method"].lower())
+        if call["method"].upper() == "GET":
+            response = method(call["path"], call.get("query") or {})
+        else:
+            path = call["path"]
+            if call.get("query"):
+                path += "?" + urlencode(call["query"])
+            response = method(path, json.dumps(call.get("body")), content_type="application/json")
+        return response.status_code
+
+class LoadRun:
+    """
+    Runs concurrency workers over the calls, started evenly over ramp_up seconds.
+    Each worker takes the next call from the shared sequence, sends it, then waits
+    a random think time averaging think_time seconds. The run ends when the
+    calls are exhausted (after loops passes) or after duration seconds.
+    """
+    def __init__(self, calls:List[Dict], target, concurrency:int = 10, ramp_up:float = 0.0, think_time:float = 0.0,
+                 loops:int = 1, duration:float = None, route_of:Callable = route_name):
+        self.calls = calls
+        self.target = target
+        self.concurrency = concurrency
+        self.ramp_up = ramp_up
+        self.think_time = think_time
+        self.loops = loops
+        self.duration = duration
+        self.route_of = route_of
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._routes = {}
+
+    def _call_sequence(self) -> Iterator[Dict]:
+        if self.duration:
+            return itertools.cycle(self.calls)
+        return itertools.chain.from_iterable(itertools.repeat(self.calls, self.loops))
+
+    def run(self) -> Dict:
+        sequence = self._call_sequence()
+        started = time.monotonic()
+        deadline = started + self.duration if self.duration else None
+
+        def next_call():
+            with self._lock:
+                return next(sequence, None)
+
+        def worker(index):
+            if self.ramp_up and self.concurrency > 1:
+                time.sleep(self.ramp_up * index / self.concurrency)
+            while deadline is None or time.monotonic() < deadline:
+                call = next_call()
+                if call is None:
+                    return
+                self._send(call)
+                if self.think_time:
+                    time.sleep(random.uniform(0, 2 * self.think_time))
+
+        threads = [threading.Thread(target=worker, args=(index,), daemon=True) for index in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.report(time.monotonic() - started)
+
+    def _send(self, call:Dict):
+        path = call["path"]
+        route = self._routes.get(path)
+        if route is None:
+            route = self._routes[path] = self.route_of(path)
+        started = time.perf_counter()
+        try:
+            status = self.target.send(call)
+        except Exception:
+            status = None
+        latency = time.perf_counter() - started
+        with self._lock:
+            self._samples.setdefault(route, []).append((latency, status))
+
+    def report(self, elapsed:float) -> Dict:
+        """Per-route and overall count, throughput, p50/p95/p99 latency (ms) and error rates."""
+        with self._lock:
+            samples = dict(self._samples)
+        routes = {name: self._summarize(route_samples, elapsed) for name, route_samples in sorted(samples.items())}
+        overall = self._summarize([sample for route_samples in samples.values() for sample in route_samples], elapsed)
+        return {"elapsed_seconds": round(elapsed, 3), "concurrency": self.concurrency, "overall": overall, "routes": routes}
+
+    @staticmethod
+    def _summarize(samples:List, elapsed:float) -> Dict:
+        latencies = sorted(latency * 1000 for latency, _ in samples)
+        count = len(samples)
+        # Failed connections and 5xx are errors; 4xx (validation, version conflicts) are reported separately
+        errors = sum(1 for _, status in samples if status is None or status >= 500)
+        client_errors = sum(1 for _, status in samples if status is not None and 400 <= status < 500)
+        return {
+            "requests": count,
+            "throughput_rps": round(count / elapsed, 1) if elapsed > 0 else 0.0,
+            "p50_ms": round(percentile(latencies, 0.50), 2),
+            "p95_ms": round(percentile(latencies, 0.95), 2),
+            "p99_ms": round(percentile(latencies, 0.99), 2),
+            "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+            "error_rate": round(errors / count, 4) if count else 0.0,
+            "client_error_rate": round(client_errors / count, 4) if count else 0.0,
+        }
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+logger = logging.getLogger(__name__)
+
+_capture_lock = threading.Lock()
+
+def pseudonymize(value, prefix:str = "u") -> str:
+    """Stable pseudonym for an identifier, so replayed calls still hit the same documents."""
+    digest = hashlib.sha256(f"{settings.SECRET_KEY}:{value}".encode("utf-8")).hexdigest()
+    return f"{prefix}-{digest[:12]}"
+
+def _is_number(value:str) -> bool:
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
+
+def sanitize(value, redact_fields=None, safe_fields=None, key:str = None):
+    """
+    Copy of a request body or query with personal data removed, keeping the
+    shape of the payload (list lengths, author counts) intact.
+
+    User ids are pseudonymized. Other strings are kept only under the
+    allow-listed fields (choices and dates the scoring depends on) or when
+    they hold a number; free text such as titles, references and names is
+    replaced by a stable pseudonym, so equal texts stay equal on replay.
+    Fields in redact_fields are pseudonymized even when numeric.
+    """
+    redact_fields = settings.TRAFFIC_CAPTURE_REDACT_FIELDS if redact_fields is None else redact_fields
+    safe_fields = settings.TRAFFIC_CAPTURE_SAFE_FIELDS if safe_fields is None else safe_fields
+    if isinstance(value, dict):
+        return {item_key: sanitize(item, redact_fields, safe_fields, item_key) for item_key, item in value.items()}
+    if isinstance(value, list):
+        return [sanitize(item, redact_fields, safe_fields, key) for item in value]
+    if key == "user_id" and isinstance(value, (str, int)):
+        return pseudonymize(value)
+    if isinstance(value, str) and value:
+        field = (key or "").lower()
+        if field in redact_fields or not (field in safe_fields or _is_number(value)):
+            return pseudonymize(value, "t")
+    return value
+
+class TrafficCaptureMiddleware:
+    """
+    Records sanitized API calls as JSON lines in TRAFFIC_CAPTURE_PATH, in the
+    format replayed by the loadtest command:
+
+        {"method": "POST", "path": "/api/injest-item-14/", "query": {}, "body": {...},
+         "status": 200, "duration_ms": 12.3, "captured_at": "..."}
+
+    Only JSON bodies up to TRAFFIC_CAPTURE_MAX_BODY bytes are recorded; uploads
+    and NDJSON streams are captured without their body so they are never read
+    into memory here. Disabled unless TRAFFIC_CAPTURE_PATH is set.
+    """
+    def __init__(self, get_response):
+        if not settings.TRAFFIC_CAPTURE_PATH:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.path = settings.TRAFFIC_CAPTURE_PATH
+
+    def __call__(self, request):
+        if not request.path.startswith(settings.TRAFFIC_CAPTURE_PATH_PREFIX) or random.random() >= settings.TRAFFIC_CAPTURE_SAMPLE_RATE:
+            return self.get_response(request)
+
+        body = self._read_body(request)
+        started = time.monotonic()
+        response = self.get_response(request)
+        duration_ms = (time.monotonic() - started) * 1000
+
+        try:
+            call = {
+                "method": request.method,
+                "path": request.path,
+                "query": sanitize({key: request.GET.get(key) for key in request.GET}),
+                "body": sanitize(body),
+                "status": response.status_code,
+                "duration_ms": round(duration_ms, 2),
+                "captured_at": datetime.now(timezone.utc).isoformat(),
+            }
+            if body is None and request.META.get("CONTENT_LENGTH") not in (None, "", "0"):
+                call["body_skipped"] = True
+            line = json.dumps(call, default=str)
+            with _capture_lock:
+                with open(self.path, "a", encoding="utf-8") as file:
+                    file.write(line + "\n")
+        except Exception as e:
+            # Capture must never affect the response
+            logger.error(f"Error capturing traffic: {e}")
+        return response
+
+    @staticmethod
+    def _read_body(request):
+        if not request.content_type == "application/json":
+            return None
+        try:
+            length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            return None
+        if not length or length > settings.TRAFFIC_CAPTURE_MAX_BODY:
+            return None
+        try:
+            # Django keeps the body, so the view still parses it as usual
+            return json.loads(request.body)
+        except ValueError:
+            return None
@@ -0,0 +1,25 @@
+"""
+DRF parser built on orjson, the counterpart of common.renderers.ORJSONRenderer.
+"""
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser, get_encoding
+from common.renderers import ORJSONRenderer
+
+class ORJSONParser(JSONParser):
+    """
+    Drop-in replacement for DRF's JSONParser. orjson never accepts NaN or
+    Infinity, which matches DRF's default STRICT_JSON behaviour.
+    """
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = get_encoding(parser_context or {})
+        try:
+            body = stream.read()
+            # orjson only decodes UTF-8
+            if encoding.lower().replace("-", "") != "utf8":
+                body = body.decode(encoding)
+            return orjson.loads(body)
+        except (ValueError, UnicodeDecodeError) as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
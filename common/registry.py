@@ -0,0 +1,105 @@
+"""
+Process-wide services and clients. Views and services take their
+collaborators from get_instance() instead of constructing them per request,
+so each class is built once per process, against the configured storage
+backend. When the backend is replaced with set_storage() or reset_storage(),
+the next lookup rebuilds the instances against the new one.
+
+The WSGI and ASGI entry points call warm_up_apps() once the application is
+loaded, so the first request does not pay for building the instances or for
+connecting to the storage. Management commands never warm up: they may
+replace the storage first, and have no first request to speed up.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, Type, TypeVar
+from django.conf import settings
+from common.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_instances = {}
+_storage = None
+# Reentrant: building a service looks up the clients it uses
+_lock = threading.RLock()
+
+def get_instance(cls:Type[T]) -> T:
+    """The shared instance of cls, built with no arguments on first use."""
+    global _storage
+    storage = get_storage()
+    if storage is _storage:
+        instance = _instances.get(cls)
+        if instance is not None:
+            return instance
+
+    with _lock:
+        if storage is not _storage:
+            _instances.clear()
+            _storage = storage
+        instance = _instances.get(cls)
+        if instance is None:
+            instance = cls()
+            _instances[cls] = instance
+        return instance
+
+def reset_instances():
+    """Forget the shared instances, so the next lookups rebuild them, e.g. after a test changes the settings they read."""
+    with _lock:
+        _instances.clear()
+
+def warm_up(classes:Iterable[type]) -> Dict[str, float]:
+    """Build the shared instance of each class. Returns the milliseconds each one took."""
+    timings = {}
+    for cls in classes:
+        started = time.perf_counter()
+        get_instance(cls)
+        timings[cls.__name__] = (time.perf_counter() - started) * 1000
+    logger.debug(f"Warmed up {', '.join(f'{name} ({ms:.1f} ms)' for name, ms in timings.items())}")
+    return timings
+
+def warm_up_apps():
+    """
+    Call the warm_up() method of every installed app config that has one,
+    unless SERVICE_WARMUP is off. Only for web server processes: servers that
+    fork workers must load the entry point in each worker, after the fork, so
+    the connections and threads warm-up creates are not shared across processes.
+    """
+    if not settings.SERVICE_WARMUP:
+        return
+    from django.apps import apps
+    for app_config in apps.get_app_configs():
+        method = getattr(app_config, "warm_up", None)
+        if method is not None:
+            method()
+
+def ping_storage(timeout:float = None, checks:Iterable[Callable] = ()) -> bool:
+    """
+    Connect to the storage backend, then run each of checks, e.g. that an index
+    the writes rely on exists. Returns False, with a warning, if the storage
+    could not be reached or a check raised.
+    """
+    timeout = settings.SERVICE_WARMUP_TIMEOUT if timeout is None else timeout
+    started = time.perf_counter()
+    try:
+        get_storage().ping(timeout)
+    except Exception as e:
+        logger.warning(f"Storage warm-up failed: {e}")
+        return False
+    logger.info(f"Storage warm-up took {(time.perf_counter() - started) * 1000:.0f} ms")
+    passed = True
+    for check in checks:
+        try:
+            check()
+        except Exception as e:
+            logger.warning(f"Storage check {getattr(check, '__qualname__', check)} failed: {e}")
+            passed = False
+    return passed
+
+def ping_storage_in_background(checks:Iterable[Callable] = ()) -> threading.Thread:
+    """ping_storage() on a daemon thread, so an unreachable server never holds up startup."""
+    thread = threading.Thread(target=ping_storage, kwargs={"checks": list(checks)}, name="storage-warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,98 @@
+"""
+Destinations the outbox relay delivers change events to, selected by kind:
+
+    file     appends each event as a JSON line to a file
+    webhook  POSTs each batch as {"events": [...]} to a URL
+    queue    puts each event on an in-process queue.Queue, for consumers
+             running in the same process as the relay
+
+deliver() either takes the whole batch or raises, in which case the relay
+delivers it again later, so a sink may see an event more than once.
+Consumers tell repeats apart by event_id. Sinks that set with_values also
+receive the saved section value of each event.
+"""
+import os
+import queue
+import urllib.error
+import urllib.request
+from abc import ABC, abstractmethod
+from typing import Dict, List
+from django.conf import settings
+from common.renderers import dumps
+
+SINKS = ("file", "webhook", "queue")
+
+class Sink(ABC):
+    name = None
+    with_values = False
+
+    @abstractmethod
+    def deliver(self, events:List[Dict]):
+        """Deliver a batch of events, raising if it was not accepted as a whole."""
+
+    def close(self):
+        pass
+
+class FileSink(Sink):
+    name = "file"
+
+    def __init__(self, path:str):
+        self.path = path
+        self.file = open(path, "ab")
+
+    def deliver(self, events:List[Dict]):
+        self.file.write(b"".join(dumps(event) + b"\n" for event in events))
+        self.file.flush()
+        # On disk before the checkpoint moves past the batch
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+class WebhookSink(Sink):
+    name = "webhook"
+
+    def __init__(self, url:str, timeout:float = None):
+        self.url = url
+        self.timeout = settings.OUTBOX_WEBHOOK_TIMEOUT if timeout is None else timeout
+
+    def deliver(self, events:List[Dict]):
+        request = urllib.request.Request(
+            self.url, data=dumps({"events": events}), method="POST", headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+        except urllib.error.HTTPError as e:
+            raise Exception(f"Webhook {self.url} returned {e.code}")
+        except (urllib.error.URLError, OSError) as e:
+            raise Exception(f"Webhook {self.url} is unreachable: {e}")
+
+class QueueSink(Sink):
+    name = "queue"
+
+    def __init__(self, target:queue.Queue = None, timeout:float = None):
+        self.queue = queue.Queue() if target is None else target
+        self.timeout = timeout
+
+    def deliver(self, events:List[Dict]):
+        try:
+            for event in events:
+                self.queue.put(event, timeout=self.timeout)
+        except queue.Full:
+            # The events already queued are queued again with the rest of the batch
+            raise Exception("The outbox queue is full")
+
+def create_sink(kind:str, target=None) -> Sink:
+    """A new sink; target is the file path, the webhook URL or the queue.Queue to deliver to."""
+    if kind == "file":
+        if not target:
+            raise ValueError("The file sink needs a path")
+        return FileSink(target)
+    if kind == "webhook":
+        if not target:
+            raise ValueError("The webhook sink needs a URL")
+        return WebhookSink(target)
+    if kind == "queue":
+        return QueueSink(target)
+    raise ValueError(f"Unknown sink {kind!r}, expected one of {', '.join(SINKS)}")
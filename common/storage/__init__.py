@@ -0,0 +1,59 @@
+"""
+Storage backends behind AbstractMongoDBClient, selected with STORAGE_BACKEND:
+
+    mongo   MongoDB at MONGO_URI (the default)
+    memory  in-process dicts, for tests, benchmarks and load tests
+    sqlite  a SQLite file at STORAGE_SQLITE_PATH, for single-node deployments
+
+Every backend hands out databases with the pymongo Database and Collection
+interface, so the domain clients are the same whichever one is configured.
+The storage conformance tests (appraisal_form_injestion/tests) check that they
+behave alike.
+"""
+import threading
+from django.conf import settings
+
+BACKENDS = ("mongo", "memory", "sqlite")
+
+_storage = None
+_storage_lock = threading.Lock()
+
+def create_storage(backend:str = None, **options):
+    """A new backend instance; options override the settings it would read (uri, path)."""
+    backend = backend or settings.STORAGE_BACKEND
+    if backend == "mongo":
+        from common.storage.mongo import MongoStorage
+        return MongoStorage(options.get("uri"))
+    if backend == "memory":
+        from common.storage.memory import MemoryStorage
+        return MemoryStorage()
+    if backend == "sqlite":
+        from common.storage.sqlite import SQLiteStorage
+        return SQLiteStorage(options.get("path") or settings.STORAGE_SQLITE_PATH)
+    raise ValueError(f"Unknown storage backend {backend!r}, expected one of {', '.join(BACKENDS)}")
+
+def get_storage():
+    """The process-wide backend, created from settings on first use."""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = create_storage()
+    return _storage
+
+def set_storage(storage):
+    """
+    Replace the process-wide backend, e.g. with an in-memory one for a load test.
+    Clients created earlier keep the backend they were created with.
+    """
+    global _storage
+    with _storage_lock:
+        _storage = storage
+
+def reset_storage():
+    """Close the process-wide backend so the next client recreates it from settings."""
+    global _storage
+    with _storage_lock:
+        if _storage is not None:
+            _storage.close()
+        _storage = None
@@ -0,0 +1,516 @@
+"""
+Collection and database interfaces shared by the document storage backends.
+
+DocumentCollection implements the subset of the pymongo Collection API the
+domain clients use (finds, counts, single and bulk writes, pipeline updates,
+aggregation and indexes) on top of a handful of storage primitives, so a
+backend only decides how documents are stored, found and locked. Results and
+errors are pymongo's own classes, so callers cannot tell the backends apart.
+"""
+import copy
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from bson import ObjectId, json_util
+from bson.json_util import CANONICAL_JSON_OPTIONS
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReplaceOne, ReturnDocument, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError, CollectionInvalid, DuplicateKeyError, OperationFailure
+from pymongo.results import BulkWriteResult, DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+from common.storage import documents
+
+def id_key(value) -> str:
+    """Canonical string form of an _id, used as the primary key of stored documents."""
+    return json_util.dumps(value, json_options=CANONICAL_JSON_OPTIONS)
+
+def index_name(keys:List[Tuple]) -> str:
+    """Default index name, as the server derives it."""
+    return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+def normalize_keys(keys) -> List[Tuple]:
+    if isinstance(keys, str):
+        return [(keys, 1)]
+    return [(key, 1) if isinstance(key, str) else tuple(key) for key in keys]
+
+def current_time() -> datetime:
+    """$$NOW as the server stores it: naive UTC with millisecond precision."""
+    return documents.normalize({"now": datetime.now(timezone.utc)})["now"]
+
+class StorageBackend(ABC):
+    """A source of databases; get_storage() returns the configured one."""
+    name = None
+
+    @abstractmethod
+    def database(self, name:str):
+        """Database handle with the pymongo Database interface."""
+
+    def ping(self, timeout:float = None):
+        """Make sure the backend is reachable, raising if it is not. Local backends always are."""
+
+    def run_in_transaction(self, callback:Callable):
+        """
+        Call callback() so that the writes this thread makes in it are applied
+        together or not at all, and return its result. Backends may call it
+        more than once if the transaction has to be retried.
+        """
+        return callback()
+
+    def supports_transactions(self) -> bool:
+        """Whether run_in_transaction() undoes the writes of a callback that raises."""
+        return False
+
+    def current_session(self):
+        """Session of the transaction running on this thread, to pass to collection methods, or None."""
+        return None
+
+    def supports_change_streams(self) -> bool:
+        """Whether collections can watch() their changes; callers poll instead when they cannot."""
+        return False
+
+    def close(self):
+        pass
+
+class ResultCursor:
+    """Iterator over materialized results, with the cursor methods callers use."""
+    def __init__(self, results:List[Dict]):
+        self._results = iter(results)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._results)
+
+    def next(self):
+        return next(self._results)
+
+    def to_list(self, length:int = None) -> List[Dict]:
+        results = list(self)
+        return results[:length] if length else results
+
+    def close(self):
+        self._results = iter(())
+
+class Cursor(ResultCursor):
+    """
+    Lazy find cursor. Like the server, sort is applied before skip and limit
+    whatever order they were chained in, and nothing runs until iteration.
+    """
+    def __init__(self, collection, filter, projection):
+        self._collection = collection
+        self._filter = filter or {}
+        self._projection = projection
+        self._sort = None
+        self._skip = 0
+        self._limit = 0
+        self._results = None
+
+    def sort(self, key_or_list, direction=None):
+        self._sort = [(key_or_list, direction or 1)] if isinstance(key_or_list, str) else list(key_or_list)
+        return self
+
+    def skip(self, skip:int):
+        self._skip = skip
+        return self
+
+    def limit(self, limit:int):
+        self._limit = limit
+        return self
+
+    def __next__(self):
+        if self._results is None:
+            self._results = iter(self._collection._find(self._filter, self._projection, self._sort, self._skip, self._limit)[0])
+        return next(self._results)
+
+    def explain(self) -> Dict:
+        """Explain output with the fields summarize_explain reads from the server's."""
+        started = time.perf_counter()
+        results, plan = self._collection._find(self._filter, self._projection, self._sort, self._skip, self._limit)
+        elapsed = time.perf_counter() - started
+        stage = {"stage": "COLLSCAN"}
+        if plan.get("index"):
+            stage = {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": plan["index"]}}
+        return {
+            "queryPlanner": {"namespace": self._collection.full_name, "winningPlan": stage},
+            "executionStats": {
+                "nReturned": len(results),
+                "totalKeysExamined": plan["examined"] if plan.get("index") else 0,
+                "totalDocsExamined": plan["examined"],
+                "executionTimeMillis": int(elapsed * 1000),
+            },
+            "storageBackend": self._collection.database.backend.name,
+        }
+
+class DocumentDatabase:
+    """Database of DocumentCollections; collections are created on first write."""
+    collection_class = None
+
+    def __init__(self, backend, name:str):
+        self.backend = backend
+        self.name = name
+        self._collections = {}
+
+    def __getitem__(self, name:str):
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections.setdefault(name, self.collection_class(self, name))
+        return collection
+
+    def get_collection(self, name:str):
+        return self[name]
+
+    def list_collection_names(self) -> List[str]:
+        return self.backend.list_collections(self.name)
+
+    def create_collection(self, name:str):
+        if name in self.list_collection_names():
+            raise CollectionInvalid(f"collection {name} already exists")
+        collection = self[name]
+        collection._create()
+        return collection
+
+    def drop_collection(self, name:str):
+        self[name].drop()
+
+class DocumentCollection(ABC):
+    """
+    pymongo Collection semantics over storage primitives. Every write runs
+    inside _write(), which holds the backend's write lock (or transaction)
+    across the read-modify-write, so upserts and conditional updates are
+    atomic as they are on the server.
+    """
+    def __init__(self, database:DocumentDatabase, name:str):
+        self.database = database
+        self.name = name
+        self.full_name = f"{database.name}.{name}"
+
+    # Storage primitives
+
+    @abstractmethod
+    def _select(self, filter:Dict) -> Tuple[Iterable[Tuple[str, Dict]], Dict]:
+        """
+        (key, document) pairs that may match the filter (a superset; the caller
+        applies the filter) and the plan used: {"index": name or None, "examined": n}.
+        Documents may be the stored objects and must not be modified.
+        """
+
+    @abstractmethod
+    def _insert(self, key:str, document:Dict):
+        """Store a new document, raising DuplicateKeyError on an _id or unique index clash."""
+
+    @abstractmethod
+    def _replace(self, key:str, old:Dict, new:Dict):
+        """Replace a stored document, raising DuplicateKeyError on a unique index clash."""
+
+    @abstractmethod
+    def _delete(self, key:str, old:Dict):
+        pass
+
+    @abstractmethod
+    def _write(self):
+        """Exclusive access for the duration of a write."""
+
+    @abstractmethod
+    def _index_specs(self) -> Dict[str, Dict]:
+        """Declared indexes by name: {"key": [(field, direction)], "unique": bool, ...}."""
+
+    @abstractmethod
+    def _add_index(self, name:str, spec:Dict):
+        """Declare an index, raising DuplicateKeyError if existing documents violate a unique one."""
+
+    @abstractmethod
+    def _create(self):
+        """Create the collection's storage if it does not exist."""
+
+    @abstractmethod
+    def drop(self):
+        pass
+
+    # Helpers for backends
+
+    def duplicate_key_error(self, index:str, key:Dict) -> DuplicateKeyError:
+        shown = ", ".join(f"{field}: {json_util.dumps(value)}" for field, value in key.items())
+        message = f"E11000 duplicate key error collection: {self.full_name} index: {index} dup key: {{ {shown} }}"
+        return DuplicateKeyError(message, 11000, {"index": 0, "code": 11000, "errmsg": message, "keyPattern": {field: 1 for field in key}, "keyValue": key})
+
+    def unique_key(self, spec:Dict, document:Dict) -> Optional[Dict]:
+        """Values of a unique index's fields in a document, or None if the index does not cover it."""
+        partial = spec.get("partialFilterExpression")
+        if partial and not documents.matches(document, partial):
+            return None
+        key = {}
+        for field, _ in spec["key"]:
+            value = documents.get_field(document, field)
+            key[field] = None if value is documents.MISSING else value
+        return key
+
+    def unique_specs(self) -> Dict[str, Dict]:
+        return {name: spec for name, spec in self._index_specs().items() if spec.get("unique")}
+
+    # Reads
+
+    def _matching(self, filter:Dict) -> Tuple[List[Tuple[str, Dict]], Dict]:
+        candidates, plan = self._select(filter or {})
+        matched = []
+        examined = 0
+        for key, document in candidates:
+            examined += 1
+            if documents.matches(document, filter):
+                matched.append((key, document))
+        plan["examined"] = examined
+        return matched, plan
+
+    def _find(self, filter, projection, sort, skip, limit) -> Tuple[List[Dict], Dict]:
+        matched, plan = self._matching(filter)
+        results = [document for _, document in matched]
+        if sort:
+            results = documents.sort_documents(results, sort)
+        if skip:
+            results = results[skip:]
+        if limit:
+            results = results[:abs(limit)]
+        return [documents.project(copy.deepcopy(document), projection) for document in results], plan
+
+    def find(self, filter=None, projection=None, **kwargs):
+        cursor = Cursor(self, filter, projection)
+        if kwargs.get("sort"):
+            cursor.sort(kwargs["sort"])
+        return cursor.skip(kwargs.get("skip", 0)).limit(kwargs.get("limit", 0))
+
+    def find_one(self, filter=None, projection=None, **kwargs):
+        if filter is not None and not isinstance(filter, dict):
+            filter = {"_id": filter}
+        return next(iter(self.find(filter, projection, **kwargs).limit(1)), None)
+
+    def count_documents(self, filter=None, **kwargs) -> int:
+        return len(self._matching(filter or {})[0])
+
+    def estimated_document_count(self) -> int:
+        return self.count_documents({})
+
+    def aggregate(self, pipeline:List[Dict], **kwargs):
+        # A leading $match selects the input the way a find would, so it can use an index
+        filter = pipeline[0]["$match"] if pipeline and "$match" in pipeline[0] else {}
+        matched, _ = self._matching(filter)
+        stages = pipeline[1:] if filter else pipeline
+        results = documents.aggregate((copy.deepcopy(document) for _, document in matched), stages, current_time(), self.database)
+        return ResultCursor(results)
+
+    # Writes
+
+    def _new_document(self, document:Dict) -> Tuple[str, Dict]:
+        if "_id" not in document:
+            document["_id"] = ObjectId()
+        stored = documents.normalize({"_id": document["_id"], **document})
+        return id_key(stored["_id"]), stored
+
+    def _updated(self, old:Dict, update, inserting:bool, now:datetime) -> Dict:
+        if isinstance(update, list):
+            new = documents.apply_pipeline_update(copy.deepcopy(old), update, now)
+        elif update and all(key.startswith("$") for key in update):
+            new = documents.apply_update(copy.deepcopy(old), update, inserting, now)
+        else:
+            # A replacement document keeps only the _id
+            new = {key: copy.deepcopy(value) for key, value in update.items() if key != "_id"}
+            if "_id" in old:
+                new = {"_id": old["_id"], **new}
+        if "_id" in old and not documents.values_equal(new.get("_id", documents.MISSING), old["_id"]):
+            raise OperationFailure("Performing an update on the path '_id' would modify the immutable field '_id'", 66)
+        if "_id" not in new:
+            new = {"_id": ObjectId(), **new}
+        elif next(iter(new)) != "_id":
+            new = {"_id": new.pop("_id"), **new}
+        return documents.normalize(new)
+
+    def _upsert_seed(self, filter:Dict) -> Dict:
+        seed = {}
+        for path, value in documents.equality_fields(filter).items():
+            documents.set_field(seed, path, copy.deepcopy(value))
+        return seed
+
+    def _apply_update(self, filter, update, upsert:bool, multi:bool, now:datetime):
+        """
+        Apply an update inside a write; returns (raw result, [(old, new)]) where
+        raw result is the server's {"n", "nModified", "upserted"?}.
+        """
+        if not update:
+            raise ValueError("update cannot be empty")
+        matched, _ = self._matching(filter or {})
+        if not multi:
+            matched = matched[:1]
+        changes = []
+        modified = 0
+        for key, old in matched:
+            new = self._updated(old, update, False, now)
+            if new != old:
+                self._replace(key, old, new)
+                modified += 1
+            changes.append((old, new))
+        if matched or not upsert:
+            return {"n": len(matched), "nModified": modified}, changes
+        new = self._updated(self._upsert_seed(filter or {}), update, True, now)
+        self._insert(id_key(new["_id"]), new)
+        return {"n": 1, "nModified": 0, "upserted": new["_id"]}, [(None, new)]
+
+    def insert_one(self, document:Dict, **kwargs) -> InsertOneResult:
+        key, stored = self._new_document(document)
+        with self._write():
+            self._insert(key, stored)
+        return InsertOneResult(stored["_id"], True)
+
+    def insert_many(self, documents_:Iterable[Dict], ordered:bool = True, **kwargs) -> InsertManyResult:
+        documents_ = list(documents_)
+        for document in documents_:
+            document.setdefault("_id", ObjectId())
+        self.bulk_write([InsertOne(document) for document in documents_], ordered=ordered)
+        return InsertManyResult([document["_id"] for document in documents_], True)
+
+    def update_one(self, filter, update, upsert:bool = False, **kwargs) -> UpdateResult:
+        with self._write():
+            raw, _ = self._apply_update(filter, update, upsert, False, current_time())
+        return UpdateResult(raw, True)
+
+    def update_many(self, filter, update, upsert:bool = False, **kwargs) -> UpdateResult:
+        with self._write():
+            raw, _ = self._apply_update(filter, update, upsert, True, current_time())
+        return UpdateResult(raw, True)
+
+    def replace_one(self, filter, replacement, upsert:bool = False, **kwargs) -> UpdateResult:
+        if any(key.startswith("$") for key in replacement):
+            raise ValueError("replacement can not include $ operators")
+        return self.update_one(filter, replacement, upsert=upsert)
+
+    def find_one_and_update(self, filter, update, projection=None, sort=None, upsert:bool = False,
+                            return_document=ReturnDocument.BEFORE, **kwargs):
+        with self._write():
+            if sort:
+                matched, _ = self._matching(filter or {})
+                first = documents.sort_documents([document for _, document in matched], sort)[:1]
+                if first:
+                    filter = {"_id": first[0]["_id"]}
+            _, changes = self._apply_update(filter, update, upsert, False, current_time())
+        if not changes:
+            return None
+        old, new = changes[0]
+        document = new if return_document == ReturnDocument.AFTER else old
+        return None if document is None else documents.project(copy.deepcopy(document), projection)
+
+    def find_one_and_delete(self, filter, projection=None, **kwargs):
+        with self._write():
+            matched, _ = self._matching(filter or {})
+            if not matched:
+                return None
+            key, old = matched[0]
+            self._delete(key, old)
+        return documents.project(copy.deepcopy(old), projection)
+
+    def delete_one(self, filter, **kwargs) -> DeleteResult:
+        with self._write():
+            return DeleteResult({"n": self._apply_delete(filter, False)}, True)
+
+    def delete_many(self, filter, **kwargs) -> DeleteResult:
+        with self._write():
+            return DeleteResult({"n": self._apply_delete(filter, True)}, True)
+
+    def _apply_delete(self, filter, multi:bool) -> int:
+        matched, _ = self._matching(filter or {})
+        if not multi:
+            matched = matched[:1]
+        for key, old in matched:
+            self._delete(key, old)
+        return len(matched)
+
+    def bulk_write(self, requests:List, ordered:bool = True, **kwargs) -> BulkWriteResult:
+        """
+        Apply write operations in order under one write lock. Failed operations
+        are reported as BulkWriteError details in the server's format; in
+        ordered mode the first failure stops the rest.
+        """
+        result = {"writeErrors": [], "writeConcernErrors": [], "nInserted": 0, "nUpserted": 0,
+                  "nMatched": 0, "nModified": 0, "nRemoved": 0, "upserted": []}
+        now = current_time()
+        with self._write():
+            for index, request in enumerate(requests):
+                try:
+                    self._apply_request(request, index, result, now)
+                except (DuplicateKeyError, OperationFailure) as e:
+                    result["writeErrors"].append({"index": index, "code": e.code, "errmsg": str(e), "op": self._request_document(request)})
+                    if ordered:
+                        break
+        if result["writeErrors"]:
+            raise BulkWriteError(result)
+        return BulkWriteResult(result, True)
+
+    def _apply_request(self, request, index:int, result:Dict, now:datetime):
+        if isinstance(request, InsertOne):
+            key, stored = self._new_document(request._doc)
+            self._insert(key, stored)
+            result["nInserted"] += 1
+        elif isinstance(request, (UpdateOne, UpdateMany, ReplaceOne)):
+            raw, _ = self._apply_update(request._filter, request._doc, bool(request._upsert), isinstance(request, UpdateMany), now)
+            if "upserted" in raw:
+                result["nUpserted"] += 1
+                result["upserted"].append({"index": index, "_id": raw["upserted"]})
+            else:
+                result["nMatched"] += raw["n"]
+                result["nModified"] += raw["nModified"]
+        elif isinstance(request, (DeleteOne, DeleteMany)):
+            result["nRemoved"] += self._apply_delete(request._filter, isinstance(request, DeleteMany))
+        else:
+            raise TypeError(f"{request!r} is not a valid request")
+
+    @staticmethod
+    def _request_document(request) -> Dict:
+        if isinstance(request, InsertOne):
+            return request._doc
+        return {"q": request._filter, "u": getattr(request, "_doc", None)}
+
+    # Indexes
+
+    def create_index(self, keys, **kwargs) -> str:
+        keys = normalize_keys(keys)
+        name = kwargs.pop("name", None) or index_name(keys)
+        spec = {"key": keys, **kwargs}
+        with self._write():
+            self._create()
+            existing = self._index_specs()
+            if name in existing:
+                if existing[name]["key"] != keys:
+                    raise OperationFailure(f"An existing index has the same name as the requested index: {name}", 86)
+                return name
+            for other_name, other in existing.items():
+                if other["key"] == keys and bool(other.get("unique")) == bool(kwargs.get("unique")):
+                    return other_name
+            self._add_index(name, spec)
+        return name
+
+    def index_information(self) -> Dict[str, Dict]:
+        information = {"_id_": {"key": [("_id", 1)]}}
+        for name, spec in self._index_specs().items():
+            information[name] = dict(spec)
+        return information
+
+    # Helpers for indexed lookups
+
+    def equality_candidates(self, filter:Dict, fields:Iterable[str]) -> Iterator[Tuple[str, List]]:
+        """
+        Top-level fields of the filter, among fields, compared by equality or
+        $in against strings and numbers: (field, values) in the filter's order.
+        """
+        fields = set(fields)
+        for field, condition in filter.items():
+            if field not in fields:
+                continue
+            if isinstance(condition, dict) and set(condition) == {"$in"}:
+                values = condition["$in"]
+            elif isinstance(condition, dict) and set(condition) == {"$eq"}:
+                values = [condition["$eq"]]
+            elif isinstance(condition, dict):
+                continue
+            else:
+                values = [condition]
+            if isinstance(values, list) and values and all(indexable(value) for value in values):
+                yield field, values
+
+def indexable(value) -> bool:
+    return isinstance(value, str) or (isinstance(value, (int, float)) and not isinstance(value, bool))
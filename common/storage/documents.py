@@ -0,0 +1,763 @@
+"""
+Pure-Python implementation of the MongoDB query, update and aggregation
+semantics the domain clients rely on, shared by the non-Mongo storage
+backends so they behave identically. Documents are plain dicts in BSON
+form (see normalize); operators outside the supported subset raise
+OperationFailure rather than being silently ignored.
+"""
+import copy
+import math
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List
+import bson
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+
+MISSING = object()
+
+def unsupported(kind:str, name:str):
+    return OperationFailure(f"Unsupported {kind} {name} for this storage backend", code=2)
+
+def normalize(document:Dict) -> Dict:
+    """
+    Round-trip a document through BSON, as the server would: datetimes become
+    naive UTC with millisecond precision, tuples become lists, and values BSON
+    cannot store are rejected. Also returns an independent copy.
+    """
+    return bson.decode(bson.encode(document))
+
+def split_path(path:str) -> List[str]:
+    return path.split(".")
+
+# Reading values
+
+def query_values(value, parts:List[str]) -> List:
+    """
+    Values a query path refers to. Arrays along the path are traversed, so a
+    path can match any element, and a numeric part can also index an array.
+    """
+    if not parts:
+        return [value]
+    head, rest = parts[0], parts[1:]
+    if isinstance(value, dict):
+        return query_values(value[head], rest) if head in value else []
+    if isinstance(value, list):
+        values = []
+        if head.isdigit() and int(head) < len(value):
+            values.extend(query_values(value[int(head)], rest))
+        for item in value:
+            if isinstance(item, dict):
+                values.extend(query_values(item, parts))
+        return values
+    return []
+
+def expression_value(value, parts:List[str]):
+    """Value of a "$field.path" expression: arrays along the path map to arrays of values."""
+    for index, part in enumerate(parts):
+        if isinstance(value, dict):
+            value = value.get(part, MISSING)
+        elif isinstance(value, list):
+            mapped = [expression_value(item, parts[index:]) for item in value if isinstance(item, dict)]
+            return [item for item in mapped if item is not MISSING]
+        else:
+            return MISSING
+        if value is MISSING:
+            return MISSING
+    return value
+
+def get_field(document:Dict, path:str):
+    return expression_value(document, split_path(path))
+
+def set_field(document:Dict, path:str, value):
+    parts = split_path(path)
+    target = document
+    for part in parts[:-1]:
+        if isinstance(target, list) and part.isdigit():
+            index = int(part)
+            while len(target) <= index:
+                target.append(None)
+            if not isinstance(target[index], (dict, list)):
+                target[index] = {}
+            target = target[index]
+            continue
+        if not isinstance(target, dict):
+            raise OperationFailure(f"Cannot create field '{part}' in element {target!r}", code=28)
+        if not isinstance(target.get(part), (dict, list)):
+            target[part] = {}
+        target = target[part]
+    last = parts[-1]
+    if isinstance(target, list) and last.isdigit():
+        index = int(last)
+        while len(target) <= index:
+            target.append(None)
+        target[index] = value
+    elif isinstance(target, dict):
+        target[last] = value
+    else:
+        raise OperationFailure(f"Cannot create field '{last}' in element {target!r}", code=28)
+
+def unset_field(document:Dict, path:str):
+    parts = split_path(path)
+    target = document
+    for part in parts[:-1]:
+        if isinstance(target, dict):
+            target = target.get(part)
+        elif isinstance(target, list) and part.isdigit() and int(part) < len(target):
+            target = target[int(part)]
+        else:
+            return
+    if isinstance(target, dict):
+        target.pop(parts[-1], None)
+    elif isinstance(target, list) and parts[-1].isdigit() and int(parts[-1]) < len(target):
+        target[int(parts[-1])] = None
+
+# Comparison, in BSON type order
+
+_TYPE_ORDER = {type(None): 1, int: 2, float: 2, str: 3, dict: 4, list: 5, bytes: 6, ObjectId: 7, bool: 8, datetime: 9}
+
+def type_rank(value) -> int:
+    if value is MISSING:
+        return 0
+    return _TYPE_ORDER.get(type(value), 10)
+
+def sort_key(value):
+    rank = type_rank(value)
+    if rank in (0, 1):
+        return (rank, 0)
+    if isinstance(value, dict):
+        return (rank, [(key, sort_key(item)) for key, item in value.items()])
+    if isinstance(value, list):
+        return (rank, [sort_key(item) for item in value])
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (rank, value)
+
+def compare(left, right) -> int:
+    left, right = sort_key(left), sort_key(right)
+    return (left > right) - (left < right)
+
+def values_equal(left, right) -> bool:
+    if type_rank(left) != type_rank(right):
+        return False
+    return compare(left, right) == 0
+
+# Queries
+
+_BSON_TYPES = {
+    "double": (float,), "string": (str,), "object": (dict,), "array": (list,), "objectId": (ObjectId,),
+    "bool": (bool,), "date": (datetime,), "null": (type(None),), "int": (int,), "long": (int,),
+    "number": (int, float),
+}
+
+def _type_matches(value, name) -> bool:
+    if isinstance(name, list):
+        return any(_type_matches(value, item) for item in name)
+    types = _BSON_TYPES.get(name)
+    if types is None:
+        raise unsupported("$type", repr(name))
+    if isinstance(value, bool) and bool not in types:
+        return False
+    return isinstance(value, types)
+
+def _candidates(values:List) -> List:
+    """Values plus the elements of array values, which equality and comparisons also match."""
+    expanded = []
+    for value in values:
+        expanded.append(value)
+        if isinstance(value, list):
+            expanded.extend(value)
+    return expanded
+
+def _equals_any(values:List, target) -> bool:
+    if target is None and not values:
+        return True
+    return any(values_equal(value, target) for value in _candidates(values))
+
+def _compare_any(values:List, target, accept) -> bool:
+    return any(
+        type_rank(value) == type_rank(target) and accept(compare(value, target))
+        for value in _candidates(values)
+    )
+
+def _operator_matches(values:List, operator:str, argument, document_options:Dict) -> bool:
+    if operator == "$eq":
+        return _equals_any(values, argument)
+    if operator == "$ne":
+        return not _equals_any(values, argument)
+    if operator == "$gt":
+        return _compare_any(values, argument, lambda result: result > 0)
+    if operator == "$gte":
+        return _compare_any(values, argument, lambda result: result >= 0)
+    if operator == "$lt":
+        return _compare_any(values, argument, lambda result: result < 0)
+    if operator == "$lte":
+        return _compare_any(values, argument, lambda result: result <= 0)
+    if operator == "$in":
+        return any(
+            _regex_matches(values, item) if isinstance(item, re.Pattern) else _equals_any(values, item)
+            for item in argument
+        )
+    if operator == "$nin":
+        return not _operator_matches(values, "$in", argument, document_options)
+    if operator == "$exists":
+        return bool(values) == bool(argument)
+    if operator == "$type":
+        return any(_type_matches(value, argument) for value in _candidates(values))
+    if operator == "$size":
+        return any(isinstance(value, list) and len(value) == argument for value in values)
+    if operator == "$all":
+        return all(_equals_any(values, item) for item in argument)
+    if operator == "$mod":
+        divisor, remainder = argument
+        return any(isinstance(value, (int, float)) and not isinstance(value, bool) and value % divisor == remainder
+                   for value in _candidates(values))
+    if operator == "$regex":
+        pattern = argument
+        if not isinstance(pattern, re.Pattern):
+            pattern = re.compile(pattern, _regex_flags(document_options.get("$options", "")))
+        return _regex_matches(values, pattern)
+    if operator == "$options":
+        return True
+    if operator == "$not":
+        return not condition_matches(values, argument)
+    if operator == "$elemMatch":
+        return any(isinstance(value, list) and any(_element_matches(item, argument) for item in value) for value in values)
+    raise unsupported("query operator", operator)
+
+def _regex_flags(options:str) -> int:
+    flags = 0
+    for option in options:
+        flags |= {"i": re.IGNORECASE, "m": re.MULTILINE, "s": re.DOTALL, "x": re.VERBOSE}.get(option, 0)
+    return flags
+
+def _regex_matches(values:List, pattern) -> bool:
+    return any(isinstance(value, str) and pattern.search(value) for value in _candidates(values))
+
+def _is_operator_document(value) -> bool:
+    return isinstance(value, dict) and bool(value) and all(key.startswith("$") for key in value)
+
+def _element_matches(element, condition:Dict) -> bool:
+    if _is_operator_document(condition):
+        return condition_matches([element], condition)
+    return isinstance(element, dict) and matches(element, condition)
+
+def condition_matches(values:List, condition) -> bool:
+    """Whether the values at a path satisfy a field condition (a value or an operator document)."""
+    if isinstance(condition, re.Pattern):
+        return _regex_matches(values, condition)
+    if _is_operator_document(condition):
+        return all(_operator_matches(values, operator, argument, condition) for operator, argument in condition.items())
+    return _equals_any(values, condition)
+
+def matches(document:Dict, query:Dict) -> bool:
+    for key, condition in (query or {}).items():
+        if key == "$and":
+            if not all(matches(document, item) for item in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(document, item) for item in condition):
+                return False
+        elif key == "$nor":
+            if any(matches(document, item) for item in condition):
+                return False
+        elif key == "$expr":
+            if not truthy(evaluate(condition, document)):
+                return False
+        elif key.startswith("$"):
+            raise unsupported("query operator", key)
+        elif not condition_matches(query_values(document, split_path(key)), condition):
+            return False
+    return True
+
+def equality_fields(query:Dict) -> Dict:
+    """Fields an upsert copies from its filter into the inserted document."""
+    fields = {}
+    for key, condition in (query or {}).items():
+        if key == "$and":
+            for item in condition:
+                fields.update(equality_fields(item))
+        elif key.startswith("$"):
+            continue
+        elif _is_operator_document(condition):
+            if "$eq" in condition:
+                fields[key] = condition["$eq"]
+        elif not isinstance(condition, re.Pattern):
+            fields[key] = condition
+    return fields
+
+# Projection and sorting
+
+def project(document:Dict, projection) -> Dict:
+    if not projection:
+        return document
+    if isinstance(projection, (list, tuple)):
+        projection = {field: 1 for field in projection}
+    include_id = projection.get("_id", 1)
+    fields = {key: value for key, value in projection.items() if key != "_id"}
+    if any(not isinstance(value, (bool, int)) for value in fields.values()):
+        raise unsupported("find projection", "expression")
+    if fields and any(fields.values()):
+        result = {}
+        for path in fields:
+            _copy_path(document, result, split_path(path))
+    else:
+        result = copy.deepcopy(document)
+        for path in fields:
+            unset_field(result, path)
+    if include_id and "_id" in document:
+        result = {"_id": document["_id"], **{key: value for key, value in result.items() if key != "_id"}}
+    elif not include_id:
+        result.pop("_id", None)
+    return result
+
+def _copy_path(source, target:Dict, parts:List[str]):
+    head, rest = parts[0], parts[1:]
+    if not isinstance(source, dict) or head not in source:
+        return
+    value = source[head]
+    if not rest:
+        target[head] = copy.deepcopy(value)
+    elif isinstance(value, dict):
+        _copy_path(value, target.setdefault(head, {}), rest)
+    elif isinstance(value, list):
+        items = target.setdefault(head, [])
+        for item in value:
+            if isinstance(item, dict):
+                projected = {}
+                _copy_path(item, projected, rest)
+                items.append(projected)
+
+def sort_documents(documents:List[Dict], sort) -> List[Dict]:
+    if not sort:
+        return documents
+    if isinstance(sort, dict):
+        sort = list(sort.items())
+    # Stable sorts applied from the last key to the first give a multi-key sort
+    for field, direction in reversed(sort):
+        documents.sort(key=lambda document: sort_key(_sort_value(document, field, direction)), reverse=direction < 0)
+    return documents
+
+def _sort_value(document:Dict, field:str, direction:int):
+    values = query_values(document, split_path(field))
+    if not values:
+        return None
+    candidates = _candidates(values) if isinstance(values[0], list) and values[0] else values
+    candidates = [value for value in candidates if not isinstance(value, list)] or values
+    # Ascending sorts use the smallest array element, descending the largest
+    return min(candidates, key=sort_key) if direction > 0 else max(candidates, key=sort_key)
+
+# Operator updates
+
+def apply_update(document:Dict, update:Dict, inserting:bool, now:datetime) -> Dict:
+    for operator, fields in update.items():
+        if operator == "$set":
+            for path, value in fields.items():
+                set_field(document, path, copy.deepcopy(value))
+        elif operator == "$setOnInsert":
+            if inserting:
+                for path, value in fields.items():
+                    set_field(document, path, copy.deepcopy(value))
+        elif operator == "$unset":
+            for path in fields:
+                unset_field(document, path)
+        elif operator == "$inc":
+            for path, amount in fields.items():
+                current = get_field(document, path)
+                set_field(document, path, (0 if current in (MISSING, None) else current) + amount)
+        elif operator == "$mul":
+            for path, amount in fields.items():
+                current = get_field(document, path)
+                set_field(document, path, (0 if current in (MISSING, None) else current) * amount)
+        elif operator in ("$min", "$max"):
+            for path, value in fields.items():
+                current = get_field(document, path)
+                better = compare(value, current) < 0 if operator == "$min" else compare(value, current) > 0
+                if current is MISSING or better:
+                    set_field(document, path, copy.deepcopy(value))
+        elif operator == "$currentDate":
+            for path in fields:
+                set_field(document, path, now)
+        elif operator in ("$push", "$addToSet"):
+            for path, value in fields.items():
+                current = get_field(document, path)
+                if current is MISSING or current is None:
+                    current = []
+                    set_field(document, path, current)
+                elif not isinstance(current, list):
+                    raise OperationFailure(f"The field '{path}' must be an array", code=2)
+                items = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+                for item in items:
+                    if operator == "$push" or not any(values_equal(existing, item) for existing in current):
+                        current.append(copy.deepcopy(item))
+        elif operator == "$pull":
+            for path, condition in fields.items():
+                current = get_field(document, path)
+                if isinstance(current, list):
+                    current[:] = [item for item in current if not _element_matches(item, condition) and not (
+                        not isinstance(condition, dict) and values_equal(item, condition))]
+        else:
+            raise unsupported("update operator", operator)
+    return document
+
+# Aggregation expressions
+
+def truthy(value) -> bool:
+    return value not in (MISSING, None, False, 0) and not (isinstance(value, float) and value == 0.0)
+
+def _number(value):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+def evaluate(expression, document:Dict, variables:Dict = None):
+    variables = variables or {}
+    if isinstance(expression, str):
+        if expression.startswith("$$"):
+            name, _, path = expression[2:].partition(".")
+            if name == "ROOT" or name == "CURRENT":
+                value = variables.get("ROOT", document) if name == "ROOT" else document
+            elif name in variables:
+                value = variables[name]
+            else:
+                raise unsupported("variable", f"$${name}")
+            return expression_value(value, split_path(path)) if path else value
+        if expression.startswith("$"):
+            return expression_value(document, split_path(expression[1:]))
+        return expression
+    if isinstance(expression, list):
+        return [_present(evaluate(item, document, variables)) for item in expression]
+    if isinstance(expression, dict):
+        if len(expression) == 1:
+            operator, argument = next(iter(expression.items()))
+            if operator.startswith("$"):
+                return _evaluate_operator(operator, argument, document, variables)
+        result = {}
+        for key, value in expression.items():
+            value = evaluate(value, document, variables)
+            if value is not MISSING:
+                result[key] = value
+        return result
+    return expression
+
+def _present(value):
+    return None if value is MISSING else value
+
+def _arguments(argument, document, variables) -> List:
+    if isinstance(argument, list):
+        return [evaluate(item, document, variables) for item in argument]
+    return [evaluate(argument, document, variables)]
+
+def _evaluate_operator(operator:str, argument, document:Dict, variables:Dict):
+    if operator == "$literal":
+        return copy.deepcopy(argument)
+    if operator == "$ifNull":
+        values = _arguments(argument, document, variables)
+        for value in values[:-1]:
+            if value is not MISSING and value is not None:
+                return value
+        return _present(values[-1])
+    if operator == "$cond":
+        if isinstance(argument, dict):
+            condition, then, otherwise = argument["if"], argument["then"], argument["else"]
+        else:
+            condition, then, otherwise = argument
+        branch = then if truthy(evaluate(condition, document, variables)) else otherwise
+        return evaluate(branch, document, variables)
+    if operator == "$switch":
+        for branch in argument["branches"]:
+            if truthy(evaluate(branch["case"], document, variables)):
+                return evaluate(branch["then"], document, variables)
+        if "default" not in argument:
+            raise OperationFailure("$switch could not find a matching branch for an input, and no default was specified", code=40066)
+        return evaluate(argument["default"], document, variables)
+    if operator == "$filter":
+        items = evaluate(argument["input"], document, variables)
+        if items in (MISSING, None):
+            return None
+        name = argument.get("as", "this")
+        return [item for item in items if truthy(evaluate(argument["cond"], document, {**variables, name: item}))]
+    if operator == "$map":
+        items = evaluate(argument["input"], document, variables)
+        if items in (MISSING, None):
+            return None
+        name = argument.get("as", "this")
+        return [_present(evaluate(argument["in"], document, {**variables, name: item})) for item in items]
+
+    values = _arguments(argument, document, variables)
+    if operator in ("$and", "$or"):
+        results = [truthy(value) for value in values]
+        return all(results) if operator == "$and" else any(results)
+    if operator == "$not":
+        return not truthy(values[0])
+    if operator in ("$eq", "$ne", "$gt", "$gte", "$lt", "$lte", "$cmp"):
+        left, right = (None if value is MISSING else value for value in values)
+        result = compare(left, right)
+        return {
+            "$eq": result == 0, "$ne": result != 0, "$gt": result > 0, "$gte": result >= 0,
+            "$lt": result < 0, "$lte": result <= 0, "$cmp": result,
+        }[operator]
+    if operator == "$in":
+        value, items = values
+        if not isinstance(items, list):
+            raise OperationFailure("$in requires an array as a second argument", code=40081)
+        return any(values_equal(_present(value), item) for item in items)
+    if operator == "$size":
+        if not isinstance(values[0], list):
+            raise OperationFailure("The argument to $size must be an array", code=17124)
+        return len(values[0])
+    if operator == "$concatArrays":
+        if any(value in (MISSING, None) for value in values):
+            return None
+        return [item for value in values for item in value]
+    if operator == "$mergeObjects":
+        merged = {}
+        for value in values:
+            if isinstance(value, dict):
+                merged.update(value)
+        return merged
+    if operator == "$arrayElemAt":
+        items, index = values
+        if not isinstance(items, list):
+            return None
+        return items[index] if -len(items) <= index < len(items) else MISSING
+    if operator in ("$sum", "$avg", "$min", "$max") and len(values) == 1 and isinstance(values[0], list):
+        values = values[0]
+    if operator == "$sum":
+        return sum(number for number in (_number(value) for value in values) if number is not None)
+    if operator == "$avg":
+        numbers = [number for number in (_number(value) for value in values) if number is not None]
+        return sum(numbers) / len(numbers) if numbers else None
+    if operator in ("$min", "$max"):
+        present = [value for value in values if value not in (MISSING, None)]
+        if not present:
+            return None
+        return min(present, key=sort_key) if operator == "$min" else max(present, key=sort_key)
+    if operator in ("$add", "$subtract", "$multiply", "$divide", "$mod"):
+        return _arithmetic(operator, values)
+    if operator in ("$trunc", "$floor", "$ceil", "$abs"):
+        value = _number(values[0])
+        if value is None:
+            return None
+        return {"$trunc": math.trunc, "$floor": math.floor, "$ceil": math.ceil, "$abs": abs}[operator](value)
+    if operator == "$toInt":
+        value = values[0]
+        if value in (MISSING, None):
+            return None
+        return int(value)
+    if operator == "$toString":
+        value = values[0]
+        return None if value in (MISSING, None) else str(value)
+    raise unsupported("expression operator", operator)
+
+def _arithmetic(operator:str, values:List):
+    if any(value in (MISSING, None) for value in values):
+        return None
+    if operator == "$add":
+        dates = [value for value in values if isinstance(value, datetime)]
+        total = sum(value for value in values if not isinstance(value, datetime))
+        if dates:
+            return dates[0] + timedelta(milliseconds=total)
+        return total
+    left, right = values
+    if operator == "$subtract":
+        if isinstance(left, datetime) and isinstance(right, datetime):
+            return int((left - right).total_seconds() * 1000)
+        return left - right
+    if operator == "$multiply":
+        result = 1
+        for value in values:
+            result *= value
+        return result
+    if right == 0:
+        raise OperationFailure(f"can't {operator[1:]} by zero", code=2)
+    if operator == "$divide":
+        return left / right
+    return left % right if isinstance(left, int) and isinstance(right, int) else math.fmod(left, right)
+
+# Pipeline updates and aggregation
+
+def _set_stage(document:Dict, fields:Dict, variables:Dict) -> Dict:
+    result = copy.deepcopy(document)
+    for path, expression in fields.items():
+        value = evaluate(expression, document, variables)
+        if value is MISSING:
+            unset_field(result, path)
+        else:
+            set_field(result, path, value)
+    return result
+
+def _project_stage(document:Dict, projection:Dict, variables:Dict) -> Dict:
+    include_id = projection.get("_id", 1)
+    fields = {key: value for key, value in projection.items() if key != "_id"}
+    is_flag = lambda value: isinstance(value, (bool, int)) and not isinstance(value, float)
+    if fields and all(is_flag(value) and not value for value in fields.values()):
+        result = copy.deepcopy(document)
+        for path in fields:
+            unset_field(result, path)
+        if not include_id:
+            result.pop("_id", None)
+        return result
+    result = {}
+    if include_id is True or include_id == 1:
+        if "_id" in document:
+            result["_id"] = document["_id"]
+    elif not is_flag(include_id):
+        result["_id"] = evaluate(include_id, document, variables)
+    for path, value in fields.items():
+        if is_flag(value):
+            if value:
+                _copy_path(document, result, split_path(path))
+        else:
+            computed = evaluate(value, document, variables)
+            if computed is not MISSING:
+                set_field(result, path, computed)
+    return result
+
+def _unset_stage(document:Dict, fields) -> Dict:
+    result = copy.deepcopy(document)
+    for path in [fields] if isinstance(fields, str) else fields:
+        unset_field(result, path)
+    return result
+
+def _replace_stage(document:Dict, expression, variables:Dict) -> Dict:
+    replacement = evaluate(expression, document, variables)
+    if not isinstance(replacement, dict):
+        raise OperationFailure("'replacement document' must evaluate to an object", code=40228)
+    return replacement
+
+def apply_pipeline_update(document:Dict, pipeline:List[Dict], now:datetime) -> Dict:
+    variables = {"NOW": now, "ROOT": document}
+    for stage in pipeline:
+        (name, argument), = stage.items()
+        if name in ("$set", "$addFields"):
+            document = _set_stage(document, argument, variables)
+        elif name == "$unset":
+            document = _unset_stage(document, argument)
+        elif name == "$project":
+            document = _project_stage(document, argument, variables)
+        elif name in ("$replaceWith", "$replaceRoot"):
+            document = _replace_stage(document, argument["newRoot"] if name == "$replaceRoot" else argument, variables)
+        else:
+            raise unsupported("update pipeline stage", name)
+        variables["ROOT"] = document
+    return document
+
+_ACCUMULATORS = ("$sum", "$avg", "$min", "$max", "$push", "$addToSet", "$first", "$last", "$count")
+
+def _group(documents:Iterable[Dict], specification:Dict, variables:Dict) -> List[Dict]:
+    groups = {}
+    for document in documents:
+        key = _present(evaluate(specification["_id"], document, variables))
+        bucket = groups.setdefault(repr(sort_key(key)), {"_id": key, "__values": {}})
+        for field, accumulator in specification.items():
+            if field == "_id":
+                continue
+            (operator, expression), = accumulator.items()
+            if operator not in _ACCUMULATORS:
+                raise unsupported("accumulator", operator)
+            value = 1 if operator == "$count" else evaluate(expression, document, variables)
+            bucket["__values"].setdefault(field, (operator, []))[1].append(value)
+    results = []
+    for bucket in groups.values():
+        result = {"_id": bucket["_id"]}
+        for field, (operator, values) in bucket.pop("__values").items():
+            present = [value for value in values if value is not MISSING]
+            if operator in ("$sum", "$count"):
+                result[field] = sum(number for number in map(_number, present) if number is not None)
+            elif operator == "$avg":
+                numbers = [number for number in map(_number, present) if number is not None]
+                result[field] = sum(numbers) / len(numbers) if numbers else None
+            elif operator in ("$min", "$max"):
+                candidates = [value for value in present if value is not None]
+                result[field] = (min if operator == "$min" else max)(candidates, key=sort_key) if candidates else None
+            elif operator == "$push":
+                result[field] = present
+            elif operator == "$addToSet":
+                unique = []
+                for value in present:
+                    if not any(values_equal(value, existing) for existing in unique):
+                        unique.append(value)
+                result[field] = unique
+            elif operator == "$first":
+                result[field] = _present(values[0]) if values else None
+            else:
+                result[field] = _present(values[-1]) if values else None
+        results.append(result)
+    return results
+
+def _unwind(documents:Iterable[Dict], argument) -> Iterator[Dict]:
+    if isinstance(argument, str):
+        argument = {"path": argument}
+    path = argument["path"][1:]
+    preserve = argument.get("preserveNullAndEmptyArrays", False)
+    for document in documents:
+        value = get_field(document, path)
+        if isinstance(value, list) and value:
+            for item in value:
+                unwound = copy.deepcopy(document)
+                set_field(unwound, path, item)
+                yield unwound
+        elif isinstance(value, list) or value in (MISSING, None):
+            if preserve:
+                unwound = copy.deepcopy(document)
+                if isinstance(value, list):
+                    unset_field(unwound, path)
+                yield unwound
+        else:
+            yield document
+
+def _lookup(documents:Iterable[Dict], specification:Dict, database) -> Iterator[Dict]:
+    """
+    $lookup joining on localField and foreignField, with an optional pipeline
+    run on each document's matches; the forms with let are not supported.
+    """
+    if "let" in specification or "localField" not in specification:
+        raise unsupported("aggregation stage", "$lookup without localField")
+    foreign = database[specification["from"]]
+    pipeline = list(specification.get("pipeline") or [])
+    for document in documents:
+        local = get_field(document, specification["localField"])
+        local = None if local is MISSING else local
+        match = {specification["foreignField"]: {"$in": local} if isinstance(local, list) else local}
+        # Merged into the pipeline's own leading $match, so the foreign collection can use one index for both
+        if pipeline and "$match" in pipeline[0]:
+            match = {"$and": [match, pipeline[0]["$match"]]} if specification["foreignField"] in pipeline[0]["$match"] else {**match, **pipeline[0]["$match"]}
+            stages = pipeline[1:]
+        else:
+            stages = pipeline
+        set_field(document, specification["as"], list(foreign.aggregate([{"$match": match}, *stages])))
+        yield document
+
+def aggregate(documents:Iterable[Dict], pipeline:List[Dict], now:datetime, database = None) -> List[Dict]:
+    """Run a pipeline; database resolves the collections $lookup joins."""
+    variables = {"NOW": now}
+    documents = list(documents)
+    for stage in pipeline:
+        (name, argument), = stage.items()
+        if name == "$match":
+            documents = [document for document in documents if matches(document, argument)]
+        elif name in ("$set", "$addFields"):
+            documents = [_set_stage(document, argument, variables) for document in documents]
+        elif name == "$project":
+            documents = [_project_stage(document, argument, variables) for document in documents]
+        elif name == "$unset":
+            documents = [_unset_stage(document, argument) for document in documents]
+        elif name in ("$replaceWith", "$replaceRoot"):
+            expression = argument["newRoot"] if name == "$replaceRoot" else argument
+            documents = [_replace_stage(document, expression, variables) for document in documents]
+        elif name == "$sort":
+            documents = sort_documents(documents, argument)
+        elif name == "$skip":
+            documents = documents[argument:]
+        elif name == "$limit":
+            documents = documents[:argument]
+        elif name == "$count":
+            documents = [{argument: len(documents)}] if documents else []
+        elif name == "$group":
+            documents = _group(documents, argument, variables)
+        elif name == "$unwind":
+            documents = list(_unwind(documents, argument))
+        elif name == "$lookup" and database is not None:
+            documents = list(_lookup(documents, argument, database))
+        else:
+            raise unsupported("aggregation stage", name)
+    return documents
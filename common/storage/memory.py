@@ -0,0 +1,250 @@
+"""
+In-process storage backend for tests, benchmarks and load tests. Documents
+live in dicts for the life of the process; nothing is persisted.
+
+Transactions hold a storage-wide lock that every read and write also takes,
+so other threads neither see a transaction's writes before it ends nor write
+in the middle of it, and keep an undo log of the documents they replace so a
+failed one is rolled back. Index changes are not undone.
+"""
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Set
+from bson import ObjectId
+from common.storage import documents
+from common.storage.base import DocumentCollection, DocumentDatabase, StorageBackend, id_key, indexable
+
+def hash_key(value):
+    """Hashable form of a value under which values the server considers equal collide."""
+    if isinstance(value, bool):
+        return ("b", value)
+    if isinstance(value, (int, float)):
+        return ("n", float(value))
+    if isinstance(value, str):
+        return ("s", value)
+    if value is None or value is documents.MISSING:
+        return ("z",)
+    if isinstance(value, datetime):
+        return ("d", documents.sort_key(value))
+    if isinstance(value, ObjectId):
+        return ("o", str(value))
+    if isinstance(value, dict):
+        return ("m", tuple((key, hash_key(item)) for key, item in value.items()))
+    if isinstance(value, list):
+        return ("a", tuple(hash_key(item) for item in value))
+    return ("x", repr(value))
+
+class MemoryCollection(DocumentCollection):
+    """
+    Documents by _id key, with a hash index on every top-level indexed field
+    (holding each string or number value, and each such element of arrays) to
+    narrow equality and $in lookups, and a map per unique index to enforce it.
+    """
+    def __init__(self, database, name:str):
+        super().__init__(database, name)
+        self._lock = threading.RLock()
+        self._documents = {}
+        self._indexes = {}
+        self._unique = {}
+        self._postings = {}
+        self._exists = False
+
+    # Reads
+
+    def _select(self, filter:Dict):
+        with self.database.backend._transaction_lock, self._lock:
+            keys = self._id_keys(filter)
+            index = "_id_" if keys is not None else None
+            if keys is None:
+                for field, values in self.equality_candidates(filter, self._postings):
+                    postings = self._postings[field]
+                    found = set()
+                    for value in values:
+                        found.update(postings.get(hash_key(value), ()))
+                    if keys is None or len(found) < len(keys):
+                        keys, index = found, self._index_on(field)
+            if keys is None:
+                return list(self._documents.items()), {"index": None}
+            return [(key, self._documents[key]) for key in keys if key in self._documents], {"index": index}
+
+    @staticmethod
+    def _id_keys(filter:Dict):
+        if "_id" not in filter:
+            return None
+        condition = filter["_id"]
+        if isinstance(condition, dict) and set(condition) == {"$in"}:
+            return {id_key(value) for value in condition["$in"]}
+        if isinstance(condition, dict) and set(condition) == {"$eq"}:
+            return {id_key(condition["$eq"])}
+        if isinstance(condition, dict) and any(key.startswith("$") for key in condition):
+            return None
+        return {id_key(condition)}
+
+    def _index_on(self, field:str) -> str:
+        for name, spec in self._indexes.items():
+            if spec["key"][0][0] == field:
+                return name
+        return next(name for name, spec in self._indexes.items() if any(key == field for key, _ in spec["key"]))
+
+    # Writes
+
+    @contextmanager
+    def _write(self):
+        with self.database.backend._transaction_lock, self._lock:
+            yield
+
+    def _insert(self, key:str, document:Dict):
+        if key in self._documents:
+            raise self.duplicate_key_error("_id_", {"_id": document["_id"]})
+        self._check_unique(key, document)
+        self._documents[key] = document
+        self._exists = True
+        self._index(key, document)
+        self.database.backend.record_undo(self, key, None)
+
+    def _replace(self, key:str, old:Dict, new:Dict):
+        self._check_unique(key, new)
+        self._unindex(key, old)
+        self._documents[key] = new
+        self._index(key, new)
+        self.database.backend.record_undo(self, key, old)
+
+    def _delete(self, key:str, old:Dict):
+        self._unindex(key, old)
+        del self._documents[key]
+        self.database.backend.record_undo(self, key, old)
+
+    def _restore(self, key:str, old:Dict):
+        """Put back the document a rolled back write replaced, or remove the one it inserted."""
+        with self._lock:
+            current = self._documents.pop(key, None)
+            if current is not None:
+                self._unindex(key, current)
+            if old is not None:
+                self._documents[key] = old
+                self._index(key, old)
+
+    def _check_unique(self, key:str, document:Dict):
+        for name, spec in self._indexes.items():
+            if not spec.get("unique"):
+                continue
+            values = self.unique_key(spec, document)
+            if values is None:
+                continue
+            owner = self._unique[name].get(hash_key(list(values.values())))
+            if owner is not None and owner != key:
+                raise self.duplicate_key_error(name, values)
+
+    def _index(self, key:str, document:Dict):
+        for name, spec in self._indexes.items():
+            if spec.get("unique"):
+                values = self.unique_key(spec, document)
+                if values is not None:
+                    self._unique[name][hash_key(list(values.values()))] = key
+        for field, postings in self._postings.items():
+            for value in self._posting_values(document, field):
+                postings.setdefault(value, set()).add(key)
+
+    def _unindex(self, key:str, document:Dict):
+        for name, spec in self._indexes.items():
+            if spec.get("unique"):
+                values = self.unique_key(spec, document)
+                if values is not None and self._unique[name].get(hash_key(list(values.values()))) == key:
+                    del self._unique[name][hash_key(list(values.values()))]
+        for field, postings in self._postings.items():
+            for value in self._posting_values(document, field):
+                keys = postings.get(value)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del postings[value]
+
+    @staticmethod
+    def _posting_values(document:Dict, field:str) -> Set:
+        value = document.get(field)
+        values = value if isinstance(value, list) else [value]
+        return {hash_key(item) for item in values if indexable(item)}
+
+    # Indexes and lifecycle
+
+    def _index_specs(self) -> Dict[str, Dict]:
+        return dict(self._indexes)
+
+    def _add_index(self, name:str, spec:Dict):
+        if spec.get("unique"):
+            seen = {}
+            for key, document in self._documents.items():
+                values = self.unique_key(spec, document)
+                if values is None:
+                    continue
+                if hash_key(list(values.values())) in seen:
+                    raise self.duplicate_key_error(name, values)
+                seen[hash_key(list(values.values()))] = key
+            self._unique[name] = seen
+        self._indexes[name] = spec
+        for field, _ in spec["key"]:
+            if "." in field or field.startswith("$") or field in self._postings:
+                continue
+            postings = self._postings[field] = {}
+            for key, document in self._documents.items():
+                for value in self._posting_values(document, field):
+                    postings.setdefault(value, set()).add(key)
+
+    def _create(self):
+        self._exists = True
+
+    def drop(self):
+        with self._lock:
+            self._documents = {}
+            self._indexes = {}
+            self._unique = {}
+            self._postings = {}
+            self._exists = False
+
+class MemoryDatabase(DocumentDatabase):
+    collection_class = MemoryCollection
+
+class MemoryStorage(StorageBackend):
+    name = "memory"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Held by a transaction for its whole run and by every read and write for theirs
+        self._transaction_lock = threading.RLock()
+        self._local = threading.local()
+        self._databases = {}
+
+    def supports_transactions(self) -> bool:
+        return True
+
+    def run_in_transaction(self, callback):
+        with self._transaction_lock:
+            if getattr(self._local, "undo", None) is not None:
+                # Nested in a transaction already in progress on this thread
+                return callback()
+            self._local.undo = undo = []
+            try:
+                return callback()
+            except BaseException:
+                for collection, key, old in reversed(undo):
+                    collection._restore(key, old)
+                raise
+            finally:
+                self._local.undo = None
+
+    def record_undo(self, collection:MemoryCollection, key:str, old:Dict):
+        """Remember the document a write in this thread's transaction replaced (None if it inserted one)."""
+        undo = getattr(self._local, "undo", None)
+        if undo is not None:
+            undo.append((collection, key, old))
+
+    def database(self, name:str) -> MemoryDatabase:
+        with self._lock:
+            database = self._databases.get(name)
+            if database is None:
+                database = self._databases[name] = MemoryDatabase(self, name)
+            return database
+
+    def list_collections(self, database:str) -> List[str]:
+        return sorted(name for name, collection in self.database(database)._collections.items() if collection._exists)
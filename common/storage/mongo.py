@@ -0,0 +1,81 @@
+import logging
+import threading
+from django.conf import settings
+import pymongo
+from pymongo import MongoClient, errors
+from common.storage.base import StorageBackend
+
+logger = logging.getLogger(__name__)
+
+class MongoStorage(StorageBackend):
+    """The default backend: databases are pymongo Databases on one pooled MongoClient."""
+    name = "mongo"
+
+    def __init__(self, uri:str = None):
+        try:
+            # Initialize the MongoDB client with connection pooling
+            self.client = MongoClient(
+                uri or settings.MONGO_URI,
+                maxPoolSize=100,  # Maximum number of connections in the pool
+                minPoolSize=10    # Minimum number of connections in the pool
+            )
+        except errors.ConnectionFailure as e:
+            raise Exception(f"Failed to connect to MongoDB: {str(e)}")
+        self._local = threading.local()
+        self._replicated = None
+        self._transactions = None
+
+    def database(self, name:str):
+        return self.client[name]
+
+    def ping(self, timeout:float = None):
+        # Selecting a server also lets the pool open its minPoolSize connections
+        with pymongo.timeout(timeout):
+            self.client.admin.command("ping")
+
+    def is_replicated(self) -> bool:
+        """Whether the server is a replica set or a sharded cluster rather than a standalone server."""
+        if self._replicated is None:
+            hello = self.client.admin.command("hello")
+            self._replicated = "setName" in hello or hello.get("msg") == "isdbgrid"
+        return self._replicated
+
+    def supports_transactions(self) -> bool:
+        """Multi-document transactions need a replica set or a sharded cluster, not a standalone server."""
+        if self._transactions is None:
+            self._transactions = self.is_replicated()
+            if not self._transactions and settings.MONGO_ALLOW_WRITES_WITHOUT_TRANSACTIONS:
+                logger.warning("MongoDB is a standalone server, so multi-document writes run without a transaction")
+        return self._transactions
+
+    def supports_change_streams(self) -> bool:
+        # Change streams read the oplog, which a standalone server does not keep
+        return self.is_replicated()
+
+    def run_in_transaction(self, callback):
+        if self.current_session() is not None:
+            return callback()
+        if not self.supports_transactions():
+            if not settings.MONGO_ALLOW_WRITES_WITHOUT_TRANSACTIONS:
+                raise Exception(
+                    "MongoDB is a standalone server and cannot run transactions; use a replica set, "
+                    "or set MONGO_ALLOW_WRITES_WITHOUT_TRANSACTIONS to write without them"
+                )
+            return callback()
+
+        def run(session):
+            self._local.session = session
+            try:
+                return callback()
+            finally:
+                self._local.session = None
+
+        # with_transaction retries the callback on transient errors, such as a write conflict with another transaction
+        with self.client.start_session() as session:
+            return session.with_transaction(run)
+
+    def current_session(self):
+        return getattr(self._local, "session", None)
+
+    def close(self):
+        self.client.close()
@@ -0,0 +1,285 @@
+"""
+SQLite storage backend for single-node deployments. Each collection is a
+table of (id, doc) rows holding documents as relaxed Extended JSON, queried
+with the JSON1 functions. Writes run in BEGIN IMMEDIATE transactions, so
+read-modify-write operations stay atomic across threads and processes, and
+the database is in WAL mode so reads never wait for a writer.
+
+Indexes on top-level fields become SQLite expression indexes, and equality
+and $in conditions on those fields are pushed down to them. The expressions
+index a missing or null field as one value, so a unique index admits a
+single document without the key, as MongoDB's does; every other
+condition is evaluated in Python on the rows they select. Indexed top-level
+fields are expected to hold scalars, as they do in every collection here:
+a document whose indexed field is an array is only found through the other
+conditions of a query.
+"""
+import json
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, List
+from bson import json_util
+from bson.json_util import RELAXED_JSON_OPTIONS
+from pymongo.errors import DuplicateKeyError, OperationFailure
+from common.storage.base import DocumentCollection, DocumentDatabase, StorageBackend, id_key
+
+logger = logging.getLogger(__name__)
+
+INDEX_TABLE = "_storage_indexes"
+
+def quote(name:str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+def json_path(field:str) -> str:
+    return "'$." + '"' + field.replace("'", "''").replace('"', '\\"') + '"' + "'"
+
+def field_expression(field:str) -> str:
+    return f"json_extract(doc, {json_path(field)})"
+
+# A blob never equals a value json_extract returns, so missing and null keys get a value of their own
+NULL_KEY = "x'00'"
+
+def index_expression(field:str) -> str:
+    """Indexed form of a top-level field, under which missing and null values are equal."""
+    return f"ifnull({field_expression(field)}, {NULL_KEY})"
+
+def encode(document:Dict) -> str:
+    return json_util.dumps(document, json_options=RELAXED_JSON_OPTIONS)
+
+def decode(text:str) -> Dict:
+    return json_util.loads(text)
+
+class SQLiteCollection(DocumentCollection):
+    def __init__(self, database, name:str):
+        super().__init__(database, name)
+        self.backend = database.backend
+        self.table = quote(self.full_name)
+        self._indexes = None
+
+    def _connection(self) -> sqlite3.Connection:
+        return self.backend.connection()
+
+    # Reads
+
+    def _select(self, filter:Dict):
+        conditions, parameters, index = [], [], None
+        if "_id" in filter:
+            keys = self._id_keys(filter["_id"])
+            if keys is not None:
+                conditions.append(f"id IN ({', '.join('?' for _ in keys)})")
+                parameters.extend(keys)
+                index = "_id_"
+        indexed = self._indexed_fields()
+        for field, values in self.equality_candidates(filter, indexed):
+            conditions.append(f"{index_expression(field)} IN ({', '.join('?' for _ in values)})")
+            parameters.extend(values)
+            index = index or indexed[field]
+        sql = f"SELECT id, doc FROM {self.table}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        try:
+            rows = self._connection().execute(sql, parameters).fetchall()
+        except sqlite3.OperationalError as e:
+            if "no such table" in str(e):
+                return [], {"index": index}
+            raise
+        return [(key, decode(text)) for key, text in rows], {"index": index}
+
+    @staticmethod
+    def _id_keys(condition):
+        if isinstance(condition, dict) and set(condition) == {"$in"}:
+            return [id_key(value) for value in condition["$in"]] or None
+        if isinstance(condition, dict) and set(condition) == {"$eq"}:
+            return [id_key(condition["$eq"])]
+        if isinstance(condition, dict) and any(key.startswith("$") for key in condition):
+            return None
+        return [id_key(condition)]
+
+    def _indexed_fields(self) -> Dict[str, str]:
+        """Top-level fields with an expression index, and the name of the first index on each."""
+        fields = {}
+        for name, spec in self._index_specs().items():
+            for field, _ in spec["key"]:
+                if self._expression_indexable(field):
+                    fields.setdefault(field, name)
+        return fields
+
+    @staticmethod
+    def _expression_indexable(field:str) -> bool:
+        return "." not in field and not field.startswith("$")
+
+    # Writes
+
+    @contextmanager
+    def _write(self):
+        connection = self._connection()
+        if connection.in_transaction:
+            # Nested in a write or transaction already in progress on this thread
+            self._create()
+            yield
+            return
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            self._create()
+            yield
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def _insert(self, key:str, document:Dict):
+        try:
+            self._connection().execute(f"INSERT INTO {self.table} (id, doc) VALUES (?, ?)", (key, encode(document)))
+        except sqlite3.IntegrityError as e:
+            raise self._duplicate_key_error(e, document)
+
+    def _replace(self, key:str, old:Dict, new:Dict):
+        try:
+            self._connection().execute(f"UPDATE {self.table} SET doc = ? WHERE id = ?", (encode(new), key))
+        except sqlite3.IntegrityError as e:
+            raise self._duplicate_key_error(e, new)
+
+    def _delete(self, key:str, old:Dict):
+        self._connection().execute(f"DELETE FROM {self.table} WHERE id = ?", (key,))
+
+    def _duplicate_key_error(self, error:sqlite3.IntegrityError, document:Dict):
+        # The message names the index ("index 'db.collection.name'") or the primary key column
+        message = str(error)
+        for name, spec in self._index_specs().items():
+            if f"'{self.full_name}.{name}'" in message:
+                return self.duplicate_key_error(name, self.unique_key(spec, document))
+        return self.duplicate_key_error("_id_", {"_id": document["_id"]})
+
+    # Indexes and lifecycle
+
+    def _index_specs(self) -> Dict[str, Dict]:
+        if self._indexes is None:
+            try:
+                rows = self._connection().execute(
+                    f"SELECT name, spec FROM {INDEX_TABLE} WHERE namespace = ? ORDER BY rowid", (self.full_name,)
+                ).fetchall()
+            except sqlite3.OperationalError as e:
+                if "no such table" in str(e):
+                    return {}
+                raise
+            indexes = {}
+            for name, spec in rows:
+                spec = json.loads(spec)
+                spec["key"] = [tuple(key) for key in spec["key"]]
+                indexes[name] = spec
+            self._indexes = indexes
+        return self._indexes
+
+    def _add_index(self, name:str, spec:Dict):
+        fields = [field for field, _ in spec["key"]]
+        indexable = [field for field in fields if self._expression_indexable(field)]
+        if spec.get("unique") and (len(indexable) != len(fields) or spec.get("partialFilterExpression")):
+            raise OperationFailure("Unique indexes on nested fields or with a partial filter are not supported by the sqlite storage backend", 2)
+        connection = self._connection()
+        if indexable:
+            unique = "UNIQUE " if spec.get("unique") else ""
+            expressions = ", ".join(index_expression(field) for field in indexable)
+            try:
+                connection.execute(f"CREATE {unique}INDEX IF NOT EXISTS {quote(f'{self.full_name}.{name}')} ON {self.table} ({expressions})")
+            except sqlite3.IntegrityError:
+                raise self.duplicate_key_error(name, {field: None for field in fields})
+        connection.execute(
+            f"INSERT OR REPLACE INTO {INDEX_TABLE} (namespace, name, spec) VALUES (?, ?, ?)",
+            (self.full_name, name, json.dumps({**spec, "key": [list(key) for key in spec["key"]]}, default=str)),
+        )
+        self._indexes = None
+
+    def _create(self):
+        self.backend.create_table(self.table)
+
+    def drop(self):
+        connection = self._connection()
+        connection.execute(f"DROP TABLE IF EXISTS {self.table}")
+        connection.execute(f"DELETE FROM {INDEX_TABLE} WHERE namespace = ?", (self.full_name,))
+        self._indexes = None
+
+class SQLiteDatabase(DocumentDatabase):
+    collection_class = SQLiteCollection
+
+class SQLiteStorage(StorageBackend):
+    """One SQLite file holding every database; tables are named "<database>.<collection>"."""
+    name = "sqlite"
+
+    def __init__(self, path:str):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._databases = {}
+        connection = self.connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(f"CREATE TABLE IF NOT EXISTS {INDEX_TABLE} (namespace TEXT NOT NULL, name TEXT NOT NULL, spec TEXT NOT NULL, PRIMARY KEY (namespace, name))")
+        self._upgrade_indexes()
+
+    def _upgrade_indexes(self):
+        """Rebuild expression indexes created before missing and null keys were indexed as one value."""
+        connection = self.connection()
+        for namespace, name in connection.execute(f"SELECT namespace, name FROM {INDEX_TABLE}").fetchall():
+            row = connection.execute("SELECT sql FROM sqlite_master WHERE type = 'index' AND name = ?", (f"{namespace}.{name}",)).fetchone()
+            if row is None or NULL_KEY in row[0]:
+                continue
+            database, collection_name = namespace.split(".", 1)
+            collection = self.database(database)[collection_name]
+            spec = collection._index_specs()[name]
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute(f"DROP INDEX {quote(f'{namespace}.{name}')}")
+                collection._add_index(name, spec)
+            except DuplicateKeyError as e:
+                # Documents that only the old index let in; keep it until they are resolved
+                connection.execute("ROLLBACK")
+                logger.warning(f"Index {name} of {namespace} was not rebuilt: {e}")
+                continue
+            connection.execute("COMMIT")
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection, in autocommit mode so transactions are explicit."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def supports_transactions(self) -> bool:
+        return True
+
+    def run_in_transaction(self, callback):
+        connection = self.connection()
+        if connection.in_transaction:
+            return callback()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            result = callback()
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return result
+
+    def create_table(self, table:str):
+        self.connection().execute(f"CREATE TABLE IF NOT EXISTS {table} (id TEXT PRIMARY KEY, doc TEXT NOT NULL)")
+
+    def database(self, name:str) -> SQLiteDatabase:
+        with self._lock:
+            database = self._databases.get(name)
+            if database is None:
+                database = self._databases[name] = SQLiteDatabase(self, name)
+            return database
+
+    def list_collections(self, database:str) -> List[str]:
+        prefix = f"{database}."
+        rows = self.connection().execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+        return sorted(name[len(prefix):] for name, in rows if name.startswith(prefix))
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
@@ -0,0 +1,58 @@
+"""
+AbstractMongoDBClient passes the storage's current session to every
+operation, so reads and writes made inside run_in_transaction() are part of
+the transaction on MongoDB.
+"""
+from unittest import mock
+from django.test import SimpleTestCase
+from common.clients.abstract_mongo_client import AbstractMongoDBClient
+from common.storage import set_storage
+
+class RecordingStorage:
+    """A storage whose database records the calls made on its collections."""
+    def __init__(self):
+        self.db = mock.MagicMock()
+        self.session = object()
+
+    def database(self, name:str):
+        return self.db
+
+    def current_session(self):
+        return self.session
+
+class Client(AbstractMongoDBClient):
+    pass
+
+class SessionTests(SimpleTestCase):
+    def setUp(self):
+        self.storage = RecordingStorage()
+        set_storage(self.storage)
+        self.addCleanup(set_storage, None)
+        self.client = Client("test")
+        self.collection = self.storage.db.__getitem__.return_value
+
+    def test_every_operation_uses_the_current_session(self):
+        operations = {
+            "find_one": lambda: self.client.find_one("c", {"_id": 1}),
+            "count_documents": lambda: self.client.count("c"),
+            "find": lambda: self.client.find_all("c", {"a": 1}),
+            "insert_one": lambda: self.client.insert_one("c", {"a": 1}),
+            "insert_many": lambda: self.client.insert_many("c", [{"a": 1}]),
+            "bulk_write": lambda: self.client.bulk_write("c", [mock.sentinel.operation]),
+            "delete_many": lambda: self.client.delete_many("c", {"a": 1}),
+            "update_one": lambda: self.client.upsert_one("c", {"a": 1}, {"$set": {"b": 2}}),
+            "update_many": lambda: self.client.update_many("c", {"a": 1}, {"$set": {"b": 2}}),
+            "find_one_and_update": lambda: self.client.find_one_and_upsert("c", {"a": 1}, {"$inc": {"b": 1}}),
+            "aggregate": lambda: self.client.aggregate("c", [{"$match": {}}]),
+        }
+        for method, call in operations.items():
+            with self.subTest(method=method):
+                self.collection.reset_mock()
+                call()
+                recorded = getattr(self.collection, method)
+                self.assertEqual(recorded.call_count, 1, f"{method} calls")
+                self.assertIs(recorded.call_args.kwargs.get("session"), self.storage.session, f"{method} session")
+
+    def test_replace_one_uses_the_current_session(self):
+        self.client.replace_one("c", {"a": 1}, {"a": 1, "b": 2}, upsert=True)
+        self.assertIs(self.collection.update_one.call_args.kwargs.get("session"), self.storage.session, "replace_one session")
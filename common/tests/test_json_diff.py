@@ -0,0 +1,50 @@
+"""
+diff() and apply_patch() round-trip every change a form section goes
+through, with patches that stay proportional to the edit.
+"""
+import copy
+from django.test import SimpleTestCase
+from common.json_diff import apply_patch, diff
+
+ROWS = [{"title": f"Paper {index}", "impact_factor": index / 2} for index in range(50)]
+
+class JsonDiffTests(SimpleTestCase):
+    def assertRoundTrips(self, old, new, msg:str):
+        self.assertEqual(apply_patch(old, diff(old, new)), new, msg)
+
+    def test_round_trips(self):
+        cases = [
+            ({"a": 1, "b": 2}, {"a": 1, "c": 3}, "keys added and removed"),
+            ({"data": ROWS}, {"data": ROWS + [{"title": "Paper 50"}]}, "row appended"),
+            ({"data": ROWS}, {"data": ROWS[:10]}, "rows removed from the end"),
+            ({"data": ROWS}, {"data": ROWS[1:]}, "row removed from the start"),
+            ({"data": [1, 2]}, {"data": {"F": [1]}}, "type changed"),
+            ({"score": 1}, {"score": 1.5}, "int to float"),
+            ({"x": None}, {"x": {"nested": [None]}}, "null replaced"),
+            ({"a/b": 1, "c~d": [1]}, {"a/b": 2, "c~d": [1, 2]}, "escaped keys"),
+            ([1, 2], {"a": 1}, "root replaced"),
+            ({}, {}, "unchanged"),
+        ]
+        for old, new, msg in cases:
+            with self.subTest(msg):
+                self.assertRoundTrips(old, new, msg)
+
+    def test_patch_is_proportional_to_the_edit(self):
+        edited = copy.deepcopy(ROWS)
+        edited[25]["impact_factor"] = 99
+        self.assertEqual(diff({"data": ROWS}, {"data": edited}), [{"op": "replace", "path": "/data/25/impact_factor", "value": 99}], "one field edited")
+        self.assertEqual(diff(ROWS, ROWS + [{"title": "Paper 50"}]), [{"op": "add", "path": "/50", "value": {"title": "Paper 50"}}], "one row appended")
+
+    def test_shrinking_list_removes_from_the_end(self):
+        self.assertEqual([op["path"] for op in diff([1, 2, 3, 4], [1, 2])], ["/3", "/2"], "remove order")
+
+    def test_escaping(self):
+        self.assertEqual(diff({}, {"a/b~c": 1}), [{"op": "add", "path": "/a~1b~0c", "value": 1}], "escaped path")
+
+    def test_apply_leaves_its_inputs_alone(self):
+        old = {"data": [{"title": "A"}]}
+        new = {"data": [{"title": "B", "tags": ["x"]}]}
+        ops = diff(old, new)
+        patched = apply_patch(old, ops)
+        patched["data"][0]["tags"].append("y")
+        self.assertEqual((old, new["data"][0]["tags"]), ({"data": [{"title": "A"}]}, ["x"]), "inputs after patching")
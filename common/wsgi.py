@@ -0,0 +1,34 @@
+"""
+Calls a WSGI application in process the way a server would, without the
+Django test client and the modules it imports, so benchmarks of worker
+startup and per-request overhead see what a real worker loads.
+"""
+import io
+import sys
+
+def call_wsgi(application, method:str, path:str, query:str = "", body:bytes = b"") -> int:
+    """Send one JSON request to the application, read the whole response and return its status code."""
+    environ = {
+        "REQUEST_METHOD": method,
+        "PATH_INFO": path,
+        "QUERY_STRING": query,
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "HTTP_HOST": "localhost",
+        "HTTP_ORIGIN": "http://localhost:3000",
+        "CONTENT_TYPE": "application/json",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.url_scheme": "http",
+    }
+    statuses = []
+    response = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+    try:
+        for _ in response:
+            pass
+    finally:
+        if hasattr(response, "close"):
+            response.close()
+    return int(statuses[0].split(" ", 1)[0])
@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class FacultyAdminConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'faculty_admin'
+
+    def warm_up(self):
+        """Called from the web server entry points by common.registry.warm_up_apps()."""
+        from common.registry import get_instance, warm_up
+        from appraisal_form_injestion.services.form_bulk_ingest_service import FormBulkIngestService
+        from faculty_admin.faculty_directory import FacultyDirectory
+        from faculty_admin.services.faculty_admin_service import FacultyAdminService
+        from faculty_admin.services.faculty_import_service import FacultyImportService
+
+        # The appraisal_form_injestion app imports the URLconf and pings the storage
+        warm_up([FacultyAdminService, FacultyImportService, FormBulkIngestService])
+        # Loaded off the startup path; lookups go to the storage until it is
+        get_instance(FacultyDirectory).start()
@@ -1,5 +1,7 @@
 import logging
+from datetime import datetime
 from typing import List,Dict
+from pymongo import errors
 from common.clients.abstract_mongo_client import AbstractMongoDBClient
 from django.conf import settings
 
@@ -9,6 +11,19 @@ class FacultyDataMongoClient(AbstractMongoDBClient):
     def __init__(self):
         super().__init__(settings.APPRAISAL_SYSTEM_MONGO_DB_NAME)
 
+    def ensure_indexes(self):
+        try:
+            # One record per faculty member, so concurrent imports upserting the same user_id cannot both insert
+            collection = self.db[settings.FACULTY_DATA_COLLECTION_NAME]
+            if self.storage.name == "mongo" and "user_id" in collection.index_information():
+                # Replaces the earlier non-unique index on the same key
+                collection.drop_index("user_id")
+            self.create_index(settings.FACULTY_DATA_COLLECTION_NAME, [("user_id", 1)], name="user_id_unique", unique=True)
+            self.create_index(settings.FACULTY_DATA_COLLECTION_NAME, [("department", 1), ("user_id", 1)], name="department_user_id")
+        except Exception as e:
+            logger.error(f"Error creating faculty data indexes: {e}")
+            raise e
+
     def get_all_faculty_data(self):
         try:
             projection = {'_id':0, 'updated_at':0, 'created_at':0}
@@ -27,10 +42,64 @@ class FacultyDataMongoClient(AbstractMongoDBClient):
             logger.error(f"Error getting faculty data by user id: {e}")
             raise e
 
+    def get_faculty_directory(self, changed_since:datetime = None):
+        """
+        Faculty records with their _id and updated_at, as the faculty directory
+        keeps them, optionally only those updated at or after changed_since.
+        """
+        try:
+            query = {"updated_at": {"$gte": changed_since}} if changed_since else {}
+            return self.find_all(settings.FACULTY_DATA_COLLECTION_NAME, query, projection={'created_at':0})
+        except Exception as e:
+            logger.error(f"Error getting faculty directory: {e}")
+            raise e
+
+    def watch_faculty_data(self, max_await_time_ms:int = None):
+        """
+        Change stream of the faculty data collection, with the full document of
+        every insert, update and replace. Only available where the storage
+        supports change streams.
+        """
+        try:
+            return self.db[settings.FACULTY_DATA_COLLECTION_NAME].watch(full_document="updateLookup", max_await_time_ms=max_await_time_ms)
+        except errors.PyMongoError as e:
+            logger.error(f"Error watching faculty data: {e}")
+            raise e
+
     def insert_faculty_data(self, data:Dict):
         try:
-            self.insert_one(settings.FACULTY_DATA_COLLECTION_NAME, data)
+            # Keyed on user_id so re-submitting a faculty record updates it instead of duplicating it
+            fields = {key: value for key, value in data.items() if key not in ("_id", "created_at", "updated_at")}
+            self.upsert_one(settings.FACULTY_DATA_COLLECTION_NAME, {"user_id": data["user_id"]}, {"$set": fields})
             logger.info(f"Faculty data inserted successfully")
         except Exception as e:
             logger.error(f"Error inserting faculty data: {e}")
             raise e
+
+    def upsert_faculty_batch(self, documents:List[Dict]):
+        """
+        Upsert faculty records keyed on user_id in unordered bulk writes.
+
+        Returns:
+            Tuple[Dict, List[Dict]]: Bulk writer stats and per-record errors, where
+                                     index is the record's position in documents
+        """
+        try:
+            with self.bulk_writer(settings.FACULTY_DATA_COLLECTION_NAME, ordered=False) as writer:
+                for document in documents:
+                    # updated_at lets the faculty directory pick up imported records when it polls
+                    writer.update_one({"user_id": document["user_id"]}, self._with_timestamps({"$set": document}, upsert=True), upsert=True)
+            return writer.stats(), writer.errors
+        except Exception as e:
+            logger.error(f"Error upserting faculty batch: {e}")
+            raise e
+
+    def get_user_ids_by_department(self, department:str = None):
+        try:
+            query = {"department": department} if department else {}
+            projection = {"_id": 0, "user_id": 1}
+            result = self.find_all(settings.FACULTY_DATA_COLLECTION_NAME, query, projection=projection)
+            return [doc["user_id"] for doc in result if doc.get("user_id")]
+        except Exception as e:
+            logger.error(f"Error getting faculty user ids by department: {e}")
+            raise e
@@ -0,0 +1,29 @@
+import logging
+from typing import List,Dict
+from common.clients.abstract_mongo_client import AbstractMongoDBClient
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+class FacultyImportMongoClient(AbstractMongoDBClient):
+    """
+    Checkpoints of faculty directory imports, one document per import keyed
+    by the import id (the sha256 of the imported file unless given).
+    """
+    def __init__(self):
+        super().__init__(settings.APPRAISAL_SYSTEM_MONGO_DB_NAME)
+
+    def get_checkpoint(self, import_id:str):
+        try:
+            return self.find_one(settings.FACULTY_IMPORT_CHECKPOINT_COLLECTION_NAME, {"_id": import_id})
+        except Exception as e:
+            logger.error(f"Error getting faculty import checkpoint: {e}")
+            raise e
+
+    def save_checkpoint(self, import_id:str, checkpoint:Dict):
+        try:
+            fields = {key: value for key, value in checkpoint.items() if key not in ("_id", "created_at", "updated_at")}
+            self.upsert_one(settings.FACULTY_IMPORT_CHECKPOINT_COLLECTION_NAME, {"_id": import_id}, {"$set": fields})
+        except Exception as e:
+            logger.error(f"Error saving faculty import checkpoint: {e}")
+            raise e
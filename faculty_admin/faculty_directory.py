@@ -0,0 +1,214 @@
+import functools
+import logging
+import os
+import threading
+import time
+import weakref
+from datetime import timedelta
+from typing import List,Dict,Optional
+from django.conf import settings
+from common.registry import get_instance
+from common.storage import get_storage
+from faculty_admin.clients.faculty_data_mongo_client import FacultyDataMongoClient
+
+logger = logging.getLogger(__name__)
+
+# Polls re-read records updated this long before the newest one seen, so a
+# write that was in flight during the previous poll is not missed
+POLL_OVERLAP = timedelta(seconds=5)
+
+def _reset_in_child(directory_ref):
+    directory = directory_ref()
+    if directory is not None:
+        directory._reset()
+
+class FacultyDirectory:
+    """
+    Process-local copy of the faculty data collection, indexed by user_id and
+    by department, so directory lookups are dict hits instead of queries.
+
+    start() loads it on a background thread and then keeps it fresh: from a
+    change stream where the storage has them (MongoDB replica sets), and
+    otherwise by polling for records with a newer updated_at, with a full
+    reload every FACULTY_DIRECTORY_RELOAD_INTERVAL to drop deleted ones.
+    Until the first load completes, and always with FACULTY_DIRECTORY_ENABLED
+    off, lookups are answered from the storage.
+
+    The thread belongs to the process that started it. A forked worker does
+    not inherit it, so the copy in the worker is dropped at the fork and the
+    worker starts its own on its first lookup.
+    """
+    def __init__(self):
+        self.faculty_data_mongo_client = get_instance(FacultyDataMongoClient)
+        self.mode = None
+        self._by_user_id = {}
+        self._by_department = {}
+        # Change stream deletes carry only the _id of the deleted record
+        self._user_id_by_key = {}
+        self._newest = None
+        self._reset()
+        os.register_at_fork(after_in_child=functools.partial(_reset_in_child, weakref.ref(self)))
+
+    def _reset(self):
+        # Also run in a forked child, where the parent's thread is gone and its lock may have been held
+        self._lock = threading.Lock()
+        self._loaded = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        # Process the thread was started in
+        self._pid = None
+
+    def __len__(self):
+        return len(self._by_user_id)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded.is_set()
+
+    def start(self):
+        """
+        Load the directory and follow its changes on a daemon thread, once per
+        process. Safe to call more than once.
+        """
+        if not settings.FACULTY_DIRECTORY_ENABLED:
+            return
+        pid = os.getpid()
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+            self._thread = threading.Thread(target=self._follow, name="faculty-directory", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def wait_until_loaded(self, timeout:float = None) -> bool:
+        self.start()
+        return self._loaded.wait(timeout)
+
+    def get(self, user_id:str) -> Optional[Dict]:
+        """The faculty record of user_id, without _id and timestamps, or None."""
+        if not self._loaded.is_set():
+            self.start()
+            return self.faculty_data_mongo_client.get_faculty_data_by_user_id(user_id)
+        entry = self._by_user_id.get(user_id)
+        return dict(entry) if entry is not None else None
+
+    def get_user_ids(self, department:str = None) -> List[str]:
+        """User ids of the faculty in a department, or of all faculty."""
+        if not self._loaded.is_set():
+            self.start()
+            return self.faculty_data_mongo_client.get_user_ids_by_department(department)
+        if department:
+            return list(self._by_department.get(department, ()))
+        return list(self._by_user_id)
+
+    def get_departments(self) -> List[str]:
+        if not self._loaded.is_set():
+            self.start()
+        with self._lock:
+            departments = list(self._by_department)
+        return sorted(department for department in departments if department)
+
+    def load(self):
+        """Replace the directory with a full read of the collection."""
+        by_user_id, by_department, user_id_by_key, newest = {}, {}, {}, None
+        for document in self.faculty_data_mongo_client.get_faculty_directory():
+            user_id, entry, updated_at = self._entry(document)
+            if user_id is None:
+                continue
+            by_user_id[user_id] = entry
+            by_department.setdefault(entry.get("department"), {})[user_id] = None
+            user_id_by_key[document.get("_id")] = user_id
+            if updated_at is not None and (newest is None or updated_at > newest):
+                newest = updated_at
+        with self._lock:
+            self._by_user_id, self._by_department, self._user_id_by_key, self._newest = by_user_id, by_department, user_id_by_key, newest
+        self._loaded.set()
+        logger.info(f"Loaded {len(by_user_id)} faculty into the directory")
+
+    def apply(self, document:Dict):
+        """Add or replace one faculty record, as read from the collection."""
+        user_id, entry, updated_at = self._entry(document)
+        if user_id is None:
+            return
+        # Updated in place under the lock; readers copy the dicts with list(), which
+        # the interpreter does in one step, so they never see one mid-update
+        with self._lock:
+            previous = self._by_user_id.get(user_id)
+            if previous is not None and previous.get("department") != entry.get("department"):
+                self._remove_from_department(user_id, previous.get("department"))
+            self._by_user_id[user_id] = entry
+            self._by_department.setdefault(entry.get("department"), {})[user_id] = None
+            self._user_id_by_key[document.get("_id")] = user_id
+            if updated_at is not None and (self._newest is None or updated_at > self._newest):
+                self._newest = updated_at
+
+    def remove(self, key):
+        """Drop the faculty record stored under _id key."""
+        with self._lock:
+            user_id = self._user_id_by_key.pop(key, None)
+            previous = self._by_user_id.pop(user_id, None) if user_id is not None else None
+            if previous is not None:
+                self._remove_from_department(user_id, previous.get("department"))
+
+    def _remove_from_department(self, user_id:str, department):
+        members = self._by_department.get(department)
+        if members is None:
+            return
+        members.pop(user_id, None)
+        if not members:
+            del self._by_department[department]
+
+    @staticmethod
+    def _entry(document:Dict):
+        entry = {key: value for key, value in document.items() if key not in ("_id", "created_at", "updated_at")}
+        return entry.get("user_id"), entry, document.get("updated_at")
+
+    def _stopped(self) -> bool:
+        # A directory built against a storage backend that has since been replaced stops following it
+        return self._stop.is_set() or self.faculty_data_mongo_client.storage is not get_storage()
+
+    def _follow(self):
+        while not self._stopped():
+            try:
+                if self.faculty_data_mongo_client.storage.supports_change_streams():
+                    self._follow_change_stream()
+                else:
+                    self._follow_polling()
+            except Exception as e:
+                logger.warning(f"Faculty directory stopped following changes, retrying: {e}")
+                self._stop.wait(settings.FACULTY_DIRECTORY_POLL_INTERVAL)
+
+    def _follow_change_stream(self):
+        self.mode = "change_stream"
+        # Opened before the load so no change made during it is missed; replaying one is harmless
+        with self.faculty_data_mongo_client.watch_faculty_data(max_await_time_ms=1000) as stream:
+            self.load()
+            while stream.alive and not self._stopped():
+                change = stream.try_next()
+                if change is None:
+                    continue
+                operation = change["operationType"]
+                if operation in ("insert", "update", "replace"):
+                    if change.get("fullDocument") is not None:
+                        self.apply(change["fullDocument"])
+                elif operation == "delete":
+                    self.remove(change["documentKey"]["_id"])
+                else:
+                    # The collection was dropped or renamed; the stream is over, so reopen it and reload
+                    return
+
+    def _follow_polling(self):
+        self.mode = "polling"
+        self.load()
+        reloaded = time.monotonic()
+        while not self._stop.wait(settings.FACULTY_DIRECTORY_POLL_INTERVAL) and not self._stopped():
+            if time.monotonic() - reloaded >= settings.FACULTY_DIRECTORY_RELOAD_INTERVAL:
+                self.load()
+                reloaded = time.monotonic()
+                continue
+            since = self._newest - POLL_OVERLAP if self._newest is not None else None
+            for document in self.faculty_data_mongo_client.get_faculty_directory(since):
+                self.apply(document)
@@ -0,0 +1,99 @@
+"""
+Streaming readers for HR faculty directory exports (CSV or XLSX). Rows are
+yielded one at a time with their 1-based data row number, so imports never
+hold the whole file in memory and can resume after a given row.
+"""
+import csv
+import hashlib
+import io
+import re
+from typing import Dict, Iterator, List, Tuple
+
+# HR exports name some columns differently; these map onto faculty data fields
+COLUMN_ALIASES = {
+    "employee_id": "user_id",
+    "emp_id": "user_id",
+    "employee_code": "user_id",
+    "dept": "department",
+    "email_id": "email",
+    "full_name": "name",
+}
+
+REQUIRED_FIELDS = ["user_id", "name"]
+
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+def normalize_column(column) -> str:
+    column = re.sub(r"[^a-z0-9]+", "_", str(column or "").strip().lower()).strip("_")
+    return COLUMN_ALIASES.get(column, column)
+
+def file_digest(file) -> str:
+    """sha256 of a binary file, read in chunks. The file is rewound afterwards."""
+    sha256 = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(1024 * 1024), b""):
+        sha256.update(chunk)
+    file.seek(0)
+    return sha256.hexdigest()
+
+def _iter_csv_rows(file) -> Iterator[Tuple[int, Dict]]:
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.reader(text)
+        header = [normalize_column(column) for column in next(reader, [])]
+        for row_number, values in enumerate(reader, start=1):
+            yield row_number, dict(zip(header, values))
+    finally:
+        # Leave the underlying file open for the caller
+        text.detach()
+
+def _iter_xlsx_rows(file) -> Iterator[Tuple[int, Dict]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise Exception("openpyxl is required to import XLSX files")
+    # read_only streams rows from the sheet XML instead of building the whole workbook
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [normalize_column(column) for column in next(rows, ())]
+        for row_number, values in enumerate(rows, start=1):
+            yield row_number, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+def iter_faculty_rows(file, filename:str) -> Iterator[Tuple[int, Dict]]:
+    """Yield (row_number, row) from a CSV or XLSX export, chosen by file extension."""
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        return _iter_xlsx_rows(file)
+    if filename.lower().endswith(".csv"):
+        return _iter_csv_rows(file)
+    raise ValueError(f"Unsupported file type: {filename}")
+
+def validate_faculty_row(row:Dict) -> Tuple[Dict, List[str]]:
+    """
+    Clean a parsed row into a faculty data document.
+
+    Returns:
+        Tuple[Dict, List[str]]: The document and the validation errors; the
+                                document must not be written if there are any
+    """
+    document = {}
+    for column, value in row.items():
+        if not column:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+        if value is None or value == "":
+            continue
+        if isinstance(value, float) and value.is_integer() and column == "user_id":
+            # Spreadsheets store numeric employee ids as floats
+            value = int(value)
+        document[column] = str(value) if column in ("user_id", "email") else value
+
+    errors = [f"{field} is required" for field in REQUIRED_FIELDS if field not in document]
+    if "email" in document and not EMAIL_PATTERN.match(document["email"]):
+        errors.append(f"Invalid email: {document['email']}")
+    if "email" in document:
+        document["email"] = document["email"].lower()
+    return document, errors
@@ -0,0 +1,79 @@
+import json
+import os
+import random
+import tempfile
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from appraisal_form_injestion.synthetic import SyntheticInstitution
+from common.registry import get_instance
+from common.storage import BACKENDS, create_storage, set_storage
+from faculty_admin.clients.faculty_data_mongo_client import FacultyDataMongoClient
+from faculty_admin.faculty_directory import FacultyDirectory
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark faculty lookups by user_id and by department from the storage against the process-local "
+        "faculty directory, and time how long a faculty update takes to reach the directory"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--storage", choices=BACKENDS, default="memory", help="Storage backend to load the synthetic faculty into")
+        parser.add_argument("--mongo-uri", help="MongoDB URI when --storage is mongo (default MONGO_URI)")
+        parser.add_argument("--faculty", type=int, default=2000, help="Number of synthetic faculty members")
+        parser.add_argument("--lookups", type=int, default=1000, help="Timed lookups by user_id")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed of the synthetic institution")
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            set_storage(create_storage(options["storage"], uri=options["mongo_uri"], path=os.path.join(directory, "directory.sqlite3")))
+            client = get_instance(FacultyDataMongoClient)
+            client.drop_collection(settings.FACULTY_DATA_COLLECTION_NAME)
+            institution = SyntheticInstitution(options["seed"])
+            faculty = [institution.faculty(index) for index in range(options["faculty"])]
+            client.upsert_faculty_batch(faculty)
+
+            faculty_directory = get_instance(FacultyDirectory)
+            started = time.perf_counter()
+            if not faculty_directory.wait_until_loaded(60):
+                raise CommandError("The faculty directory did not load within 60 seconds")
+            report = {"storage": options["storage"], "faculty": len(faculty_directory), "mode": faculty_directory.mode,
+                      "load_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+            rng = random.Random(options["seed"])
+            user_ids = [rng.choice(faculty)["user_id"] for _ in range(options["lookups"])]
+            departments = faculty_directory.get_departments()
+            for name, lookup in (("storage", client.get_faculty_data_by_user_id), ("directory", faculty_directory.get)):
+                report[f"{name}_by_user_id_us"] = round(self._time(lookup, user_ids), 2)
+            for name, lookup in (("storage", client.get_user_ids_by_department), ("directory", faculty_directory.get_user_ids)):
+                report[f"{name}_by_department_us"] = round(self._time(lookup, departments * 20), 2)
+
+            # Freshness: an update made through the storage, until the directory returns it
+            user_id = faculty[0]["user_id"]
+            client.upsert_faculty_batch([{**faculty[0], "designation": "Dean"}])
+            started = time.perf_counter()
+            while (faculty_directory.get(user_id) or {}).get("designation") != "Dean":
+                if time.perf_counter() - started > settings.FACULTY_DIRECTORY_POLL_INTERVAL * 3:
+                    raise CommandError("The update did not reach the faculty directory")
+                time.sleep(0.005)
+            report["update_visible_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            faculty_directory.stop()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(f"{report['faculty']} faculty on {report['storage']}, directory loaded in {report['load_ms']} ms, following by {report['mode']}")
+        self.stdout.write(f"{'microseconds per lookup':<28}{'storage':>12}{'directory':>12}{'speedup':>10}")
+        for key, label in (("by_user_id", "by user_id"), ("by_department", "by department")):
+            storage, directory = report[f"storage_{key}_us"], report[f"directory_{key}_us"]
+            self.stdout.write(f"{label:<28}{storage:>12}{directory:>12}{storage / directory:>9.0f}x")
+        self.stdout.write(f"Update visible in the directory after {report['update_visible_ms']} ms")
+
+    @staticmethod
+    def _time(lookup, keys):
+        started = time.perf_counter()
+        for key in keys:
+            lookup(key)
+        return (time.perf_counter() - started) / len(keys) * 1e6
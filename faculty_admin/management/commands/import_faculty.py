@@ -0,0 +1,39 @@
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from faculty_admin.services.faculty_import_service import FacultyImportService
+
+
+class Command(BaseCommand):
+    help = "Import a CSV/XLSX faculty directory export, resuming an interrupted import of the same file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or XLSX file exported by HR")
+        parser.add_argument("--chunk-size", type=int, help="Rows per bulk upsert")
+        parser.add_argument("--import-id", help="Checkpoint key (default: sha256 of the file)")
+        parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and start from the first row")
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.exists():
+            raise CommandError(f"File not found: {path}")
+
+        def progress(checkpoint):
+            self.stdout.write(
+                f"Row {checkpoint['last_row']}: {checkpoint['imported']} imported, "
+                f"{checkpoint['invalid']} invalid, {checkpoint['failed']} failed"
+            )
+
+        with path.open("rb") as file:
+            try:
+                checkpoint = FacultyImportService().import_faculty(
+                    file, path.name, options["import_id"], options["chunk_size"], options["restart"], progress
+                )
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        for error in checkpoint.get("errors", []):
+            self.stdout.write(f"Row {error['row']}: {'; '.join(error['errors'])}")
+        self.stdout.write(
+            f"Import {checkpoint['_id']} {checkpoint['status']}: {checkpoint['imported']} imported, "
+            f"{checkpoint['invalid']} invalid, {checkpoint['failed']} failed"
+        )
@@ -0,0 +1,70 @@
+import logging
+from typing import List,Dict
+from appraisal_form_injestion.clients.data_injestion_mongo_client import DataInjestionMongoClient
+from appraisal_form_injestion.clients.section_rows_mongo_client import CHILD_LAYOUT, SectionRowsMongoClient
+from appraisal_form_injestion.constants import CHILD_ROW_SECTIONS, TOTAL_SECTIONS, missing_sections
+from faculty_admin.faculty_directory import FacultyDirectory
+from faculty_admin.utils import build_section_filter_query, summarize_explain
+from common.registry import get_instance
+
+logger = logging.getLogger(__name__)
+
+class FacultyAdminService:
+    def __init__(self):
+        self.data_injestion_mongo_client = get_instance(DataInjestionMongoClient)
+        self.faculty_directory = get_instance(FacultyDirectory)
+        self.section_rows_mongo_client = get_instance(SectionRowsMongoClient)
+
+    def get_incomplete_faculty(self, department:str = None, skip:int = 0, limit:int = 0, include_not_started:bool = False, cycle:str = None):
+        try:
+            rows = self.data_injestion_mongo_client.get_incomplete_faculty(department, skip, limit, cycle)
+            incomplete = [{
+                "user_id": row["user_id"],
+                "department": row.get("department"),
+                "section_count": row.get("section_count", 0),
+                "total_sections": TOTAL_SECTIONS,
+                "missing_sections": missing_sections(row.get("completeness_mask", 0)),
+            } for row in rows]
+
+            result = {"incomplete": incomplete}
+            if include_not_started:
+                # Department is recorded from the 1-10 section, so directory entries without a
+                # matching form document are faculty who have not submitted general details yet.
+                submitted = set(self.data_injestion_mongo_client.get_user_ids(department, cycle))
+                directory = self.faculty_directory.get_user_ids(department)
+                result["not_started"] = [user_id for user_id in directory if user_id not in submitted]
+            return result
+        except Exception as e:
+            logger.error(f"Error getting incomplete faculty: {e}")
+            raise e
+
+    def filter_faculty(self, filters:List[Dict], department:str = None, skip:int = 0, limit:int = 0, explain:bool = False, cycle:str = None):
+        try:
+            query = build_section_filter_query(filters)
+            # A section that can keep its rows in the section rows collection is matched
+            # by the layout each form document records: inline rows on the document, or,
+            # for documents in the child layout, a row of the user's looked up in the
+            # section rows collection as the page is read
+            layouts = []
+            lookups = []
+            for array_path in list(query):
+                section = array_path[:-len(".data")]
+                if section in CHILD_ROW_SECTIONS:
+                    condition = query.pop(array_path)
+                    layouts.append({"$or": [{array_path: condition}, {f"{section}.layout": CHILD_LAYOUT}]})
+                    matched_rows = f"_matched_rows_{len(lookups)}"
+                    stage = self.section_rows_mongo_client.lookup_stage(section, condition["$elemMatch"], matched_rows, cycle)
+                    lookups.append((stage, {"$or": [{array_path: condition}, {f"{section}.layout": CHILD_LAYOUT, matched_rows: {"$ne": []}}]}))
+            if layouts:
+                query["$and"] = layouts
+            if department:
+                query["department"] = department
+
+            rows, stats = self.data_injestion_mongo_client.filter_faculty(query, skip, limit, explain, cycle, lookups)
+            result = {"faculty": rows}
+            if explain:
+                result["explain"] = summarize_explain(stats)
+            return result
+        except Exception as e:
+            logger.error(f"Error filtering faculty: {e}")
+            raise e
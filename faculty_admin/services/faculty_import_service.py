@@ -0,0 +1,121 @@
+import logging
+from datetime import datetime, timezone
+from typing import List,Dict,Callable
+from django.conf import settings
+from faculty_admin.clients.faculty_data_mongo_client import FacultyDataMongoClient
+from faculty_admin.clients.faculty_import_mongo_client import FacultyImportMongoClient
+from faculty_admin.faculty_import import file_digest, iter_faculty_rows, validate_faculty_row
+from common.registry import get_instance
+
+logger = logging.getLogger(__name__)
+
+# Invalid rows are counted in full but only this many are kept on the checkpoint
+MAX_RECORDED_ERRORS = 200
+
+class FacultyImportService:
+    def __init__(self):
+        self.faculty_data_mongo_client = get_instance(FacultyDataMongoClient)
+        self.faculty_import_mongo_client = get_instance(FacultyImportMongoClient)
+
+    def import_faculty(self, file, filename:str, import_id:str = None, chunk_size:int = None, restart:bool = False, progress:Callable = None):
+        """
+        Stream a CSV/XLSX faculty export into the faculty directory.
+
+        Valid rows are upserted on user_id a chunk at a time, and the checkpoint
+        is saved after every chunk. Importing the same file again (same import
+        id) resumes after the last saved chunk; upserts make replaying a chunk
+        that was written but not checkpointed harmless.
+
+        Args:
+            file: Binary file object, seekable
+            filename (str): Used to choose the parser
+            import_id (str): Checkpoint key, defaults to the sha256 of the file
+            chunk_size (int): Rows per bulk upsert
+            restart (bool): Ignore an existing checkpoint and start from the first row
+            progress (Callable): Called with the checkpoint after every chunk
+
+        Returns:
+            Dict: The final checkpoint
+        """
+        checkpoint = None
+        try:
+            import_id = import_id or file_digest(file)
+            chunk_size = chunk_size or settings.FACULTY_IMPORT_CHUNK_SIZE
+            checkpoint = None if restart else self.faculty_import_mongo_client.get_checkpoint(import_id)
+            if checkpoint and checkpoint.get("status") == "completed":
+                return checkpoint
+            if not checkpoint:
+                checkpoint = {
+                    "_id": import_id,
+                    "filename": filename,
+                    "last_row": 0,
+                    "imported": 0,
+                    "invalid": 0,
+                    "failed": 0,
+                    "errors": [],
+                    "started_at": datetime.now(timezone.utc),
+                }
+            checkpoint["status"] = "running"
+            checkpoint.pop("error", None)
+            self.faculty_import_mongo_client.save_checkpoint(import_id, checkpoint)
+
+            resume_after = checkpoint["last_row"]
+            chunk, chunk_rows = [], []
+            last_row = resume_after
+            for row_number, row in iter_faculty_rows(file, filename):
+                if row_number <= resume_after:
+                    continue
+                last_row = row_number
+                document, errors = validate_faculty_row(row)
+                if errors:
+                    checkpoint["invalid"] += 1
+                    self._record_error(checkpoint, row_number, errors)
+                    continue
+                chunk.append(document)
+                chunk_rows.append(row_number)
+                if len(chunk) >= chunk_size:
+                    self._write_chunk(import_id, checkpoint, chunk, chunk_rows, last_row, progress)
+                    chunk, chunk_rows = [], []
+
+            self._write_chunk(import_id, checkpoint, chunk, chunk_rows, last_row, progress)
+            checkpoint["status"] = "completed"
+            checkpoint["finished_at"] = datetime.now(timezone.utc)
+            self.faculty_import_mongo_client.save_checkpoint(import_id, checkpoint)
+            return checkpoint
+        except Exception as e:
+            logger.error(f"Error importing faculty data: {e}")
+            if checkpoint:
+                checkpoint["status"] = "failed"
+                checkpoint["error"] = str(e)
+                try:
+                    # Only the status is saved: the stored counts and errors stay as of the last
+                    # committed chunk, which is where a resumed import starts reading again
+                    self.faculty_import_mongo_client.save_checkpoint(import_id, {"status": "failed", "error": str(e)})
+                except Exception:
+                    pass
+            raise e
+
+    def get_import_status(self, import_id:str):
+        try:
+            return self.faculty_import_mongo_client.get_checkpoint(import_id)
+        except Exception as e:
+            logger.error(f"Error getting faculty import status: {e}")
+            raise e
+
+    def _write_chunk(self, import_id:str, checkpoint:Dict, chunk:List[Dict], chunk_rows:List[int], last_row:int, progress:Callable):
+        if chunk:
+            stats, errors = self.faculty_data_mongo_client.upsert_faculty_batch(chunk)
+            checkpoint["imported"] += stats["matched"] + stats["upserted"]
+            checkpoint["failed"] += len(errors)
+            for error in errors:
+                if error["index"] is not None:
+                    self._record_error(checkpoint, chunk_rows[error["index"]], [error["message"]])
+        checkpoint["last_row"] = last_row
+        self.faculty_import_mongo_client.save_checkpoint(import_id, checkpoint)
+        if progress:
+            progress(checkpoint)
+
+    @staticmethod
+    def _record_error(checkpoint:Dict, row_number:int, errors:List[str]):
+        if len(checkpoint["errors"]) < MAX_RECORDED_ERRORS:
+            checkpoint["errors"].append({"row": row_number, "errors": errors})
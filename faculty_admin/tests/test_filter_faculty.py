@@ -0,0 +1,59 @@
+"""
+The admin filter over section rows, across form documents that keep a
+section's rows inline and ones that keep them in the section rows collection.
+"""
+import orjson
+from django.test import Client, override_settings
+from appraisal_form_injestion.tests import StorageTestCase
+from common.registry import get_instance
+from faculty_admin.services.faculty_admin_service import FacultyAdminService
+
+ONGOING = [{"field": "17.data.status", "op": "eq", "value": "ongoing"}, {"field": "17.data.months_ongoing", "op": "gte", "value": 12}]
+
+def save_projects(user_id:str, rows):
+    return Client().post("/api/injest-item-17/", orjson.dumps({"user_id": user_id, "data": rows}), content_type="application/json")
+
+def project(status:str, months:int = 0):
+    return {"title": f"{status} project", "status": status, "months_ongoing": months}
+
+
+class FilterFacultyTests(StorageTestCase):
+    def setUp(self):
+        super().setUp()
+        self.service = get_instance(FacultyAdminService)
+        saved = [
+            ("inline-match", [project("completed"), project("ongoing", 14)], "inline"),
+            ("inline-miss", [project("ongoing", 3), project("completed", 20)], "inline"),
+            ("child-match", [project("ongoing", 30)], "child"),
+            ("child-miss", [project("ongoing", 2)], "child"),
+            ("child-match-2", [project("completed"), project("ongoing", 12)], "child"),
+        ]
+        for user_id, rows, mode in saved:
+            with override_settings(FORM_LIST_STORAGE_MODE=mode):
+                self.assertEqual(save_projects(user_id, rows).status_code, 200, "save")
+
+    def user_ids(self, **kwargs):
+        return sorted(row["user_id"] for row in self.service.filter_faculty(ONGOING, **kwargs)["faculty"])
+
+    def test_matches_both_layouts(self):
+        self.assertEqual(self.user_ids(), ["child-match", "child-match-2", "inline-match"], "matched faculty")
+
+    def test_conditions_hold_for_the_same_row(self):
+        filters = [{"field": "17.data.status", "op": "eq", "value": "completed"}, {"field": "17.data.months_ongoing", "op": "gte", "value": 12}]
+        self.assertEqual([row["user_id"] for row in self.service.filter_faculty(filters)["faculty"]], ["inline-miss"], "matched faculty")
+
+    def test_pages(self):
+        pages = [self.user_ids(skip=skip, limit=2) for skip in (0, 2, 4)]
+        self.assertEqual([len(page) for page in pages], [2, 1, 0], "page sizes")
+        self.assertEqual(sorted(sum(pages, [])), self.user_ids(), "pages together")
+
+    def test_explain(self):
+        result = self.service.filter_faculty(ONGOING, explain=True)
+        self.assertEqual(set(result["explain"]), {"stages", "indexes", "n_returned", "total_keys_examined", "total_docs_examined", "execution_time_millis"}, "explain stats")
+
+    def test_endpoint(self):
+        response = Client().post("/api/admin/filter-faculty/", orjson.dumps({"filters": ONGOING, "limit": 1}), content_type="application/json")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(response.json()["result"]["faculty"]), 1, "page")
+        response = Client().post("/api/admin/filter-faculty/", orjson.dumps({"filters": [{"field": "17.data.title", "value": "x"}]}), content_type="application/json")
+        self.assertEqual(response.status_code, 400, "field outside the whitelist")
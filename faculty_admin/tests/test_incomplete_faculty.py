@@ -0,0 +1,84 @@
+"""
+The completeness bitmask every section write maintains, and the incomplete
+faculty listing read from it.
+"""
+import orjson
+from django.conf import settings
+from django.test import Client, SimpleTestCase, override_settings
+from appraisal_form_injestion.clients.data_injestion_mongo_client import DataInjestionMongoClient
+from appraisal_form_injestion.constants import ALL_SECTIONS_MASK, SECTION_BITS, compute_completeness_mask, missing_sections, section_bit
+from appraisal_form_injestion.tests import StorageTestCase
+from faculty_admin.clients.faculty_data_mongo_client import FacultyDataMongoClient
+
+SECTIONS_AFTER_12_1 = ["12.3-12.4", "13", "14", "15", "16", "17", "18", "19"]
+
+def post(path:str, payload:dict):
+    return Client().post(path, orjson.dumps(payload), content_type="application/json")
+
+def incomplete(**params):
+    return Client().get("/api/admin/incomplete-faculty/", params)
+
+
+class CompletenessMaskTests(SimpleTestCase):
+    def test_section_bits(self):
+        self.assertEqual(section_bit("12.1_odd-2026"), SECTION_BITS["12.1"], "semester key")
+        self.assertEqual(section_bit("department"), None, "denormalised field")
+        self.assertEqual(missing_sections(ALL_SECTIONS_MASK), [], "complete form")
+        self.assertEqual(missing_sections(ALL_SECTIONS_MASK & ~SECTION_BITS["14"] & ~SECTION_BITS["19"]), ["14", "19"], "missing sections")
+        self.assertEqual(missing_sections(None), list(SECTION_BITS), "no mask")
+
+    def test_mask_from_a_stored_document(self):
+        document = {"1-10": {"data": {}}, "12": {"3-12": {"4": {"score": 0}}}, "17": {"layout": "child", "row_count": 3}}
+        self.assertEqual(compute_completeness_mask(document), SECTION_BITS["1-10"] | SECTION_BITS["12.3-12.4"] | SECTION_BITS["17"], "nested section keys")
+        self.assertEqual(compute_completeness_mask({"12": {"1": {"semesters": [{"semester": "odd-2026"}]}}}), SECTION_BITS["12.1"], "semesters")
+        self.assertEqual(compute_completeness_mask({"12": {"1_odd-2026": {"data": []}}}), SECTION_BITS["12.1"], "legacy semester key")
+
+
+@override_settings(FACULTY_DIRECTORY_ENABLED=False)
+class IncompleteFacultyTests(StorageTestCase):
+    def setUp(self):
+        super().setUp()
+        self.forms = DataInjestionMongoClient()
+        post("/api/injest-item-1-to-10/", {"user_id": "a1", "full_name": "A", "department": "CSE"})
+        post("/api/injest-item-17/", {"user_id": "a1", "data": []})
+        post("/api/injest-item-1-to-10/", {"user_id": "a2", "full_name": "B", "department": "CSE"})
+        post("/api/injest-item-1-to-10/", {"user_id": "b1", "full_name": "C", "department": "ECE"})
+        # Every section of a3 is written, so a3 is complete
+        sections = {section: {"data": []} for section in SECTIONS_AFTER_12_1}
+        sections.update({"1-10": {"data": {"department": "CSE"}}, "11": {"data": []}, "department": "CSE"})
+        sections["12.1_odd-2026"] = {"total_hour_scheduled": 40, "total_hour_engaged": 40, "data": []}
+        self.forms.update_data_injestion_collection("a3", sections)
+
+    def test_masks_follow_the_writes(self):
+        document = self.forms.find_one(settings.DATA_INJECTION_COLLECTION_NAME, {"user_id": "a1"})
+        self.assertEqual((document["completeness_mask"], document["section_count"]), (SECTION_BITS["1-10"] | SECTION_BITS["17"], 2), "a1")
+        post("/api/injest-item-17/", {"user_id": "a1", "data": []})
+        document = self.forms.find_one(settings.DATA_INJECTION_COLLECTION_NAME, {"user_id": "a1"})
+        self.assertEqual(document["section_count"], 2, "rewriting a section")
+        document = self.forms.find_one(settings.DATA_INJECTION_COLLECTION_NAME, {"user_id": "a3"})
+        self.assertEqual((document["completeness_mask"], document["section_count"]), (ALL_SECTIONS_MASK, len(SECTION_BITS)), "a3")
+
+    def test_listing(self):
+        response = incomplete(department="CSE")
+        self.assertEqual(response.status_code, 200, response.content)
+        rows = response.json()["result"]["incomplete"]
+        # Fewest sections first
+        self.assertEqual([(row["user_id"], row["section_count"]) for row in rows], [("a2", 1), ("a1", 2)], "incomplete CSE faculty")
+        self.assertEqual(rows[1]["missing_sections"], [section for section in SECTION_BITS if section not in ("1-10", "17")], "a1 missing sections")
+        self.assertEqual(sorted(row["user_id"] for row in incomplete().json()["result"]["incomplete"]), ["a1", "a2", "b1"], "every department")
+        self.assertEqual([row["user_id"] for row in incomplete(department="CSE", skip=1, limit=1).json()["result"]["incomplete"]], ["a1"], "page")
+        self.assertEqual(incomplete(skip="x").status_code, 400, "bad skip")
+
+    def test_not_started(self):
+        FacultyDataMongoClient().upsert_faculty_batch([
+            {"user_id": user_id, "department": department} for user_id, department in (("a1", "CSE"), ("a4", "CSE"), ("b2", "ECE"))
+        ])
+        result = incomplete(department="CSE", include_not_started="true").json()["result"]
+        self.assertEqual(result["not_started"], ["a4"], "CSE faculty without a form")
+
+    def test_backfill(self):
+        self.forms.insert_one(settings.DATA_INJECTION_COLLECTION_NAME, {"cycle": settings.APPRAISAL_ACTIVE_CYCLE, "user_id": "old", "1-10": {"data": {"department": "ME"}}, "14": {"data": []}})
+        self.assertEqual(self.forms.backfill_completeness(), 1, "backfilled")
+        document = self.forms.find_one(settings.DATA_INJECTION_COLLECTION_NAME, {"user_id": "old"})
+        self.assertEqual((document["completeness_mask"], document["section_count"], document["department"]), (SECTION_BITS["1-10"] | SECTION_BITS["14"], 2, "ME"), "backfilled fields")
+        self.assertEqual(self.forms.backfill_completeness(), 0, "nothing left to backfill")
@@ -0,0 +1,15 @@
+from django.urls import path
+from .views import (
+    FilterFaculty,
+    ImportFaculty,
+    IncompleteFaculty,
+    IngestForms,
+    PublicationConsistencyReport,
+)
+urlpatterns = [
+    path("filter-faculty/", FilterFaculty.as_view(), name="filter-faculty"),
+    path("import-faculty/", ImportFaculty.as_view(), name="import-faculty"),
+    path("ingest-forms/", IngestForms.as_view(), name="ingest-forms"),
+    path("incomplete-faculty/", IncompleteFaculty.as_view(), name="incomplete-faculty"),
+    path("publication-conflicts/", PublicationConsistencyReport.as_view(), name="publication-conflicts"),
+]
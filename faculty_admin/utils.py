@@ -0,0 +1,94 @@
+import logging
+from typing import List,Dict
+from appraisal_form_injestion.constants import FILTER_FIELDS
+
+logger = logging.getLogger(__name__)
+
+FILTER_OPERATORS = {
+    "eq": "$eq",
+    "ne": "$ne",
+    "gt": "$gt",
+    "gte": "$gte",
+    "lt": "$lt",
+    "lte": "$lte",
+    "in": "$in",
+}
+
+def _coerce_filter_value(field: str, value):
+    field_type = FILTER_FIELDS[field]
+    if field_type is bool:
+        if isinstance(value, bool):
+            return value
+        if str(value).lower() in ("true", "1", "yes"):
+            return True
+        if str(value).lower() in ("false", "0", "no"):
+            return False
+        raise ValueError(f"Invalid boolean value for {field}: {value}")
+    try:
+        return field_type(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid value for {field}: {value}")
+
+def build_section_filter_query(filters: List[Dict]) -> Dict:
+    """
+    Compile the admin filter DSL into a Mongo query.
+
+    Args:
+        filters (List[Dict]): Conditions of the form
+            {"field": "14.data.pub_type", "op": "eq", "value": "IJ"}.
+            Fields must be listed in FILTER_FIELDS and ops in FILTER_OPERATORS.
+
+    Returns:
+        Dict: Query in which all conditions on the same section are wrapped in a
+              single $elemMatch, so they have to hold for the same row.
+    """
+    if not isinstance(filters, list) or not filters:
+        raise ValueError("At least one filter is required")
+
+    rows = {}
+    for condition in filters:
+        if not isinstance(condition, dict):
+            raise ValueError("Each filter must be an object")
+        field = condition.get("field")
+        op = condition.get("op", "eq")
+        if field not in FILTER_FIELDS:
+            raise ValueError(f"Filtering on {field} is not allowed")
+        if op not in FILTER_OPERATORS:
+            raise ValueError(f"Unknown filter operator: {op}")
+
+        value = condition.get("value")
+        if op == "in":
+            if not isinstance(value, list):
+                raise ValueError(f"Operator 'in' on {field} expects a list")
+            value = [_coerce_filter_value(field, v) for v in value]
+        else:
+            value = _coerce_filter_value(field, value)
+
+        array_path, row_field = field.split(".data.", 1)
+        row_conditions = rows.setdefault(f"{array_path}.data", {})
+        row_conditions.setdefault(row_field, {})[FILTER_OPERATORS[op]] = value
+
+    return {array_path: {"$elemMatch": conditions} for array_path, conditions in rows.items()}
+
+def summarize_explain(explain: Dict) -> Dict:
+    """Reduce an explain document to the stats that show whether a query was index-served."""
+    stages = []
+    index_names = []
+    plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+    # Newer servers wrap the classic plan in queryPlan
+    plan = plan.get("queryPlan", plan)
+    while plan:
+        stages.append(plan.get("stage"))
+        if plan.get("indexName"):
+            index_names.append(plan["indexName"])
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+
+    execution_stats = explain.get("executionStats", {})
+    return {
+        "stages": stages,
+        "indexes": index_names,
+        "n_returned": execution_stats.get("nReturned"),
+        "total_keys_examined": execution_stats.get("totalKeysExamined"),
+        "total_docs_examined": execution_stats.get("totalDocsExamined"),
+        "execution_time_millis": execution_stats.get("executionTimeMillis"),
+    }
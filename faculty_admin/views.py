@@ -1,3 +1,169 @@
-from django.shortcuts import render
+import logging
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.conf import settings
+from appraisal_form_injestion.clients.data_injestion_mongo_client import MissingUniqueIndex
+from appraisal_form_injestion.services.form_bulk_ingest_service import FormBulkIngestService
+from appraisal_form_injestion.services.publication_index_service import PublicationIndexService
+from faculty_admin.services.faculty_admin_service import FacultyAdminService
+from faculty_admin.services.faculty_import_service import FacultyImportService
+from common.registry import get_instance
+import json
+logger = logging.getLogger(__name__)
 
-# Create your views here.
+class IncompleteFaculty(APIView):
+    """
+    API Endpoint to list faculty with incomplete appraisal forms
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.faculty_admin_service = get_instance(FacultyAdminService)
+
+    def get(self, request, *args, **kwargs):
+        try:
+            department = request.GET.get("department")
+            try:
+                skip = int(request.GET.get("skip", 0))
+                limit = int(request.GET.get("limit", 0))
+            except ValueError:
+                return Response({"message": "Skip and limit must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+            include_not_started = request.GET.get("include_not_started", "").lower() in ("1", "true")
+            cycle = request.GET.get("cycle")
+
+            result = self.faculty_admin_service.get_incomplete_faculty(department, skip, limit, include_not_started, cycle)
+            return Response({"message": "Data fetched successfully","result": result}, status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.error(f"Error getting incomplete faculty: {e}")
+            return Response({"message": "Error getting incomplete faculty"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class FilterFaculty(APIView):
+    """
+    API Endpoint to find faculty whose stored section rows match a filter
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.faculty_admin_service = get_instance(FacultyAdminService)
+
+    def post(self, request):
+        try:
+            data = request.body
+            if not data:
+                return Response({"message": "No data provided"}, status=status.HTTP_400_BAD_REQUEST)
+
+            data = json.loads(data)
+            try:
+                skip = int(data.get("skip", 0))
+                limit = int(data.get("limit", 0))
+            except (TypeError, ValueError):
+                return Response({"message": "Skip and limit must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+            # Explain stats are only exposed in debug mode
+            result = self.faculty_admin_service.filter_faculty(data.get("filters"), data.get("department"), skip, limit, settings.DEBUG, data.get("cycle"))
+            return Response({"message": "Data fetched successfully","result": result}, status=status.HTTP_200_OK)
+        except ValueError as e:
+            return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Error filtering faculty: {e}")
+            return Response({"message": "Error filtering faculty"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class PublicationConsistencyReport(APIView):
+    """
+    API Endpoint to list co-authored publications with conflicting author claims
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.publication_index_service = get_instance(PublicationIndexService)
+
+    def get(self, request, *args, **kwargs):
+        try:
+            result = self.publication_index_service.get_consistency_report()
+            return Response({"message": "Data fetched successfully","result": result}, status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.error(f"Error getting publication consistency report: {e}")
+            return Response({"message": "Error getting publication consistency report"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class ImportFaculty(APIView):
+    """
+    API Endpoint to import a CSV/XLSX faculty directory export, or get the progress of an import
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.faculty_import_service = get_instance(FacultyImportService)
+
+    def get(self, request, *args, **kwargs):
+        try:
+            import_id = request.GET.get("import_id")
+            if not import_id:
+                return Response({"message": "Import ID is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+            result = self.faculty_import_service.get_import_status(import_id)
+            if result is None:
+                return Response({"message": "Import not found"}, status=status.HTTP_404_NOT_FOUND)
+            return Response({"message": "Data fetched successfully","result": result}, status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.error(f"Error getting faculty import status: {e}")
+            return Response({"message": "Error getting faculty import status"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def post(self, request, *args, **kwargs):
+        try:
+            upload = request.FILES.get("file")
+            if not upload:
+                return Response({"message": "No file provided"}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                chunk_size = int(request.data.get("chunk_size")) if request.data.get("chunk_size") else None
+            except (TypeError, ValueError):
+                return Response({"message": "Chunk size must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+            restart = str(request.data.get("restart", "")).lower() in ("1", "true")
+
+            # Large uploads are spooled to a temporary file by Django, and rows are read from it one at a time
+            result = self.faculty_import_service.import_faculty(upload.file, upload.name, request.data.get("import_id"), chunk_size, restart)
+            return Response({"message": "Faculty data imported successfully","result": result}, status=status.HTTP_200_OK)
+        except ValueError as e:
+            return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Error importing faculty data: {e}")
+            return Response({"message": "Error importing faculty data"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class IngestForms(APIView):
+    """
+    API Endpoint to bulk ingest appraisal form sections from an NDJSON request body,
+    streaming back one NDJSON result line per input line
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.form_bulk_ingest_service = get_instance(FormBulkIngestService)
+
+    def post(self, request, *args, **kwargs):
+        try:
+            batch_size = int(request.GET["batch_size"]) if request.GET.get("batch_size") else None
+            workers = int(request.GET["workers"]) if request.GET.get("workers") else None
+        except ValueError:
+            return Response({"message": "Batch size and workers must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+        # Bulk writes detect version conflicts through the unique (cycle, user_id) index
+        try:
+            self.form_bulk_ingest_service.data_injestion_mongo_client.require_unique_form_index()
+        except MissingUniqueIndex as e:
+            logger.error(f"Refusing bulk form ingestion: {e}")
+            return Response({"message": "Bulk ingestion is unavailable until the form indexes are created"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        # The body is read line by line as results are streamed back, never parsed as a whole.
+        # request.stream is None without a Content-Length, so the request itself is read; a chunked
+        # body can only be read to its end where the server marks the input as terminated.
+        stream = request._request
+        if not request.META.get("CONTENT_LENGTH"):
+            if not request.META.get("wsgi.input_terminated"):
+                return Response({"message": "A Content-Length or a chunked body is required"}, status=status.HTTP_411_LENGTH_REQUIRED)
+            stream = request.META["wsgi.input"]
+        results = self.form_bulk_ingest_service.ingest(stream, request.GET.get("cycle"), batch_size, workers)
+        return StreamingHttpResponse(self._ndjson(results), content_type="application/x-ndjson")
+
+    @staticmethod
+    def _ndjson(results):
+        try:
+            for result in results:
+                yield json.dumps(result, default=str) + "\n"
+        except Exception as e:
+            # The status line has already been sent, so the failure is reported in the stream
+            logger.error(f"Error ingesting forms: {e}")
+            yield json.dumps({"error": "Error ingesting forms"}) + "\n"
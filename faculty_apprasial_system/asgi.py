@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'faculty_apprasial_system.settings')
 
 application = get_asgi_application()
+
+# Build the shared services and connect to the storage before the first request;
+# see warm_up_apps() for servers that fork workers
+from common.registry import warm_up_apps
+warm_up_apps()
@@ -46,6 +46,7 @@ MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'common.middleware.TrafficCaptureMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -151,3 +152,112 @@ MONGO_URI = os.getenv('MONGO_URI','mongodb://localhost:27017/')
 APPRAISAL_SYSTEM_MONGO_DB_NAME = os.getenv('APPRAISAL_SYSTEM_MONGO_DB_NAME','faculty_appraisal_db')
 DATA_INJECTION_COLLECTION_NAME = os.getenv('DATA_INJECTION_COLLECTION_NAME','form_data_collection')
 FACULTY_DATA_COLLECTION_NAME = os.getenv('FACULTY_DATA_COLLECTION_NAME','faculty_data_collection')
+PUBLICATION_INDEX_COLLECTION_NAME = os.getenv('PUBLICATION_INDEX_COLLECTION_NAME','publication_index_collection')
+# Journal catalog, CSV or Parquet, that item 14 indexed and impact factor values are filled in and checked from. The
+# default is an empty template, since indexing and impact factor data are licensed: until this points at the institution's
+# catalog, a warning is logged at startup, journal lookups find nothing and item 14 values are scored as reported
+JOURNAL_CATALOG_PATH = os.getenv('JOURNAL_CATALOG_PATH', str(BASE_DIR / 'appraisal_form_injestion' / 'data' / 'journal_catalog.csv'))
+# Replace reported values that disagree with the catalog instead of only recording the mismatch
+JOURNAL_CATALOG_ENFORCE = os.getenv('JOURNAL_CATALOG_ENFORCE', 'False').lower() == 'true'
+SCORE_PREVIEW_CACHE_SIZE = int(os.getenv('SCORE_PREVIEW_CACHE_SIZE', '2048'))
+FORM_HISTORY_COLLECTION_NAME = os.getenv('FORM_HISTORY_COLLECTION_NAME','form_history_collection')
+FORM_HISTORY_SNAPSHOT_INTERVAL = int(os.getenv('FORM_HISTORY_SNAPSHOT_INTERVAL', '10'))
+FORM_HISTORY_CACHE_SIZE = int(os.getenv('FORM_HISTORY_CACHE_SIZE', '4096'))
+# Outbox consumer the history relay (relay_outbox --sink history) checkpoints under; prune keeps what it has not written
+FORM_HISTORY_CONSUMER = os.getenv('FORM_HISTORY_CONSUMER', 'form-history')
+ATTACHMENT_BUCKET_NAME = os.getenv('ATTACHMENT_BUCKET_NAME','attachments')
+ATTACHMENT_CHUNK_SIZE = int(os.getenv('ATTACHMENT_CHUNK_SIZE', '261120'))
+ATTACHMENT_MAX_SIZE = int(os.getenv('ATTACHMENT_MAX_SIZE', str(50 * 1024 * 1024)))
+ATTACHMENT_SECTIONS = ["14", "15", "16", "17"]
+FORM_LIST_STORAGE_MODE = os.getenv('FORM_LIST_STORAGE_MODE','inline')
+FORM_SECTION_ROWS_COLLECTION_NAME = os.getenv('FORM_SECTION_ROWS_COLLECTION_NAME','form_section_rows_collection')
+FORM_ROWS_PAGE_SIZE = int(os.getenv('FORM_ROWS_PAGE_SIZE', '50'))
+FORM_ROWS_MAX_PAGE_SIZE = int(os.getenv('FORM_ROWS_MAX_PAGE_SIZE', '500'))
+APPRAISAL_ACTIVE_CYCLE = os.getenv('APPRAISAL_ACTIVE_CYCLE','2026-2027')
+APPRAISAL_ARCHIVE_COLLECTION_NAME = os.getenv('APPRAISAL_ARCHIVE_COLLECTION_NAME','form_data_archive_collection')
+# Earlier archived copies of a form document, kept when a cycle is archived again
+APPRAISAL_ARCHIVE_HISTORY_COLLECTION_NAME = os.getenv('APPRAISAL_ARCHIVE_HISTORY_COLLECTION_NAME','form_data_archive_history_collection')
+BULK_WRITE_MAX_OPERATIONS = int(os.getenv('BULK_WRITE_MAX_OPERATIONS', '1000'))
+BULK_WRITE_MAX_BYTES = int(os.getenv('BULK_WRITE_MAX_BYTES', str(4 * 1024 * 1024)))
+FACULTY_IMPORT_CHECKPOINT_COLLECTION_NAME = os.getenv('FACULTY_IMPORT_CHECKPOINT_COLLECTION_NAME','faculty_import_checkpoint_collection')
+FACULTY_IMPORT_CHUNK_SIZE = int(os.getenv('FACULTY_IMPORT_CHUNK_SIZE', '1000'))
+FORM_BULK_INGEST_BATCH_SIZE = int(os.getenv('FORM_BULK_INGEST_BATCH_SIZE', '200'))
+FORM_BULK_INGEST_WORKERS = int(os.getenv('FORM_BULK_INGEST_WORKERS', '4'))
+TRAFFIC_CAPTURE_PATH = os.getenv('TRAFFIC_CAPTURE_PATH','')
+TRAFFIC_CAPTURE_PATH_PREFIX = os.getenv('TRAFFIC_CAPTURE_PATH_PREFIX','/api/')
+TRAFFIC_CAPTURE_SAMPLE_RATE = float(os.getenv('TRAFFIC_CAPTURE_SAMPLE_RATE', '1.0'))
+TRAFFIC_CAPTURE_MAX_BODY = int(os.getenv('TRAFFIC_CAPTURE_MAX_BODY', str(1024 * 1024)))
+TRAFFIC_CAPTURE_REDACT_FIELDS = [field.strip().lower() for field in os.getenv('TRAFFIC_CAPTURE_REDACT_FIELDS', 'name,email,phone,mobile,address,password,token').split(',') if field.strip()]
+# String fields captured as they are; every other non-numeric string is pseudonymized
+TRAFFIC_CAPTURE_SAFE_FIELDS = [field.strip().lower() for field in os.getenv(
+    'TRAFFIC_CAPTURE_SAFE_FIELDS',
+    'attended/organized,program_type,start_date,end_date,pub_type,isbn_issn,issn,user_author_type,author_type,publisher_type,'
+    'status,degree,duration,sanction_date,position_type,role,nature,activity,class,department,present_designation,'
+    'first_designation,institute_joining_date,semester,semesters,section,cycle,page,page_size,skip,limit,version,'
+    'include_not_started'
+).split(',') if field.strip()]
+
+# Storage backend behind the Mongo clients: mongo, memory (tests and benchmarks) or sqlite (single node)
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND','mongo')
+STORAGE_SQLITE_PATH = os.getenv('STORAGE_SQLITE_PATH') or str(BASE_DIR / 'appraisal_storage.sqlite3')
+
+# orjson renders and parses API bodies, including datetimes and ObjectIds, much faster than DRF's stdlib json classes
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'common.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'common.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# API-only profile. The API keeps its data in the storage backend and never uses the ORM, sessions, auth, messages,
+# CSRF or the admin, so API_ONLY=true drops those apps and their middleware and serves /api/ routes only.
+# CORS and security headers are kept.
+API_ONLY = os.getenv('API_ONLY', 'False').lower() == 'true'
+if API_ONLY:
+    INSTALLED_APPS = [app for app in INSTALLED_APPS if not app.startswith('django.contrib.')]
+    MIDDLEWARE = [
+        'django.middleware.security.SecurityMiddleware',
+        'corsheaders.middleware.CorsMiddleware',
+        'django.middleware.common.CommonMiddleware',
+        'common.middleware.TrafficCaptureMiddleware',
+        'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    ]
+    TEMPLATES[0]['OPTIONS']['context_processors'] = ['django.template.context_processors.request']
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = ['common.renderers.ORJSONRenderer']
+    # DRF's defaults authenticate against django.contrib.auth, which is not installed
+    REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'] = []
+    REST_FRAMEWORK['UNAUTHENTICATED_USER'] = None
+
+# Build the shared services and clients and ping the storage when a web server loads the WSGI or ASGI application, so the first request is not slower than the rest
+SERVICE_WARMUP = os.getenv('SERVICE_WARMUP', 'True').lower() == 'true'
+SERVICE_WARMUP_TIMEOUT = float(os.getenv('SERVICE_WARMUP_TIMEOUT', '5'))
+
+# Maximum time, in milliseconds, from starting a worker to its first response, checked by the profile_startup command
+STARTUP_BUDGET_MS = float(os.getenv('STARTUP_BUDGET_MS', '600'))
+
+# Transactional outbox of section change events, relayed to consumers by the relay_outbox command
+OUTBOX_ENABLED = os.getenv('OUTBOX_ENABLED', 'True').lower() == 'true'
+OUTBOX_COLLECTION_NAME = os.getenv('OUTBOX_COLLECTION_NAME','section_event_outbox_collection')
+OUTBOX_CHECKPOINT_COLLECTION_NAME = os.getenv('OUTBOX_CHECKPOINT_COLLECTION_NAME','section_event_checkpoint_collection')
+OUTBOX_SEQUENCE_COLLECTION_NAME = os.getenv('OUTBOX_SEQUENCE_COLLECTION_NAME','section_event_sequence_collection')
+OUTBOX_RELAY_BATCH_SIZE = int(os.getenv('OUTBOX_RELAY_BATCH_SIZE', '500'))
+OUTBOX_RELAY_INTERVAL = float(os.getenv('OUTBOX_RELAY_INTERVAL', '1'))
+# A gap in event positions, left only by appends made without a transaction, is waited on this long before it is skipped
+OUTBOX_RELAY_SETTLE_MS = int(os.getenv('OUTBOX_RELAY_SETTLE_MS', '2000'))
+OUTBOX_WEBHOOK_TIMEOUT = float(os.getenv('OUTBOX_WEBHOOK_TIMEOUT', '10'))
+
+# Process-local faculty directory, kept fresh by a change stream on replica sets and by polling updated_at otherwise
+FACULTY_DIRECTORY_ENABLED = os.getenv('FACULTY_DIRECTORY_ENABLED', 'True').lower() == 'true'
+FACULTY_DIRECTORY_POLL_INTERVAL = float(os.getenv('FACULTY_DIRECTORY_POLL_INTERVAL', '5'))
+# Polling cannot see deletes, so the directory is reloaded in full this often, in seconds
+FACULTY_DIRECTORY_RELOAD_INTERVAL = float(os.getenv('FACULTY_DIRECTORY_RELOAD_INTERVAL', '300'))
+
+# Multi-document writes (a section and its outbox events or section rows) need a replica set. On a standalone
+# MongoDB server the outbox is off and child row storage is refused, unless this is True, which runs them
+# without a transaction, accepting that a crash in between can lose events or leave rows out of step
+MONGO_ALLOW_WRITES_WITHOUT_TRANSACTIONS = os.getenv('MONGO_ALLOW_WRITES_WITHOUT_TRANSACTIONS', 'False').lower() == 'true'